@@ -10,6 +10,7 @@ from sqlalchemy.future import select
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 
+from app.config import settings
 from app.db.session import get_db
 from app.db.models import Tweet, User, Keyword, TweetKeyword, Topic, TweetTopic, AppUser
 from app.schemas.analysis import (
@@ -17,6 +18,7 @@ from app.schemas.analysis import (
     SentimentDistribution, TopicDistribution
 )
 from app.core.security import get_current_user
+from app.core.http_cache import conditional_cache, RESOURCE_ANALYSIS
 from app.services.analyzer.analyzer import TweetAnalyzer
 from app.services.analyzer.claude_client import ClaudeClient
 from app.services.analyzer.cost_manager import CostManager
@@ -250,7 +252,8 @@ async def get_topics(
         limit: int = 100,
         min_count: int = 5,
         db: AsyncSession = Depends(get_db),
-        current_user: AppUser = Depends(get_current_user)
+        current_user: AppUser = Depends(get_current_user),
+        cache_validators: None = Depends(conditional_cache(RESOURCE_ANALYSIS, max_age=settings.HTTP_CACHE_MAX_AGE))
 ):
     """
     دریافت لیست موضوعات.
@@ -261,6 +264,7 @@ async def get_topics(
         min_count (int): حداقل تعداد توییت‌های مرتبط
         db (AsyncSession): نشست دیتابیس
         current_user (AppUser): کاربر فعلی
+        cache_validators: بررسی درخواست شرطی (ETag) پیش از اجرای کوئری‌ها
 
     Returns:
         List[Dict[str, Any]]: لیست موضوعات و آمار آنها
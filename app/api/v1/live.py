@@ -0,0 +1,98 @@
+"""
+اندپوینت رویدادهای زنده.
+
+این ماژول هشدارها، توییت‌های جدید، موج‌ها و عبارات نوظهور را به محض انتشار به
+صورت Server-Sent Events به کلاینت ارسال می‌کند تا نیازی به پرس‌وجوی دوره‌ای نباشد.
+"""
+
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.db.models import AppUser
+from app.core.security import get_current_user
+from app.core.responses import sse_event
+from app.services.live_updates import LiveSubscriber, LIVE_CHANNELS, get_live_update_hub
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/live", tags=["live"])
+
+# فاصله تلاش دوباره EventSource پس از قطع اتصال (میلی‌ثانیه)
+CLIENT_RETRY_MS = 5000
+
+
+@router.get("/stream")
+async def live_stream(
+        channels: Optional[List[str]] = Query(None),
+        keywords: Optional[List[str]] = Query(None),
+        severity: Optional[List[str]] = Query(None),
+        alert_type: Optional[List[str]] = Query(None),
+        current_user: AppUser = Depends(get_current_user)
+):
+    """
+    جریان رویدادهای زنده
+
+    نام هر رویداد SSE برابر کانال آن است (alerts، tweets، waves، emerging_terms).
+    رویداد lagged یعنی کلاینت عقب مانده و تعدادی رویداد به او نرسیده است؛ کلاینت
+    باید وضعیت را از اندپوینت‌های REST دوباره بخواند.
+
+    Args:
+        channels (Optional[List[str]]): کانال‌های درخواستی (پیش‌فرض همه)
+        keywords (Optional[List[str]]): فقط رویدادهای این کلیدواژه‌ها
+        severity (Optional[List[str]]): فقط هشدارهای این شدت‌ها
+        alert_type (Optional[List[str]]): فقط هشدارهای این نوع‌ها
+        current_user (AppUser): کاربر فعلی
+
+    Returns:
+        StreamingResponse: جریان رویدادها
+    """
+    unknown = set(channels or []) - set(LIVE_CHANNELS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"کانال نامعتبر: {', '.join(sorted(unknown))}"
+        )
+
+    hub = get_live_update_hub()
+    subscriber = LiveSubscriber(
+        channels=channels or LIVE_CHANNELS,
+        keywords=keywords or [],
+        severities=severity or [],
+        alert_types=alert_type or []
+    )
+
+    async def event_stream():
+        hub.register(subscriber)
+        try:
+            yield f"retry: {CLIENT_RETRY_MS}\n\n"
+            yield sse_event("ready", {"channels": sorted(subscriber.channels)})
+
+            while True:
+                item = await subscriber.next_event(settings.LIVE_HEARTBEAT_SECONDS)
+                if item is None:
+                    # پیام نگهداری اتصال برای پروکسی‌ها
+                    yield ": keepalive\n\n"
+                    continue
+
+                dropped = subscriber.take_dropped()
+                if dropped:
+                    logger.warning(f"Live client of {current_user.email} lagged, dropped {dropped} events")
+                    yield sse_event("lagged", {"dropped": dropped})
+
+                channel, event = item
+                yield sse_event(channel, event)
+        finally:
+            hub.unregister(subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -4,13 +4,20 @@
 این ماژول اندپوینت‌های مربوط به تنظیمات سیستم را فراهم می‌کند.
 """
 
+import asyncio
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, Any, Optional
+from sqlalchemy.future import select
+from typing import Dict, List, Any, Optional
 
-from app.db.session import get_db
-from app.db.models import AppUser
+from app.db.session import get_db, run_concurrently, fetch_concurrently
+from app.db.models import AppUser, Tweet, Alert
 from app.core.security import get_current_user, get_current_superuser
+from app.core.http_cache import (
+    conditional_cache, RESOURCE_TWEETS, RESOURCE_ANALYSIS, RESOURCE_ALERTS, RESOURCE_API_USAGE
+)
 from app.schemas.settings import SystemSettings, ApiUsageResponse
 from app.services.analyzer.cost_manager import CostManager, ApiType
 from app.config import settings as app_settings
@@ -165,6 +172,28 @@ async def get_api_usage(
     # دریافت آمار استفاده روزانه
     daily_usage = await cost_manager.get_daily_usage(days)
 
+    # آمار تحلیل آبشاری به تفکیک لایه و مدل
+    tier_usage = await cost_manager.get_tier_usage(days)
+
+    return _build_api_usage(daily_usage, tier_usage, days)
+
+
+def _build_api_usage(
+        daily_usage: Dict[str, Any],
+        tier_usage: List[Dict[str, Any]],
+        days: int
+) -> ApiUsageResponse:
+    """
+    ساخت پاسخ آمار استفاده از API.
+
+    Args:
+        daily_usage (Dict[str, Any]): آمار استفاده روزانه
+        tier_usage (List[Dict[str, Any]]): آمار تحلیل آبشاری به تفکیک لایه و مدل
+        days (int): تعداد روزهای اخیر
+
+    Returns:
+        ApiUsageResponse: آمار استفاده از API
+    """
     # محاسبه مجموع هزینه‌ها
     total_claude_cost = sum(item.get("cost", 0) for item in daily_usage.get("claude", []))
     total_twitter_cost = sum(item.get("cost", 0) for item in daily_usage.get("twitter", []))
@@ -176,21 +205,30 @@ async def get_api_usage(
             "twitter": total_twitter_cost,
             "total": total_claude_cost + total_twitter_cost
         },
-        period_days=days
+        period_days=days,
+        tier_usage=tier_usage
     )
 
 
 @router.get("/dashboard", response_model=Dict[str, Any])
 async def get_dashboard_stats(
     db: AsyncSession = Depends(get_db),
-    current_user: AppUser = Depends(get_current_user)
+    current_user: AppUser = Depends(get_current_user),
+    cache_validators: None = Depends(conditional_cache(
+        RESOURCE_TWEETS, RESOURCE_ANALYSIS, RESOURCE_ALERTS, RESOURCE_API_USAGE,
+        max_age=app_settings.HTTP_CACHE_MAX_AGE, time_window=app_settings.DASHBOARD_CACHE_WINDOW
+    ))
 ):
     """
     دریافت آمار اصلی برای داشبورد.
+
+    ETag پاسخ با تغییر توییت‌ها، تحلیل‌ها، هشدارها و مصرف API و حداکثر پس از
+    DASHBOARD_CACHE_WINDOW ثانیه (برای آمار وابسته به زمان) تغییر می‌کند.
     
     Args:
         db (AsyncSession): نشست دیتابیس
         current_user (AppUser): کاربر فعلی
+        cache_validators: بررسی درخواست شرطی (ETag) پیش از اجرای کوئری‌ها
     
     Returns:
         Dict[str, Any]: آمار داشبورد
@@ -199,42 +237,21 @@ async def get_dashboard_stats(
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
     yesterday = today - timedelta(days=1)
     last_week = today - timedelta(days=7)
-    
-    # آمار توییت‌ها
-    tweet_counts = {}
-    
-    # تعداد کل توییت‌ها
-    total_tweets_stmt = select(func.count()).select_from(Tweet)
-    result = await db.execute(total_tweets_stmt)
-    tweet_counts["total"] = result.scalar() or 0
-    
-    # توییت‌های امروز
-    today_tweets_stmt = select(func.count()).where(
-        Tweet.created_at_internal >= today
-    ).select_from(Tweet)
-    result = await db.execute(today_tweets_stmt)
-    tweet_counts["today"] = result.scalar() or 0
-    
-    # توییت‌های دیروز
-    yesterday_tweets_stmt = select(func.count()).where(
-        and_(
-            Tweet.created_at_internal >= yesterday,
-            Tweet.created_at_internal < today
-        )
-    ).select_from(Tweet)
-    result = await db.execute(yesterday_tweets_stmt)
-    tweet_counts["yesterday"] = result.scalar() or 0
-    
-    # توییت‌های هفته اخیر
-    week_tweets_stmt = select(func.count()).where(
-        Tweet.created_at_internal >= last_week
+
+    # آمار توییت‌ها در یک کوئری
+    tweet_counts_stmt = select(
+        func.count(),
+        func.count().filter(Tweet.created_at_internal >= today),
+        func.count().filter(
+            and_(
+                Tweet.created_at_internal >= yesterday,
+                Tweet.created_at_internal < today
+            )
+        ),
+        func.count().filter(Tweet.created_at_internal >= last_week)
     ).select_from(Tweet)
-    result = await db.execute(week_tweets_stmt)
-    tweet_counts["last_week"] = result.scalar() or 0
-    
+
     # آمار احساسات توییت‌ها
-    sentiment_stats = {}
-    
     sentiment_stmt = select(
         Tweet.sentiment_label,
         func.count().label("count")
@@ -243,49 +260,55 @@ async def get_dashboard_stats(
     ).group_by(
         Tweet.sentiment_label
     )
-    
-    result = await db.execute(sentiment_stmt)
-    sentiment_counts = {row[0]: row[1] for row in result.fetchall()}
-    
+
+    # آمار هشدارها در یک کوئری
+    alert_counts_stmt = select(
+        func.count(),
+        func.count().filter(Alert.is_read == False),
+        func.count().filter(Alert.created_at >= today)
+    ).select_from(Alert)
+
+    # کوئری‌های مستقل به صورت هم‌زمان روی اتصالات جداگانه اجرا می‌شوند
+    (tweet_rows, sentiment_rows, alert_rows), (daily_usage, tier_usage) = await asyncio.gather(
+        fetch_concurrently(tweet_counts_stmt, sentiment_stmt, alert_counts_stmt),
+        run_concurrently(
+            lambda session: CostManager(session).get_daily_usage(7),
+            lambda session: CostManager(session).get_tier_usage(7)
+        )
+    )
+    api_usage = _build_api_usage(daily_usage, tier_usage, days=7)
+
+    total, today_count, yesterday_count, last_week_count = tweet_rows[0]
+    tweet_counts = {
+        "total": total or 0,
+        "today": today_count or 0,
+        "yesterday": yesterday_count or 0,
+        "last_week": last_week_count or 0
+    }
+
+    sentiment_counts = {row[0]: row[1] for row in sentiment_rows}
+
     total_sentiment_count = sum(sentiment_counts.values()) or 1  # جلوگیری از تقسیم بر صفر
-    
+
     sentiment_stats = {
         "counts": sentiment_counts,
         "distribution": {
-            label: count / total_sentiment_count 
+            label: count / total_sentiment_count
             for label, count in sentiment_counts.items()
         }
     }
-    
-    # آمار هشدارها
-    alert_counts = {}
-    
-    # تعداد کل هشدارها
-    total_alerts_stmt = select(func.count()).select_from(Alert)
-    result = await db.execute(total_alerts_stmt)
-    alert_counts["total"] = result.scalar() or 0
-    
-    # هشدارهای خوانده نشده
-    unread_alerts_stmt = select(func.count()).where(
-        Alert.is_read == False
-    ).select_from(Alert)
-    result = await db.execute(unread_alerts_stmt)
-    alert_counts["unread"] = result.scalar() or 0
-    
-    # هشدارهای امروز
-    today_alerts_stmt = select(func.count()).where(
-        Alert.created_at >= today
-    ).select_from(Alert)
-    result = await db.execute(today_alerts_stmt)
-    alert_counts["today"] = result.scalar() or 0
-    
-    # آمار API
-    api_usage = await get_api_usage(days=7, db=db, current_user=current_user)
-    
+
+    total_alerts, unread_alerts, today_alerts = alert_rows[0]
+    alert_counts = {
+        "total": total_alerts or 0,
+        "unread": unread_alerts or 0,
+        "today": today_alerts or 0
+    }
+
     return {
         "tweet_counts": tweet_counts,
         "sentiment_stats": sentiment_stats,
         "alert_counts": alert_counts,
         "api_usage": api_usage,
         "generated_at": datetime.now().isoformat()
-    }
\ No newline at end of file
+    }
@@ -4,51 +4,132 @@
 این ماژول اندپوینت‌های مربوط به جستجو و مدیریت توییت‌ها را فراهم می‌کند.
 """
 
+import json
 import logging
-logger = logging.getLogger(__name__)
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import and_, func, literal_column
 from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta
 
-from app.db.session import get_db
-from app.db.models import Tweet, User, Keyword, TweetKeyword
-from app.schemas.tweet import TweetResponse, TweetFilterParams, KeywordCreate, KeywordResponse
+from app.config import settings
+from app.db.session import get_db, fetch_concurrently
+from app.db.models import Tweet, User, Keyword, TweetKeyword, TWEET_SORT_EXPRESSIONS
+from app.db.keywords import upsert_keywords
+from app.db.search import search_document, search_query, search_rank, search_headline
+from app.schemas.tweet import (
+    TweetResponse, TweetFilterParams, KeywordCreate, KeywordResponse, KeywordBulkRequest, KeywordBulkResponse
+)
 from app.core.security import get_current_user
+from app.core.responses import FastJSONResponse
+from app.core.http_cache import conditional_cache, bump_resource_versions, RESOURCE_KEYWORDS
+from app.core.pagination import encode_cursor, decode_cursor, after_cursor, set_next_cursor
 from app.db.models import AppUser
 from app.services.processor.content_filter import ContentFilter
+from app.services.analyzer.keyword_series import SENTIMENT_LABELS
+from app.services.analyzer.tweet_counts import TweetCountService
+from app.services.redis_service import RedisService, get_redis_service
+from app.services.tweet_export import TweetExporter, EXPORT_MEDIA_TYPES, parquet_available
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tweets", tags=["tweets"])
 
 
-@router.get("/", response_model=List[TweetResponse])
-async def get_tweets(
-        params: TweetFilterParams = Depends(),
-        db: AsyncSession = Depends(get_db),
-        current_user: AppUser = Depends(get_current_user)
-):
+# ستون‌های انتخابی لیست توییت‌ها (بدون بارگذاری کامل موجودیت‌ها)
+TWEET_LIST_COLUMNS = (
+    Tweet.id, Tweet.tweet_id, Tweet.content, Tweet.created_at, Tweet.language,
+    Tweet.sentiment_label, Tweet.sentiment_score, Tweet.importance_score,
+    Tweet.is_processed, Tweet.is_analyzed, Tweet.entities,
+)
+
+# ستون‌های کاربر که در همان query با join خوانده می‌شوند
+USER_LIST_COLUMNS = (
+    User.user_id.label("user_user_id"), User.username.label("user_username"),
+    User.display_name.label("user_display_name"), User.followers_count.label("user_followers_count"),
+    User.following_count.label("user_following_count"), User.verified.label("user_verified"),
+    User.profile_image_url.label("user_profile_image_url"),
+)
+
+
+def _parse_entities(entities: Any) -> Optional[Dict[str, Any]]:
     """
-    دریافت لیست توییت‌ها با امکان فیلتر کردن.
+    خواندن entities توییت (در برخی ردیف‌ها به صورت رشته JSON ذخیره شده است)
 
     Args:
-        params (TweetFilterParams): پارامترهای فیلتر
-        db (AsyncSession): نشست دیتابیس
-        current_user (AppUser): کاربر فعلی
+        entities (Any): مقدار ستون entities
 
     Returns:
-        List[TweetResponse]: لیست توییت‌ها
+        Optional[Dict[str, Any]]: دیکشنری entities
     """
-    # ایجاد query پایه
-    query = select(Tweet).join(User, Tweet.user_id == User.user_id, isouter=True)
+    if isinstance(entities, str):
+        try:
+            entities = json.loads(entities)
+        except ValueError:
+            return None
+    return entities if isinstance(entities, dict) else None
 
-    # اعمال فیلترها
+
+def _tweet_row_to_dict(row) -> Dict[str, Any]:
+    """
+    تبدیل ردیف projection به دیکشنری قابل ارسال با ساختار TweetResponse
+
+    ردیف‌ها مستقیماً به JSON تبدیل می‌شوند و از اعتبارسنجی دوباره Pydantic عبور نمی‌کنند.
+
+    Args:
+        row: ردیف شامل ستون‌های TWEET_LIST_COLUMNS و USER_LIST_COLUMNS
+
+    Returns:
+        Dict[str, Any]: اطلاعات توییت
+    """
+    user = None
+    if row.user_user_id is not None:
+        user = {
+            "user_id": row.user_user_id,
+            "username": row.user_username,
+            "display_name": row.user_display_name,
+            "followers_count": row.user_followers_count,
+            "following_count": row.user_following_count,
+            "verified": row.user_verified,
+            "profile_image_url": row.user_profile_image_url,
+        }
+
+    return {
+        "id": row.id,
+        "tweet_id": row.tweet_id,
+        "content": row.content,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "language": row.language,
+        "user": user,
+        "sentiment_label": row.sentiment_label,
+        "sentiment_score": row.sentiment_score,
+        "importance_score": row.importance_score,
+        "is_processed": row.is_processed,
+        "is_analyzed": row.is_analyzed,
+        "entities": _parse_entities(row.entities),
+        "search_rank": row._mapping.get("search_rank"),
+        "highlight": row._mapping.get("highlight"),
+    }
+
+
+def _build_tweet_filters(params: TweetFilterParams) -> List:
+    """
+    ساخت شرط‌های فیلتر توییت‌ها
+
+    Args:
+        params (TweetFilterParams): پارامترهای فیلتر
+
+    Returns:
+        List: شرط‌های فیلتر
+    """
     filters = []
 
-    # فیلتر براساس متن
+    # فیلتر براساس متن (جستجوی متن کامل با شاخص GIN)
     if params.query:
-        filters.append(Tweet.content.ilike(f"%{params.query}%"))
+        filters.append(search_document(Tweet.content).op("@@")(search_query(params.query)))
 
     # فیلتر براساس احساسات
     if params.sentiment:
@@ -71,55 +152,26 @@ async def get_tweets(
     if params.min_importance:
         filters.append(Tweet.importance_score >= params.min_importance)
 
-    # ترکیب فیلترها
-    if filters:
-        query = query.where(and_(*filters))
-
-    # مرتب‌سازی
-    if params.sort_by == "date":
-        query = query.order_by(desc(Tweet.created_at))
-    elif params.sort_by == "importance":
-        query = query.order_by(desc(Tweet.importance_score))
-    elif params.sort_by == "sentiment":
-        query = query.order_by(Tweet.sentiment_score.desc())
-    else:
-        query = query.order_by(desc(Tweet.created_at))
-
-    # صفحه‌بندی
-    query = query.offset(params.skip).limit(params.limit)
+    return filters
 
-    # اجرای query
-    result = await db.execute(query)
-    tweets = result.scalars().all()
 
-    # تبدیل به فرمت پاسخ
-    return [
-        TweetResponse(
-            id=tweet.id,
-            tweet_id=tweet.tweet_id,
-            content=tweet.content,
-            created_at=tweet.created_at,
-            language=tweet.language,
-            user=tweet.user,
-            sentiment_label=tweet.sentiment_label,
-            sentiment_score=tweet.sentiment_score,
-            importance_score=tweet.importance_score,
-            is_processed=tweet.is_processed,
-            is_analyzed=tweet.is_analyzed,
-            entities=tweet.entities
-        )
-        for tweet in tweets
-    ]
-
-
-@router.get("/count", response_model=Dict[str, Any])
-async def get_tweets_count(
+@router.get("/", response_model=List[TweetResponse])
+async def get_tweets(
         params: TweetFilterParams = Depends(),
         db: AsyncSession = Depends(get_db),
         current_user: AppUser = Depends(get_current_user)
 ):
     """
-    دریافت تعداد توییت‌ها با امکان فیلتر کردن.
+    دریافت لیست توییت‌ها با امکان فیلتر کردن.
+
+    با مشخص بودن query، نتایج با جستجوی متن کامل یافته می‌شوند و به طور پیش‌فرض
+    براساس ارتباط مرتب شده و بخش‌های منطبق متن برجسته می‌شوند.
+
+    صفحه‌بندی با نشانگر: اگر صفحه کامل باشد، نشانگر صفحه بعد در هدر X-Next-Cursor
+    برگردانده می‌شود و با پارامتر cursor صفحه بعد دریافت می‌شود.
+
+    ستون‌های توییت و کاربر در یک query خوانده شده و ردیف‌ها مستقیماً به JSON تبدیل
+    می‌شوند (ساختار پاسخ همان TweetResponse است).
 
     Args:
         params (TweetFilterParams): پارامترهای فیلتر
@@ -127,135 +179,136 @@ async def get_tweets_count(
         current_user (AppUser): کاربر فعلی
 
     Returns:
-        Dict[str, Any]: تعداد توییت‌ها و آمار احساسات
+        FastJSONResponse: لیست توییت‌ها با ساختار TweetResponse
     """
-    # ایجاد query پایه
-    query = select(func.count(),
-                   func.count().filter(Tweet.sentiment_label == "positive"),
-                   func.count().filter(Tweet.sentiment_label == "negative"),
-                   func.count().filter(Tweet.sentiment_label == "neutral"),
-                   func.count().filter(Tweet.sentiment_label == "mixed")
-                   ).select_from(Tweet)
-
-    # اعمال فیلترها (مشابه با تابع get_tweets)
-    filters = []
-
-    # فیلتر براساس متن
+    # ایجاد query پایه: فقط ستون‌های مورد نیاز پاسخ، همراه با کاربر در یک join
+    rank = None
+    columns = TWEET_LIST_COLUMNS + USER_LIST_COLUMNS
     if params.query:
-        filters.append(Tweet.content.ilike(f"%{params.query}%"))
-
-    # فیلتر براساس احساسات
-    if params.sentiment:
-        filters.append(Tweet.sentiment_label == params.sentiment)
+        text_query = search_query(params.query)
+        rank = search_rank(Tweet.content, text_query)
+        columns += (rank.label("search_rank"), search_headline(Tweet.content, text_query).label("highlight"))
+    query = select(*columns).select_from(Tweet).join(User, Tweet.user_id == User.user_id, isouter=True)
 
-    # فیلتر براساس کلیدواژه‌ها
-    if params.keywords:
-        keyword_subquery = select(TweetKeyword.tweet_id).join(
-            Keyword, TweetKeyword.keyword_id == Keyword.id
-        ).where(Keyword.text.in_(params.keywords))
-        filters.append(Tweet.id.in_(keyword_subquery))
+    # اعمال فیلترها
+    filters = _build_tweet_filters(params)
 
-    # فیلتر براساس بازه زمانی
-    if params.start_date:
-        filters.append(Tweet.created_at >= params.start_date)
-    if params.end_date:
-        filters.append(Tweet.created_at <= params.end_date)
+    # مرتب‌سازی نزولی براساس (مقدار، شناسه) تا صفحه‌بندی با نشانگر پایدار باشد
+    sort_by = params.sort_by or ("relevance" if rank is not None else "date")
+    if sort_by == "relevance" and rank is not None:
+        sort_expression = rank
+    else:
+        if sort_by not in TWEET_SORT_EXPRESSIONS:
+            sort_by = "date"
+        sort_expression = TWEET_SORT_EXPRESSIONS[sort_by]
 
-    # فیلتر براساس امتیاز اهمیت
-    if params.min_importance:
-        filters.append(Tweet.importance_score >= params.min_importance)
+    if params.cursor:
+        value, last_id = decode_cursor(params.cursor, sort_by, is_datetime=sort_by == "date")
+        filters.append(after_cursor(sort_expression, Tweet.id, value, last_id))
 
-    # ترکیب فیلترها
     if filters:
         query = query.where(and_(*filters))
 
+    query = query.order_by(sort_expression.desc(), Tweet.id.desc())
+
+    # صفحه‌بندی (offset فقط بدون نشانگر اعمال می‌شود)
+    if not params.cursor and params.skip:
+        query = query.offset(params.skip)
+    query = query.add_columns(sort_expression.label("sort_value")).limit(params.limit)
+
     # اجرای query
     result = await db.execute(query)
-    counts = result.fetchone()
+    rows = result.all()
 
-    return {
-        "total": counts[0],
-        "sentiment_counts": {
-            "positive": counts[1],
-            "negative": counts[2],
-            "neutral": counts[3],
-            "mixed": counts[4]
-        }
-    }
+    response = FastJSONResponse(content=[_tweet_row_to_dict(row) for row in rows])
 
+    # نشانگر صفحه بعد فقط وقتی صفحه کامل باشد
+    if rows and len(rows) == params.limit:
+        set_next_cursor(response, encode_cursor(sort_by, rows[-1].sort_value, rows[-1].id))
 
-@router.get("/{tweet_id}", response_model=TweetResponse)
-async def get_tweet(
-        tweet_id: int,
+    return response
+
+
+@router.get("/count", response_model=Dict[str, Any])
+async def get_tweets_count(
+        params: TweetFilterParams = Depends(),
+        exact: bool = Query(False, description="شمارش دقیق از جدول توییت‌ها به جای کش و تخمین"),
         db: AsyncSession = Depends(get_db),
+        redis_service: RedisService = Depends(get_redis_service),
         current_user: AppUser = Depends(get_current_user)
 ):
     """
-    دریافت اطلاعات یک توییت.
+    دریافت تعداد توییت‌ها با امکان فیلتر کردن.
+
+    بدون exact، تعداد از کش کوتاه‌مدت، آمار جدول (بدون فیلتر) یا سری‌های دقیقه‌ای
+    (فیلترهای زمان، یک کلیدواژه و احساسات) خوانده می‌شود و ممکن است تقریبی باشد.
 
     Args:
-        tweet_id (int): شناسه توییت
+        params (TweetFilterParams): پارامترهای فیلتر
+        exact (bool): الزام به شمارش دقیق
         db (AsyncSession): نشست دیتابیس
+        redis_service (RedisService): سرویس Redis
         current_user (AppUser): کاربر فعلی
 
     Returns:
-        TweetResponse: اطلاعات توییت
-
-    Raises:
-        HTTPException: در صورت یافت نشدن توییت
+        Dict[str, Any]: تعداد توییت‌ها، آمار احساسات، دقیق بودن (exact) و منبع تعداد (source)
     """
-    # دریافت توییت از دیتابیس
-    stmt = select(Tweet).where(Tweet.id == tweet_id)
-    result = await db.execute(stmt)
-    tweet = result.scalar_one_or_none()
+    # فیلترها مشابه با تابع get_tweets
+    count_service = TweetCountService(db, redis_service)
+    return await count_service.count(params, _build_tweet_filters(params), exact=exact)
 
-    if not tweet:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="توییت یافت نشد",
-        )
 
-    return TweetResponse(
-        id=tweet.id,
-        tweet_id=tweet.tweet_id,
-        content=tweet.content,
-        created_at=tweet.created_at,
-        language=tweet.language,
-        user=tweet.user,
-        sentiment_label=tweet.sentiment_label,
-        sentiment_score=tweet.sentiment_score,
-        importance_score=tweet.importance_score,
-        is_processed=tweet.is_processed,
-        is_analyzed=tweet.is_analyzed,
-        entities=tweet.entities
-    )
+@router.get("/export")
+async def export_tweets(
+        params: TweetFilterParams = Depends(),
+        export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|parquet)$"),
+        current_user: AppUser = Depends(get_current_user)
+):
+    """
+    خروجی گرفتن از همه توییت‌های منطبق با فیلترها به صورت جریانی.
 
+    ردیف‌ها با cursor سمت سرور دسته به دسته خوانده و ارسال می‌شوند، بنابراین
+    خروجی بازه‌های طولانی در حافظه بارگذاری نمی‌شود. skip، limit، cursor و sort_by
+    نادیده گرفته می‌شوند و ردیف‌ها به ترتیب شناسه ارسال می‌شوند.
 
-"""
-اندپوینت‌های توییت‌ها.
-
-این ماژول اندپوینت‌های مربوط به جستجو و مدیریت توییت‌ها را فراهم می‌کند.
-"""
+    Args:
+        params (TweetFilterParams): پارامترهای فیلتر
+        export_format (str): قالب خروجی (ndjson، csv یا parquet)
+        current_user (AppUser): کاربر فعلی
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy import and_, or_, desc, func
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+    Returns:
+        StreamingResponse: جریان فایل خروجی
 
-from app.db.session import get_db
-from app.db.models import Tweet, User, Keyword, TweetKeyword
-from app.schemas.tweet import TweetResponse, TweetFilterParams, KeywordCreate, KeywordResponse
-from app.core.security import get_current_user
-from app.db.models import AppUser
-from app.services.processor.content_filter import ContentFilter
+    Raises:
+        HTTPException: در صورت در دسترس نبودن خروجی Parquet
+    """
+    if export_format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="خروجی Parquet در دسترس نیست (pyarrow نصب نشده است)",
+        )
 
-router = APIRouter(prefix="/tweets", tags=["tweets"])
+    query = select(*TWEET_LIST_COLUMNS, *USER_LIST_COLUMNS).select_from(Tweet).join(
+        User, Tweet.user_id == User.user_id, isouter=True
+    )
+    filters = _build_tweet_filters(params)
+    if filters:
+        query = query.where(and_(*filters))
+    query = query.order_by(Tweet.id)
+
+    exporter = TweetExporter(query, _tweet_row_to_dict)
+    filename = f"tweets-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{export_format}"
+    logger.info(f"User {current_user.email} started {export_format} tweet export")
+
+    return StreamingResponse(
+        exporter.stream(export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no"
+        }
+    )
 
-# تغییرات نیاز نیست در کل فایل اعمال شود. فقط توابع مورد نظر را با توابع جدید جایگزین می‌کنیم
 
 @router.get("/keywords", response_model=List[KeywordResponse])
 async def get_keywords(
@@ -263,7 +316,8 @@ async def get_keywords(
         limit: int = 100,
         active_only: bool = False,
         db: AsyncSession = Depends(get_db),
-        current_user: AppUser = Depends(get_current_user)
+        current_user: AppUser = Depends(get_current_user),
+        cache_validators: None = Depends(conditional_cache(RESOURCE_KEYWORDS, max_age=settings.HTTP_CACHE_MAX_AGE))
 ):
     """
     دریافت لیست کلیدواژه‌ها.
@@ -274,65 +328,49 @@ async def get_keywords(
         active_only (bool): فقط کلیدواژه‌های فعال
         db (AsyncSession): نشست دیتابیس
         current_user (AppUser): کاربر فعلی
+        cache_validators: بررسی درخواست شرطی (ETag) پیش از اجرای کوئری‌ها
 
     Returns:
         List[KeywordResponse]: لیست کلیدواژه‌ها
     """
-    try:
-        # ایجاد query پایه
-        query = select(Keyword)
+    # ایجاد query پایه
+    query = select(Keyword)
 
-        # فیلتر براساس وضعیت فعال
-        if active_only:
-            query = query.where(Keyword.is_active == True)
+    # فیلتر براساس وضعیت فعال
+    if active_only:
+        query = query.where(Keyword.is_active == True)
 
-        # صفحه‌بندی و مرتب‌سازی
-        query = query.order_by(Keyword.priority.desc()).offset(skip).limit(limit)
+    # صفحه‌بندی و مرتب‌سازی
+    query = query.order_by(Keyword.priority.desc()).offset(skip).limit(limit)
 
-        # اجرای query
+    # اجرای query
+    try:
         result = await db.execute(query)
-        keywords = result.scalars().all()
-
-        # لاگ برای دیباگ
-        logger.info(f"Found {len(keywords)} keywords in database")
-
-        # تبدیل به فرمت پاسخ
-        response_data = [
-            {
-                "id": keyword.id,
-                "text": keyword.text,
-                "is_active": keyword.is_active,
-                "priority": keyword.priority,
-                "description": keyword.description,
-                "created_at": keyword.created_at
-            }
-            for keyword in keywords
-        ]
-        
-        # برگرداندن پاسخ دستی با هدرهای CORS صریح
-        return JSONResponse(
-            content=jsonable_encoder(response_data),
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, Authorization",
-            }
-        )
-
     except Exception as e:
-        # لاگ خطا برای دیباگ
         logger.exception(f"Error getting keywords: {str(e)}")
-        
-        # برگرداندن پاسخ خطا با هدرهای CORS صریح
-        return JSONResponse(
-            status_code=500,
-            content={"detail": f"خطا در دریافت کلیدواژه‌ها: {str(e)}"},
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, Authorization",
-            }
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="خطا در دریافت کلیدواژه‌ها",
         )
+    keywords = result.scalars().all()
+
+    # لاگ برای دیباگ
+    logger.info(f"Found {len(keywords)} keywords in database")
+
+    # مقدار ساده برگردانده می‌شود تا هدرهای درخواست شرطی وابستگی به پاسخ اضافه شوند
+    # (هدرهای CORS را میان‌افزار CORS اضافه می‌کند)
+    return [
+        {
+            "id": keyword.id,
+            "text": keyword.text,
+            "is_active": keyword.is_active,
+            "priority": keyword.priority,
+            "description": keyword.description,
+            "created_at": keyword.created_at
+        }
+        for keyword in keywords
+    ]
+
 
 @router.get("/debug/keywords", response_model=Dict[str, Any])
 async def debug_keywords(
@@ -435,6 +473,7 @@ async def create_keyword(
             existing_keyword.priority = keyword_in.priority
             existing_keyword.description = keyword_in.description
             await db.commit()
+            await bump_resource_versions(RESOURCE_KEYWORDS)
             await db.refresh(existing_keyword)
 
         return KeywordResponse(
@@ -456,6 +495,7 @@ async def create_keyword(
 
     db.add(keyword)
     await db.commit()
+    await bump_resource_versions(RESOURCE_KEYWORDS)
     await db.refresh(keyword)
 
     return KeywordResponse(
@@ -468,6 +508,49 @@ async def create_keyword(
     )
 
 
+@router.post("/keywords/bulk", response_model=KeywordBulkResponse)
+async def bulk_upsert_keywords(
+        bulk_in: KeywordBulkRequest,
+        db: AsyncSession = Depends(get_db),
+        current_user: AppUser = Depends(get_current_user)
+):
+    """
+    ورود یا به‌روزرسانی گروهی کلیدواژه‌ها در یک تراکنش.
+
+    کلیدواژه‌های موجود (براساس متن) با اولویت، وضعیت و توضیحات جدید به‌روز و
+    بقیه ایجاد می‌شوند. اگر یک متن چند بار آمده باشد، آخرین مقدار آن ثبت می‌شود.
+
+    Args:
+        bulk_in (KeywordBulkRequest): کلیدواژه‌ها
+        db (AsyncSession): نشست دیتابیس
+        current_user (AppUser): کاربر فعلی
+
+    Returns:
+        KeywordBulkResponse: تعداد کلیدواژه‌های ایجاد و به‌روز شده و کلیدواژه‌های ثبت شده
+    """
+    try:
+        saved, created_count = await upsert_keywords(
+            db, [keyword.model_dump() for keyword in bulk_in.keywords]
+        )
+        await db.commit()
+        await bump_resource_versions(RESOURCE_KEYWORDS)
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error importing keywords: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="خطا در ثبت کلیدواژه‌ها",
+        )
+
+    logger.info(f"Imported {len(saved)} keywords ({created_count} new) by {current_user.email}")
+
+    return KeywordBulkResponse(
+        created=created_count,
+        updated=len(saved) - created_count,
+        keywords=[KeywordResponse(**keyword) for keyword in saved]
+    )
+
+
 @router.put("/keywords/{keyword_id}", response_model=KeywordResponse)
 async def update_keyword(
         keyword_id: int,
@@ -508,6 +591,7 @@ async def update_keyword(
     keyword.description = keyword_in.description
 
     await db.commit()
+    await bump_resource_versions(RESOURCE_KEYWORDS)
     await db.refresh(keyword)
 
     return KeywordResponse(
@@ -555,6 +639,7 @@ async def delete_keyword(
     keyword.is_active = False
 
     await db.commit()
+    await bump_resource_versions(RESOURCE_KEYWORDS)
 
     return {"message": "کلیدواژه با موفقیت غیرفعال شد"}
 
@@ -595,78 +680,137 @@ async def extract_keywords_from_text(
 @router.get("/keywords/stats", response_model=List[Dict[str, Any]])
 async def get_keywords_stats(
     days: int = 7,
+    daily: bool = Query(False, description="افزودن سری روزانه تعداد توییت‌ها برای هر کلیدواژه"),
     db: AsyncSession = Depends(get_db),
     current_user: AppUser = Depends(get_current_user)
 ):
     """
     دریافت آمار استفاده از کلیدواژه‌ها.
-    
+
+    تعداد توییت‌ها و توزیع احساسات همه کلیدواژه‌ها با یک کوئری گروه‌بندی شده
+    محاسبه می‌شود و سری روزانه (در صورت درخواست) هم‌زمان با آن خوانده می‌شود.
+
     Args:
         days (int): تعداد روزهای اخیر
+        daily (bool): افزودن سری روزانه (daily_counts) برای نمودارهای کوچک
         db (AsyncSession): نشست دیتابیس
         current_user (AppUser): کاربر فعلی
-    
+
     Returns:
         List[Dict[str, Any]]: آمار کلیدواژه‌ها
     """
     # محاسبه تاریخ شروع
     start_date = datetime.now() - timedelta(days=days)
-    
-    # استخراج تعداد توییت‌ها برای هر کلیدواژه
+
+    # تجمیع توییت‌های بازه به تفکیک کلیدواژه (join داخلی تا شاخص زمان توییت‌ها استفاده شود)
+    keyword_counts = select(
+        TweetKeyword.keyword_id.label("keyword_id"),
+        func.count().label("tweet_count"),
+        *[func.count().filter(Tweet.sentiment_label == label).label(label) for label in SENTIMENT_LABELS]
+    ).join(
+        Tweet, Tweet.id == TweetKeyword.tweet_id
+    ).where(
+        Tweet.created_at >= start_date
+    ).group_by(
+        TweetKeyword.keyword_id
+    ).subquery()
+
+    tweet_count = func.coalesce(keyword_counts.c.tweet_count, 0)
     stmt = select(
         Keyword.id,
         Keyword.text,
-        func.count(TweetKeyword.tweet_id).label("tweet_count")
+        tweet_count.label("tweet_count"),
+        *[func.coalesce(keyword_counts.c[label], 0) for label in SENTIMENT_LABELS]
     ).outerjoin(
-        TweetKeyword, Keyword.id == TweetKeyword.keyword_id
-    ).outerjoin(
-        Tweet, Tweet.id == TweetKeyword.tweet_id
+        keyword_counts, keyword_counts.c.keyword_id == Keyword.id
     ).where(
-        and_(
-            Keyword.is_active == True,
-            or_(
-                Tweet.created_at >= start_date,
-                Tweet.created_at == None
-            )
-        )
-    ).group_by(
-        Keyword.id, Keyword.text
+        Keyword.is_active == True
     ).order_by(
-        func.count(TweetKeyword.tweet_id).desc()
+        tweet_count.desc()
     )
-    
-    result = await db.execute(stmt)
-    keywords_stats = []
-    
-    for row in result.fetchall():
-        keyword_id, keyword_text, tweet_count = row
-        
-        # استخراج آمار احساسات برای هر کلیدواژه
-        sentiment_stmt = select(
-            Tweet.sentiment_label,
-            func.count().label("count")
-        ).join(
-            TweetKeyword, Tweet.id == TweetKeyword.tweet_id
-        ).where(
-            and_(
-                TweetKeyword.keyword_id == keyword_id,
-                Tweet.created_at >= start_date,
-                Tweet.sentiment_label != None
+
+    statements = [stmt]
+    if daily:
+        day = func.date_trunc(literal_column("'day'"), Tweet.created_at)
+        statements.append(
+            select(
+                TweetKeyword.keyword_id, day, func.count()
+            ).join(
+                Tweet, Tweet.id == TweetKeyword.tweet_id
+            ).join(
+                Keyword, Keyword.id == TweetKeyword.keyword_id
+            ).where(
+                and_(Keyword.is_active == True, Tweet.created_at >= start_date)
+            ).group_by(
+                TweetKeyword.keyword_id, day
             )
-        ).group_by(
-            Tweet.sentiment_label
         )
-        
-        sentiment_result = await db.execute(sentiment_stmt)
-        sentiment_stats = {
-            row[0]: row[1] for row in sentiment_result.fetchall()
-        }
-        
-        keywords_stats.append({
+
+    # کوئری آمار و سری روزانه مستقل هستند و هم‌زمان اجرا می‌شوند
+    results = await fetch_concurrently(*statements)
+
+    daily_counts = {}
+    if daily:
+        for keyword_id, bucket, count in results[1]:
+            daily_counts.setdefault(keyword_id, {})[bucket.date()] = count
+    series_days = [
+        (start_date + timedelta(days=offset)).date()
+        for offset in range((datetime.now().date() - start_date.date()).days + 1)
+    ]
+
+    keywords_stats = []
+    for keyword_id, keyword_text, tweet_count, *label_counts in results[0]:
+        keyword_stats = {
             "id": keyword_id,
             "text": keyword_text,
             "tweet_count": tweet_count,
-            "sentiment_stats": sentiment_stats
-        })
-    
-    return keywords_stats
\ No newline at end of file
+            "sentiment_stats": {
+                label: count for label, count in zip(SENTIMENT_LABELS, label_counts) if count
+            }
+        }
+        if daily:
+            counts = daily_counts.get(keyword_id, {})
+            keyword_stats["daily_counts"] = [
+                {"date": series_day.isoformat(), "count": counts.get(series_day, 0)}
+                for series_day in series_days
+            ]
+        keywords_stats.append(keyword_stats)
+
+    return keywords_stats
+
+
+# مسیر پارامتری در انتها تعریف می‌شود تا مسیرهای ثابت (مانند /keywords) را نپوشاند
+@router.get("/{tweet_id}", response_model=TweetResponse)
+async def get_tweet(
+        tweet_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: AppUser = Depends(get_current_user)
+):
+    """
+    دریافت اطلاعات یک توییت.
+
+    Args:
+        tweet_id (int): شناسه توییت
+        db (AsyncSession): نشست دیتابیس
+        current_user (AppUser): کاربر فعلی
+
+    Returns:
+        FastJSONResponse: اطلاعات توییت با ساختار TweetResponse
+
+    Raises:
+        HTTPException: در صورت یافت نشدن توییت
+    """
+    # دریافت توییت و کاربر آن در یک query
+    stmt = select(*TWEET_LIST_COLUMNS, *USER_LIST_COLUMNS).select_from(Tweet).join(
+        User, Tweet.user_id == User.user_id, isouter=True
+    ).where(Tweet.id == tweet_id)
+    result = await db.execute(stmt)
+    row = result.first()
+
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="توییت یافت نشد",
+        )
+
+    return FastJSONResponse(content=_tweet_row_to_dict(row))
@@ -4,25 +4,42 @@
 این ماژول اندپوینت‌های مربوط به تشخیص موج‌های توییتری و مدیریت هشدارها را فراهم می‌کند.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+import asyncio
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
 from sqlalchemy import update, and_, or_, desc, func
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
-from app.db.session import get_db
-from app.db.models import Alert, Tweet, AppUser
+from app.config import settings
+from app.db.session import get_db, get_session
+from app.db.models import Alert, Tweet, AppUser, Wave
 from app.schemas.wave import (
     AlertResponse, AlertFilterParams, WaveResponse, WaveDetectionRequest,
-    WaveAnalysisResponse
+    WaveAnalysisResponse, KeywordWavesResponse, TrackedWaveResponse, EmergingTermResponse
 )
 from app.core.security import get_current_user
+from app.core.http_cache import conditional_cache, bump_resource_versions, RESOURCE_ALERTS
+from app.core.pagination import encode_cursor, decode_cursor, after_cursor, set_next_cursor
+from app.core.responses import sse_event
 from app.services.analyzer.analyzer import TweetAnalyzer
 from app.services.analyzer.wave_detector import WaveDetector
+from app.services.analyzer.wave_tracker import WaveTracker
+from app.services.analyzer.term_burst import EMERGING_TERMS_KEY
+from app.services.redis_service import RedisService, get_redis_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/waves", tags=["waves"])
 
+# ارجاع به ذخیره‌های در حال اجرای تحلیل موج تا پس از قطع اتصال کلاینت جمع‌آوری نشوند
+_pending_analysis_saves = set()
+
 
 async def get_wave_detector(db: AsyncSession = Depends(get_db)) -> WaveDetector:
     """
@@ -73,6 +90,7 @@ async def detect_waves(
         hours_back: int = 24,
         min_importance: float = 3.0,
         wave_type: Optional[str] = None,
+        multi_resolution: bool = False,
         db: AsyncSession = Depends(get_db),
         current_user: AppUser = Depends(get_current_user),
         wave_detector: WaveDetector = Depends(get_wave_detector)
@@ -85,6 +103,7 @@ async def detect_waves(
         hours_back (int): تعداد ساعات برای بررسی
         min_importance (float): حداقل امتیاز اهمیت
         wave_type (Optional[str]): نوع موج (volume, sentiment)
+        multi_resolution (bool): تشخیص در چند تفکیک‌پذیری زمانی با پنجره‌های لغزان
         db (AsyncSession): نشست دیتابیس
         current_user (AppUser): کاربر فعلی
         wave_detector (WaveDetector): سرویس تشخیص موج
@@ -93,7 +112,11 @@ async def detect_waves(
         List[WaveResponse]: لیست موج‌های تشخیص داده شده
     """
     # تشخیص موج‌ها
-    if wave_type == "volume":
+    if multi_resolution:
+        waves = await wave_detector.detect_multi_resolution_waves(keywords, hours_back)
+        if wave_type:
+            waves = [w for w in waves if w.get("type") == wave_type]
+    elif wave_type == "volume":
         waves = await wave_detector.detect_volume_waves(keywords, hours_back)
     elif wave_type == "sentiment":
         waves = await wave_detector.detect_sentiment_waves(keywords, hours_back)
@@ -117,13 +140,59 @@ async def detect_waves(
             sentiment_distribution=wave.get("sentiment_distribution", {}),
             importance_score=wave.get("importance_score", 0),
             related_keywords=wave.get("related_keywords", []),
-            top_tweets=wave.get("top_tweets", [])[:5]  # فقط 5 توییت برتر
+            top_tweets=wave.get("top_tweets", [])[:5],  # فقط 5 توییت برتر
+            resolutions=wave.get("resolutions", [])
         )
         responses.append(response)
 
     return responses
 
 
+@router.get("/scan", response_model=List[KeywordWavesResponse])
+async def scan_keyword_waves(
+        keywords: Optional[List[str]] = Query(None),
+        hours_back: int = 24,
+        min_importance: float = 3.0,
+        z_threshold: float = 4.0,
+        max_waves_per_keyword: int = Query(5, ge=1, le=50),
+        current_user: AppUser = Depends(get_current_user),
+        wave_detector: WaveDetector = Depends(get_wave_detector)
+):
+    """
+    تشخیص موج‌ها برای همه کلیدواژه‌ها با یک پویش برداری.
+
+    Args:
+        keywords (Optional[List[str]]): کلیدواژه‌ها (پیش‌فرض: همه کلیدواژه‌های فعال)
+        hours_back (int): تعداد ساعات برای بررسی
+        min_importance (float): حداقل امتیاز اهمیت
+        z_threshold (float): آستانه z-score برای موج حجمی
+        max_waves_per_keyword (int): حداکثر تعداد موج برای هر کلیدواژه
+        current_user (AppUser): کاربر فعلی
+        wave_detector (WaveDetector): سرویس تشخیص موج
+
+    Returns:
+        List[KeywordWavesResponse]: موج‌های هر کلیدواژه به ترتیب مهم‌ترین موج
+    """
+    waves_by_keyword = await wave_detector.scan_keywords(
+        keywords=keywords,
+        hours_back=hours_back,
+        z_threshold=z_threshold,
+        max_waves_per_keyword=max_waves_per_keyword
+    )
+
+    responses = []
+    for keyword, waves in waves_by_keyword.items():
+        waves = [w for w in waves if w["importance_score"] >= min_importance]
+        if waves:
+            responses.append(KeywordWavesResponse(
+                keyword=keyword,
+                waves=[WaveResponse(**wave) for wave in waves]
+            ))
+
+    responses.sort(key=lambda x: x.waves[0].importance_score, reverse=True)
+    return responses
+
+
 @router.post("/detect_and_alert", response_model=List[Dict[str, Any]])
 async def detect_waves_and_create_alerts(
         request: WaveDetectionRequest,
@@ -147,36 +216,29 @@ async def detect_waves_and_create_alerts(
     alerts = await analyzer.detect_waves_and_alert(
         keywords=request.keywords,
         hours_back=request.hours_back,
-        min_importance=request.min_importance
+        min_importance=request.min_importance,
+        per_keyword=request.per_keyword,
+        multi_resolution=request.multi_resolution
     )
 
     return alerts
 
 
-@router.post("/analyze_wave", response_model=WaveAnalysisResponse)
-async def analyze_wave(
-        wave_id: Dict[str, Any],
-        db: AsyncSession = Depends(get_db),
-        current_user: AppUser = Depends(get_current_user),
-        analyzer: TweetAnalyzer = Depends(get_analyzer)
-):
+def _parse_wave_time_range(wave_id: Dict[str, Any]) -> Tuple[datetime, datetime]:
     """
-    تحلیل عمیق یک موج.
+    استخراج بازه زمانی موج از داده‌های ورودی.
 
     Args:
         wave_id (Dict[str, Any]): اطلاعات موج
-        db (AsyncSession): نشست دیتابیس
-        current_user (AppUser): کاربر فعلی
-        analyzer (TweetAnalyzer): سرویس تحلیل
 
     Returns:
-        WaveAnalysisResponse: نتیجه تحلیل موج
+        Tuple[datetime, datetime]: زمان شروع و پایان موج
+
+    Raises:
+        HTTPException: در صورت نبود یا نامعتبر بودن زمان‌ها
     """
-    # استخراج داده‌های موج از ورودی
-    wave_type = wave_id.get("type", "volume")
     start_time = wave_id.get("start_time")
     end_time = wave_id.get("end_time")
-    related_keywords = wave_id.get("related_keywords", [])
 
     if not start_time or not end_time:
         raise HTTPException(
@@ -194,8 +256,25 @@ async def analyze_wave(
             detail="فرمت زمان نامعتبر است",
         )
 
-    # دریافت توییت‌های این بازه زمانی
-    stmt = select(Tweet).where(
+    return start_datetime, end_datetime
+
+
+async def _load_wave_tweets(db: AsyncSession, start_datetime: datetime, end_datetime: datetime) -> List[Dict[str, Any]]:
+    """
+    دریافت توییت‌های تحلیل شده یک موج در قالب مورد نیاز تحلیل.
+
+    Args:
+        db (AsyncSession): نشست دیتابیس
+        start_datetime (datetime): زمان شروع موج
+        end_datetime (datetime): زمان پایان موج
+
+    Returns:
+        List[Dict[str, Any]]: داده‌های توییت‌ها
+
+    Raises:
+        HTTPException: اگر توییتی در بازه یافت نشود
+    """
+    stmt = select(Tweet).options(selectinload(Tweet.user)).where(
         and_(
             Tweet.created_at >= start_datetime,
             Tweet.created_at <= end_datetime,
@@ -213,7 +292,7 @@ async def analyze_wave(
         )
 
     # تبدیل توییت‌ها به فرمت مورد نیاز برای تحلیل موج
-    tweets_data = [
+    return [
         {
             "id": tweet.id,
             "content": tweet.content,
@@ -231,15 +310,109 @@ async def analyze_wave(
         for tweet in tweets
     ]
 
-    # استفاده از Claude API برای تحلیل عمیق موج
-    wave_analysis = await analyzer.claude_client.analyze_wave(
-        tweets=tweets_data,
-        keywords=related_keywords,
-        use_extended_thinking=True
-    )
 
-    # تبدیل به فرمت پاسخ
-    response = WaveAnalysisResponse(
+async def _save_wave_analysis(db: AsyncSession, alert_id: int, wave_analysis: Dict[str, Any]) -> bool:
+    """
+    ذخیره نتیجه تحلیل موج در داده‌های هشدار مرتبط.
+
+    Args:
+        db (AsyncSession): نشست دیتابیس
+        alert_id (int): شناسه هشدار
+        wave_analysis (Dict[str, Any]): نتیجه تحلیل موج
+
+    Returns:
+        bool: True اگر هشدار یافت و به‌روزرسانی شد
+    """
+    stmt = select(Alert).where(Alert.id == alert_id)
+    result = await db.execute(stmt)
+    alert = result.scalar_one_or_none()
+
+    if not alert:
+        logger.warning(f"Alert {alert_id} not found, wave analysis not saved")
+        return False
+
+    # ستون JSON تغییرات درجا را تشخیص نمی‌دهد؛ بنابراین دیکشنری جدید جایگزین می‌شود
+    alert.data = {**(alert.data or {}), "wave_analysis": wave_analysis}
+
+    # ثبت تحلیل در موج مرتبط تا زمان رشد اساسی بعدی دوباره تحلیل نشود
+    tracker = WaveTracker(db)
+    wave = await tracker.get_by_alert(alert_id)
+    if wave:
+        tracker.mark_analyzed(wave)
+
+    await db.commit()
+    await bump_resource_versions(RESOURCE_ALERTS)
+
+    logger.info(f"Wave analysis saved to alert {alert_id}")
+    return True
+
+
+async def _save_wave_analysis_detached(alert_id: int, wave_analysis: Dict[str, Any]) -> bool:
+    """
+    ذخیره نتیجه تحلیل موج مستقل از اتصال کلاینت.
+
+    ذخیره در یک task جداگانه با نشست خودش انجام می‌شود و فراخواننده آن را با
+    shield منتظر می‌ماند؛ اگر کلاینت در این فاصله قطع شود و جریان پاسخ لغو شود،
+    تحلیل پرهزینه همچنان ذخیره می‌شود.
+
+    Args:
+        alert_id (int): شناسه هشدار
+        wave_analysis (Dict[str, Any]): نتیجه تحلیل موج
+
+    Returns:
+        bool: True اگر هشدار یافت و به‌روزرسانی شد
+    """
+    async def _save() -> bool:
+        try:
+            async with get_session() as session:
+                return await _save_wave_analysis(session, alert_id, wave_analysis)
+        except Exception as e:
+            logger.error(f"Error saving wave analysis to alert {alert_id}: {e}")
+            return False
+
+    task = asyncio.create_task(_save())
+    _pending_analysis_saves.add(task)
+    task.add_done_callback(_pending_analysis_saves.discard)
+    return await asyncio.shield(task)
+
+
+async def _get_cached_wave_analysis(db: AsyncSession, alert_id: int) -> Optional[Dict[str, Any]]:
+    """
+    دریافت تحلیل ذخیره شده هشدار در صورتی که موج آن از زمان تحلیل تغییر اساسی نکرده باشد.
+
+    Args:
+        db (AsyncSession): نشست دیتابیس
+        alert_id (int): شناسه هشدار
+
+    Returns:
+        Optional[Dict[str, Any]]: تحلیل ذخیره شده یا None اگر تحلیل مجدد لازم است
+    """
+    tracker = WaveTracker(db)
+    wave = await tracker.get_by_alert(alert_id)
+    if not wave or tracker.needs_analysis(wave):
+        return None
+
+    alert = await db.get(Alert, alert_id)
+    wave_analysis = (alert.data or {}).get("wave_analysis") if alert else None
+    if not wave_analysis or "analyzed_at" not in wave_analysis:
+        return None
+
+    logger.info(f"Reusing wave analysis of alert {alert_id} (wave {wave.id} unchanged)")
+    return wave_analysis
+
+
+def _build_wave_analysis_response(wave_analysis: Dict[str, Any], analyzed_at: datetime) -> WaveAnalysisResponse:
+    """
+    تبدیل نتیجه تحلیل موج به مدل پاسخ.
+
+    Args:
+        wave_analysis (Dict[str, Any]): نتیجه تحلیل موج
+        analyzed_at (datetime): زمان تحلیل
+
+    Returns:
+        WaveAnalysisResponse: مدل پاسخ
+    """
+    return WaveAnalysisResponse(
         main_topic=wave_analysis.get("main_topic", ""),
         summary=wave_analysis.get("summary", ""),
         is_coordinated=wave_analysis.get("is_coordinated", False),
@@ -253,22 +426,224 @@ async def analyze_wave(
         sentiment_distribution=wave_analysis.get("sentiment_distribution", {}),
         analysis_confidence=wave_analysis.get("analysis_confidence", 0),
         extended_thinking=wave_analysis.get("extended_thinking", ""),
-        analyzed_at=datetime.utcnow()
+        analyzed_at=analyzed_at
+    )
+
+
+@router.post("/analyze_wave", response_model=WaveAnalysisResponse)
+async def analyze_wave(
+        wave_id: Dict[str, Any],
+        db: AsyncSession = Depends(get_db),
+        current_user: AppUser = Depends(get_current_user),
+        analyzer: TweetAnalyzer = Depends(get_analyzer)
+):
+    """
+    تحلیل عمیق یک موج.
+
+    اگر alert_id در ورودی باشد، نتیجه در داده‌های آن هشدار ذخیره می‌شود و تا زمانی که
+    موج مرتبط تغییر اساسی نکرده، همان نتیجه بدون فراخوانی مجدد Claude برگردانده می‌شود
+    (مگر اینکه force در ورودی true باشد).
+
+    Args:
+        wave_id (Dict[str, Any]): اطلاعات موج
+        db (AsyncSession): نشست دیتابیس
+        current_user (AppUser): کاربر فعلی
+        analyzer (TweetAnalyzer): سرویس تحلیل
+
+    Returns:
+        WaveAnalysisResponse: نتیجه تحلیل موج
+    """
+    # استخراج داده‌های موج از ورودی
+    start_datetime, end_datetime = _parse_wave_time_range(wave_id)
+    related_keywords = wave_id.get("related_keywords", [])
+    alert_id = wave_id.get("alert_id")
+
+    if alert_id and not wave_id.get("force"):
+        cached = await _get_cached_wave_analysis(db, alert_id)
+        if cached:
+            return _build_wave_analysis_response(cached, datetime.fromisoformat(cached["analyzed_at"]))
+
+    # دریافت توییت‌های این بازه زمانی
+    tweets_data = await _load_wave_tweets(db, start_datetime, end_datetime)
+
+    # استفاده از Claude API برای تحلیل عمیق موج
+    wave_analysis = await analyzer.claude_client.analyze_wave(
+        tweets=tweets_data,
+        keywords=related_keywords,
+        use_extended_thinking=True
+    )
+    analyzed_at = datetime.utcnow()
+
+    if alert_id and "error" not in wave_analysis:
+        await _save_wave_analysis(db, alert_id, {**wave_analysis, "analyzed_at": analyzed_at.isoformat()})
+
+    return _build_wave_analysis_response(wave_analysis, analyzed_at)
+
+
+@router.post("/analyze_wave/stream")
+async def analyze_wave_stream(
+        wave_id: Dict[str, Any],
+        db: AsyncSession = Depends(get_db),
+        current_user: AppUser = Depends(get_current_user),
+        analyzer: TweetAnalyzer = Depends(get_analyzer)
+):
+    """
+    تحلیل عمیق یک موج به صورت جریانی (Server-Sent Events).
+
+    رویدادهای ارسالی:
+        - thinking: بخشی از متن Extended Thinking
+        - text: بخشی از متن پاسخ
+        - tool_input: بخشی از JSON نتیجه ساختاریافته
+        - result: نتیجه نهایی اعتبارسنجی شده (WaveAnalysisResponse)
+        - saved: شناسه هشداری که نتیجه در آن ذخیره شد
+        - error: پیام خطا
+
+    اگر alert_id در ورودی باشد، نتیجه بلافاصله پس از تکمیل در داده‌های آن هشدار ذخیره می‌شود.
+    اگر موج مرتبط از زمان تحلیل قبلی تغییر اساسی نکرده باشد (و force داده نشده باشد)،
+    فقط رویداد result با نتیجه ذخیره شده ارسال می‌شود.
+
+    Args:
+        wave_id (Dict[str, Any]): اطلاعات موج
+        db (AsyncSession): نشست دیتابیس
+        current_user (AppUser): کاربر فعلی
+        analyzer (TweetAnalyzer): سرویس تحلیل
+
+    Returns:
+        StreamingResponse: جریان رویدادهای تحلیل
+    """
+    start_datetime, end_datetime = _parse_wave_time_range(wave_id)
+    related_keywords = wave_id.get("related_keywords", [])
+    alert_id = wave_id.get("alert_id")
+    claude_client = analyzer.claude_client
+
+    cached = None
+    if alert_id and not wave_id.get("force"):
+        cached = await _get_cached_wave_analysis(db, alert_id)
+
+    # توییت‌ها قبل از شروع جریان خوانده می‌شوند تا خطاهای ورودی با کد HTTP مناسب برگردند
+    tweets_data = [] if cached else await _load_wave_tweets(db, start_datetime, end_datetime)
+
+    async def event_stream():
+        try:
+            if cached:
+                response = _build_wave_analysis_response(cached, datetime.fromisoformat(cached["analyzed_at"]))
+                yield sse_event("result", response.model_dump(mode="json"))
+                return
+
+            async for event, data in claude_client.analyze_wave_stream(
+                tweets=tweets_data,
+                keywords=related_keywords,
+                use_extended_thinking=True
+            ):
+                if event != "result":
+                    yield sse_event(event, data)
+                    continue
+
+                analyzed_at = datetime.utcnow()
+
+                # ذخیره پیش از ارسال نتیجه تا قطع اتصال کلاینت پس از دیدن نتیجه آن را از بین نبرد
+                saved = False
+                if alert_id and "error" not in data:
+                    saved = await _save_wave_analysis_detached(
+                        alert_id, {**data, "analyzed_at": analyzed_at.isoformat()}
+                    )
+
+                response = _build_wave_analysis_response(data, analyzed_at)
+                yield sse_event("result", response.model_dump(mode="json"))
+                if saved:
+                    yield sse_event("saved", {"alert_id": alert_id})
+
+        except Exception as e:
+            logger.error(f"Error streaming wave analysis: {e}")
+            yield sse_event("error", {"detail": "خطا در تحلیل موج"})
+        finally:
+            await claude_client.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
     )
 
-    return response
+
+@router.get("/tracked", response_model=List[TrackedWaveResponse])
+async def get_tracked_waves(
+        status_filter: Optional[str] = Query(None, alias="status"),
+        wave_type: Optional[str] = None,
+        skip: int = 0,
+        limit: int = Query(50, ge=1, le=500),
+        db: AsyncSession = Depends(get_db),
+        current_user: AppUser = Depends(get_current_user)
+):
+    """
+    دریافت موج‌های ردیابی شده و وضعیت چرخه عمر آن‌ها.
+
+    Args:
+        status_filter (Optional[str]): وضعیت موج (open, growing, peaked, closed)
+        wave_type (Optional[str]): نوع موج (volume, sentiment)
+        skip (int): تعداد موارد رد شده
+        limit (int): حداکثر تعداد نتایج
+        db (AsyncSession): نشست دیتابیس
+        current_user (AppUser): کاربر فعلی
+
+    Returns:
+        List[TrackedWaveResponse]: موج‌ها به ترتیب آخرین تشخیص
+    """
+    query = select(Wave)
+    if status_filter:
+        query = query.where(Wave.status == status_filter)
+    if wave_type:
+        query = query.where(Wave.wave_type == wave_type)
+
+    query = query.order_by(desc(Wave.last_seen_at)).offset(skip).limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+@router.get("/emerging-terms", response_model=List[EmergingTermResponse])
+async def get_emerging_terms(
+        term_type: Optional[str] = None,
+        limit: int = Query(50, ge=1, le=100),
+        redis_service: RedisService = Depends(get_redis_service),
+        current_user: AppUser = Depends(get_current_user)
+):
+    """
+    دریافت هشتگ‌ها و عبارات نوظهور اخیر (کلیدواژه‌های پیشنهادی).
+
+    Args:
+        term_type (Optional[str]): نوع عبارت (hashtag, ngram)
+        limit (int): حداکثر تعداد نتایج
+        redis_service (RedisService): سرویس Redis
+        current_user (AppUser): کاربر فعلی
+
+    Returns:
+        List[EmergingTermResponse]: عبارات به ترتیب زمان تشخیص (جدیدترین ابتدا)
+    """
+    terms = await redis_service.get_cache(EMERGING_TERMS_KEY) or []
+    if term_type:
+        terms = [term for term in terms if term.get("term_type") == term_type]
+    return terms[:limit]
 
 
 @router.get("/alerts", response_model=List[AlertResponse])
 async def get_alerts(
+        response: Response,
         params: AlertFilterParams = Depends(),
         db: AsyncSession = Depends(get_db),
-        current_user: AppUser = Depends(get_current_user)
+        current_user: AppUser = Depends(get_current_user),
+        cache_validators: None = Depends(conditional_cache(RESOURCE_ALERTS, max_age=settings.HTTP_CACHE_MAX_AGE))
 ):
     """
     دریافت لیست هشدارها.
 
+    صفحه‌بندی با نشانگر: اگر صفحه کامل باشد، نشانگر صفحه بعد در هدر X-Next-Cursor
+    برگردانده می‌شود و با پارامتر cursor صفحه بعد دریافت می‌شود.
+
     Args:
+        response (Response): پاسخ (برای هدر نشانگر صفحه بعد)
         params (AlertFilterParams): پارامترهای فیلتر
         db (AsyncSession): نشست دیتابیس
         current_user (AppUser): کاربر فعلی
@@ -300,20 +675,31 @@ async def get_alerts(
     if params.end_date:
         filters.append(Alert.created_at <= params.end_date)
 
+    # ادامه از نشانگر صفحه قبل
+    if params.cursor:
+        value, last_id = decode_cursor(params.cursor, "date", is_datetime=True)
+        filters.append(after_cursor(Alert.created_at, Alert.id, value, last_id))
+
     # ترکیب فیلترها
     if filters:
         query = query.where(and_(*filters))
 
-    # مرتب‌سازی
-    query = query.order_by(desc(Alert.created_at))
+    # مرتب‌سازی براساس (زمان، شناسه) تا صفحه‌بندی با نشانگر پایدار باشد
+    query = query.order_by(desc(Alert.created_at), desc(Alert.id))
 
-    # صفحه‌بندی
-    query = query.offset(params.skip).limit(params.limit)
+    # صفحه‌بندی (offset فقط بدون نشانگر اعمال می‌شود)
+    if not params.cursor and params.skip:
+        query = query.offset(params.skip)
+    query = query.limit(params.limit)
 
     # اجرای query
     result = await db.execute(query)
     alerts = result.scalars().all()
 
+    # نشانگر صفحه بعد فقط وقتی صفحه کامل باشد
+    if alerts and len(alerts) == params.limit:
+        set_next_cursor(response, encode_cursor("date", alerts[-1].created_at, alerts[-1].id))
+
     # تبدیل به فرمت پاسخ
     return [
         AlertResponse(
@@ -410,6 +796,7 @@ async def mark_alert_as_read(
     alert.is_read = True
 
     await db.commit()
+    await bump_resource_versions(RESOURCE_ALERTS)
     await db.refresh(alert)
 
     return AlertResponse(
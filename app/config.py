@@ -80,6 +80,74 @@ class Settings(BaseSettings):
     DAILY_BUDGET: float = float(os.getenv("DAILY_BUDGET", "10.0"))
     ANALYZER_BATCH_SIZE: int = int(os.getenv("ANALYZER_BATCH_SIZE", "50"))
 
+    # دفتر بودجه: درج دسته‌ای ردیف‌های api_usage پس از این تعداد ردیف یا این فاصله زمانی (ثانیه)
+    # و حداکثر ردیف‌های در انتظار وقتی دیتابیس در دسترس نیست
+    BUDGET_FLUSH_SIZE: int = int(os.getenv("BUDGET_FLUSH_SIZE", "50"))
+    BUDGET_FLUSH_INTERVAL: float = float(os.getenv("BUDGET_FLUSH_INTERVAL", "30"))
+    BUDGET_MAX_PENDING: int = int(os.getenv("BUDGET_MAX_PENDING", "10000"))
+
+    # تحلیل آبشاری: ابتدا مدل ارزان، سپس ارجاع موارد مبهم یا مهم به مدل قوی‌تر
+    ANALYZER_CASCADE_ENABLED: bool = os.getenv("ANALYZER_CASCADE_ENABLED", "True").lower() in ("true", "1", "t")
+    CASCADE_CONFIDENCE_THRESHOLD: float = float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.7"))
+    CASCADE_IMPORTANCE_THRESHOLD: float = float(os.getenv("CASCADE_IMPORTANCE_THRESHOLD", "0.7"))
+
+    # تشخیص موج از سری‌های دقیقه‌ای کلیدواژه‌ها به جای تجمیع جدول توییت‌ها
+    # (پیش از فعال‌سازی روی داده‌های موجود، scripts/rebuild_keyword_series.py اجرا شود)
+    WAVE_USE_KEYWORD_SERIES: bool = os.getenv("WAVE_USE_KEYWORD_SERIES", "False").lower() in ("true", "1", "t")
+
+    # تشخیص چند تفکیک‌پذیری: طول پنجره‌ها به دقیقه و گام پنجره (طول پنجره تقسیم بر این مقدار)
+    WAVE_RESOLUTIONS: str = os.getenv("WAVE_RESOLUTIONS", "5,15,60,240")
+    WAVE_HOP_FRACTION: int = int(os.getenv("WAVE_HOP_FRACTION", "4"))
+    # هشدارهای دوره‌ای موج با تشخیص چند تفکیک‌پذیری (به جای پنجره ثابت)
+    WAVE_ALERT_MULTI_RESOLUTION: bool = os.getenv("WAVE_ALERT_MULTI_RESOLUTION", "True").lower() in ("true", "1", "t")
+
+    # چرخه عمر موج‌ها: فاصله ادغام تشخیص‌ها، مدت بسته شدن بدون تشخیص (دقیقه) و نسبت رشد اساسی
+    WAVE_MERGE_GAP_MINUTES: int = int(os.getenv("WAVE_MERGE_GAP_MINUTES", "60"))
+    WAVE_CLOSE_AFTER_MINUTES: int = int(os.getenv("WAVE_CLOSE_AFTER_MINUTES", "180"))
+    WAVE_CHANGE_RATIO: float = float(os.getenv("WAVE_CHANGE_RATIO", "0.5"))
+
+    # تشخیص آنلاین موج در مرحله پردازش (میانگین و واریانس نمایی تعداد توییت‌های دقیقه‌ای)
+    ONLINE_WAVE_ENABLED: bool = os.getenv("ONLINE_WAVE_ENABLED", "True").lower() in ("true", "1", "t")
+    ONLINE_WAVE_ALPHA: float = float(os.getenv("ONLINE_WAVE_ALPHA", "0.05"))
+    ONLINE_WAVE_Z_THRESHOLD: float = float(os.getenv("ONLINE_WAVE_Z_THRESHOLD", "4.0"))
+    ONLINE_WAVE_MIN_TWEETS: int = int(os.getenv("ONLINE_WAVE_MIN_TWEETS", "10"))
+    ONLINE_WAVE_WARMUP_MINUTES: int = int(os.getenv("ONLINE_WAVE_WARMUP_MINUTES", "60"))
+    ONLINE_WAVE_COOLDOWN_MINUTES: int = int(os.getenv("ONLINE_WAVE_COOLDOWN_MINUTES", "30"))
+
+    # تشخیص انفجار هشتگ‌ها و n-gramها (Count-Min Sketch و Space-Saving در بازه‌های ثابت)
+    TERM_BURST_ENABLED: bool = os.getenv("TERM_BURST_ENABLED", "True").lower() in ("true", "1", "t")
+    TERM_BURST_BUCKET_MINUTES: int = int(os.getenv("TERM_BURST_BUCKET_MINUTES", "15"))
+    TERM_BURST_SKETCH_WIDTH: int = int(os.getenv("TERM_BURST_SKETCH_WIDTH", "2048"))
+    TERM_BURST_SKETCH_DEPTH: int = int(os.getenv("TERM_BURST_SKETCH_DEPTH", "4"))
+    TERM_BURST_TOP_K: int = int(os.getenv("TERM_BURST_TOP_K", "200"))
+    TERM_BURST_ALPHA: float = float(os.getenv("TERM_BURST_ALPHA", "0.1"))
+    TERM_BURST_Z_THRESHOLD: float = float(os.getenv("TERM_BURST_Z_THRESHOLD", "5.0"))
+    TERM_BURST_MIN_COUNT: int = int(os.getenv("TERM_BURST_MIN_COUNT", "20"))
+    TERM_BURST_WARMUP_BUCKETS: int = int(os.getenv("TERM_BURST_WARMUP_BUCKETS", "8"))
+    TERM_BURST_COOLDOWN_MINUTES: int = int(os.getenv("TERM_BURST_COOLDOWN_MINUTES", "180"))
+    TERM_BURST_NGRAM_SIZES: str = os.getenv("TERM_BURST_NGRAM_SIZES", "2")
+    TERM_BURST_CREATE_ALERTS: bool = os.getenv("TERM_BURST_CREATE_ALERTS", "True").lower() in ("true", "1", "t")
+
+    # ساخت گزارش‌ها از خلاصه‌های ساعتی (report_hour_stats) به جای تجمیع کامل جدول توییت‌ها
+    REPORT_USE_SNAPSHOTS: bool = os.getenv("REPORT_USE_SNAPSHOTS", "True").lower() in ("true", "1", "t")
+
+    # شمارش توییت‌ها: مدت کش تعداد (ثانیه، 0 برای غیرفعال) و پاسخ تقریبی از سری‌های دقیقه‌ای
+    # (پیش از فعال‌سازی، scripts/rebuild_keyword_series.py برای کل تاریخچه توییت‌ها اجرا شود)
+    TWEET_COUNT_CACHE_TTL: int = int(os.getenv("TWEET_COUNT_CACHE_TTL", "60"))
+    TWEET_COUNT_USE_ROLLUPS: bool = os.getenv("TWEET_COUNT_USE_ROLLUPS", "False").lower() in ("true", "1", "t")
+
+    # فشرده‌سازی پاسخ‌ها: حداقل اندازه پاسخ (بایت) و سطح فشرده‌سازی GZip
+    GZIP_MINIMUM_SIZE: int = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+    GZIP_COMPRESS_LEVEL: int = int(os.getenv("GZIP_COMPRESS_LEVEL", "5"))
+
+    # کش HTTP: مدت تازگی پاسخ‌ها در مرورگر (ثانیه) و طول بازه تغییر ETag آمار داشبورد (ثانیه)
+    HTTP_CACHE_MAX_AGE: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "5"))
+    DASHBOARD_CACHE_WINDOW: int = int(os.getenv("DASHBOARD_CACHE_WINDOW", "60"))
+
+    # رویدادهای زنده: ظرفیت صف هر کلاینت و فاصله پیام نگهداری اتصال (ثانیه)
+    LIVE_CLIENT_QUEUE_SIZE: int = int(os.getenv("LIVE_CLIENT_QUEUE_SIZE", "100"))
+    LIVE_HEARTBEAT_SECONDS: int = int(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+
     # تنظیمات سرویس‌ها
     SERVICE_RETRY_MAX: int = 3
     SERVICE_RETRY_DELAY: int = 5
@@ -0,0 +1,139 @@
+"""
+درخواست‌های شرطی HTTP (ETag).
+
+برای هر منبع (توییت‌ها، تحلیل‌ها، هشدارها و ...) یک نسخه در Redis نگه داشته
+می‌شود که مقدار آن زمان آخرین تغییر (نانوثانیه) است و مسیرهای نوشتن آن را به‌روز
+می‌کنند. ETag اندپوینت‌های پرتکرار از نسخه منابع وابسته و آدرس درخواست ساخته
+می‌شود؛ اگر با If-None-Match درخواست یکسان باشد، پاسخ 304 بدون اجرای کوئری‌ها
+برگردانده می‌شود.
+
+Last-Modified ارسال نمی‌شود: دقت آن یک ثانیه است و تغییری در همان ثانیه پاسخ قبلی،
+برای کلاینتی که فقط If-Modified-Since می‌فرستد پاسخ 304 کهنه می‌ساخت. ETag از
+نسخه نانوثانیه‌ای ساخته می‌شود و این مشکل را ندارد.
+"""
+
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.services.redis_service import get_redis_service
+
+logger = logging.getLogger(__name__)
+
+# منابع دارای نسخه
+RESOURCE_TWEETS = "tweets"
+RESOURCE_ANALYSIS = "analysis"
+RESOURCE_ALERTS = "alerts"
+RESOURCE_KEYWORDS = "keywords"
+RESOURCE_API_USAGE = "api_usage"
+
+# پیشوند کلیدهای نسخه در Redis
+VERSION_KEY_PREFIX = "resource_version:"
+
+
+async def bump_resource_versions(*resources: str) -> None:
+    """
+    ثبت تغییر منابع پس از نوشتن در دیتابیس
+
+    خطای Redis فقط لاگ می‌شود تا مسیر نوشتن متوقف نشود.
+
+    Args:
+        *resources (str): نام منابع تغییر کرده
+    """
+    version = str(time.time_ns())
+    try:
+        await get_redis_service().set_many({
+            VERSION_KEY_PREFIX + resource: version for resource in resources
+        })
+    except Exception as e:
+        logger.warning(f"Could not bump resource versions {resources}: {e}")
+
+
+async def get_resource_versions(resources: List[str]) -> Optional[Dict[str, int]]:
+    """
+    دریافت نسخه منابع با یک درخواست
+
+    منابعی که هنوز نسخه ندارند با زمان فعلی مقداردهی می‌شوند تا ETag آن‌ها تا
+    تغییر بعدی ثابت بماند.
+
+    Args:
+        resources (List[str]): نام منابع
+
+    Returns:
+        Optional[Dict[str, int]]: نسخه هر منبع یا None اگر Redis در دسترس نباشد
+    """
+    redis_service = get_redis_service()
+    try:
+        values = await redis_service.get_many([VERSION_KEY_PREFIX + resource for resource in resources])
+        versions = {}
+        for resource, value in zip(resources, values):
+            if value is None:
+                await redis_service.set_if_not_exists(VERSION_KEY_PREFIX + resource, str(time.time_ns()))
+                value = await redis_service.get_cache(VERSION_KEY_PREFIX + resource)
+                if value is None:
+                    return None
+            versions[resource] = int(value)
+        return versions
+    except Exception as e:
+        logger.warning(f"Could not read resource versions {resources}: {e}")
+        return None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    بررسی تطابق هدر If-None-Match با ETag (مقایسه ضعیف)
+
+    Args:
+        if_none_match (str): مقدار هدر
+        etag (str): ETag فعلی
+
+    Returns:
+        bool: آیا تطابق دارد
+    """
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
+
+
+def conditional_cache(*resources: str, max_age: int = 0, time_window: Optional[int] = None):
+    """
+    ساخت وابستگی FastAPI برای پشتیبانی از درخواست‌های شرطی
+
+    وابستگی پیش از اجرای اندپوینت اجرا می‌شود؛ در صورت تطابق ETag با
+    If-None-Match، پاسخ 304 برگردانده شده و اندپوینت اجرا نمی‌شود. در غیر این
+    صورت هدرهای ETag و Cache-Control به پاسخ اضافه می‌شوند. اندپوینت باید مقدار
+    ساده (نه شیء Response) برگرداند تا این هدرها به پاسخ اضافه شوند.
+
+    Args:
+        *resources (str): منابعی که پاسخ به آن‌ها وابسته است
+        max_age (int): مدت تازگی پاسخ در کش مرورگر (ثانیه)
+        time_window (Optional[int]): برای پاسخ‌های وابسته به زمان فعلی (مانند آمار
+            امروز)، ETag در هر بازه با این طول (ثانیه) تغییر می‌کند
+
+    Returns:
+        Callable: وابستگی FastAPI
+    """
+    async def dependency(request: Request, response: Response) -> None:
+        versions = await get_resource_versions(list(resources))
+        if versions is None:
+            return
+
+        parts = [request.url.path, request.url.query] + [f"{name}={versions[name]}" for name in resources]
+        if time_window:
+            parts.append(str(int(time.time()) // time_window))
+        etag = 'W/"' + hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20] + '"'
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={max_age}, must-revalidate",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+
+    return dependency
@@ -0,0 +1,96 @@
+"""
+صفحه‌بندی با نشانگر (keyset).
+
+به جای offset که با عمیق شدن صفحات کندتر می‌شود و با ورود ردیف‌های جدید جابه‌جا
+می‌شود، هر صفحه از آخرین (مقدار مرتب‌سازی، شناسه) صفحه قبل ادامه پیدا می‌کند.
+نشانگر یک رشته base64 مبهم است که نوع مرتب‌سازی و این دو مقدار را نگه می‌دارد.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+# هدر پاسخ حاوی نشانگر صفحه بعد
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_by: str, value: Any, row_id: int) -> str:
+    """
+    ساخت نشانگر از آخرین ردیف صفحه
+
+    Args:
+        sort_by (str): نوع مرتب‌سازی
+        value (Any): مقدار ستون مرتب‌سازی آخرین ردیف
+        row_id (int): شناسه آخرین ردیف
+
+    Returns:
+        str: نشانگر
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, is_datetime: bool = False) -> Tuple[Any, int]:
+    """
+    خواندن نشانگر
+
+    Args:
+        cursor (str): نشانگر
+        sort_by (str): نوع مرتب‌سازی درخواست (باید با نشانگر یکسان باشد)
+        is_datetime (bool): آیا مقدار مرتب‌سازی زمان است
+
+    Returns:
+        Tuple[Any, int]: (مقدار مرتب‌سازی، شناسه)
+
+    Raises:
+        HTTPException: در صورت نامعتبر بودن نشانگر
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if cursor_sort != sort_by:
+            raise ValueError("sort mismatch")
+        if is_datetime:
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="نشانگر صفحه نامعتبر است",
+        )
+
+
+def after_cursor(sort_expression, id_column, value: Any, row_id: int):
+    """
+    شرط ردیف‌های بعد از نشانگر برای مرتب‌سازی نزولی (مقدار، شناسه)
+
+    مقایسه سطری PostgreSQL مستقیماً از شاخص مرکب (مقدار، شناسه) استفاده می‌کند.
+
+    Args:
+        sort_expression: عبارت مرتب‌سازی
+        id_column: ستون شناسه
+        value (Any): مقدار مرتب‌سازی نشانگر
+        row_id (int): شناسه نشانگر
+
+    Returns:
+        شرط SQL
+    """
+    return tuple_(sort_expression, id_column) < tuple_(value, row_id)
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    """
+    افزودن نشانگر صفحه بعد به هدرهای پاسخ
+
+    Args:
+        response (Response): پاسخ
+        cursor (Optional[str]): نشانگر صفحه بعد (None اگر صفحه آخر باشد)
+    """
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
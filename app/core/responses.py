@@ -0,0 +1,41 @@
+"""
+کلاس‌های پاسخ API.
+
+پاسخ پیش‌فرض برنامه با orjson ساخته می‌شود که چند برابر سریع‌تر از json استاندارد
+است. کلیدهای غیر رشته‌ای (مانند شناسه‌های عددی) و آرایه‌های NumPy هم پشتیبانی
+می‌شوند تا رفتار با پاسخ JSON قبلی یکسان بماند.
+"""
+
+import json
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    پاسخ JSON با orjson
+
+    اندپوینت‌هایی که لیست‌های بزرگ را مستقیماً به صورت دیکشنری می‌سازند می‌توانند
+    این پاسخ را برگردانند تا از اعتبارسنجی دوباره مدل پاسخ عبور نکنند.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    قالب‌بندی یک رویداد Server-Sent Events.
+
+    Args:
+        event (str): نام رویداد
+        data (Any): داده قابل تبدیل به JSON
+
+    Returns:
+        str: رویداد SSE
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
@@ -0,0 +1,106 @@
+"""
+درج و به‌روزرسانی گروهی کلیدواژه‌ها.
+
+کلیدواژه‌ها با دستور INSERT ... ON CONFLICT (text) DO UPDATE در یک تراکنش ثبت
+می‌شوند؛ بنابراین ورود صدها کلیدواژه به جای یک SELECT و commit برای هر کلیدواژه
+فقط چند دستور (یکی برای هر دسته) هزینه دارد.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Keyword
+
+# حداکثر تعداد ردیف در هر دستور درج (محدودیت تعداد پارامترهای PostgreSQL)
+UPSERT_CHUNK_SIZE = 1000
+
+
+def _dedupe_keywords(keywords: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    حذف کلیدواژه‌های تکراری ورودی (آخرین مقدار هر متن باقی می‌ماند)
+
+    PostgreSQL اجازه نمی‌دهد یک ردیف در یک دستور ON CONFLICT دو بار به‌روز شود.
+
+    Args:
+        keywords (Iterable[Dict[str, Any]]): کلیدواژه‌ها
+
+    Returns:
+        List[Dict[str, Any]]: کلیدواژه‌های یکتا به ترتیب اولین ظهور
+    """
+    unique = {}
+    for keyword in keywords:
+        text = (keyword.get("text") or "").strip()
+        if text:
+            unique[text] = {**keyword, "text": text}
+    return list(unique.values())
+
+
+async def upsert_keywords(
+        db_session: AsyncSession,
+        keywords: Iterable[Dict[str, Any]],
+        update_existing: bool = True
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    درج یا به‌روزرسانی گروهی کلیدواژه‌ها براساس متن
+
+    کلیدواژه‌های موجود با اولویت، وضعیت فعال بودن و توضیحات جدید به‌روز می‌شوند.
+    commit بر عهده فراخواننده است تا کل ورود در یک تراکنش انجام شود.
+
+    Args:
+        db_session (AsyncSession): نشست دیتابیس
+        keywords (Iterable[Dict[str, Any]]): کلیدواژه‌ها (text، is_active، priority، description)
+        update_existing (bool): به‌روزرسانی کلیدواژه‌های موجود (در غیر این صورت فقط کلیدواژه‌های
+            جدید درج و برگردانده می‌شوند)
+
+    Returns:
+        Tuple[List[Dict[str, Any]], int]: کلیدواژه‌های ثبت شده و تعداد کلیدواژه‌های جدید
+    """
+    rows = _dedupe_keywords(keywords)
+    now = datetime.utcnow()
+    saved = []
+    created_count = 0
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+        stmt = pg_insert(Keyword).values([
+            {
+                "text": row["text"],
+                "is_active": row.get("is_active", True),
+                "priority": row.get("priority", 1),
+                "description": row.get("description"),
+                "created_at": now,
+                "updated_at": now
+            }
+            for row in chunk
+        ])
+        if update_existing:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Keyword.text],
+                set_={
+                    "is_active": stmt.excluded.is_active,
+                    "priority": stmt.excluded.priority,
+                    "description": stmt.excluded.description,
+                    "updated_at": stmt.excluded.updated_at
+                }
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Keyword.text])
+
+        stmt = stmt.returning(
+            Keyword.id, Keyword.text, Keyword.is_active, Keyword.priority,
+            Keyword.description, Keyword.created_at,
+            # xmax برابر صفر یعنی ردیف درج شده و به‌روز نشده است
+            literal_column("(xmax = 0)").label("inserted")
+        )
+
+        result = await db_session.execute(stmt)
+        for row in result.fetchall():
+            record = dict(row._mapping)
+            created_count += bool(record.pop("inserted"))
+            saved.append(record)
+
+    return saved, created_count
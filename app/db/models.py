@@ -5,11 +5,14 @@
 """
 
 from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index, JSON, Table
+from sqlalchemy import func, literal_column
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
+from app.db.search import search_document
+
 Base = declarative_base()
 
 
@@ -65,12 +68,27 @@ class Tweet(Base):
     __table_args__ = (
         Index('idx_tweet_sentiment_created', sentiment_label, created_at),
         Index('idx_tweet_importance_created', importance_score, created_at),
+        # شاخص جستجوی متن کامل روی متن نرمال شده (app.db.search)
+        Index('idx_tweet_content_search', search_document(content), postgresql_using='gin'),
     )
 
     def __repr__(self):
         return f"<Tweet(id={self.id}, tweet_id={self.tweet_id})>"
 
 
+# عبارت‌های مرتب‌سازی نزولی لیست توییت‌ها برای صفحه‌بندی با نشانگر؛ مقادیر خالی با
+# مقداری کمتر از همه مقادیر واقعی جایگزین می‌شوند تا مقایسه سطری (مقدار، شناسه) معتبر باشد
+TWEET_SORT_EXPRESSIONS = {
+    "date": func.coalesce(Tweet.created_at, literal_column("'1970-01-01 00:00:00'::timestamp")),
+    "importance": func.coalesce(Tweet.importance_score, literal_column("-1.0")),
+    "sentiment": func.coalesce(Tweet.sentiment_score, literal_column("-2.0")),
+}
+
+Index('idx_tweet_date_keyset', TWEET_SORT_EXPRESSIONS["date"], Tweet.id)
+Index('idx_tweet_importance_keyset', TWEET_SORT_EXPRESSIONS["importance"], Tweet.id)
+Index('idx_tweet_sentiment_keyset', TWEET_SORT_EXPRESSIONS["sentiment"], Tweet.id)
+
+
 class User(Base):
     """
     مدل داده‌ای برای ذخیره‌سازی کاربران
@@ -174,6 +192,83 @@ class TweetKeyword(Base):
         return f"<TweetKeyword(tweet_id={self.tweet_id}, keyword_id={self.keyword_id})>"
 
 
+class KeywordMinuteStat(Base):
+    """
+    مدل داده‌ای برای آمار دقیقه‌ای هر کلیدواژه
+
+    این جدول هنگام پردازش و تحلیل توییت‌ها به‌روزرسانی می‌شود تا تشخیص موج
+    بدون تجمیع جدول توییت‌ها انجام شود. keyword_id برابر 0 آمار همه توییت‌ها است.
+
+    Attributes:
+        keyword_id (int): شناسه کلیدواژه (0 برای همه توییت‌ها)
+        bucket (datetime): ابتدای دقیقه
+        tweet_count (int): تعداد توییت‌ها
+        scored_count (int): تعداد توییت‌های دارای امتیاز احساسات
+        sentiment_sum (float): مجموع امتیاز احساسات
+        positive_count (int): تعداد توییت‌های مثبت
+        negative_count (int): تعداد توییت‌های منفی
+        neutral_count (int): تعداد توییت‌های خنثی
+        mixed_count (int): تعداد توییت‌های ترکیبی
+    """
+    __tablename__ = "keyword_minute_stats"
+
+    keyword_id = Column(Integer, primary_key=True)
+    bucket = Column(DateTime, primary_key=True, index=True)
+    tweet_count = Column(Integer, default=0, nullable=False)
+    scored_count = Column(Integer, default=0, nullable=False)
+    sentiment_sum = Column(Float, default=0.0, nullable=False)
+    positive_count = Column(Integer, default=0, nullable=False)
+    negative_count = Column(Integer, default=0, nullable=False)
+    neutral_count = Column(Integer, default=0, nullable=False)
+    mixed_count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<KeywordMinuteStat(keyword_id={self.keyword_id}, bucket={self.bucket}, count={self.tweet_count})>"
+
+
+class ReportHourStat(Base):
+    """
+    مدل داده‌ای برای خلاصه ساعتی گزارش‌ها
+
+    گزارش هر بازه زمانی از جمع این خلاصه‌ها ساخته می‌شود و فقط ساعت‌های ناقص
+    ابتدا و انتهای بازه به صورت زنده محاسبه می‌شوند. ردیف keyword_id برابر 0
+    (همه توییت‌ها) علامت تغییر ساعت (dirty_at) را نیز نگه می‌دارد.
+
+    Attributes:
+        keyword_id (int): شناسه کلیدواژه (0 برای همه توییت‌ها)
+        hour (datetime): ابتدای ساعت
+        tweet_count (int): تعداد توییت‌های تحلیل شده
+        scored_count (int): تعداد توییت‌های دارای امتیاز احساسات
+        sentiment_sum (float): مجموع امتیاز احساسات
+        positive_count (int): تعداد توییت‌های مثبت
+        negative_count (int): تعداد توییت‌های منفی
+        neutral_count (int): تعداد توییت‌های خنثی
+        mixed_count (int): تعداد توییت‌های ترکیبی
+        topic_stats (JSON): تعداد و مجموع امتیاز ارتباط هر موضوع ({نام: [تعداد، مجموع]})
+        top_tweet_ids (JSON): شناسه مهم‌ترین توییت‌های ساعت
+        dirty_at (datetime): زمان آخرین تغییر توییت‌های ساعت
+        computed_at (datetime): زمان آخرین محاسبه خلاصه
+    """
+    __tablename__ = "report_hour_stats"
+
+    keyword_id = Column(Integer, primary_key=True)
+    hour = Column(DateTime, primary_key=True, index=True)
+    tweet_count = Column(Integer, default=0, nullable=False)
+    scored_count = Column(Integer, default=0, nullable=False)
+    sentiment_sum = Column(Float, default=0.0, nullable=False)
+    positive_count = Column(Integer, default=0, nullable=False)
+    negative_count = Column(Integer, default=0, nullable=False)
+    neutral_count = Column(Integer, default=0, nullable=False)
+    mixed_count = Column(Integer, default=0, nullable=False)
+    topic_stats = Column(JSON, nullable=True)
+    top_tweet_ids = Column(JSON, nullable=True)
+    dirty_at = Column(DateTime, nullable=True)
+    computed_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ReportHourStat(keyword_id={self.keyword_id}, hour={self.hour}, count={self.tweet_count})>"
+
+
 class Topic(Base):
     """
     مدل داده‌ای برای ذخیره‌سازی موضوعات
@@ -259,10 +354,78 @@ class Alert(Base):
     # روابط
     related_tweet = relationship("Tweet", foreign_keys=[related_tweet_id], back_populates="alerts")
 
+    # شاخص صفحه‌بندی با نشانگر (created_at، id)
+    __table_args__ = (
+        Index('idx_alert_created_keyset', created_at, id),
+    )
+
     def __repr__(self):
         return f"<Alert(id={self.id}, title={self.title}, severity={self.severity})>"
 
 
+class Wave(Base):
+    """
+    مدل داده‌ای برای ردیابی موج‌ها در طول عمرشان
+
+    هر موج با نوع، کلیدواژه‌ها و دقیقه شروع اولین تشخیص شناخته می‌شود. تشخیص‌های
+    بعدی همان رویداد به جای ساخت هشدار جدید، این ردیف و هشدار مرتبط را به‌روز می‌کنند.
+
+    Attributes:
+        id (int): شناسه اولیه
+        identity_key (str): شناسه یکتای موج (نوع:کلیدواژه‌ها:دقیقه شروع)
+        wave_type (str): نوع موج (volume, sentiment)
+        keyword_key (str): کلیدواژه‌های مرتب شده و جدا شده با کاما (* برای همه توییت‌ها،
+            فهرست‌های بلند با درهم‌ساز کوتاه می‌شوند)
+        status (str): وضعیت موج (open, growing, peaked, closed)
+        start_time (datetime): شروع موج
+        end_time (datetime): پایان آخرین بازه تشخیص
+        tweet_count (int): تعداد توییت‌های آخرین تشخیص
+        peak_tweet_count (int): بیشترین تعداد توییت تشخیص داده شده
+        importance_score (float): امتیاز اهمیت آخرین تشخیص
+        peak_importance (float): بیشترین امتیاز اهمیت
+        detection_count (int): تعداد دفعات تشخیص
+        alert_id (int): شناسه هشدار مرتبط
+        alerted_tweet_count (int): تعداد توییت در آخرین به‌روزرسانی هشدار
+        analyzed_tweet_count (int): تعداد توییت در زمان آخرین تحلیل عمیق
+        analyzed_at (datetime): زمان آخرین تحلیل عمیق
+        last_seen_at (datetime): زمان آخرین تشخیص
+        closed_at (datetime): زمان بسته شدن موج
+    """
+    __tablename__ = "waves"
+
+    id = Column(Integer, primary_key=True)
+    identity_key = Column(String(512), unique=True, nullable=False)
+    wave_type = Column(String(20), nullable=False)
+    keyword_key = Column(String(255), nullable=False)
+    status = Column(String(20), default="open", nullable=False, index=True)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    tweet_count = Column(Integer, default=0)
+    peak_tweet_count = Column(Integer, default=0)
+    importance_score = Column(Float, default=0.0)
+    peak_importance = Column(Float, default=0.0)
+    detection_count = Column(Integer, default=1)
+    alert_id = Column(Integer, ForeignKey("alerts.id", ondelete="SET NULL"), nullable=True, index=True)
+    alerted_tweet_count = Column(Integer, nullable=True)
+    analyzed_tweet_count = Column(Integer, nullable=True)
+    analyzed_at = Column(DateTime, nullable=True)
+    last_seen_at = Column(DateTime, default=datetime.utcnow)
+    closed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # روابط
+    alert = relationship("Alert")
+
+    # شاخص یافتن موج‌های باز یک کلیدواژه
+    __table_args__ = (
+        Index('idx_wave_lookup', keyword_key, wave_type, status),
+    )
+
+    def __repr__(self):
+        return f"<Wave(id={self.id}, type={self.wave_type}, keywords={self.keyword_key}, status={self.status})>"
+
+
 class ApiUsage(Base):
     """
     مدل داده‌ای برای ثبت استفاده از API
@@ -276,6 +439,9 @@ class ApiUsage(Base):
         tokens_out (int): تعداد توکن‌های خروجی (برای Claude)
         item_count (int): تعداد آیتم‌ها (برای Twitter)
         cost (float): هزینه تخمینی
+        model (str): مدل Claude استفاده شده
+        tier (str): لایه تحلیل آبشاری (triage, escalation)
+        latency_ms (int): زمان پاسخ API به میلی‌ثانیه
     """
     __tablename__ = "api_usage"
 
@@ -287,6 +453,9 @@ class ApiUsage(Base):
     tokens_out = Column(Integer, default=0)
     item_count = Column(Integer, default=0)
     cost = Column(Float, default=0.0)
+    model = Column(String(100), nullable=True, index=True)
+    tier = Column(String(20), nullable=True, index=True)
+    latency_ms = Column(Integer, nullable=True)
 
     def __repr__(self):
         return f"<ApiUsage(date={self.date}, api_type={self.api_type}, cost=${self.cost:.4f})>"
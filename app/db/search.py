@@ -0,0 +1,163 @@
+"""
+جستجوی متن کامل توییت‌ها.
+
+متن توییت‌ها پیش از ساخت tsvector نرمال‌سازی می‌شود: حروف عربی به معادل فارسی
+(ي به ی، ك به ک و ...)، نیم‌فاصله به فاصله، ارقام فارسی و عربی به لاتین تبدیل
+و اعراب و کشیده حذف می‌شوند. PostgreSQL پیکربندی فارسی ندارد، بنابراین از
+پیکربندی simple (بدون ریشه‌یابی) استفاده می‌شود.
+
+عبارت tsvector به صورت literal (بدون پارامتر) ساخته می‌شود تا کوئری‌ها دقیقاً با
+عبارت شاخص GIN یکسان باشند و برنامه‌ریز از شاخص استفاده کند.
+
+متن برجسته شده یک قطعه HTML امن است: متن توییت پیش از ts_headline escape می‌شود و
+تنها برچسب آن <b> دور کلمات منطبق است.
+"""
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+# پیکربندی متن PostgreSQL
+SEARCH_CONFIG = "simple"
+
+# نگاشت حروف: هر حرف FROM به حرف متناظر TO تبدیل می‌شود و حروف اضافه FROM حذف می‌شوند
+_CHAR_MAP = {
+    "ي": "ی", "ى": "ی", "ئ": "ی",
+    "ك": "ک",
+    "ۀ": "ه", "ة": "ه",
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و",
+    "\u200c": " ",  # نیم‌فاصله
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # ارقام فارسی
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # ارقام عربی
+}
+# اعراب (فتحه تا سکون) و کشیده حذف می‌شوند
+_REMOVED_CHARS = "".join(chr(code) for code in range(0x064B, 0x0653)) + "ـ"
+
+TRANSLATE_FROM = "".join(_CHAR_MAP) + _REMOVED_CHARS
+TRANSLATE_TO = "".join(_CHAR_MAP.values())
+
+_PYTHON_TABLE = str.maketrans(
+    {**_CHAR_MAP, **{char: None for char in _REMOVED_CHARS}}
+)
+
+# جایگزینی نویسه‌های ویژه HTML (& باید اول جایگزین شود)
+HTML_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;"))
+
+# تنظیمات برجسته‌سازی بخش‌های منطبق
+HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxFragments=2, MaxWords=20, MinWords=5, FragmentDelimiter= ... "
+
+
+def _sql_string(value: str) -> ColumnElement:
+    """
+    ساخت رشته SQL به صورت literal
+
+    Args:
+        value (str): مقدار
+
+    Returns:
+        ColumnElement: رشته literal
+    """
+    return literal_column("'" + value.replace("'", "''") + "'")
+
+
+def normalize_text(text: str) -> str:
+    """
+    نرمال‌سازی متن با همان قواعد شاخص جستجو
+
+    Args:
+        text (str): متن
+
+    Returns:
+        str: متن نرمال شده
+    """
+    return (text or "").translate(_PYTHON_TABLE)
+
+
+def escape_html(column) -> ColumnElement:
+    """
+    escape نویسه‌های ویژه HTML یک ستون متنی (معادل html.escape)
+
+    Args:
+        column: ستون متن
+
+    Returns:
+        ColumnElement: متن escape شده
+    """
+    escaped = column
+    for char, entity in HTML_ESCAPES:
+        escaped = func.replace(escaped, _sql_string(char), _sql_string(entity))
+    return escaped
+
+
+def search_document(column) -> ColumnElement:
+    """
+    عبارت tsvector نرمال شده یک ستون متنی (همان عبارت شاخص GIN)
+
+    Args:
+        column: ستون متن
+
+    Returns:
+        ColumnElement: عبارت tsvector
+    """
+    return func.to_tsvector(
+        literal_column(f"'{SEARCH_CONFIG}'::regconfig"),
+        func.translate(
+            func.coalesce(column, _sql_string("")),
+            _sql_string(TRANSLATE_FROM),
+            _sql_string(TRANSLATE_TO)
+        )
+    )
+
+
+def search_query(text: str) -> ColumnElement:
+    """
+    ساخت tsquery از عبارت جستجوی کاربر
+
+    از نحو websearch پشتیبانی می‌شود ("عبارت دقیق"، or و -کلمه).
+
+    Args:
+        text (str): عبارت جستجو
+
+    Returns:
+        ColumnElement: عبارت tsquery
+    """
+    return func.websearch_to_tsquery(
+        literal_column(f"'{SEARCH_CONFIG}'::regconfig"),
+        normalize_text(text)
+    )
+
+
+def search_rank(column, query: ColumnElement) -> ColumnElement:
+    """
+    امتیاز ارتباط متن با عبارت جستجو
+
+    Args:
+        column: ستون متن
+        query (ColumnElement): عبارت tsquery
+
+    Returns:
+        ColumnElement: امتیاز (ts_rank_cd نرمال شده با طول متن)
+    """
+    return func.ts_rank_cd(search_document(column), query, 1)
+
+
+def search_headline(column, query: ColumnElement) -> ColumnElement:
+    """
+    بخش‌های منطبق متن با برجسته‌سازی کلمات جستجو
+
+    متن توییت از کاربر می‌آید و ts_headline آن را escape نمی‌کند؛ بنابراین متن پیش
+    از برجسته‌سازی escape می‌شود تا خروجی جز <b> هیچ برچسب HTML نداشته باشد.
+
+    Args:
+        column: ستون متن
+        query (ColumnElement): عبارت tsquery
+
+    Returns:
+        ColumnElement: قطعه HTML امن با کلمات منطبق داخل <b>
+    """
+    return func.ts_headline(
+        literal_column(f"'{SEARCH_CONFIG}'::regconfig"),
+        escape_html(func.translate(column, _sql_string(TRANSLATE_FROM), _sql_string(TRANSLATE_TO))),
+        query,
+        _sql_string(HEADLINE_OPTIONS)
+    )
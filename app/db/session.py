@@ -4,15 +4,17 @@
 این ماژول ارتباط با دیتابیس و مدیریت نشست‌های SQLAlchemy را فراهم می‌کند.
 """
 
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, Optional, Callable, Awaitable, List, Any
 from contextlib import asynccontextmanager
+import asyncio
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 import logging
 
 from app.config import settings
-from app.db.models import Base
+from app.db.models import Base, ApiUsage
 
 logger = logging.getLogger(__name__)
 
@@ -36,10 +38,56 @@ async_session_factory = async_sessionmaker(
 )
 
 
+# ستون‌هایی که بعد از ساخت جداول به مدل‌های موجود اضافه شده‌اند
+ADDED_COLUMNS = (
+    ApiUsage.__table__.c.model,
+    ApiUsage.__table__.c.tier,
+    ApiUsage.__table__.c.latency_ms,
+)
+
+
+def _add_missing_columns(connection) -> None:
+    """
+    افزودن ستون‌های جدید به جداول موجود
+
+    create_all جداول موجود را تغییر نمی‌دهد؛ بدون این مرحله درج در این جداول و
+    ساخت شاخص روی ستون‌های جدید با خطای UndefinedColumn متوقف می‌شود. ستون‌ها
+    nullable و بدون مقدار پیش‌فرض هستند، پس افزودنشان فقط متادیتا را تغییر می‌دهد.
+
+    Args:
+        connection: اتصال همگام SQLAlchemy
+    """
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    existing = {}
+
+    for column in ADDED_COLUMNS:
+        table = column.table
+        if table.name not in existing:
+            existing[table.name] = {item["name"] for item in inspector.get_columns(table.name)}
+        if column.name in existing[table.name]:
+            continue
+
+        logger.info(f"Adding column {table.name}.{column.name}")
+        connection.exec_driver_sql(
+            f"ALTER TABLE {preparer.format_table(table)} "
+            f"ADD COLUMN IF NOT EXISTS {preparer.format_column(column)} "
+            f"{column.type.compile(dialect=connection.dialect)}"
+        )
+
+
 async def create_tables():
-    """ایجاد جداول دیتابیس اگر وجود نداشته باشند"""
+    """
+    ایجاد جداول دیتابیس اگر وجود نداشته باشند
+
+    شاخص‌های جداول جدید همراه با آن‌ها ساخته می‌شوند. شاخص‌هایی که بعداً به جداول
+    موجود اضافه شده‌اند اینجا ساخته نمی‌شوند، چون CREATE INDEX معمولی در تراکنش
+    راه‌اندازی تا پایان ساخت، نوشتن در جدول را قفل می‌کند؛ این شاخص‌ها با
+    scripts/create_indexes.py به صورت CONCURRENTLY ساخته می‌شوند.
+    """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
 
 
 # Context manager برای استفاده در with
@@ -73,6 +121,45 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def run_concurrently(*calls: Callable[[AsyncSession], Awaitable[Any]]) -> List[Any]:
+    """
+    اجرای هم‌زمان چند عملیات مستقل دیتابیس.
+
+    یک AsyncSession در هر لحظه فقط یک کوئری اجرا می‌کند؛ بنابراین هر عملیات
+    نشست (و اتصال) جداگانه‌ای از pool می‌گیرد و زمان کل برابر کندترین عملیات است.
+
+    Args:
+        *calls: توابعی که یک نشست می‌گیرند و نتیجه را برمی‌گردانند
+
+    Returns:
+        List[Any]: نتایج به ترتیب توابع
+    """
+    async def _run(call: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+        async with get_session() as session:
+            return await call(session)
+
+    return list(await asyncio.gather(*(_run(call) for call in calls)))
+
+
+async def fetch_concurrently(*statements) -> List[List[Any]]:
+    """
+    اجرای هم‌زمان چند کوئری مستقل و دریافت همه ردیف‌های آن‌ها.
+
+    Args:
+        *statements: کوئری‌های SELECT
+
+    Returns:
+        List[List[Any]]: ردیف‌های هر کوئری به ترتیب کوئری‌ها
+    """
+    async def _fetch(statement, session: AsyncSession) -> List[Any]:
+        result = await session.execute(statement)
+        return result.fetchall()
+
+    return await run_concurrently(*(
+        lambda session, statement=statement: _fetch(statement, session) for statement in statements
+    ))
+
+
 # تابع صریح برای بستن موتور دیتابیس و آزادسازی همه اتصالات
 async def close_db_engine():
     """بستن موتور دیتابیس و آزادسازی تمام اتصالات"""
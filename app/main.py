@@ -22,7 +22,12 @@ from app.db.session import get_db, create_tables
 from app.middlewares.logging_middleware import LoggingMiddleware
 from app.middlewares.error_handler import ErrorHandlerMiddleware
 from app.middlewares.debug_middleware import APIDebugMiddleware, DetailedCORSMiddleware
+from app.middlewares.compression_middleware import CompressionMiddleware
 from app.core.security import get_current_user, get_current_superuser
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import FastJSONResponse
+from app.services.analyzer.budget_ledger import get_budget_ledger
+from app.services.live_updates import get_live_update_hub
 
 # روترهای API
 from app.api.v1.auth import router as auth_router
@@ -31,6 +36,7 @@ from app.api.v1.analysis import router as analysis_router
 from app.api.v1.waves import router as waves_router
 from app.api.v1.settings import router as settings_router
 from app.api.v1.services import router as services_router
+from app.api.v1.live import router as live_router
 
 from sqlalchemy import select, text
 
@@ -80,6 +86,12 @@ async def lifespan(app: FastAPI):
     # عملیات خاموش کردن
     logger.info("Shutting down application...")
 
+    # توقف درج دوره‌ای و درج ردیف‌های استفاده API که هنوز در دیتابیس ثبت نشده‌اند
+    await get_budget_ledger().stop()
+
+    # بستن اشتراک Redis رویدادهای زنده
+    await get_live_update_hub().stop()
+
     # بستن اتصالات خارجی
     # TODO: پیاده‌سازی بستن اتصالات
 
@@ -92,6 +104,7 @@ app = FastAPI(
     lifespan=lifespan,
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    default_response_class=FastJSONResponse,
 )
 
 # افزودن میان‌افزارها
@@ -101,10 +114,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 app.add_middleware(APIDebugMiddleware)  # میان‌افزار دیباگ
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(ErrorHandlerMiddleware)
+# فشرده‌سازی بیرونی‌ترین لایه است تا میان‌افزارهای دیگر بدنه فشرده نشده را ببینند
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL,
+)
 
 # نصب فایل‌های استاتیک
 app.mount("/static", StaticFiles(directory=str(FRONTEND_DIR)), name="static")
@@ -117,6 +137,7 @@ app.include_router(analysis_router, prefix=settings.API_V1_STR)  # حذف واب
 app.include_router(waves_router, prefix=settings.API_V1_STR)  # حذف وابستگی احراز هویت
 app.include_router(settings_router, prefix=settings.API_V1_STR)  # حذف وابستگی احراز هویت
 app.include_router(services_router, prefix=settings.API_V1_STR)  # حذف وابستگی احراز هویت
+app.include_router(live_router, prefix=settings.API_V1_STR)
 
 
 @app.get("/", response_class=HTMLResponse)
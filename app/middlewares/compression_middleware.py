@@ -0,0 +1,66 @@
+"""
+میان‌افزار فشرده‌سازی پاسخ‌ها.
+
+پاسخ‌های بزرگ‌تر از حد مشخص با GZip فشرده می‌شوند. جریان‌های رویداد (SSE) فشرده
+نمی‌شوند تا هر رویداد بلافاصله به کاربر برسد و فایل‌های Parquet که خودشان
+فشرده هستند دوباره فشرده نمی‌شوند.
+"""
+
+from typing import Iterable
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# نوع محتواهایی که فشرده نمی‌شوند
+EXCLUDED_MEDIA_TYPES = (
+    "text/event-stream",
+    "application/vnd.apache.parquet",
+)
+
+
+class _SelectiveGZipResponder(GZipResponder):
+    """پاسخ‌دهنده GZip که نوع محتواهای مستثنی را بدون تغییر ارسال می‌کند"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int, excluded_media_types: Iterable[str]):
+        super().__init__(app, minimum_size, compresslevel=compresslevel)
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    async def send_with_gzip(self, message: Message) -> None:
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith(self.excluded_media_types):
+                # مانند پاسخی که از قبل کدگذاری شده، بدون فشرده‌سازی ارسال می‌شود
+                self.content_encoding_set = True
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    میان‌افزار فشرده‌سازی GZip با استثنای جریان‌های رویداد و فایل‌های فشرده
+
+    Attributes:
+        minimum_size (int): حداقل اندازه پاسخ برای فشرده‌سازی (بایت)
+        compresslevel (int): سطح فشرده‌سازی GZip
+        excluded_media_types (tuple): نوع محتواهایی که فشرده نمی‌شوند
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            minimum_size: int = 1024,
+            compresslevel: int = 5,
+            excluded_media_types: Iterable[str] = EXCLUDED_MEDIA_TYPES
+    ) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """اجرای میان‌افزار"""
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _SelectiveGZipResponder(
+                self.app, self.minimum_size, self.compresslevel, self.excluded_media_types
+            )
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -22,4 +22,5 @@ class ApiUsageResponse(BaseModel):
     """آمار استفاده از API"""
     daily_usage: Dict[str, List[Dict[str, Any]]]
     total_cost: Dict[str, float]
-    period_days: int
\ No newline at end of file
+    period_days: int
+    tier_usage: List[Dict[str, Any]] = []
\ No newline at end of file
@@ -17,7 +17,8 @@ class TweetFilterParams(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     min_importance: Optional[float] = None
-    sort_by: Optional[str] = "date"  # date, importance, sentiment
+    sort_by: Optional[str] = None  # date, importance, sentiment, relevance (پیش‌فرض: relevance با query و در غیر این صورت date)
+    cursor: Optional[str] = None  # نشانگر صفحه بعد (هدر X-Next-Cursor پاسخ قبلی)
     skip: int = 0
     limit: int = 100
 
@@ -37,7 +38,13 @@ class UserResponse(BaseModel):
 
 
 class TweetResponse(BaseModel):
-    """مدل پاسخ توییت"""
+    """
+    مدل پاسخ توییت
+
+    highlight فقط در جستجوی متن پر می‌شود و قطعه HTML امن است: متن توییت escape
+    شده و کلمات منطبق داخل <b> هستند. content متن خام است و باید به صورت متن
+    (نه HTML) نمایش داده شود.
+    """
     id: int
     tweet_id: str
     content: str
@@ -50,6 +57,8 @@ class TweetResponse(BaseModel):
     is_processed: bool
     is_analyzed: bool
     entities: Optional[Dict[str, Any]] = None
+    search_rank: Optional[float] = None
+    highlight: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -73,4 +82,15 @@ class KeywordResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class KeywordBulkRequest(BaseModel):
+    """مدل درخواست ورود گروهی کلیدواژه‌ها"""
+    keywords: List[KeywordCreate] = Field(..., min_length=1, max_length=5000)
+
+
+class KeywordBulkResponse(BaseModel):
+    """مدل پاسخ ورود گروهی کلیدواژه‌ها"""
+    created: int
+    updated: int
+    keywords: List[KeywordResponse]
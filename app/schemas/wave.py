@@ -16,6 +16,7 @@ class AlertFilterParams(BaseModel):
     is_read: Optional[bool] = None
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
+    cursor: Optional[str] = None  # نشانگر صفحه بعد (هدر X-Next-Cursor پاسخ قبلی)
     skip: int = 0
     limit: int = 100
 
@@ -36,6 +37,41 @@ class AlertResponse(BaseModel):
         orm_mode = True
 
 
+class TrackedWaveResponse(BaseModel):
+    """مدل پاسخ موج ردیابی شده"""
+    id: int
+    wave_type: str
+    keyword_key: str
+    status: str
+    start_time: datetime
+    end_time: datetime
+    tweet_count: int
+    peak_tweet_count: int
+    importance_score: float
+    peak_importance: float
+    detection_count: int
+    alert_id: Optional[int] = None
+    analyzed_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class EmergingTermResponse(BaseModel):
+    """مدل پاسخ هشتگ یا عبارت نوظهور"""
+    term: str
+    term_type: str
+    bucket_start: str
+    bucket_end: str
+    count: int
+    expected: float
+    z_score: float
+    importance_score: float
+    alert_id: Optional[int] = None
+
+
 class WaveResponse(BaseModel):
     """مدل پاسخ موج توییتری"""
     type: str
@@ -49,6 +85,14 @@ class WaveResponse(BaseModel):
     importance_score: float
     related_keywords: List[str] = []
     top_tweets: List[Dict[str, Any]] = []
+    z_score: Optional[float] = None
+    resolutions: List[int] = []
+
+
+class KeywordWavesResponse(BaseModel):
+    """مدل پاسخ موج‌های یک کلیدواژه"""
+    keyword: str
+    waves: List[WaveResponse]
 
 
 class WaveDetectionRequest(BaseModel):
@@ -56,6 +100,8 @@ class WaveDetectionRequest(BaseModel):
     keywords: Optional[List[str]] = None
     hours_back: int = 6
     min_importance: float = 3.0
+    per_keyword: bool = False
+    multi_resolution: Optional[bool] = None
 
 
 class WaveAnalysisResponse(BaseModel):
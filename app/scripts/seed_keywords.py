@@ -11,9 +11,8 @@ from pathlib import Path
 project_root = Path(__file__).parents[2]
 sys.path.insert(0, str(project_root))
 
-from sqlalchemy import select
 from app.db.session import get_session, create_tables
-from app.db.models import Keyword
+from app.db.keywords import upsert_keywords
 
 
 async def add_sample_keywords():
@@ -40,27 +39,14 @@ async def add_sample_keywords():
     ]
     
     async with get_session() as session:
-        # ابتدا بررسی کنیم کلیدواژه‌ها قبلاً وجود دارند یا خیر
-        stmt = select(Keyword)
-        result = await session.execute(stmt)
-        existing_keywords = result.scalars().all()
-        
-        existing_texts = [k.text for k in existing_keywords]
-        print(f"تعداد {len(existing_texts)} کلیدواژه از قبل موجود است:")
-        for text in existing_texts:
-            print(f"  - {text}")
-        
-        # اضافه کردن کلیدواژه‌های جدید
-        added_count = 0
-        for kw in sample_keywords:
-            if kw["text"] not in existing_texts:
-                keyword = Keyword(**kw)
-                session.add(keyword)
-                added_count += 1
-        
+        # درج کلیدواژه‌های جدید با یک دستور (کلیدواژه‌های موجود تغییر نمی‌کنند)
+        added_keywords, added_count = await upsert_keywords(session, sample_keywords, update_existing=False)
+
         if added_count > 0:
             await session.commit()
-            print(f"{added_count} کلیدواژه با موفقیت اضافه شد.")
+            print(f"{added_count} کلیدواژه با موفقیت اضافه شد:")
+            for keyword in added_keywords:
+                print(f"  - {keyword['text']}")
         else:
             print("کلیدواژه جدیدی اضافه نشد.")
 
@@ -13,16 +13,24 @@ import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update, and_, or_, func, desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import math
 
 from app.config import settings
-from app.db.models import Tweet, User, Keyword, Topic, TweetTopic, Alert, ApiUsage
+from app.db.session import fetch_concurrently
+from app.db.models import Tweet, User, Keyword, TweetKeyword, Topic, TweetTopic, Alert, ApiUsage
 from app.services.analyzer.claude_client import ClaudeClient
-from app.services.analyzer.cost_manager import CostManager, ApiType, AnalysisType
+from app.services.analyzer.cost_manager import CostManager, ApiType, AnalysisType, ModelTier
 from app.services.analyzer.wave_detector import WaveDetector
+from app.services.analyzer.keyword_series import KeywordSeriesService, ALL_KEYWORDS_ID
+from app.services.analyzer.report_snapshots import ReportSnapshotService
+from app.core.http_cache import bump_resource_versions, RESOURCE_ANALYSIS
 
 logger = logging.getLogger(__name__)
 
+# حداکثر تعداد نام موضوع در کش شناسه موضوعات
+TOPIC_CACHE_MAX_SIZE = 10000
+
 
 class TweetAnalyzer:
     """
@@ -37,15 +45,24 @@ class TweetAnalyzer:
         cost_manager (CostManager): مدیریت هزینه API
         wave_detector (WaveDetector): تشخیص موج‌های توییتری
         batch_size (int): اندازه دسته برای پردازش توییت‌ها
+        cascade_enabled (bool): آیا تحلیل آبشاری (Haiku سپس Sonnet) فعال است؟
+        confidence_threshold (float): حداقل اطمینان لایه اول برای عدم ارجاع
+        importance_threshold (float): امتیاز اهمیتی که بالاتر از آن توییت ارجاع داده می‌شود
     """
 
+    # کش مشترک نام موضوع به شناسه در این فرآیند
+    _topic_ids: Dict[str, int] = {}
+
     def __init__(
             self,
             db_session: AsyncSession,
             claude_client: ClaudeClient = None,
             cost_manager: CostManager = None,
             wave_detector: WaveDetector = None,
-            batch_size: int = 50
+            batch_size: int = 50,
+            cascade_enabled: Optional[bool] = None,
+            confidence_threshold: Optional[float] = None,
+            importance_threshold: Optional[float] = None
     ):
         """
         مقداردهی اولیه سرویس تحلیل
@@ -56,13 +73,31 @@ class TweetAnalyzer:
             cost_manager (CostManager, optional): مدیریت هزینه API
             wave_detector (WaveDetector, optional): تشخیص موج‌ها
             batch_size (int): اندازه دسته برای پردازش توییت‌ها
+            cascade_enabled (bool, optional): فعال بودن تحلیل آبشاری. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            confidence_threshold (float, optional): آستانه اطمینان برای ارجاع. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            importance_threshold (float, optional): آستانه اهمیت برای ارجاع. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
         """
         self.db_session = db_session
         self.claude_client = claude_client or ClaudeClient()
         self.cost_manager = cost_manager or CostManager(db_session)
         self.wave_detector = wave_detector or WaveDetector(db_session)
+        self.keyword_series = KeywordSeriesService(db_session)
+        self.report_snapshots = ReportSnapshotService(db_session)
+        self.use_report_snapshots = settings.REPORT_USE_SNAPSHOTS
         self.batch_size = batch_size or settings.ANALYZER_BATCH_SIZE
-        logger.info(f"TweetAnalyzer initialized with batch size: {self.batch_size}")
+        self.cascade_enabled = (
+            settings.ANALYZER_CASCADE_ENABLED if cascade_enabled is None else cascade_enabled
+        )
+        self.confidence_threshold = (
+            settings.CASCADE_CONFIDENCE_THRESHOLD if confidence_threshold is None else confidence_threshold
+        )
+        self.importance_threshold = (
+            settings.CASCADE_IMPORTANCE_THRESHOLD if importance_threshold is None else importance_threshold
+        )
+        logger.info(
+            f"TweetAnalyzer initialized with batch size: {self.batch_size}, "
+            f"cascade: {self.cascade_enabled}"
+        )
 
     async def initialize(self) -> None:
         """
@@ -77,6 +112,7 @@ class TweetAnalyzer:
         بستن اتصالات و آزادسازی منابع
         """
         await self.claude_client.close()
+        await self.cost_manager.close()
         logger.info("TweetAnalyzer closed")
 
     async def analyze_tweet(self, tweet_id: int) -> Dict[str, Any]:
@@ -118,25 +154,22 @@ class TweetAnalyzer:
         text = tweet.content
         language = tweet.language or "auto"
 
-        # انتخاب مدل بهینه براساس طول متن و اهمیت
-        is_important = tweet.importance_score is not None and tweet.importance_score > 0.7
-        model, estimation = self.cost_manager.select_optimal_model(
-            AnalysisType.SENTIMENT,
-            len(text),
-            is_important=is_important
-        )
+        is_important = self._is_important(tweet)
+
+        if self.cascade_enabled:
+            sentiment_result = await self._cascade_sentiment(text, language, tweet.importance_score)
+        else:
+            # انتخاب مدل بهینه براساس طول متن و اهمیت
+            model, estimation = self.cost_manager.select_optimal_model(
+                AnalysisType.SENTIMENT,
+                len(text),
+                is_important=is_important
+            )
 
-        # بهتر است از claude_client استفاده کنیم
-        sentiment_result = await self.claude_client.analyze_sentiment(text, language)
+            sentiment_result = await self.claude_client.analyze_sentiment(text, language, model=model)
 
-        # ثبت استفاده از API
-        await self.cost_manager.record_usage(
-            api_type=ApiType.CLAUDE,
-            operation="analyze_sentiment",
-            tokens_in=estimation["tokens_in"],
-            tokens_out=estimation["tokens_out"],
-            cost=estimation["estimated_cost"]
-        )
+            # ثبت استفاده از API
+            await self._record_claude_usage("analyze_sentiment", estimation)
 
         # استخراج نتایج
         sentiment_label = sentiment_result.get("sentiment", "neutral")
@@ -145,59 +178,35 @@ class TweetAnalyzer:
         # تحلیل موضوعات اگر توییت مهم باشد
         topics_result = {}
         if is_important:
-            # تحلیل موضوعات
-            topics_result = await self.claude_client.extract_topics(text, language)
-
-            # ثبت استفاده از API
             topic_model, topic_estimation = self.cost_manager.select_optimal_model(
                 AnalysisType.TOPICS,
                 len(text),
                 is_important=is_important
             )
 
-            await self.cost_manager.record_usage(
-                api_type=ApiType.CLAUDE,
-                operation="extract_topics",
-                tokens_in=topic_estimation["tokens_in"],
-                tokens_out=topic_estimation["tokens_out"],
-                cost=topic_estimation["estimated_cost"]
-            )
+            # تحلیل موضوعات
+            topics_result = await self.claude_client.extract_topics(text, language, model=topic_model)
+
+            # ثبت استفاده از API
+            await self._record_claude_usage("extract_topics", topic_estimation)
 
             # ذخیره موضوعات در دیتابیس
-            if "topics" in topics_result:
-                for topic_data in topics_result.get("topics", []):
-                    topic_title = topic_data.get("title")
-                    if topic_title:
-                        # بررسی وجود موضوع
-                        stmt = select(Topic).where(Topic.name == topic_title)
-                        result = await self.db_session.execute(stmt)
-                        topic = result.scalar_one_or_none()
-
-                        if not topic:
-                            # ایجاد موضوع جدید
-                            topic = Topic(
-                                name=topic_title,
-                                description=topic_data.get("keywords", [])[:10]
-                                # استفاده از کلیدواژه‌ها به عنوان توضیحات
-                            )
-                            self.db_session.add(topic)
-                            await self.db_session.flush()
-
-                        # ایجاد ارتباط بین توییت و موضوع
-                        tweet_topic = TweetTopic(
-                            tweet_id=tweet.id,
-                            topic_id=topic.id,
-                            relevance_score=topic_data.get("relevance", 1.0)
-                        )
-                        self.db_session.add(tweet_topic)
+            if topics_result.get("topics"):
+                await self._save_topics({tweet.id: topics_result["topics"]})
 
         # به‌روزرسانی توییت با نتایج تحلیل
+        old_label, old_score = tweet.sentiment_label, tweet.sentiment_score
         tweet.sentiment_label = sentiment_label
         tweet.sentiment_score = sentiment_score
         tweet.is_analyzed = True
 
+        # اعمال تغییر احساسات در سری‌های دقیقه‌ای
+        await self.keyword_series.update_sentiment([(tweet, old_label, old_score)])
+        await self.report_snapshots.mark_dirty([tweet.created_at])
+
         # ذخیره تغییرات
         await self.db_session.commit()
+        await bump_resource_versions(RESOURCE_ANALYSIS)
 
         # برگرداندن نتایج
         return {
@@ -205,14 +214,162 @@ class TweetAnalyzer:
             "sentiment": {
                 "label": sentiment_label,
                 "score": sentiment_score,
+                "confidence": sentiment_result.get("confidence"),
                 "explanation": sentiment_result.get("explanation", "")
             },
+            "model_tier": sentiment_result.get("tier"),
             "topics": topics_result.get("topics", []),
             "main_topic": topics_result.get("main_topic", ""),
             "keywords": topics_result.get("keywords", []),
             "is_analyzed": True
         }
 
+    async def _resolve_topic_ids(self, topics: Dict[str, str]) -> Dict[str, int]:
+        """
+        دریافت یا ایجاد شناسه موضوعات
+
+        نام‌های موجود در کش بدون مراجعه به دیتابیس برگردانده می‌شوند. بقیه با یک
+        INSERT ... ON CONFLICT (name) DO NOTHING RETURNING ایجاد شده و شناسه
+        موضوعاتی که از قبل وجود داشتند با یک SELECT دریافت می‌شود.
+
+        Args:
+            topics (Dict[str, str]): نام موضوع به توضیحات آن
+
+        Returns:
+            Dict[str, int]: نام موضوع به شناسه آن
+        """
+        topic_ids = {name: self._topic_ids[name] for name in topics if name in self._topic_ids}
+        missing = [name for name in topics if name not in topic_ids]
+
+        if missing:
+            stmt = pg_insert(Topic).values([
+                {"name": name, "description": topics[name]}
+                for name in missing
+            ]).on_conflict_do_nothing(
+                index_elements=["name"]
+            ).returning(Topic.id, Topic.name)
+            result = await self.db_session.execute(stmt)
+            topic_ids.update({name: topic_id for topic_id, name in result.fetchall()})
+
+            existing = [name for name in missing if name not in topic_ids]
+            if existing:
+                result = await self.db_session.execute(
+                    select(Topic.id, Topic.name).where(Topic.name.in_(existing))
+                )
+                topic_ids.update({name: topic_id for topic_id, name in result.fetchall()})
+
+            if len(self._topic_ids) + len(missing) > TOPIC_CACHE_MAX_SIZE:
+                self._topic_ids.clear()
+            self._topic_ids.update({name: topic_ids[name] for name in missing if name in topic_ids})
+
+        return topic_ids
+
+    async def _save_topics(self, topics_by_tweet: Dict[int, List[Dict[str, Any]]]) -> int:
+        """
+        ذخیره موضوعات و ارتباط آن‌ها با توییت‌ها
+
+        نام همه موضوعات دسته یکجا به شناسه تبدیل شده و تمام ارتباط‌های توییت-موضوع
+        با یک INSERT چندسطری درج می‌شوند. تراکنش توسط فراخواننده commit می‌شود.
+
+        Args:
+            topics_by_tweet (Dict[int, List[Dict[str, Any]]]): شناسه توییت به لیست موضوعات استخراج شده
+
+        Returns:
+            int: تعداد ارتباط‌های ارسال شده برای درج
+        """
+        topics: Dict[str, str] = {}
+        relevance: Dict[Tuple[int, str], float] = {}
+
+        for tweet_id, topic_list in topics_by_tweet.items():
+            for topic_data in topic_list:
+                topic_title = (topic_data.get("title") or "").strip()[:255]
+                if not topic_title:
+                    continue
+
+                # استفاده از کلیدواژه‌ها به عنوان توضیحات
+                topics.setdefault(topic_title, ", ".join(topic_data.get("keywords", [])[:10]))
+
+                key = (tweet_id, topic_title)
+                relevance[key] = max(relevance.get(key, 0.0), topic_data.get("relevance", 1.0))
+
+        if not relevance:
+            return 0
+
+        topic_ids = await self._resolve_topic_ids(topics)
+
+        rows = [
+            {"tweet_id": tweet_id, "topic_id": topic_ids[name], "relevance_score": score}
+            for (tweet_id, name), score in relevance.items()
+            if name in topic_ids
+        ]
+        if rows:
+            stmt = pg_insert(TweetTopic).values(rows).on_conflict_do_nothing(
+                index_elements=["tweet_id", "topic_id"]
+            )
+            try:
+                await self.db_session.execute(stmt)
+            except Exception:
+                # ممکن است شناسه‌های کش مربوط به تراکنشی باشند که rollback شده است
+                self._topic_ids.clear()
+                raise
+
+        logger.debug(f"Saved {len(rows)} tweet-topic links for {len(topics_by_tweet)} tweets")
+        return len(rows)
+
+    @staticmethod
+    def _is_important(tweet: Tweet) -> bool:
+        """
+        آیا توییت برای استخراج موضوعات به اندازه کافی مهم است
+
+        Args:
+            tweet (Tweet): توییت
+
+        Returns:
+            bool: True اگر امتیاز اهمیت توییت بیشتر از 0.7 باشد
+        """
+        return tweet.importance_score is not None and tweet.importance_score > 0.7
+
+    async def _batch_extract_topics(self, tweets: List[Tweet], language: str) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        استخراج موضوعات چند توییت با یک درخواست دسته‌ای
+
+        Args:
+            tweets (List[Tweet]): توییت‌ها
+            language (str): زبان غالب توییت‌ها
+
+        Returns:
+            Dict[int, List[Dict[str, Any]]]: شناسه توییت به لیست موضوعات (قالب _save_topics)
+        """
+        texts = [tweet.content for tweet in tweets]
+        model, estimation = self.cost_manager.select_optimal_model(
+            AnalysisType.TOPICS,
+            sum(len(text) for text in texts),
+            is_batch=True,
+            items_count=len(texts)
+        )
+
+        topic_results = await self.claude_client.analyze_batch(
+            texts,
+            analysis_type="topics",
+            language=language,
+            model=model
+        )
+        await self._record_claude_usage("batch_extract_topics", estimation)
+
+        # تحلیل دسته‌ای برای هر متن یک موضوع اصلی و کلیدواژه‌های آن را برمی‌گرداند
+        topics_by_tweet = {}
+        for item in topic_results:
+            topics = item.get("topics")
+            if not topics or not topics.get("main_topic"):
+                continue
+            topics_by_tweet[tweets[item["index"]].id] = [{
+                "title": topics["main_topic"],
+                "relevance": 1.0,
+                "keywords": topics.get("keywords", [])
+            }]
+
+        return topics_by_tweet
+
     async def batch_analyze_tweets(self, tweet_ids: List[int]) -> List[Dict[str, Any]]:
         """
         تحلیل دسته‌ای توییت‌ها
@@ -274,32 +431,31 @@ class TweetAnalyzer:
 
         dominant_language = max(language_counts.items(), key=lambda x: x[1])[0] if language_counts else "auto"
 
-        # تخمین هزینه و انتخاب مدل بهینه
-        model, estimation = self.cost_manager.select_optimal_model(
-            AnalysisType.SENTIMENT,
-            sum(len(text) for text in texts),
-            is_batch=True,
-            items_count=len(texts)
-        )
+        if self.cascade_enabled:
+            sentiment_results = await self._cascade_batch_sentiment(unanalyzed_tweets, dominant_language)
+        else:
+            # تخمین هزینه و انتخاب مدل بهینه
+            model, estimation = self.cost_manager.select_optimal_model(
+                AnalysisType.SENTIMENT,
+                sum(len(text) for text in texts),
+                is_batch=True,
+                items_count=len(texts)
+            )
 
-        # تحلیل دسته‌ای احساسات
-        sentiment_results = await self.claude_client.analyze_batch(
-            texts,
-            analysis_type="sentiment",
-            language=dominant_language
-        )
+            # تحلیل دسته‌ای احساسات
+            sentiment_results = await self.claude_client.analyze_batch(
+                texts,
+                analysis_type="sentiment",
+                language=dominant_language,
+                model=model
+            )
 
-        # ثبت استفاده از API
-        await self.cost_manager.record_usage(
-            api_type=ApiType.CLAUDE,
-            operation="batch_analyze_sentiment",
-            tokens_in=estimation["tokens_in"],
-            tokens_out=estimation["tokens_out"],
-            cost=estimation["estimated_cost"]
-        )
+            # ثبت استفاده از API
+            await self._record_claude_usage("batch_analyze_sentiment", estimation)
 
         # به‌روزرسانی توییت‌ها با نتایج تحلیل
         results = []
+        sentiment_changes = []
 
         for i, tweet in enumerate(unanalyzed_tweets):
             # یافتن نتیجه مربوطه
@@ -319,6 +475,7 @@ class TweetAnalyzer:
             sentiment_score = sentiment_data.get("score", 0.0)
 
             # به‌روزرسانی توییت
+            sentiment_changes.append((tweet, tweet.sentiment_label, tweet.sentiment_score))
             tweet.sentiment_label = sentiment_label
             tweet.sentiment_score = sentiment_score
             tweet.is_analyzed = True
@@ -331,11 +488,39 @@ class TweetAnalyzer:
                     "score": sentiment_score,
                     "confidence": sentiment_data.get("confidence", 0.0)
                 },
+                "model_tier": result.get("tier"),
                 "is_analyzed": True
             })
 
+        # استخراج موضوعات توییت‌های مهم دسته با یک درخواست و ثبت همه آن‌ها با یک رفت و برگشت
+        important_tweets = [tweet for tweet, _, _ in sentiment_changes if self._is_important(tweet)]
+        topics_by_tweet = {}
+        if important_tweets and not budget_status["is_exhausted"]:
+            try:
+                topics_by_tweet = await self._batch_extract_topics(important_tweets, dominant_language)
+            except Exception as e:
+                logger.error(f"Error extracting topics for batch: {e}")
+
+        if topics_by_tweet:
+            # savepoint تا خطای ثبت موضوعات نتایج احساسات دسته را از بین نبرد
+            try:
+                async with self.db_session.begin_nested():
+                    await self._save_topics(topics_by_tweet)
+            except Exception as e:
+                logger.error(f"Error saving topics for batch: {e}")
+            else:
+                for item in results:
+                    topic_list = topics_by_tweet.get(item["tweet_id"])
+                    if topic_list:
+                        item["main_topic"] = topic_list[0]["title"]
+
+        # اعمال تغییر احساسات در سری‌های دقیقه‌ای
+        await self.keyword_series.update_sentiment(sentiment_changes)
+        await self.report_snapshots.mark_dirty(tweet.created_at for tweet, _, _ in sentiment_changes)
+
         # ذخیره تغییرات
         await self.db_session.commit()
+        await bump_resource_versions(RESOURCE_ANALYSIS)
 
         # ترکیب نتایج توییت‌های از قبل تحلیل شده
         for tweet in analyzed_tweets:
@@ -351,6 +536,172 @@ class TweetAnalyzer:
         logger.info(f"Completed batch analysis for {len(results)} tweets")
         return results
 
+    async def _record_claude_usage(
+            self,
+            operation: str,
+            estimation: Dict[str, Any],
+            tier: Optional[str] = None
+    ) -> None:
+        """
+        ثبت استفاده از Claude با مقادیر واقعی آخرین درخواست
+
+        اگر کلاینت اطلاعات مصرف را گزارش نکرده باشد، از تخمین CostManager استفاده می‌شود.
+
+        Args:
+            operation (str): نوع عملیات
+            estimation (Dict[str, Any]): تخمین هزینه برگردانده شده از select_optimal_model
+            tier (Optional[str]): لایه تحلیل آبشاری
+        """
+        usage = self.claude_client.last_usage or {}
+        estimated_model = estimation["model"]
+
+        await self.cost_manager.record_usage(
+            api_type=ApiType.CLAUDE,
+            operation=operation,
+            tokens_in=usage.get("tokens_in", estimation["tokens_in"]),
+            tokens_out=usage.get("tokens_out", estimation["tokens_out"]),
+            cost=None if usage else estimation["estimated_cost"],
+            model=usage.get("model", getattr(estimated_model, "value", estimated_model)),
+            tier=tier,
+            latency_ms=usage.get("latency_ms")
+        )
+
+    def _needs_escalation(self, sentiment_data: Optional[Dict[str, Any]], importance_score: Optional[float]) -> bool:
+        """
+        بررسی نیاز به ارجاع نتیجه لایه اول به مدل قوی‌تر
+
+        Args:
+            sentiment_data (Optional[Dict[str, Any]]): نتیجه احساسات لایه اول
+            importance_score (Optional[float]): امتیاز اهمیت توییت
+
+        Returns:
+            bool: True اگر نتیجه نامعتبر، کم‌اطمینان یا توییت مهم باشد
+        """
+        if not sentiment_data or sentiment_data.get("sentiment") not in ("positive", "negative", "neutral", "mixed"):
+            return True
+
+        if sentiment_data.get("confidence", 0.0) < self.confidence_threshold:
+            return True
+
+        return importance_score is not None and importance_score >= self.importance_threshold
+
+    async def _cascade_sentiment(
+            self,
+            text: str,
+            language: str,
+            importance_score: Optional[float]
+    ) -> Dict[str, Any]:
+        """
+        تحلیل آبشاری احساسات یک متن
+
+        Args:
+            text (str): متن توییت
+            language (str): زبان متن
+            importance_score (Optional[float]): امتیاز اهمیت توییت
+
+        Returns:
+            Dict[str, Any]: نتیجه تحلیل احساسات به همراه لایه نهایی (tier)
+        """
+        model, estimation = self.cost_manager.select_optimal_model(
+            AnalysisType.SENTIMENT, len(text), tier=ModelTier.TRIAGE
+        )
+        result = await self.claude_client.analyze_sentiment(text, language, model=model)
+        await self._record_claude_usage("analyze_sentiment", estimation, ModelTier.TRIAGE.value)
+        result["tier"] = ModelTier.TRIAGE.value
+
+        if not self._needs_escalation(result, importance_score):
+            return result
+
+        budget_status = await self.cost_manager.check_budget()
+        if budget_status["is_exhausted"]:
+            logger.warning("Daily budget exhausted, keeping triage result without escalation")
+            return result
+
+        model, estimation = self.cost_manager.select_optimal_model(
+            AnalysisType.SENTIMENT, len(text), tier=ModelTier.ESCALATION
+        )
+        escalated = await self.claude_client.analyze_sentiment(text, language, model=model)
+        await self._record_claude_usage("analyze_sentiment", estimation, ModelTier.ESCALATION.value)
+
+        # اگر پاسخ لایه دوم نامعتبر بود، نتیجه لایه اول حفظ می‌شود
+        if escalated.get("sentiment") == "unknown":
+            return result
+
+        escalated["tier"] = ModelTier.ESCALATION.value
+        return escalated
+
+    async def _cascade_batch_sentiment(
+            self,
+            tweets: List[Tweet],
+            language: str
+    ) -> List[Dict[str, Any]]:
+        """
+        تحلیل آبشاری احساسات یک دسته توییت
+
+        همه توییت‌ها ابتدا با ارزان‌ترین مدل دسته‌بندی می‌شوند و فقط نتایج نامعتبر،
+        کم‌اطمینان یا توییت‌های با امتیاز اهمیت بالا در یک درخواست دسته‌ای دوم
+        به مدل قوی‌تر ارجاع داده می‌شوند.
+
+        Args:
+            tweets (List[Tweet]): توییت‌های تحلیل نشده
+            language (str): زبان غالب دسته
+
+        Returns:
+            List[Dict[str, Any]]: یک نتیجه به ازای هر توییت (با همان index)
+        """
+        texts = [tweet.content for tweet in tweets]
+        total_length = sum(len(text) for text in texts)
+
+        model, estimation = self.cost_manager.select_optimal_model(
+            AnalysisType.SENTIMENT, total_length, is_batch=True, items_count=len(texts), tier=ModelTier.TRIAGE
+        )
+        results = await self.claude_client.analyze_batch(
+            texts, analysis_type="sentiment", language=language, model=model
+        )
+        await self._record_claude_usage("batch_analyze_sentiment", estimation, ModelTier.TRIAGE.value)
+
+        for result in results:
+            result["tier"] = ModelTier.TRIAGE.value
+
+        escalate_indices = [
+            i for i, tweet in enumerate(tweets)
+            if self._needs_escalation(results[i].get("sentiment"), tweet.importance_score)
+        ]
+
+        if not escalate_indices:
+            logger.info(f"Cascade: all {len(texts)} tweets resolved by triage model")
+            return results
+
+        budget_status = await self.cost_manager.check_budget()
+        if budget_status["is_exhausted"]:
+            logger.warning("Daily budget exhausted, keeping triage results without escalation")
+            return results
+
+        escalate_texts = [texts[i] for i in escalate_indices]
+        model, estimation = self.cost_manager.select_optimal_model(
+            AnalysisType.SENTIMENT,
+            sum(len(text) for text in escalate_texts),
+            is_batch=True,
+            items_count=len(escalate_texts),
+            tier=ModelTier.ESCALATION
+        )
+        escalated_results = await self.claude_client.analyze_batch(
+            escalate_texts, analysis_type="sentiment", language=language, model=model
+        )
+        await self._record_claude_usage("batch_analyze_sentiment", estimation, ModelTier.ESCALATION.value)
+
+        # جایگزینی نتایج معتبر لایه دوم؛ برای بقیه نتیجه لایه اول باقی می‌ماند
+        for local_index, escalated in enumerate(escalated_results):
+            if "sentiment" not in escalated:
+                continue
+            index = escalate_indices[local_index]
+            escalated["index"] = index
+            escalated["tier"] = ModelTier.ESCALATION.value
+            results[index] = escalated
+
+        logger.info(f"Cascade: escalated {len(escalate_indices)}/{len(texts)} tweets to {model}")
+        return results
+
     async def process_analysis_queue(self, batch_size: int = None) -> int:
         """
         پردازش توییت‌های صف تحلیل
@@ -463,6 +814,7 @@ class TweetAnalyzer:
 
         # شرط کلیدواژه
         keyword_condition = None
+        keyword_ids = []
         if keywords:
             # دریافت شناسه‌های کلیدواژه‌ها
             stmt = select(Keyword.id).where(Keyword.text.in_(keywords))
@@ -480,30 +832,102 @@ class TweetAnalyzer:
                 )
 
         # ترکیب شرط‌ها
-        if keyword_condition:
+        if keyword_condition is not None:
             query_condition = and_(time_condition, keyword_condition)
         else:
             query_condition = time_condition
 
-        # دریافت آمار کلی
-        stmt = select(
-            func.count(),
-            func.avg(Tweet.sentiment_score),
-            func.count().filter(Tweet.sentiment_label == "positive"),
-            func.count().filter(Tweet.sentiment_label == "negative"),
-            func.count().filter(Tweet.sentiment_label == "neutral"),
-            func.count().filter(Tweet.sentiment_label == "mixed")
-        ).where(query_condition)
-
-        result = await self.db_session.execute(stmt)
-        row = result.fetchone()
+        # گزارش همه توییت‌ها یا یک کلیدواژه از خلاصه‌های ساعتی ساخته می‌شود؛
+        # برای چند کلیدواژه توییت‌های مشترک فقط با محاسبه زنده یک بار شمرده می‌شوند
+        snapshot_keyword_id = None
+        if self.use_report_snapshots:
+            if keyword_condition is None:
+                snapshot_keyword_id = ALL_KEYWORDS_ID
+            elif len(keyword_ids) == 1:
+                snapshot_keyword_id = keyword_ids[0]
+
+        # ستون‌های مورد نیاز توییت‌های مهم
+        important_stmt = select(
+            Tweet.id,
+            Tweet.tweet_id,
+            Tweet.content,
+            Tweet.user_id,
+            Tweet.sentiment_label,
+            Tweet.sentiment_score,
+            Tweet.importance_score,
+            Tweet.created_at
+        ).order_by(
+            Tweet.importance_score.desc().nullslast()
+        ).limit(10)
+
+        if snapshot_keyword_id is not None:
+            stats = await self.report_snapshots.get_report_stats(start_time, end_time, snapshot_keyword_id)
+
+            total_tweets = stats["tweet_count"]
+            avg_sentiment = stats["sentiment_sum"] / stats["scored_count"] if stats["scored_count"] else 0
+            positive_count = stats["positive_count"]
+            negative_count = stats["negative_count"]
+            neutral_count = stats["neutral_count"]
+            mixed_count = stats["mixed_count"]
+
+            topics = [
+                (name, count, relevance_sum / count if count else None)
+                for name, (count, relevance_sum) in sorted(
+                    stats["topic_stats"].items(), key=lambda item: item[1][0], reverse=True
+                )[:5]
+            ]
 
-        total_tweets = row[0] or 0
-        avg_sentiment = row[1] or 0
-        positive_count = row[2] or 0
-        negative_count = row[3] or 0
-        neutral_count = row[4] or 0
-        mixed_count = row[5] or 0
+            # مهم‌ترین توییت‌ها از میان نامزدهای هر ساعت انتخاب می‌شوند
+            important_rows = []
+            if include_tweets and total_tweets > 0:
+                result = await self.db_session.execute(
+                    important_stmt.where(Tweet.id.in_(stats["top_tweet_ids"]))
+                )
+                important_rows = result.fetchall()
+        else:
+            # دریافت آمار کلی
+            counts_stmt = select(
+                func.count(),
+                func.avg(Tweet.sentiment_score),
+                func.count().filter(Tweet.sentiment_label == "positive"),
+                func.count().filter(Tweet.sentiment_label == "negative"),
+                func.count().filter(Tweet.sentiment_label == "neutral"),
+                func.count().filter(Tweet.sentiment_label == "mixed")
+            ).where(query_condition)
+
+            # دریافت موضوعات اصلی
+            topics_stmt = select(
+                Topic.name,
+                func.count(TweetTopic.tweet_id).label("count"),
+                func.avg(TweetTopic.relevance_score).label("avg_relevance")
+            ).join(
+                TweetTopic, Topic.id == TweetTopic.topic_id
+            ).join(
+                Tweet, Tweet.id == TweetTopic.tweet_id
+            ).where(
+                query_condition
+            ).group_by(
+                Topic.name
+            ).order_by(
+                func.count(TweetTopic.tweet_id).desc()
+            ).limit(5)
+
+            # کوئری‌های مستقل به صورت هم‌زمان روی اتصالات جداگانه اجرا می‌شوند
+            statements = [counts_stmt, topics_stmt]
+            if include_tweets:
+                statements.append(important_stmt.where(query_condition))
+            results = await fetch_concurrently(*statements)
+
+            row = results[0][0]
+            total_tweets = row[0] or 0
+            avg_sentiment = row[1] or 0
+            positive_count = row[2] or 0
+            negative_count = row[3] or 0
+            neutral_count = row[4] or 0
+            mixed_count = row[5] or 0
+
+            topics = results[1]
+            important_rows = results[2] if include_tweets else []
 
         # محاسبه توزیع احساسات
         sentiment_distribution = {}
@@ -515,50 +939,20 @@ class TweetAnalyzer:
                 "mixed": mixed_count / total_tweets
             }
 
-        # دریافت توییت‌های مهم
-        important_tweets = []
-        if include_tweets and total_tweets > 0:
-            stmt = select(Tweet).where(query_condition).order_by(
-                Tweet.importance_score.desc().nullslast()
-            ).limit(10)
-
-            result = await self.db_session.execute(stmt)
-            tweets = result.scalars().all()
-
-            important_tweets = [
-                {
-                    "id": tweet.id,
-                    "tweet_id": tweet.tweet_id,
-                    "content": tweet.content,
-                    "user_id": tweet.user_id,
-                    "sentiment_label": tweet.sentiment_label,
-                    "sentiment_score": tweet.sentiment_score,
-                    "importance_score": tweet.importance_score,
-                    "created_at": tweet.created_at.isoformat() if tweet.created_at else None
-                }
-                for tweet in tweets
-            ]
-
-        # دریافت موضوعات اصلی
-        top_topics = []
-        stmt = select(
-            Topic.name,
-            func.count(TweetTopic.tweet_id).label("count"),
-            func.avg(TweetTopic.relevance_score).label("avg_relevance")
-        ).join(
-            TweetTopic, Topic.id == TweetTopic.topic_id
-        ).join(
-            Tweet, Tweet.id == TweetTopic.tweet_id
-        ).where(
-            query_condition
-        ).group_by(
-            Topic.name
-        ).order_by(
-            func.count(TweetTopic.tweet_id).desc()
-        ).limit(5)
-
-        result = await self.db_session.execute(stmt)
-        topics = result.fetchall()
+        # توییت‌های مهم
+        important_tweets = [
+            {
+                "id": tweet.id,
+                "tweet_id": tweet.tweet_id,
+                "content": tweet.content,
+                "user_id": tweet.user_id,
+                "sentiment_label": tweet.sentiment_label,
+                "sentiment_score": tweet.sentiment_score,
+                "importance_score": tweet.importance_score,
+                "created_at": tweet.created_at.isoformat() if tweet.created_at else None
+            }
+            for tweet in important_rows
+        ]
 
         top_topics = [
             {
@@ -594,7 +988,9 @@ class TweetAnalyzer:
             self,
             keywords: Optional[List[str]] = None,
             hours_back: int = 6,
-            min_importance: float = 3.0
+            min_importance: float = 3.0,
+            per_keyword: bool = False,
+            multi_resolution: Optional[bool] = None
     ) -> List[Dict[str, Any]]:
         """
         تشخیص موج‌های توییتری و ایجاد هشدار
@@ -603,6 +999,9 @@ class TweetAnalyzer:
             keywords (Optional[List[str]]): کلیدواژه‌ها برای فیلتر کردن
             hours_back (int): تعداد ساعات برای بررسی
             min_importance (float): حداقل امتیاز اهمیت برای ایجاد هشدار
+            per_keyword (bool): تشخیص جداگانه برای هر کلیدواژه با پویش برداری
+            multi_resolution (Optional[bool]): تشخیص در چند تفکیک‌پذیری زمانی. اگر مشخص نشود،
+                از تنظیمات استفاده می‌شود.
 
         Returns:
             List[Dict[str, Any]]: لیست هشدارهای ایجاد شده
@@ -613,7 +1012,9 @@ class TweetAnalyzer:
         alerts = await self.wave_detector.run_detection_and_create_alerts(
             keywords=keywords,
             hours_back=hours_back,
-            min_importance=min_importance
+            min_importance=min_importance,
+            per_keyword=per_keyword,
+            multi_resolution=multi_resolution
         )
 
         return alerts
\ No newline at end of file
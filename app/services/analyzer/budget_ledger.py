@@ -0,0 +1,293 @@
+"""
+دفتر بودجه API‌ها.
+
+این ماژول مجموع هزینه روزانه هر API را در حافظه و Redis نگهداری می‌کند تا
+بررسی بودجه بدون کوئری SUM روی جدول api_usage انجام شود. افزایش‌ها با
+INCRBYFLOAT اتمیک هستند؛ بنابراین چند نمونه تحلیلگر یک دید مشترک از بودجه دارند.
+هر افزایش آخرین مجموع شناخته شده این نمونه را به عنوان حداقل کلید ارسال می‌کند
+تا کلیدی که هنوز مقداردهی نشده، حذف شده یا پس از راه‌اندازی دوباره Redis از بین
+رفته، از صفر شروع نشود و هزینه ثبت شده امروز از بررسی بودجه حذف نشود.
+ردیف‌های استفاده در حافظه جمع شده و به صورت دسته‌ای در دیتابیس درج می‌شوند؛ یک
+تسک پس‌زمینه ردیف‌های در انتظار را حتی وقتی مصرف جدیدی ثبت نمی‌شود، دوره‌ای درج
+می‌کند. اگر دیتابیس در دسترس نباشد، صف حداکثر BUDGET_MAX_PENDING ردیف نگه می‌دارد.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, date
+from typing import Dict, List, Any, Optional
+
+from sqlalchemy import func, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.db.models import ApiUsage
+from app.db.session import get_session
+from app.services.redis_service import RedisService
+from app.core.http_cache import bump_resource_versions, RESOURCE_API_USAGE
+
+logger = logging.getLogger(__name__)
+
+# کلیدهای روزانه دو روز نگهداری می‌شوند تا گزارش‌های پایان روز هم به آن‌ها دسترسی داشته باشند
+LEDGER_KEY_TTL = 2 * 24 * 3600
+
+
+class BudgetLedger:
+    """
+    دفتر مشترک هزینه روزانه API‌ها
+
+    Attributes:
+        redis_service (RedisService): سرویس Redis برای مجموع‌های مشترک
+        flush_size (int): تعداد ردیف‌هایی که پس از آن درج دسته‌ای انجام می‌شود
+        flush_interval (float): حداکثر فاصله زمانی بین درج‌ها به ثانیه
+        max_pending (int): حداکثر ردیف‌های در انتظار (قدیمی‌ترها پس از آن دور ریخته می‌شوند)
+        key_prefix (str): پیشوند کلیدهای Redis
+        day (date): روز جاری دفتر
+        totals (Dict[str, float]): مجموع هزینه امروز به تفکیک API
+        pending (List[Dict[str, Any]]): ردیف‌های api_usage در انتظار درج
+    """
+
+    def __init__(
+            self,
+            redis_service: RedisService = None,
+            api_types: List[str] = None,
+            flush_size: int = None,
+            flush_interval: float = None,
+            max_pending: int = None,
+            key_prefix: str = "budget"
+    ):
+        """
+        مقداردهی اولیه دفتر بودجه
+
+        Args:
+            redis_service (RedisService, optional): سرویس Redis. اگر مشخص نشود، نمونه جدید ساخته می‌شود.
+            api_types (List[str], optional): انواع API‌هایی که مجموع آن‌ها نگهداری می‌شود
+            flush_size (int, optional): اندازه دسته درج. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            flush_interval (float, optional): فاصله درج به ثانیه. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            max_pending (int, optional): حداکثر ردیف‌های در انتظار. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            key_prefix (str): پیشوند کلیدهای Redis
+        """
+        self.redis_service = redis_service or RedisService()
+        self.api_types = list(api_types or ["claude", "twitter"])
+        self.flush_size = flush_size or settings.BUDGET_FLUSH_SIZE
+        self.flush_interval = flush_interval or settings.BUDGET_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.BUDGET_MAX_PENDING
+        self.key_prefix = key_prefix
+
+        self.day: Optional[date] = None
+        self.totals: Dict[str, float] = {}
+        self.pending: List[Dict[str, Any]] = []
+        self._seeded_day: Optional[date] = None
+        self._last_flush = time.monotonic()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self._rollover()
+        logger.info(
+            f"BudgetLedger initialized (flush every {self.flush_size} rows or {self.flush_interval}s)"
+        )
+
+    def _rollover(self) -> None:
+        """شروع دفتر جدید با تغییر روز"""
+        today = datetime.now().date()
+        if today != self.day:
+            self.day = today
+            self.totals = {api_type: 0.0 for api_type in self.api_types}
+            self._seeded_day = None
+
+    def _key(self, api_type: str) -> str:
+        """
+        کلید Redis مجموع هزینه امروز یک API
+
+        Args:
+            api_type (str): نوع API
+
+        Returns:
+            str: کلید Redis
+        """
+        return f"{self.key_prefix}:{self.day.isoformat()}:{api_type}"
+
+    async def load(self, db_session: AsyncSession) -> Dict[str, float]:
+        """
+        بارگذاری مجموع‌های امروز
+
+        اگر کلیدهای امروز در Redis وجود داشته باشند، بدون مراجعه به دیتابیس
+        استفاده می‌شوند. در غیر این صورت یک کوئری GROUP BY اجرا شده و نتیجه به
+        عنوان حداقل مقدار کلیدها در Redis ثبت می‌شود؛ اگر نمونه دیگری در این فاصله
+        افزایشی ثبت کرده باشد، مقدار بزرگ‌تر حفظ می‌شود.
+
+        Args:
+            db_session (AsyncSession): نشست دیتابیس
+
+        Returns:
+            Dict[str, float]: مجموع هزینه امروز به تفکیک API
+        """
+        self._rollover()
+        if self._seeded_day == self.day:
+            return await self.get_totals()
+
+        keys = [self._key(api_type) for api_type in self.api_types]
+        values = await self.redis_service.get_many(keys)
+
+        if any(value is None for value in values):
+            today_start = datetime.combine(self.day, datetime.min.time())
+            today_end = datetime.combine(self.day, datetime.max.time())
+
+            stmt = select(ApiUsage.api_type, func.sum(ApiUsage.cost)).where(
+                ApiUsage.date >= today_start,
+                ApiUsage.date <= today_end
+            ).group_by(ApiUsage.api_type)
+            result = await db_session.execute(stmt)
+            db_totals = {api_type: float(cost or 0.0) for api_type, cost in result.fetchall()}
+
+            for api_type, key in zip(self.api_types, keys):
+                db_total = max(db_totals.get(api_type, 0.0), self.totals.get(api_type, 0.0))
+                total = await self.redis_service.increment_float(
+                    key, 0.0, expire=LEDGER_KEY_TTL, floor=db_total
+                )
+                self.totals[api_type] = total if total is not None else db_total
+
+        self._seeded_day = self.day
+        return await self.get_totals()
+
+    async def get_totals(self) -> Dict[str, float]:
+        """
+        دریافت مجموع هزینه امروز (یک MGET روی Redis)
+
+        در صورت در دسترس نبودن Redis، مجموع‌های محلی برگردانده می‌شوند.
+
+        Returns:
+            Dict[str, float]: مجموع هزینه امروز به تفکیک API
+        """
+        self._rollover()
+        values = await self.redis_service.get_many([self._key(api_type) for api_type in self.api_types])
+
+        for api_type, value in zip(self.api_types, values):
+            if value is not None:
+                self.totals[api_type] = float(value)
+
+        return dict(self.totals)
+
+    async def record(self, api_type: str, cost: float, row: Dict[str, Any]) -> float:
+        """
+        ثبت یک مصرف در دفتر
+
+        Args:
+            api_type (str): نوع API
+            cost (float): هزینه به دلار
+            row (Dict[str, Any]): ستون‌های ردیف api_usage
+
+        Returns:
+            float: مجموع هزینه امروز این API پس از ثبت
+        """
+        self._rollover()
+        self.pending.append(row)
+        self._trim_pending()
+        self._ensure_flush_task()
+
+        # مجموع محلی باید پیش از اولین افزایش روز شامل هزینه ثبت شده در دیتابیس باشد
+        if self._seeded_day != self.day:
+            try:
+                async with get_session() as session:
+                    await self.load(session)
+            except Exception as e:
+                logger.warning(f"Could not seed budget ledger from database: {e}")
+
+        # مجموع شناخته شده محلی حداقل مقدار کلید است (در برابر حذف یا ساخت کلید از صفر)
+        known_total = self.totals.get(api_type, 0.0)
+        new_total = await self.redis_service.increment_float(
+            self._key(api_type), cost, expire=LEDGER_KEY_TTL, floor=known_total
+        )
+        if new_total is None:
+            new_total = known_total + cost
+        self.totals[api_type] = new_total
+
+        if len(self.pending) >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            await self.flush()
+
+        return new_total
+
+    async def flush(self) -> int:
+        """
+        درج دسته‌ای ردیف‌های در انتظار در جدول api_usage
+
+        درج با نشست مستقل انجام می‌شود تا تراکنش فراخواننده تحت تأثیر قرار نگیرد.
+        در صورت خطا، ردیف‌ها برای تلاش بعدی به صف بازگردانده می‌شوند (تا سقف max_pending).
+
+        Returns:
+            int: تعداد ردیف‌های درج شده
+        """
+        async with self._flush_lock:
+            self._last_flush = time.monotonic()
+            if not self.pending:
+                return 0
+
+            rows, self.pending = self.pending, []
+            try:
+                async with get_session() as session:
+                    await session.execute(insert(ApiUsage), rows)
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Error flushing {len(rows)} API usage rows: {e}")
+                self.pending = rows + self.pending
+                self._trim_pending()
+                return 0
+
+        await bump_resource_versions(RESOURCE_API_USAGE)
+        logger.debug(f"Flushed {len(rows)} API usage rows")
+        return len(rows)
+
+    def _trim_pending(self) -> None:
+        """حذف قدیمی‌ترین ردیف‌های در انتظار بیش از max_pending"""
+        excess = len(self.pending) - self.max_pending
+        if excess > 0:
+            del self.pending[:excess]
+            logger.warning(f"Dropped {excess} unsaved API usage rows (pending queue is full)")
+
+    def _ensure_flush_task(self) -> None:
+        """شروع تسک درج دوره‌ای در event loop جاری در صورت نیاز"""
+        loop = asyncio.get_running_loop()
+        if self._flush_task is None or self._flush_task.done() or self._flush_task.get_loop() is not loop:
+            self._flush_task = loop.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        """درج ردیف‌های در انتظار هر flush_interval ثانیه"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self.pending and time.monotonic() - self._last_flush >= self.flush_interval:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Error in periodic API usage flush: {e}")
+
+    async def stop(self) -> None:
+        """توقف تسک درج دوره‌ای و درج ردیف‌های باقی مانده هنگام خاموش شدن"""
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+
+_budget_ledger: Optional[BudgetLedger] = None
+
+
+def get_budget_ledger() -> BudgetLedger:
+    """
+    دریافت دفتر بودجه مشترک این فرآیند
+
+    همه نمونه‌های CostManager در یک فرآیند از یک دفتر استفاده می‌کنند تا
+    ردیف‌های در انتظار بین درخواست‌ها از دست نروند.
+
+    Returns:
+        BudgetLedger: دفتر بودجه
+    """
+    global _budget_ledger
+    if _budget_ledger is None:
+        _budget_ledger = BudgetLedger()
+    return _budget_ledger
@@ -5,10 +5,17 @@
 """
 import json
 import logging
+import time
 import httpx
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, AsyncIterator, Tuple
 from pydantic import BaseModel, Field
 from app.config import settings
+from app.services.analyzer.response_schemas import (
+    SentimentResult, TopicsResult, WaveAnalysisResult,
+    SENTIMENT_TOOL, SENTIMENT_TOOL_NAME, TOPICS_TOOL, TOPICS_TOOL_NAME,
+    WAVE_TOOL, WAVE_TOOL_NAME, BATCH_TOOL_NAME,
+    build_batch_tool, extract_tool_input, parse_model, parse_batch_results
+)
 logger = logging.getLogger(__name__)
 
 class ClaudeMessage(BaseModel):
@@ -21,8 +28,11 @@ class ClaudeRequest(BaseModel):
     model: str
     messages: List[ClaudeMessage]
     max_tokens: int = 4096
-    temperature: float = 0.7
+    temperature: Optional[float] = 0.7
     system: Optional[str] = None
+    tools: Optional[List[Dict[str, Any]]] = None
+    tool_choice: Optional[Dict[str, Any]] = None
+    thinking: Optional[Dict[str, Any]] = None
 
 class ClaudeResponse(BaseModel):
     """مدل داده پاسخ از Claude API"""
@@ -46,6 +56,7 @@ class ClaudeClient:
         base_url (str): آدرس پایه API
         headers (Dict): هدرهای HTTP پیش‌فرض
         client (httpx.AsyncClient): کلاینت HTTP برای ارتباطات ناهمگام
+        last_usage (Dict[str, Any]): مدل، توکن‌ها و زمان پاسخ آخرین درخواست
     """
     def __init__(
             self,
@@ -71,6 +82,7 @@ class ClaudeClient:
             "content-type": "application/json"
         }
         self.client = httpx.AsyncClient(headers=self.headers, timeout=timeout)
+        self.last_usage: Dict[str, Any] = {}
         logger.info(f"ClaudeClient initialized with model: {self.model}")
     
     async def close(self):
@@ -84,7 +96,10 @@ class ClaudeClient:
             system: Optional[str] = None,
             model: Optional[str] = None,
             max_tokens: int = 4096,
-            temperature: float = 0.7
+            temperature: float = 0.7,
+            tools: Optional[List[Dict[str, Any]]] = None,
+            tool_choice: Optional[Dict[str, Any]] = None,
+            thinking: Optional[Dict[str, Any]] = None
     ) -> ClaudeResponse:
         """
         ارسال پیام به Claude API
@@ -94,6 +109,9 @@ class ClaudeClient:
             model (Optional[str]): مدل Claude
             max_tokens (int): حداکثر تعداد توکن‌های پاسخ
             temperature (float): دمای تولید متن
+            tools (Optional[List[Dict[str, Any]]]): تعریف ابزارها برای خروجی ساختاریافته
+            tool_choice (Optional[Dict[str, Any]]): نحوه انتخاب ابزار
+            thinking (Optional[Dict[str, Any]]): تنظیمات Extended Thinking
         Returns:
             ClaudeResponse: پاسخ Claude API
         Raises:
@@ -101,15 +119,13 @@ class ClaudeClient:
             Exception: در صورت سایر خطاها
         """
         url = f"{self.base_url}/messages"
-        request_data = ClaudeRequest(
-            model=model or self.model,
-            messages=[ClaudeMessage(**msg) for msg in messages],
-            max_tokens=max_tokens,
-            temperature=temperature,
-            system=system
+        request_data = self._build_request(
+            messages, system, model, max_tokens, temperature, tools, tool_choice, thinking
         )
+        self.last_usage = {}
         try:
             logger.debug(f"Sending request to Claude API: {request_data.model_dump_json()}")
+            started_at = time.perf_counter()
             response = await self.client.post(
                 url,
                 json=request_data.model_dump(exclude_none=True),
@@ -117,9 +133,16 @@ class ClaudeClient:
             )
             response.raise_for_status()
             data = response.json()
+            latency_ms = int((time.perf_counter() - started_at) * 1000)
             # محاسبه هزینه برای ثبت در لاگ
             input_tokens = data.get("usage", {}).get("input_tokens", 0)
             output_tokens = data.get("usage", {}).get("output_tokens", 0)
+            self.last_usage = {
+                "model": data.get("model", request_data.model),
+                "tokens_in": input_tokens,
+                "tokens_out": output_tokens,
+                "latency_ms": latency_ms
+            }
             # قیمت‌های تقریبی برای Claude-3-7-Sonnet
             input_cost = input_tokens * 0.000003  # $3 / MTok
             output_cost = output_tokens * 0.000015  # $15 / MTok
@@ -127,7 +150,7 @@ class ClaudeClient:
             logger.info(
                 f"Claude API response: model={data.get('model')}, "
                 f"tokens={input_tokens}in/{output_tokens}out, "
-                f"cost=${total_cost:.6f}"
+                f"cost=${total_cost:.6f}, latency={latency_ms}ms"
             )
             return ClaudeResponse(**data)
         except httpx.HTTPStatusError as e:
@@ -137,11 +160,183 @@ class ClaudeClient:
             logger.error(f"Error sending message to Claude API: {e}")
             raise
     
+    def _build_request(
+            self,
+            messages: List[Dict[str, Any]],
+            system: Optional[str],
+            model: Optional[str],
+            max_tokens: int,
+            temperature: float,
+            tools: Optional[List[Dict[str, Any]]],
+            tool_choice: Optional[Dict[str, Any]],
+            thinking: Optional[Dict[str, Any]]
+    ) -> ClaudeRequest:
+        """
+        ساخت مدل درخواست Claude API
+        Returns:
+            ClaudeRequest: درخواست آماده ارسال
+        """
+        return ClaudeRequest(
+            model=model or self.model,
+            messages=[ClaudeMessage(**msg) for msg in messages],
+            max_tokens=max_tokens,
+            # Extended Thinking با تغییر دما سازگار نیست
+            temperature=None if thinking else temperature,
+            system=system,
+            tools=tools,
+            tool_choice=tool_choice,
+            thinking=thinking
+        )
+
+    async def stream_message(
+            self,
+            messages: List[Dict[str, Any]],
+            system: Optional[str] = None,
+            model: Optional[str] = None,
+            max_tokens: int = 4096,
+            temperature: float = 0.7,
+            tools: Optional[List[Dict[str, Any]]] = None,
+            tool_choice: Optional[Dict[str, Any]] = None,
+            thinking: Optional[Dict[str, Any]] = None,
+            timeout: float = 300.0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        ارسال پیام به Claude API به صورت جریانی (SSE)
+
+        رویدادهای خام API (message_start، content_block_delta و ...) به همان ترتیب
+        دریافت yield می‌شوند. پس از پایان پیام، یک رویداد نهایی با نوع
+        "message_complete" شامل پاسخ کامل (ClaudeResponse) ارسال می‌شود.
+
+        Args:
+            messages (List[Dict[str, Any]]): لیست پیام‌ها
+            system (Optional[str]): دستورالعمل‌های سیستم
+            model (Optional[str]): مدل Claude
+            max_tokens (int): حداکثر تعداد توکن‌های پاسخ
+            temperature (float): دمای تولید متن
+            tools (Optional[List[Dict[str, Any]]]): تعریف ابزارها
+            tool_choice (Optional[Dict[str, Any]]): نحوه انتخاب ابزار
+            thinking (Optional[Dict[str, Any]]): تنظیمات Extended Thinking
+            timeout (float): حداکثر زمان کل جریان به ثانیه
+
+        Yields:
+            Dict[str, Any]: رویدادهای جریان
+
+        Raises:
+            httpx.HTTPStatusError: در صورت خطای HTTP
+            Exception: در صورت سایر خطاها
+        """
+        url = f"{self.base_url}/messages"
+        request_data = self._build_request(
+            messages, system, model, max_tokens, temperature, tools, tool_choice, thinking
+        )
+        payload = request_data.model_dump(exclude_none=True)
+        payload["stream"] = True
+
+        self.last_usage = {}
+        message: Dict[str, Any] = {}
+        blocks: Dict[int, Dict[str, Any]] = {}
+        partial_json: Dict[int, str] = {}
+
+        try:
+            started_at = time.perf_counter()
+            first_token_ms = None
+
+            async with self.client.stream("POST", url, json=payload, timeout=timeout) as response:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+
+                    event = json.loads(line[5:].strip())
+                    event_type = event.get("type")
+
+                    if event_type == "message_start":
+                        message = event.get("message", {})
+
+                    elif event_type == "content_block_start":
+                        blocks[event["index"]] = dict(event.get("content_block", {}))
+
+                    elif event_type == "content_block_delta":
+                        if first_token_ms is None:
+                            first_token_ms = int((time.perf_counter() - started_at) * 1000)
+                        block = blocks.setdefault(event["index"], {})
+                        delta = event.get("delta", {})
+                        delta_type = delta.get("type")
+                        if delta_type == "text_delta":
+                            block["text"] = block.get("text", "") + delta.get("text", "")
+                        elif delta_type == "thinking_delta":
+                            block["thinking"] = block.get("thinking", "") + delta.get("thinking", "")
+                        elif delta_type == "signature_delta":
+                            block["signature"] = delta.get("signature")
+                        elif delta_type == "input_json_delta":
+                            partial_json[event["index"]] = (
+                                partial_json.get(event["index"], "") + delta.get("partial_json", "")
+                            )
+
+                    elif event_type == "content_block_stop":
+                        index = event["index"]
+                        if index in partial_json:
+                            try:
+                                blocks[index]["input"] = json.loads(partial_json.pop(index) or "{}")
+                            except json.JSONDecodeError:
+                                logger.warning(f"Invalid tool input JSON in streamed block {index}")
+
+                    elif event_type == "message_delta":
+                        message.update(event.get("delta", {}))
+                        message.setdefault("usage", {}).update(event.get("usage", {}))
+
+                    elif event_type == "error":
+                        raise RuntimeError(f"Claude stream error: {event.get('error')}")
+
+                    yield event
+
+            latency_ms = int((time.perf_counter() - started_at) * 1000)
+            usage = message.get("usage", {})
+            self.last_usage = {
+                "model": message.get("model", request_data.model),
+                "tokens_in": usage.get("input_tokens", 0),
+                "tokens_out": usage.get("output_tokens", 0),
+                "latency_ms": latency_ms
+            }
+            logger.info(
+                f"Claude API stream completed: model={self.last_usage['model']}, "
+                f"tokens={self.last_usage['tokens_in']}in/{self.last_usage['tokens_out']}out, "
+                f"first_token={first_token_ms}ms, latency={latency_ms}ms"
+            )
+
+            message["content"] = [blocks[i] for i in sorted(blocks)]
+            message["usage"] = {k: v for k, v in usage.items() if isinstance(v, int)}
+            yield {"type": "message_complete", "message": ClaudeResponse(**message)}
+
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP Error from Claude API stream: {e.response.status_code} - {e.response.text}")
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming message from Claude API: {e}")
+            raise
+
+    def _forced_tool(self, tool: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        پارامترهای درخواست برای اجبار مدل به استفاده از یک ابزار
+        Args:
+            tool (Dict[str, Any]): تعریف ابزار
+        Returns:
+            Dict[str, Any]: پارامترهای tools و tool_choice
+        """
+        return {
+            "tools": [tool],
+            "tool_choice": {"type": "tool", "name": tool["name"]}
+        }
+
     async def analyze_sentiment(
             self,
             text: str,
             language: str = "auto",
-            detailed: bool = False
+            detailed: bool = False,
+            model: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         تحلیل احساسات متن
@@ -149,12 +344,13 @@ class ClaudeClient:
             text (str): متن برای تحلیل
             language (str): زبان متن ('fa', 'en', یا 'auto')
             detailed (bool): آیا تحلیل جزئیات بیشتری ارائه دهد؟
+            model (Optional[str]): مدل Claude. اگر مشخص نشود، از مدل پیش‌فرض استفاده می‌شود.
         Returns:
             Dict[str, Any]: نتایج تحلیل احساسات
         """
-        system_prompt = """
+        system_prompt = f"""
         تو یک سیستم تحلیل احساسات متخصص هستی. وظیفه تو تحلیل احساسات متون فارسی و انگلیسی
-        و تشخیص دقیق احساس غالب در متن است. پاسخ را فقط به صورت JSON بازگردان.
+        و تشخیص دقیق احساس غالب در متن است. نتیجه را فقط با ابزار {SENTIMENT_TOOL_NAME} ثبت کن.
         """
         # تنظیم پیام بر اساس زبان
         language_hint = ""
@@ -163,55 +359,32 @@ class ClaudeClient:
         elif language == "en":
             language_hint = "این متن به زبان انگلیسی است."
         detail_level = "معمولی" if not detailed else "جزئیات بیشتر"
-        
-        detailed_fields = ""
+
+        detailed_hint = ""
         if detailed:
-            detailed_fields = (
-                '"emotions": ["emotion1", "emotion2", ...], '
-                '"intensity": (عددی بین 0 تا 1), '
-                '"entities": [{"entity": "name", "sentiment": "positive/negative/neutral"}]'
-            )
-        
+            detailed_hint = "فیلدهای emotions، intensity و entities را هم پر کن."
+
         user_message = f"""
         لطفاً احساس غالب در متن زیر را تحلیل کن. {language_hint}
         سطح جزئیات: {detail_level}
         متن: {text}
-        لطفاً پاسخ را فقط به صورت JSON با ساختار زیر بازگردان:
-        {{
-            "sentiment": "positive/negative/neutral/mixed",
-            "score": (عددی بین -1 تا 1),
-            "confidence": (عددی بین 0 تا 1),
-            "explanation": "توضیح مختصر دلیل این احساس"
-        }}
-        {f'اگر سطح جزئیات بیشتر درخواست شده است، این فیلدها را هم اضافه کن: {detailed_fields}' if detailed else ''}
+        {detailed_hint}
         """
-        
+
         messages = [
             {"role": "user", "content": user_message}
         ]
         response = await self.send_message(
             messages=messages,
             system=system_prompt,
-            temperature=0.3  # دمای پایین برای نتایج قطعی‌تر
+            model=model,
+            temperature=0.3,  # دمای پایین برای نتایج قطعی‌تر
+            **self._forced_tool(SENTIMENT_TOOL)
         )
-        # استخراج پاسخ JSON
-        try:
-            # یافتن اولین بلاک متنی در پاسخ
-            text_content = next((item["text"] for item in response.content if item["type"] == "text"), None)
-            if not text_content:
-                raise ValueError("پاسخ معتبری از Claude دریافت نشد")
-            # تلاش برای پارس JSON از پاسخ
-            # حذف تمام کاراکترهای قبل و بعد از JSON
-            json_str = text_content.strip()
-            # پیدا کردن شروع و پایان اولین JSON معتبر
-            start_idx = json_str.find("{")
-            end_idx = json_str.rfind("}") + 1
-            if start_idx != -1 and end_idx != 0:
-                json_str = json_str[start_idx:end_idx]
-            result = json.loads(json_str)
-            return result
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Error parsing sentiment analysis response: {e}")
+
+        result = parse_model(extract_tool_input(response.content, SENTIMENT_TOOL_NAME), SentimentResult)
+        if result is None:
+            logger.error("Error parsing sentiment analysis response")
             # برگرداندن یک نتیجه پیش‌فرض در صورت خطا
             return {
                 "sentiment": "unknown",
@@ -219,12 +392,14 @@ class ClaudeClient:
                 "confidence": 0,
                 "explanation": "خطا در پردازش پاسخ"
             }
-    
+        return result
+
     async def extract_topics(
             self,
             text: str,
             language: str = "auto",
-            max_topics: int = 5
+            max_topics: int = 5,
+            model: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         استخراج موضوعات اصلی از متن
@@ -232,12 +407,13 @@ class ClaudeClient:
             text (str): متن برای تحلیل
             language (str): زبان متن ('fa', 'en', یا 'auto')
             max_topics (int): حداکثر تعداد موضوعات
+            model (Optional[str]): مدل Claude. اگر مشخص نشود، از مدل پیش‌فرض استفاده می‌شود.
         Returns:
             Dict[str, Any]: موضوعات استخراج شده
         """
-        system_prompt = """
+        system_prompt = f"""
         تو یک سیستم استخراج موضوع متخصص هستی. وظیفه تو تحلیل متون فارسی و انگلیسی
-        و استخراج موضوعات اصلی و کلیدواژه‌های مهم است. پاسخ را فقط به صورت JSON بازگردان.
+        و استخراج موضوعات اصلی و کلیدواژه‌های مهم است. نتیجه را فقط با ابزار {TOPICS_TOOL_NAME} ثبت کن.
         """
         # تنظیم پیام بر اساس زبان
         language_hint = ""
@@ -249,19 +425,6 @@ class ClaudeClient:
         لطفاً موضوعات اصلی در متن زیر را استخراج کن. {language_hint}
         حداکثر تعداد موضوعات: {max_topics}
         متن: {text}
-        لطفاً پاسخ را فقط به صورت JSON با ساختار زیر بازگردان:
-        {{
-            "topics": [
-                {{
-                    "title": "عنوان موضوع",
-                    "relevance": (عددی بین 0 تا 1),
-                    "keywords": ["کلیدواژه1", "کلیدواژه2", ...]
-                }},
-                ...
-            ],
-            "main_topic": "موضوع اصلی کلی",
-            "keywords": ["کلیدواژه1", "کلیدواژه2", ...]
-        }}
         """
         messages = [
             {"role": "user", "content": user_message}
@@ -269,48 +432,45 @@ class ClaudeClient:
         response = await self.send_message(
             messages=messages,
             system=system_prompt,
-            temperature=0.3
+            model=model,
+            temperature=0.3,
+            **self._forced_tool(TOPICS_TOOL)
         )
-        # استخراج پاسخ JSON
-        try:
-            # یافتن اولین بلاک متنی در پاسخ
-            text_content = next((item["text"] for item in response.content if item["type"] == "text"), None)
-            if not text_content:
-                raise ValueError("پاسخ معتبری از Claude دریافت نشد")
-            # تلاش برای پارس JSON از پاسخ
-            json_str = text_content.strip()
-            start_idx = json_str.find("{")
-            end_idx = json_str.rfind("}") + 1
-            if start_idx != -1 and end_idx != 0:
-                json_str = json_str[start_idx:end_idx]
-            result = json.loads(json_str)
-            return result
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Error parsing topic extraction response: {e}")
+
+        result = parse_model(extract_tool_input(response.content, TOPICS_TOOL_NAME), TopicsResult)
+        if result is None:
+            logger.error("Error parsing topic extraction response")
             return {
                 "topics": [],
                 "main_topic": "unknown",
                 "keywords": []
             }
-    
+        result["topics"] = result["topics"][:max_topics]
+        return result
+
     async def analyze_batch(
             self,
             texts: List[str],
             analysis_type: str = "sentiment",
-            language: str = "auto"
+            language: str = "auto",
+            model: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         تحلیل دسته‌ای متون
+
+        نتایج هر متن به صورت مستقل اعتبارسنجی می‌شوند؛ اگر بخشی از پاسخ نامعتبر باشد
+        فقط آیتم‌های همان متون با خطا علامت‌گذاری می‌شوند و بقیه نتایج حفظ می‌شوند.
         Args:
             texts (List[str]): لیست متون برای تحلیل
             analysis_type (str): نوع تحلیل ('sentiment', 'topics', 'full')
             language (str): زبان متون ('fa', 'en', یا 'auto')
+            model (Optional[str]): مدل Claude. اگر مشخص نشود، براساس اندازه دسته انتخاب می‌شود.
         Returns:
-            List[Dict[str, Any]]: نتایج تحلیل
+            List[Dict[str, Any]]: نتایج تحلیل، یک آیتم به ازای هر متن
         """
-        system_prompt = """
+        system_prompt = f"""
         تو یک سیستم تحلیل متن هوشمند هستی. وظیفه تو تحلیل دسته‌ای متون فارسی و انگلیسی است.
-        پاسخ را فقط به صورت JSON بازگردان و دقت کن که برای هر متن، یک آیتم در آرایه نتایج وجود داشته باشد.
+        نتایج را فقط با ابزار {BATCH_TOOL_NAME} ثبت کن و دقت کن که برای هر متن، یک آیتم در آرایه نتایج وجود داشته باشد.
         """
         # تنظیم پیام بر اساس نوع تحلیل و زبان
         language_hint = ""
@@ -325,107 +485,57 @@ class ClaudeClient:
             analysis_request = "استخراج موضوعات (topics)"
         elif analysis_type == "full":
             analysis_request = "تحلیل کامل (sentiment + topics)"
-        # ساخت متن دسته‌ای
-        batch_text = ""
-        for i, text in enumerate(texts):
-            batch_text += f"متن {i + 1}: {text}\n\n"
-        
-        # ساخت JSON ساختار نمونه برای استفاده در پیام کاربر
-        json_structure = """
-        {
-            "results": [
-                {
-                    "index": 0,
-        """
-        
-        # تکمیل ساختار JSON براساس نوع تحلیل
-        if analysis_type == "sentiment" or analysis_type == "full":
-            json_structure += """
-                    "sentiment": {
-                        "sentiment": "positive/negative/neutral/mixed",
-                        "score": (عددی بین -1 تا 1),
-                        "confidence": (عددی بین 0 تا 1)
-                    },
-            """
-        
-        if analysis_type == "topics" or analysis_type == "full":
-            json_structure += """
-                    "topics": {
-                        "main_topic": "موضوع اصلی",
-                        "keywords": ["کلیدواژه1", "کلیدواژه2", ...]
-                    },
-            """
-        
-        json_structure += """
-                },
-                ...
-            ]
-        }
-        """
-        
+        # ساخت متن دسته‌ای (شماره داخل کروشه همان index نتیجه است)
+        batch_text = "\n\n".join(f"[{i}] {text}" for i, text in enumerate(texts))
+
         # ساخت پیام کاربر
         user_message = f"""
         لطفاً تحلیل {analysis_request} را برای متون زیر انجام بده. {language_hint}
         {batch_text}
-        لطفاً پاسخ را فقط به صورت JSON با ساختار زیر بازگردان:
-        {json_structure}
         """
-        
+
         messages = [
             {"role": "user", "content": user_message}
         ]
-        
+
         # برای دسته‌های بزرگ، مدل قوی‌تر و توکن‌های بیشتری نیاز است
-        model = self.model if len(texts) <= 10 else "claude-3-7-sonnet-20250219"
+        model = model or (self.model if len(texts) <= 10 else "claude-3-7-sonnet-20250219")
         max_tokens = 4096 if len(texts) <= 10 else 8192
-        
+
         response = await self.send_message(
             messages=messages,
             system=system_prompt,
             model=model,
             max_tokens=max_tokens,
-            temperature=0.3
+            temperature=0.3,
+            **self._forced_tool(build_batch_tool(analysis_type))
         )
-        
-        # استخراج پاسخ JSON
-        try:
-            # یافتن اولین بلاک متنی در پاسخ
-            text_content = next((item["text"] for item in response.content if item["type"] == "text"), None)
-            if not text_content:
-                raise ValueError("پاسخ معتبری از Claude دریافت نشد")
-            
-            # تلاش برای پارس JSON از پاسخ
-            json_str = text_content.strip()
-            start_idx = json_str.find("{")
-            end_idx = json_str.rfind("}") + 1
-            if start_idx != -1 and end_idx != 0:
-                json_str = json_str[start_idx:end_idx]
-            
-            result = json.loads(json_str)
-            return result.get("results", [])
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Error parsing batch analysis response: {e}")
-            return [{"index": i, "error": "خطا در پردازش پاسخ"} for i in range(len(texts))]
 
-    async def analyze_wave(
+        payload = extract_tool_input(response.content, BATCH_TOOL_NAME)
+        if payload is None:
+            logger.error("Error parsing batch analysis response: no structured output")
+
+        return parse_batch_results(payload, len(texts), analysis_type)
+
+    def _build_wave_request(
             self,
             tweets: List[Dict[str, Any]],
-            keywords: List[str] = None,
-            use_extended_thinking: bool = True
+            keywords: Optional[List[str]],
+            use_extended_thinking: bool
     ) -> Dict[str, Any]:
         """
-        تحلیل عمیق یک موج توییتری
+        ساخت پارامترهای درخواست تحلیل موج
         Args:
             tweets (List[Dict[str, Any]]): لیست توییت‌ها
-            keywords (List[str]): کلیدواژه‌های مرتبط با موج
-            use_extended_thinking (bool): استفاده از Extended Thinking برای تحلیل عمیق‌تر
+            keywords (Optional[List[str]]): کلیدواژه‌های مرتبط با موج
+            use_extended_thinking (bool): استفاده از Extended Thinking
         Returns:
-            Dict[str, Any]: نتایج تحلیل موج
+            Dict[str, Any]: پارامترهای send_message / stream_message
         """
-        system_prompt = """
+        system_prompt = f"""
         تو یک سیستم تحلیل موج شبکه‌های اجتماعی هستی. وظیفه تو تحلیل عمیق موج‌های توییتری در فضای مجازی است.
         سعی کن الگوهای توییت‌ها، منشا احتمالی موج، میزان تأثیرگذاری و روند پیش‌بینی شده را به دقت تحلیل کنی.
-        پاسخ را به صورت JSON با ساختار مشخص شده بازگردان.
+        نتیجه نهایی را با ابزار {WAVE_TOOL_NAME} ثبت کن.
         """
         # خلاصه‌سازی توییت‌ها برای استفاده در پرامپت
         tweet_summaries = []
@@ -435,28 +545,10 @@ class ClaudeClient:
             engagement = tweet.get("retweet_count", 0) + tweet.get("like_count", 0)
             tweet_summary = f"توییت {i + 1}: @{username} - لایک/ریتوییت: {engagement} - {tweet_text[:100]}..."
             tweet_summaries.append(tweet_summary)
-        
+
         tweets_count = len(tweets)
         keywords_text = ", ".join(keywords) if keywords else "نامشخص"
-        
-        # ساخت JSON ساختار نمونه برای استفاده در پیام کاربر
-        json_structure = """
-        {
-            "main_topic": "موضوع اصلی موج",
-            "summary": "خلاصه‌ای از ماهیت موج",
-            "is_coordinated": true/false,
-            "coordination_confidence": (عددی بین 0 تا 1),
-            "importance_score": (عددی بین 0 تا 10),
-            "key_influencers": ["کاربر1", "کاربر2", ...],
-            "reactionary": true/false,
-            "trigger_event": "رویداد محرک (اگر وجود دارد)",
-            "prediction": "پیش‌بینی روند آینده",
-            "recommendations": ["توصیه1", "توصیه2", ...],
-            "sentiment_distribution": {"positive": 0.x, "negative": 0.y, "neutral": 0.z},
-            "analysis_confidence": (عددی بین 0 تا 1)
-        }
-        """
-        
+
         # ساخت پیام کاربر
         tweet_summaries_text = "\n".join(tweet_summaries)
         user_message = f"""
@@ -473,69 +565,115 @@ class ClaudeClient:
         4. چه کاربرانی بیشترین تأثیر را در این موج داشته‌اند؟
         5. آیا این موج واکنشی به یک رویداد خاص است؟
         6. پیش‌بینی روند آینده این موج چیست؟
-        
-        لطفاً پاسخ را فقط به صورت JSON با ساختار زیر بازگردان:
-        {json_structure}
         """
-        
+
         messages = [
             {"role": "user", "content": user_message}
         ]
-        
+
         # استفاده از مدل قوی‌تر و Extended Thinking
         model = "claude-3-7-sonnet-20250219"  # استفاده از بهترین مدل برای تحلیل موج
-        
-        # تنظیم درخواست با Extended Thinking در صورت نیاز
+
         request_params = {
             "messages": messages,
             "system": system_prompt,
             "model": model,
             "max_tokens": 4096,
-            "temperature": 0.2  # دمای پایین برای نتایج قطعی‌تر
+            "temperature": 0.2,  # دمای پایین برای نتایج قطعی‌تر
+            **self._forced_tool(WAVE_TOOL)
         }
-        
-        # اضافه کردن هدر Extended Thinking
+
+        # در حالت Extended Thinking انتخاب اجباری ابزار پشتیبانی نمی‌شود و
+        # بودجه تفکر باید کمتر از max_tokens باشد
         if use_extended_thinking:
-            self.headers["anthropic-beta"] = "thinking-2025-04-15"
+            request_params["tool_choice"] = {"type": "auto"}
+            request_params["max_tokens"] = 10000
             request_params["thinking"] = {
                 "type": "enabled",
                 "budget_tokens": 6000
             }
-        
-        response = await self.send_message(**request_params)
-        
-        # حذف هدر Extended Thinking برای درخواست‌های بعدی
-        if use_extended_thinking and "anthropic-beta" in self.headers:
-            del self.headers["anthropic-beta"]
-        
-        # استخراج پاسخ JSON
-        try:
-            # یافتن اولین بلاک متنی در پاسخ
-            text_content = next((item["text"] for item in response.content if item["type"] == "text"), None)
-            if not text_content:
-                raise ValueError("پاسخ معتبری از Claude دریافت نشد")
-            
-            # تلاش برای پارس JSON از پاسخ
-            json_str = text_content.strip()
-            start_idx = json_str.find("{")
-            end_idx = json_str.rfind("}") + 1
-            if start_idx != -1 and end_idx != 0:
-                json_str = json_str[start_idx:end_idx]
-            
-            result = json.loads(json_str)
-            
-            # استخراج محتوای Extended Thinking اگر موجود بود
-            thinking_content = next((item["thinking"] for item in response.content if item.get("type") == "thinking"),
-                            None)
-            if thinking_content:
-                result["extended_thinking"] = thinking_content
-            
-            return result
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Error parsing wave analysis response: {e}")
+
+        return request_params
+
+    def _parse_wave_response(self, content: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        استخراج نتیجه تحلیل موج از بلاک‌های محتوای پاسخ
+        Args:
+            content (List[Dict[str, Any]]): بلاک‌های محتوای پاسخ
+        Returns:
+            Dict[str, Any]: نتایج تحلیل موج
+        """
+        result = parse_model(extract_tool_input(content, WAVE_TOOL_NAME), WaveAnalysisResult)
+        if result is None:
+            logger.error("Error parsing wave analysis response")
             return {
                 "main_topic": "خطا در تحلیل موج",
                 "summary": "خطا در پردازش پاسخ",
-                "error": str(e),
+                "error": "خروجی ساختاریافته معتبری دریافت نشد",
                 "analysis_confidence": 0
-            }
\ No newline at end of file
+            }
+
+        # استخراج محتوای Extended Thinking اگر موجود بود
+        thinking_content = next((item["thinking"] for item in content if item.get("type") == "thinking"),
+                        None)
+        if thinking_content:
+            result["extended_thinking"] = thinking_content
+
+        return result
+
+    async def analyze_wave(
+            self,
+            tweets: List[Dict[str, Any]],
+            keywords: List[str] = None,
+            use_extended_thinking: bool = True
+    ) -> Dict[str, Any]:
+        """
+        تحلیل عمیق یک موج توییتری
+        Args:
+            tweets (List[Dict[str, Any]]): لیست توییت‌ها
+            keywords (List[str]): کلیدواژه‌های مرتبط با موج
+            use_extended_thinking (bool): استفاده از Extended Thinking برای تحلیل عمیق‌تر
+        Returns:
+            Dict[str, Any]: نتایج تحلیل موج
+        """
+        request_params = self._build_wave_request(tweets, keywords, use_extended_thinking)
+        response = await self.send_message(**request_params)
+        return self._parse_wave_response(response.content)
+
+    async def analyze_wave_stream(
+            self,
+            tweets: List[Dict[str, Any]],
+            keywords: List[str] = None,
+            use_extended_thinking: bool = True
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        تحلیل عمیق یک موج توییتری به صورت جریانی
+
+        بخش‌های تفکر، متن و ورودی ابزار به محض دریافت ارسال می‌شوند و در پایان
+        نتیجه اعتبارسنجی شده با رویداد "result" برگردانده می‌شود.
+
+        Args:
+            tweets (List[Dict[str, Any]]): لیست توییت‌ها
+            keywords (List[str]): کلیدواژه‌های مرتبط با موج
+            use_extended_thinking (bool): استفاده از Extended Thinking
+
+        Yields:
+            Tuple[str, Dict[str, Any]]: نام رویداد ("thinking", "text", "tool_input", "result") و داده آن
+        """
+        request_params = self._build_wave_request(tweets, keywords, use_extended_thinking)
+
+        async for event in self.stream_message(**request_params):
+            event_type = event.get("type")
+
+            if event_type == "content_block_delta":
+                delta = event.get("delta", {})
+                delta_type = delta.get("type")
+                if delta_type == "thinking_delta":
+                    yield "thinking", {"text": delta.get("thinking", "")}
+                elif delta_type == "text_delta":
+                    yield "text", {"text": delta.get("text", "")}
+                elif delta_type == "input_json_delta":
+                    yield "tool_input", {"partial_json": delta.get("partial_json", "")}
+
+            elif event_type == "message_complete":
+                yield "result", self._parse_wave_response(event["message"].content)
@@ -17,6 +17,7 @@ from sqlalchemy import func, insert, update
 
 from app.config import settings
 from app.db.models import ApiUsage, Tweet
+from app.services.analyzer.budget_ledger import BudgetLedger, get_budget_ledger
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,12 @@ class ClaudeModel(str, Enum):
     HAIKU = "claude-3-5-haiku-20241022"
 
 
+class ModelTier(str, Enum):
+    """لایه‌های تحلیل آبشاری"""
+    TRIAGE = "triage"          # دسته‌بندی اولیه با ارزان‌ترین مدل
+    ESCALATION = "escalation"  # تحلیل مجدد موارد مبهم یا مهم با مدل قوی‌تر
+
+
 class AnalysisType(str, Enum):
     """انواع تحلیل‌ها"""
     SENTIMENT = "sentiment"
@@ -53,21 +60,24 @@ class CostManager:
     Attributes:
         db_session (AsyncSession): نشست دیتابیس
         daily_budget (float): بودجه روزانه به دلار
+        ledger (BudgetLedger): دفتر مشترک هزینه روزانه
         current_usage (Dict[str, float]): هزینه فعلی به تفکیک API
         model_prices (Dict[str, Dict[str, float]]): قیمت‌های مدل‌های مختلف
         token_estimation (Dict[str, Dict[str, Tuple[int, int]]]): تخمین تعداد توکن برای عملیات مختلف
     """
 
-    def __init__(self, db_session: AsyncSession, daily_budget: float = None):
+    def __init__(self, db_session: AsyncSession, daily_budget: float = None, ledger: BudgetLedger = None):
         """
         مقداردهی اولیه مدیریت هزینه
 
         Args:
             db_session (AsyncSession): نشست دیتابیس
             daily_budget (float, optional): بودجه روزانه به دلار. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            ledger (BudgetLedger, optional): دفتر بودجه. اگر مشخص نشود، دفتر مشترک فرآیند استفاده می‌شود.
         """
         self.db_session = db_session
         self.daily_budget = daily_budget or settings.DAILY_BUDGET
+        self.ledger = ledger or get_budget_ledger()
         self.current_usage = {
             ApiType.CLAUDE: 0.0,
             ApiType.TWITTER: 0.0
@@ -119,37 +129,33 @@ class CostManager:
 
     async def initialize(self) -> None:
         """
-        مقداردهی اولیه و بارگذاری آمار فعلی از دیتابیس
+        مقداردهی اولیه و بارگذاری آمار فعلی از دفتر بودجه
+
+        دیتابیس فقط زمانی خوانده می‌شود که مجموع‌های امروز هنوز در Redis ثبت نشده باشند.
         """
-        # بارگذاری آمار امروز
-        today = datetime.now().date()
-        today_start = datetime.combine(today, datetime.min.time())
-        today_end = datetime.combine(today, datetime.max.time())
+        totals = await self.ledger.load(self.db_session)
+        self._apply_totals(totals)
 
-        # بارگذاری هزینه امروز برای Claude
-        stmt = select(func.sum(ApiUsage.cost)).where(
-            ApiUsage.api_type == ApiType.CLAUDE,
-            ApiUsage.date >= today_start,
-            ApiUsage.date <= today_end
+        logger.info(
+            f"Current API usage loaded: Claude=${self.current_usage[ApiType.CLAUDE]:.2f}, "
+            f"Twitter=${self.current_usage[ApiType.TWITTER]:.2f}"
         )
-        result = await self.db_session.execute(stmt)
-        claude_cost = result.scalar() or 0.0
 
-        # بارگذاری هزینه امروز برای Twitter
-        stmt = select(func.sum(ApiUsage.cost)).where(
-            ApiUsage.api_type == ApiType.TWITTER,
-            ApiUsage.date >= today_start,
-            ApiUsage.date <= today_end
-        )
-        result = await self.db_session.execute(stmt)
-        twitter_cost = result.scalar() or 0.0
+    async def close(self) -> None:
+        """
+        درج ردیف‌های استفاده در انتظار
+        """
+        await self.ledger.flush()
 
-        self.current_usage = {
-            ApiType.CLAUDE: claude_cost,
-            ApiType.TWITTER: twitter_cost
-        }
+    def _apply_totals(self, totals: Dict[str, float]) -> None:
+        """
+        به‌روزرسانی هزینه فعلی از روی مجموع‌های دفتر
 
-        logger.info(f"Current API usage loaded: Claude=${claude_cost:.2f}, Twitter=${twitter_cost:.2f}")
+        Args:
+            totals (Dict[str, float]): مجموع هزینه امروز به تفکیک API
+        """
+        for api_type in ApiType:
+            self.current_usage[api_type] = totals.get(api_type.value, 0.0)
 
     async def record_usage(
         self,
@@ -158,7 +164,10 @@ class CostManager:
         tokens_in: int = 0,
         tokens_out: int = 0,
         item_count: int = 0,
-        cost: float = None
+        cost: float = None,
+        model: Optional[str] = None,
+        tier: Optional[str] = None,
+        latency_ms: Optional[int] = None
     ) -> None:
         """
         ثبت استفاده از API
@@ -170,36 +179,57 @@ class CostManager:
             tokens_out (int): تعداد توکن‌های خروجی
             item_count (int): تعداد آیتم‌ها
             cost (float, optional): هزینه تخمینی. اگر مشخص نشود، محاسبه می‌شود.
+            model (str, optional): مدل Claude استفاده شده
+            tier (str, optional): لایه تحلیل آبشاری
+            latency_ms (int, optional): زمان پاسخ API به میلی‌ثانیه
         """
         # محاسبه هزینه اگر مشخص نشده باشد
         if cost is None:
             if api_type == ApiType.CLAUDE:
-                # محاسبه هزینه براساس تعداد توکن و مدل پیش‌فرض
-                model = settings.CLAUDE_MODEL
-                model_price = self.model_prices.get(model, self.model_prices[ClaudeModel.SONNET_3_7])
-                cost = (tokens_in * model_price["input"] + tokens_out * model_price["output"]) / 1_000_000
+                # محاسبه هزینه براساس تعداد توکن و مدل (یا مدل پیش‌فرض)
+                cost = self.calculate_cost(model or settings.CLAUDE_MODEL, tokens_in, tokens_out)
             elif api_type == ApiType.TWITTER:
                 # هزینه تخمینی براساس تعداد آیتم‌ها
                 cost = item_count * 0.0002  # تقریباً $0.2 برای هر 1000 آیتم
 
-        # ثبت استفاده در دیتابیس
-        usage = ApiUsage(
-            date=datetime.now(),
-            api_type=api_type,
-            operation=operation,
-            tokens_in=tokens_in,
-            tokens_out=tokens_out,
-            item_count=item_count,
-            cost=cost
-        )
-
-        self.db_session.add(usage)
-        await self.db_session.commit()
+        # ثبت در دفتر بودجه؛ ردیف‌ها به صورت دسته‌ای در دیتابیس درج می‌شوند
+        api_type = ApiType(api_type)
+        new_total = await self.ledger.record(api_type.value, cost, {
+            "date": datetime.now(),
+            "api_type": api_type.value,
+            "operation": operation,
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_out,
+            "item_count": item_count,
+            "cost": cost,
+            "model": model,
+            "tier": tier,
+            "latency_ms": latency_ms
+        })
 
         # به‌روزرسانی هزینه فعلی
-        self.current_usage[api_type] += cost
+        self.current_usage[api_type] = new_total
+
+        logger.info(f"Recorded {api_type.value} API usage: operation={operation}, cost=${cost:.6f}")
+
+    def calculate_cost(self, model: str, tokens_in: int, tokens_out: int) -> float:
+        """
+        محاسبه هزینه براساس مدل و تعداد توکن‌ها
 
-        logger.info(f"Recorded {api_type} API usage: operation={operation}, cost=${cost:.6f}")
+        Args:
+            model (str): مدل Claude
+            tokens_in (int): تعداد توکن‌های ورودی
+            tokens_out (int): تعداد توکن‌های خروجی
+
+        Returns:
+            float: هزینه به دلار
+        """
+        # کلیدهای جدول قیمت از نوع Enum هستند؛ نام مدل رشته‌ای باید ابتدا تبدیل شود
+        try:
+            model_price = self.model_prices[ClaudeModel(model)]
+        except (ValueError, KeyError):
+            model_price = self.model_prices[ClaudeModel.SONNET_3_7]
+        return (tokens_in * model_price["input"] + tokens_out * model_price["output"]) / 1_000_000
 
     async def get_daily_usage(self, days: int = 7) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -211,6 +241,9 @@ class CostManager:
         Returns:
             Dict[str, List[Dict[str, Any]]]: آمار استفاده روزانه به تفکیک API
         """
+        # ردیف‌های در انتظار ابتدا درج می‌شوند تا آمار امروز کامل باشد
+        await self.ledger.flush()
+
         # محاسبه تاریخ شروع
         start_date = datetime.now() - timedelta(days=days)
 
@@ -269,13 +302,59 @@ class CostManager:
             "twitter": twitter_usage
         }
 
+    async def get_tier_usage(self, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        دریافت آمار هزینه و زمان پاسخ به تفکیک لایه و مدل
+
+        Args:
+            days (int): تعداد روزهای اخیر
+
+        Returns:
+            List[Dict[str, Any]]: آمار هر ترکیب لایه/مدل
+        """
+        await self.ledger.flush()
+        start_date = datetime.now() - timedelta(days=days)
+
+        stmt = select(
+            ApiUsage.tier,
+            ApiUsage.model,
+            func.count(),
+            func.sum(ApiUsage.cost),
+            func.sum(ApiUsage.tokens_in),
+            func.sum(ApiUsage.tokens_out),
+            func.avg(ApiUsage.latency_ms)
+        ).where(
+            ApiUsage.api_type == ApiType.CLAUDE,
+            ApiUsage.date >= start_date
+        ).group_by(
+            ApiUsage.tier,
+            ApiUsage.model
+        )
+
+        result = await self.db_session.execute(stmt)
+        return [
+            {
+                "tier": tier,
+                "model": model,
+                "calls": int(calls),
+                "cost": float(cost or 0),
+                "tokens_in": int(tokens_in or 0),
+                "tokens_out": int(tokens_out or 0),
+                "avg_latency_ms": float(avg_latency) if avg_latency is not None else None
+            }
+            for tier, model, calls, cost, tokens_in, tokens_out, avg_latency in result.fetchall()
+        ]
+
     async def check_budget(self) -> Dict[str, Any]:
         """
         بررسی وضعیت بودجه
 
+        مجموع‌ها از دفتر مشترک (یک MGET روی Redis) خوانده می‌شوند و به دیتابیس مراجعه نمی‌شود.
+
         Returns:
             Dict[str, Any]: وضعیت بودجه
         """
+        self._apply_totals(await self.ledger.get_totals())
         total_usage = sum(self.current_usage.values())
         remaining = self.daily_budget - total_usage
         percentage_used = (total_usage / self.daily_budget) * 100 if self.daily_budget > 0 else 100
@@ -300,7 +379,8 @@ class CostManager:
         text_length: int,
         is_batch: bool = False,
         items_count: int = 1,
-        is_important: bool = False
+        is_important: bool = False,
+        tier: Optional[str] = None
     ) -> Tuple[str, Dict[str, Any]]:
         """
         انتخاب بهینه مدل Claude برای تحلیل
@@ -311,6 +391,7 @@ class CostManager:
             is_batch (bool): آیا تحلیل دسته‌ای است؟
             items_count (int): تعداد آیتم‌ها در تحلیل دسته‌ای
             is_important (bool): آیا این تحلیل اهمیت بالایی دارد؟
+            tier (str, optional): لایه تحلیل آبشاری. در صورت تعیین، مدل براساس لایه انتخاب می‌شود.
 
         Returns:
             Tuple[str, Dict[str, Any]]: مدل بهینه و اطلاعات تخمین هزینه
@@ -366,7 +447,17 @@ class CostManager:
         selected_model = None
         model_reason = ""
 
-        if analysis_type == AnalysisType.WAVE or is_important:
+        if tier == ModelTier.TRIAGE:
+            # لایه اول آبشار همیشه ارزان‌ترین مدل است
+            selected_model = ClaudeModel.HAIKU
+            model_reason = "دسته‌بندی اولیه آبشاری"
+
+        elif tier == ModelTier.ESCALATION:
+            # موارد ارجاع شده با مدل قوی‌تر بازتحلیل می‌شوند
+            selected_model = ClaudeModel.SONNET_3_7
+            model_reason = "ارجاع آبشاری"
+
+        elif analysis_type == AnalysisType.WAVE or is_important:
             # برای تحلیل موج یا موارد مهم، همیشه از بهترین مدل استفاده می‌شود
             selected_model = ClaudeModel.SONNET_3_7
             model_reason = "تحلیل مهم یا موج"
@@ -387,8 +478,7 @@ class CostManager:
             model_reason = "تحلیل معمولی"
 
         # محاسبه هزینه تخمینی
-        model_price = self.model_prices.get(selected_model)
-        estimated_cost = (tokens_in * model_price["input"] + tokens_out * model_price["output"]) / 1_000_000
+        estimated_cost = self.calculate_cost(selected_model, tokens_in, tokens_out)
 
         logger.debug(
             f"Selected model {selected_model} for {analysis_type} analysis "
@@ -400,7 +490,8 @@ class CostManager:
             "tokens_out": tokens_out,
             "estimated_cost": estimated_cost,
             "model": selected_model,
-            "reason": model_reason
+            "reason": model_reason,
+            "tier": tier
         }
 
     async def update_daily_budget(self, new_budget: float) -> Dict[str, Any]:
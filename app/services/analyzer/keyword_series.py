@@ -0,0 +1,346 @@
+"""
+سری زمانی دقیقه‌ای کلیدواژه‌ها.
+
+این ماژول آمار تجمیعی هر کلیدواژه در هر دقیقه (حجم، مجموع احساسات و تعداد
+هر برچسب) را هنگام پردازش و تحلیل توییت‌ها در جدول keyword_minute_stats
+به‌روزرسانی می‌کند. تشخیص موج به جای تجمیع جدول توییت‌ها از این سری‌ها
+می‌خواند؛ بنابراین هزینه آن به تعداد توییت‌ها وابسته نیست.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Iterable
+
+from sqlalchemy import func, and_, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db.models import Tweet, TweetKeyword, KeywordMinuteStat
+
+logger = logging.getLogger(__name__)
+
+# شناسه ردیف‌های آمار همه توییت‌ها (بدون فیلتر کلیدواژه)
+ALL_KEYWORDS_ID = 0
+
+SENTIMENT_LABELS = ("positive", "negative", "neutral", "mixed")
+
+COUNTER_COLUMNS = (
+    "tweet_count", "scored_count", "sentiment_sum",
+    "positive_count", "negative_count", "neutral_count", "mixed_count"
+)
+
+
+def floor_to_minute(value: datetime) -> datetime:
+    """
+    گرد کردن زمان به ابتدای دقیقه (به وقت UTC و بدون منطقه زمانی)
+
+    Args:
+        value (datetime): زمان
+
+    Returns:
+        datetime: ابتدای دقیقه
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(second=0, microsecond=0)
+
+
+class KeywordSeriesService:
+    """
+    نگهداری و خواندن سری زمانی دقیقه‌ای کلیدواژه‌ها
+
+    به‌روزرسانی‌ها در تراکنش فراخواننده انجام می‌شوند تا با تغییر توییت‌ها
+    همزمان commit شوند.
+
+    Attributes:
+        db_session (AsyncSession): نشست دیتابیس
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        """
+        مقداردهی اولیه سرویس سری زمانی
+
+        Args:
+            db_session (AsyncSession): نشست دیتابیس
+        """
+        self.db_session = db_session
+
+    async def _get_tweet_keywords(self, tweet_ids: List[int]) -> Dict[int, List[int]]:
+        """
+        دریافت کلیدواژه‌های هر توییت با یک کوئری
+
+        Args:
+            tweet_ids (List[int]): شناسه توییت‌ها
+
+        Returns:
+            Dict[int, List[int]]: شناسه توییت به لیست شناسه کلیدواژه‌ها
+        """
+        tweet_keywords = defaultdict(list)
+        if not tweet_ids:
+            return tweet_keywords
+
+        stmt = select(TweetKeyword.tweet_id, TweetKeyword.keyword_id).where(
+            TweetKeyword.tweet_id.in_(tweet_ids)
+        )
+        result = await self.db_session.execute(stmt)
+        for tweet_id, keyword_id in result.fetchall():
+            tweet_keywords[tweet_id].append(keyword_id)
+
+        return tweet_keywords
+
+    async def _apply(self, deltas: Dict[Tuple[int, datetime], Dict[str, float]]) -> int:
+        """
+        اعمال تغییرات شمارنده‌ها با یک INSERT ... ON CONFLICT DO UPDATE
+
+        Args:
+            deltas (Dict[Tuple[int, datetime], Dict[str, float]]): تغییرات به ازای (کلیدواژه، دقیقه)
+
+        Returns:
+            int: تعداد ردیف‌های به‌روزرسانی شده
+        """
+        # مرتب‌سازی کلیدها از بن‌بست بین نویسنده‌های همزمان جلوگیری می‌کند
+        rows = [
+            {
+                "keyword_id": keyword_id,
+                "bucket": bucket,
+                **{
+                    column: float(values.get(column, 0)) if column == "sentiment_sum" else int(values.get(column, 0))
+                    for column in COUNTER_COLUMNS
+                }
+            }
+            for (keyword_id, bucket), values in sorted(deltas.items())
+            if any(values.values())
+        ]
+        if not rows:
+            return 0
+
+        stmt = pg_insert(KeywordMinuteStat).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["keyword_id", "bucket"],
+            set_={
+                column: getattr(KeywordMinuteStat, column) + getattr(stmt.excluded, column)
+                for column in COUNTER_COLUMNS
+            }
+        )
+        await self.db_session.execute(stmt)
+        return len(rows)
+
+    async def record_tweets(self, tweets: Iterable[Tweet]) -> Dict[Tuple[int, datetime], int]:
+        """
+        افزودن توییت‌های پردازش شده به سری‌ها
+
+        Args:
+            tweets (Iterable[Tweet]): توییت‌هایی که برای اولین بار شمرده می‌شوند
+
+        Returns:
+            Dict[Tuple[int, datetime], int]: تعداد توییت‌های افزوده شده به ازای (کلیدواژه، دقیقه)
+        """
+        tweets = [tweet for tweet in tweets if tweet.created_at]
+        if not tweets:
+            return {}
+
+        tweet_keywords = await self._get_tweet_keywords([tweet.id for tweet in tweets])
+        deltas = defaultdict(lambda: defaultdict(float))
+
+        for tweet in tweets:
+            bucket = floor_to_minute(tweet.created_at)
+            for keyword_id in [ALL_KEYWORDS_ID] + tweet_keywords.get(tweet.id, []):
+                values = deltas[(keyword_id, bucket)]
+                values["tweet_count"] += 1
+                if tweet.sentiment_score is not None:
+                    values["scored_count"] += 1
+                    values["sentiment_sum"] += tweet.sentiment_score
+                if tweet.sentiment_label in SENTIMENT_LABELS:
+                    values[f"{tweet.sentiment_label}_count"] += 1
+
+        await self._apply(deltas)
+        return {key: int(values["tweet_count"]) for key, values in deltas.items()}
+
+    async def update_sentiment(self, changes: Iterable[Tuple[Tweet, Optional[str], Optional[float]]]) -> int:
+        """
+        اعمال تغییر احساسات توییت‌هایی که قبلاً شمرده شده‌اند
+
+        Args:
+            changes (Iterable[Tuple[Tweet, Optional[str], Optional[float]]]): توییت (با مقادیر جدید)،
+                برچسب قبلی و امتیاز قبلی
+
+        Returns:
+            int: تعداد ردیف‌های به‌روزرسانی شده
+        """
+        # توییت‌های پردازش نشده هنوز در سری‌ها شمرده نشده‌اند
+        changes = [
+            (tweet, old_label, old_score) for tweet, old_label, old_score in changes
+            if tweet.is_processed and tweet.created_at
+        ]
+        if not changes:
+            return 0
+
+        tweet_keywords = await self._get_tweet_keywords([tweet.id for tweet, _, _ in changes])
+        deltas = defaultdict(lambda: defaultdict(float))
+
+        for tweet, old_label, old_score in changes:
+            bucket = floor_to_minute(tweet.created_at)
+            for keyword_id in [ALL_KEYWORDS_ID] + tweet_keywords.get(tweet.id, []):
+                values = deltas[(keyword_id, bucket)]
+                values["scored_count"] += (tweet.sentiment_score is not None) - (old_score is not None)
+                values["sentiment_sum"] += (tweet.sentiment_score or 0.0) - (old_score or 0.0)
+                if old_label != tweet.sentiment_label:
+                    if old_label in SENTIMENT_LABELS:
+                        values[f"{old_label}_count"] -= 1
+                    if tweet.sentiment_label in SENTIMENT_LABELS:
+                        values[f"{tweet.sentiment_label}_count"] += 1
+
+        return await self._apply(deltas)
+
+    async def get_bucket_rows(
+            self,
+            keyword_ids: Optional[List[int]],
+            start_time: datetime,
+            end_time: datetime,
+            window: timedelta
+    ) -> List[Tuple]:
+        """
+        دریافت آمار بازه‌های زمانی از سری‌ها
+
+        خروجی هم‌شکل کوئری تجمیعی جدول توییت‌هاست: (ابتدای بازه، تعداد،
+        تعداد دارای امتیاز، میانگین احساسات، positive، negative، neutral، mixed).
+        توییت‌های بدون برچسب خنثی شمرده می‌شوند. اگر چند کلیدواژه مشخص شود،
+        توییتی که با چند کلیدواژه مرتبط است بیش از یک بار شمرده می‌شود.
+
+        Args:
+            keyword_ids (Optional[List[int]]): شناسه کلیدواژه‌ها (None برای همه توییت‌ها)
+            start_time (datetime): ابتدای بازه (مبدأ بازه‌بندی)
+            end_time (datetime): انتهای بازه
+            window (timedelta): طول هر بازه
+
+        Returns:
+            List[Tuple]: آمار هر بازه دارای داده
+        """
+        bucket = func.date_bin(window, KeywordMinuteStat.bucket, start_time).label("bucket")
+        tweet_count = func.sum(KeywordMinuteStat.tweet_count)
+        scored_count = func.sum(KeywordMinuteStat.scored_count)
+        labeled_count = (
+            func.sum(KeywordMinuteStat.positive_count) + func.sum(KeywordMinuteStat.negative_count) +
+            func.sum(KeywordMinuteStat.neutral_count) + func.sum(KeywordMinuteStat.mixed_count)
+        )
+
+        conditions = [
+            KeywordMinuteStat.bucket >= start_time,
+            KeywordMinuteStat.bucket < end_time,
+            KeywordMinuteStat.keyword_id.in_(keyword_ids) if keyword_ids
+            else KeywordMinuteStat.keyword_id == ALL_KEYWORDS_ID
+        ]
+
+        stmt = select(
+            bucket,
+            tweet_count,
+            scored_count,
+            func.sum(KeywordMinuteStat.sentiment_sum) / func.nullif(scored_count, 0),
+            func.sum(KeywordMinuteStat.positive_count),
+            func.sum(KeywordMinuteStat.negative_count),
+            func.sum(KeywordMinuteStat.neutral_count) + tweet_count - labeled_count,
+            func.sum(KeywordMinuteStat.mixed_count)
+        ).where(and_(*conditions)).group_by(literal_column("bucket"))
+
+        result = await self.db_session.execute(stmt)
+        return result.fetchall()
+
+    async def get_keyword_matrix_rows(
+            self,
+            keyword_ids: Optional[List[int]],
+            start_time: datetime,
+            end_time: datetime,
+            window: timedelta
+    ) -> List[Tuple]:
+        """
+        دریافت آمار بازه‌های زمانی به تفکیک کلیدواژه با یک کوئری
+
+        Args:
+            keyword_ids (Optional[List[int]]): شناسه کلیدواژه‌ها (None برای همه کلیدواژه‌ها)
+            start_time (datetime): ابتدای بازه (مبدأ بازه‌بندی)
+            end_time (datetime): انتهای بازه
+            window (timedelta): طول هر بازه
+
+        Returns:
+            List[Tuple]: ردیف‌های (شناسه کلیدواژه، ابتدای بازه، تعداد، تعداد دارای امتیاز، مجموع امتیاز احساسات)
+        """
+        bucket = func.date_bin(window, KeywordMinuteStat.bucket, start_time).label("bucket")
+
+        conditions = [
+            KeywordMinuteStat.bucket >= start_time,
+            KeywordMinuteStat.bucket < end_time,
+            KeywordMinuteStat.keyword_id.in_(keyword_ids) if keyword_ids
+            else KeywordMinuteStat.keyword_id != ALL_KEYWORDS_ID
+        ]
+
+        stmt = select(
+            KeywordMinuteStat.keyword_id,
+            bucket,
+            func.sum(KeywordMinuteStat.tweet_count),
+            func.sum(KeywordMinuteStat.scored_count),
+            func.sum(KeywordMinuteStat.sentiment_sum)
+        ).where(and_(*conditions)).group_by(KeywordMinuteStat.keyword_id, literal_column("bucket"))
+
+        result = await self.db_session.execute(stmt)
+        return result.fetchall()
+
+    async def rebuild(self, start_time: datetime, end_time: datetime) -> int:
+        """
+        بازسازی سری‌ها از جدول توییت‌ها برای یک بازه زمانی
+
+        برای مقداردهی اولیه داده‌های قدیمی یا اصلاح انحراف استفاده می‌شود.
+        ردیف‌های بازه حذف و از روی توییت‌های پردازش شده دوباره ساخته می‌شوند.
+
+        Args:
+            start_time (datetime): ابتدای بازه
+            end_time (datetime): انتهای بازه
+
+        Returns:
+            int: تعداد ردیف‌های ساخته شده
+        """
+        start_time = floor_to_minute(start_time)
+        end_time = floor_to_minute(end_time)
+
+        await self.db_session.execute(
+            KeywordMinuteStat.__table__.delete().where(
+                and_(KeywordMinuteStat.bucket >= start_time, KeywordMinuteStat.bucket < end_time)
+            )
+        )
+
+        # واحد به صورت literal نوشته می‌شود تا عبارت SELECT و GROUP BY یکسان شناخته شوند
+        minute = func.date_trunc(literal_column("'minute'"), Tweet.created_at)
+        counters = [
+            func.count(),
+            func.count(Tweet.sentiment_score),
+            func.coalesce(func.sum(Tweet.sentiment_score), 0.0),
+            *[func.count().filter(Tweet.sentiment_label == label) for label in SENTIMENT_LABELS]
+        ]
+        tweet_filter = and_(
+            Tweet.is_processed == True,
+            Tweet.created_at >= start_time,
+            Tweet.created_at < end_time
+        )
+
+        all_tweets = select(
+            literal_column(str(ALL_KEYWORDS_ID)), minute, *counters
+        ).where(tweet_filter).group_by(minute)
+
+        per_keyword = select(
+            TweetKeyword.keyword_id, minute, *counters
+        ).join(
+            TweetKeyword, TweetKeyword.tweet_id == Tweet.id
+        ).where(tweet_filter).group_by(TweetKeyword.keyword_id, minute)
+
+        columns = ["keyword_id", "bucket", *COUNTER_COLUMNS]
+        inserted = 0
+        for query in (all_tweets, per_keyword):
+            result = await self.db_session.execute(
+                KeywordMinuteStat.__table__.insert().from_select(columns, query)
+            )
+            inserted += result.rowcount or 0
+
+        await self.db_session.commit()
+        logger.info(f"Rebuilt {inserted} keyword series rows from {start_time} to {end_time}")
+        return inserted
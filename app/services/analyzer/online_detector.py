@@ -0,0 +1,321 @@
+"""
+تشخیص آنلاین موج‌ها.
+
+این ماژول برخلاف WaveDetector که به صورت دوره‌ای پنجره‌های زمانی را بررسی می‌کند،
+با هر دسته توییت پردازش شده تغذیه می‌شود و برای هر کلیدواژه میانگین و واریانس
+نمایی (EWMA) تعداد توییت‌های دقیقه‌ای را نگه می‌دارد. به محض اینکه تعداد دقیقه
+جاری از آستانه z-score عبور کند، موج گزارش می‌شود.
+
+وضعیت هر کلیدواژه فقط چند عدد است و در یک hash در Redis ذخیره می‌شود تا
+راه‌اندازی مجدد پردازشگر بدون بازخوانی تاریخچه انجام شود. وضعیت متعلق به
+یک نمونه پردازشگر است؛ اجرای چند پردازشگر موازی وضعیت یکدیگر را بازنویسی می‌کنند.
+"""
+
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.db.models import Keyword
+from app.services.redis_service import RedisService
+from app.services.analyzer.keyword_series import ALL_KEYWORDS_ID
+from app.services.analyzer.wave_detector import WaveDetector
+from app.services.live_updates import publish_live_event, WAVE_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# کلید hash وضعیت کلیدواژه‌ها در Redis
+STATE_KEY = "online_wave_state"
+
+# حداکثر تعداد دقیقه‌های خالی که به صورت صریح در میانگین اعمال می‌شوند
+MAX_GAP_MINUTES = 24 * 60
+
+
+class OnlineWaveDetector:
+    """
+    تشخیص آنلاین موج با میانگین و واریانس نمایی
+
+    وضعیت هر کلیدواژه شامل دقیقه باز جاری، تعداد آن، میانگین و واریانس نمایی
+    دقیقه‌های بسته شده، تعداد دقیقه‌های مشاهده شده و زمان آخرین موج است.
+
+    Attributes:
+        db_session (AsyncSession): نشست دیتابیس
+        redis_service (RedisService): سرویس Redis برای ذخیره وضعیت و انتشار موج‌ها
+        alpha (float): ضریب هموارسازی نمایی
+        z_threshold (float): آستانه z-score برای اعلام موج
+        min_tweets (int): حداقل تعداد توییت در دقیقه برای اعلام موج
+        warmup_minutes (int): حداقل تعداد دقیقه‌های مشاهده شده قبل از اعلام موج
+        cooldown (timedelta): حداقل فاصله بین دو موج یک کلیدواژه
+        create_alerts (bool): ایجاد هشدار برای موج‌های شناسایی شده
+        states (Dict[int, Dict[str, Any]]): وضعیت کلیدواژه‌ها
+    """
+
+    def __init__(
+            self,
+            db_session: AsyncSession,
+            redis_service: RedisService,
+            alpha: float = None,
+            z_threshold: float = None,
+            min_tweets: int = None,
+            warmup_minutes: int = None,
+            cooldown_minutes: int = None,
+            create_alerts: bool = True
+    ):
+        """
+        مقداردهی اولیه تشخیص آنلاین موج
+
+        Args:
+            db_session (AsyncSession): نشست دیتابیس
+            redis_service (RedisService): سرویس Redis
+            alpha (float, optional): ضریب هموارسازی. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            z_threshold (float, optional): آستانه z-score. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            min_tweets (int, optional): حداقل توییت در دقیقه. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            warmup_minutes (int, optional): دقیقه‌های گرم شدن. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            cooldown_minutes (int, optional): فاصله بین موج‌ها به دقیقه. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            create_alerts (bool): ایجاد هشدار برای موج‌ها
+        """
+        self.db_session = db_session
+        self.redis_service = redis_service
+        self.alpha = alpha or settings.ONLINE_WAVE_ALPHA
+        self.z_threshold = z_threshold or settings.ONLINE_WAVE_Z_THRESHOLD
+        self.min_tweets = min_tweets or settings.ONLINE_WAVE_MIN_TWEETS
+        self.warmup_minutes = warmup_minutes or settings.ONLINE_WAVE_WARMUP_MINUTES
+        self.cooldown = timedelta(minutes=cooldown_minutes or settings.ONLINE_WAVE_COOLDOWN_MINUTES)
+        self.create_alerts = create_alerts
+
+        self.states: Dict[int, Dict[str, Any]] = {}
+        self._loaded = False
+        self._keyword_texts: Dict[int, str] = {}
+        logger.info(
+            f"OnlineWaveDetector initialized (alpha: {self.alpha}, z: {self.z_threshold}, "
+            f"min tweets: {self.min_tweets})"
+        )
+
+    async def load_state(self) -> int:
+        """
+        بارگذاری وضعیت ذخیره شده از Redis
+
+        Returns:
+            int: تعداد کلیدواژه‌های بارگذاری شده
+        """
+        stored = await self.redis_service.get_hash(STATE_KEY)
+        for field, value in stored.items():
+            try:
+                keyword_id = int(field)
+                bucket, count, mean, var, seen, last_wave = value
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring malformed online wave state for {field}")
+                continue
+
+            self.states[keyword_id] = {
+                "bucket": datetime.fromisoformat(bucket) if bucket else None,
+                "count": count,
+                "mean": mean,
+                "var": var,
+                "seen": seen,
+                "last_wave": datetime.fromisoformat(last_wave) if last_wave else None
+            }
+
+        self._loaded = True
+        logger.info(f"Loaded online wave state for {len(self.states)} keywords")
+        return len(self.states)
+
+    async def save_state(self, keyword_ids: List[int]) -> bool:
+        """
+        ذخیره وضعیت کلیدواژه‌ها در Redis
+
+        وضعیت هر کلیدواژه به صورت یک آرایه فشرده JSON ذخیره می‌شود.
+
+        Args:
+            keyword_ids (List[int]): کلیدواژه‌هایی که وضعیت آن‌ها تغییر کرده است
+
+        Returns:
+            bool: نتیجه عملیات
+        """
+        mapping = {}
+        for keyword_id in keyword_ids:
+            state = self.states[keyword_id]
+            mapping[str(keyword_id)] = [
+                state["bucket"].isoformat() if state["bucket"] else None,
+                state["count"],
+                round(state["mean"], 6),
+                round(state["var"], 6),
+                state["seen"],
+                state["last_wave"].isoformat() if state["last_wave"] else None
+            ]
+        return await self.redis_service.set_hash_fields(STATE_KEY, mapping)
+
+    def _update_baseline(self, state: Dict[str, Any], value: float) -> None:
+        """
+        افزودن یک دقیقه بسته شده به میانگین و واریانس نمایی
+
+        Args:
+            state (Dict[str, Any]): وضعیت کلیدواژه
+            value (float): تعداد توییت‌های دقیقه
+        """
+        if state["seen"] == 0:
+            state["mean"] = float(value)
+            state["var"] = 0.0
+        else:
+            diff = value - state["mean"]
+            increment = self.alpha * diff
+            state["mean"] += increment
+            state["var"] = (1 - self.alpha) * (state["var"] + diff * increment)
+        state["seen"] += 1
+
+    def _close_minutes(self, state: Dict[str, Any], minute: datetime) -> None:
+        """
+        بستن دقیقه باز و دقیقه‌های خالی تا دقیقه جدید
+
+        Args:
+            state (Dict[str, Any]): وضعیت کلیدواژه
+            minute (datetime): دقیقه جدید
+        """
+        self._update_baseline(state, state["count"])
+
+        # دقیقه‌های بدون توییت با مقدار صفر در میانگین اعمال می‌شوند
+        gap = int((minute - state["bucket"]).total_seconds() // 60) - 1
+        for _ in range(min(gap, MAX_GAP_MINUTES)):
+            self._update_baseline(state, 0)
+
+        state["bucket"] = minute
+        state["count"] = 0
+
+    def _z_score(self, state: Dict[str, Any]) -> float:
+        """
+        محاسبه z-score دقیقه باز نسبت به میانگین نمایی
+
+        Args:
+            state (Dict[str, Any]): وضعیت کلیدواژه
+
+        Returns:
+            float: z-score
+        """
+        # کف انحراف معیار از نویز پواسون برای کلیدواژه‌های کم‌حجم جلوگیری می‌کند
+        std = max(math.sqrt(state["var"]), math.sqrt(max(state["mean"], 1.0)))
+        return (state["count"] - state["mean"]) / std
+
+    def observe(self, keyword_id: int, minute: datetime, count: int) -> Optional[Dict[str, Any]]:
+        """
+        اعمال تعداد توییت‌های جدید یک کلیدواژه در یک دقیقه
+
+        توییت‌های دقیقه‌های قدیمی‌تر از دقیقه باز در خط پایه اعمال نمی‌شوند
+        (در سری‌های دقیقه‌ای شمرده شده‌اند).
+
+        Args:
+            keyword_id (int): شناسه کلیدواژه
+            minute (datetime): ابتدای دقیقه
+            count (int): تعداد توییت‌های جدید
+
+        Returns:
+            Optional[Dict[str, Any]]: اطلاعات موج در صورت عبور از آستانه
+        """
+        state = self.states.get(keyword_id)
+        if state is None:
+            state = {"bucket": minute, "count": 0, "mean": 0.0, "var": 0.0, "seen": 0, "last_wave": None}
+            self.states[keyword_id] = state
+
+        if minute < state["bucket"]:
+            return None
+        if minute > state["bucket"]:
+            self._close_minutes(state, minute)
+
+        state["count"] += count
+
+        if state["seen"] < self.warmup_minutes or state["count"] < self.min_tweets:
+            return None
+        if state["last_wave"] and minute - state["last_wave"] < self.cooldown:
+            return None
+
+        z_score = self._z_score(state)
+        if z_score < self.z_threshold:
+            return None
+
+        state["last_wave"] = minute
+        return {
+            "keyword_id": keyword_id,
+            "type": "volume",
+            "detection": "online",
+            "start_time": minute.isoformat(),
+            "end_time": (minute + timedelta(minutes=1)).isoformat(),
+            "tweet_count": state["count"],
+            "baseline_mean": state["mean"],
+            "z_score": z_score,
+            "growth_rate": state["count"] / max(state["mean"], 1.0),
+            "importance_score": min(10.0, z_score)
+        }
+
+    async def _get_keyword_texts(self, keyword_ids: List[int]) -> Dict[int, str]:
+        """
+        دریافت متن کلیدواژه‌ها (با کش)
+
+        Args:
+            keyword_ids (List[int]): شناسه کلیدواژه‌ها
+
+        Returns:
+            Dict[int, str]: متن کلیدواژه‌ها به تفکیک شناسه
+        """
+        missing = [keyword_id for keyword_id in keyword_ids if keyword_id not in self._keyword_texts]
+        if missing:
+            result = await self.db_session.execute(
+                select(Keyword.id, Keyword.text).where(Keyword.id.in_(missing))
+            )
+            self._keyword_texts.update(dict(result.all()))
+        return {keyword_id: self._keyword_texts.get(keyword_id) for keyword_id in keyword_ids}
+
+    async def process_counts(self, counts: Dict[Tuple[int, datetime], int]) -> List[Dict[str, Any]]:
+        """
+        اعمال تعداد توییت‌های یک دسته پردازش شده و اعلام موج‌ها
+
+        Args:
+            counts (Dict[Tuple[int, datetime], int]): تعداد توییت‌ها به ازای (کلیدواژه، دقیقه)
+
+        Returns:
+            List[Dict[str, Any]]: موج‌های شناسایی شده
+        """
+        if not counts:
+            return []
+
+        if not self._loaded:
+            await self.load_state()
+
+        waves = []
+        for (keyword_id, minute), count in sorted(counts.items(), key=lambda item: (item[0][1], item[0][0])):
+            wave = self.observe(keyword_id, minute, count)
+            if wave:
+                waves.append(wave)
+
+        await self.save_state(sorted({keyword_id for keyword_id, _ in counts}))
+
+        if not waves:
+            return []
+
+        keyword_texts = await self._get_keyword_texts(
+            [wave["keyword_id"] for wave in waves if wave["keyword_id"] != ALL_KEYWORDS_ID]
+        )
+        wave_detector = WaveDetector(self.db_session) if self.create_alerts else None
+
+        for wave in waves:
+            keyword_text = keyword_texts.get(wave["keyword_id"])
+            wave["related_keywords"] = [keyword_text] if keyword_text else []
+
+            logger.info(
+                f"Online wave detected for keyword {wave['keyword_id']}: "
+                f"{wave['tweet_count']} tweets at {wave['start_time']} (z={wave['z_score']:.2f})"
+            )
+
+            if wave_detector:
+                try:
+                    alert = await wave_detector.track_wave_alert(wave)
+                    wave["alert_id"] = alert["id"] if alert else None
+                except Exception as e:
+                    logger.error(f"Error creating alert for online wave: {e}")
+                    await self.db_session.rollback()
+
+            await publish_live_event(WAVE_CHANNEL, wave)
+
+        return waves
@@ -0,0 +1,417 @@
+"""
+خلاصه‌های ساعتی گزارش‌ها.
+
+این ماژول برای هر ساعت و هر کلیدواژه تعداد توییت‌های تحلیل شده، توزیع احساسات،
+آمار موضوعات و شناسه مهم‌ترین توییت‌ها را در جدول report_hour_stats نگه می‌دارد.
+تحلیلگر ساعت‌هایی که توییت‌های آن‌ها تحلیل شده‌اند را علامت‌گذاری می‌کند و این
+ساعت‌ها پیش از ساخت گزارش دوباره محاسبه می‌شوند. گزارش هر بازه از جمع خلاصه‌های
+ساعت‌های کامل و محاسبه زنده ساعت‌های ناقص ابتدا و انتهای بازه ساخته می‌شود.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+
+from sqlalchemy import func, and_, or_, literal_column, null
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db.session import fetch_concurrently
+from app.db.models import Tweet, TweetKeyword, Topic, TweetTopic, ReportHourStat
+from app.services.analyzer.keyword_series import ALL_KEYWORDS_ID, SENTIMENT_LABELS, floor_to_minute
+
+logger = logging.getLogger(__name__)
+
+# تعداد توییت‌های مهم نگهداری شده برای هر ساعت (برابر تعداد توییت‌های مهم گزارش)
+TOP_TWEETS_PER_HOUR = 10
+
+COUNTER_COLUMNS = (
+    "tweet_count", "scored_count", "sentiment_sum",
+    "positive_count", "negative_count", "neutral_count", "mixed_count"
+)
+
+# حداکثر تعداد ردیف در هر دستور درج (محدودیت تعداد پارامترهای PostgreSQL)
+UPSERT_CHUNK_SIZE = 1000
+
+
+def floor_to_hour(value: datetime) -> datetime:
+    """
+    گرد کردن زمان به ابتدای ساعت (به وقت UTC و بدون منطقه زمانی)
+
+    Args:
+        value (datetime): زمان
+
+    Returns:
+        datetime: ابتدای ساعت
+    """
+    return floor_to_minute(value).replace(minute=0)
+
+
+def _empty_stats() -> Dict[str, Any]:
+    """
+    ساخت آمار خالی
+
+    Returns:
+        Dict[str, Any]: آمار با مقادیر صفر
+    """
+    stats = {column: 0 for column in COUNTER_COLUMNS}
+    stats["sentiment_sum"] = 0.0
+    stats["topic_stats"] = {}
+    stats["top_tweet_ids"] = []
+    return stats
+
+
+def _add_stats(total: Dict[str, Any], stats: Dict[str, Any]) -> None:
+    """
+    افزودن یک آمار به مجموع
+
+    Args:
+        total (Dict[str, Any]): مجموع (درجا به‌روز می‌شود)
+        stats (Dict[str, Any]): آمار
+    """
+    for column in COUNTER_COLUMNS:
+        total[column] += stats.get(column) or 0
+    for name, (count, relevance_sum) in (stats.get("topic_stats") or {}).items():
+        current = total["topic_stats"].setdefault(name, [0, 0.0])
+        current[0] += count
+        current[1] += relevance_sum
+    total["top_tweet_ids"].extend(stats.get("top_tweet_ids") or [])
+
+
+class ReportSnapshotService:
+    """
+    سرویس خلاصه‌های ساعتی گزارش‌ها
+
+    Attributes:
+        db_session (AsyncSession): نشست دیتابیس
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        """
+        مقداردهی اولیه سرویس خلاصه‌های گزارش
+
+        Args:
+            db_session (AsyncSession): نشست دیتابیس
+        """
+        self.db_session = db_session
+
+    async def mark_dirty(self, times: Iterable[Optional[datetime]]) -> int:
+        """
+        علامت‌گذاری ساعت‌هایی که توییت‌های آن‌ها تغییر کرده‌اند
+
+        Args:
+            times (Iterable[Optional[datetime]]): زمان ایجاد توییت‌های تغییر کرده
+
+        Returns:
+            int: تعداد ساعت‌های علامت‌گذاری شده
+        """
+        hours = sorted({floor_to_hour(value) for value in times if value})
+        if not hours:
+            return 0
+
+        now = datetime.utcnow()
+        stmt = pg_insert(ReportHourStat).values([
+            {"keyword_id": ALL_KEYWORDS_ID, "hour": hour, "dirty_at": now} for hour in hours
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ReportHourStat.keyword_id, ReportHourStat.hour],
+            set_={"dirty_at": stmt.excluded.dirty_at}
+        )
+        await self.db_session.execute(stmt)
+        return len(hours)
+
+    def _group_by(self, keyword_ids: Optional[List[int]], hourly: bool) -> List:
+        """
+        عبارت‌های گروه‌بندی یک دامنه
+
+        Args:
+            keyword_ids (Optional[List[int]]): None برای همه توییت‌ها و در غیر این صورت به تفکیک کلیدواژه
+            hourly (bool): گروه‌بندی به تفکیک ساعت
+
+        Returns:
+            List: عبارت‌های گروه‌بندی
+        """
+        group_by = []
+        if keyword_ids is not None:
+            group_by.append(TweetKeyword.keyword_id)
+        if hourly:
+            # واحد به صورت literal نوشته می‌شود تا عبارت SELECT و GROUP BY یکسان شناخته شوند
+            group_by.append(func.date_trunc(literal_column("'hour'"), Tweet.created_at))
+        return group_by
+
+    def _scoped_select(self, keyword_ids: Optional[List[int]], hourly: bool, *columns):
+        """
+        ساخت کوئری برای همه توییت‌ها یا به تفکیک کلیدواژه
+
+        Args:
+            keyword_ids (Optional[List[int]]): None برای همه توییت‌ها، لیست خالی برای همه کلیدواژه‌ها
+                و در غیر این صورت فقط کلیدواژه‌های مشخص شده
+            hourly (bool): ستون ساعت به تفکیک ساعت
+            *columns: ستون‌های دیگر
+
+        Returns:
+            Select: کوئری با ستون‌های keyword_id و bucket
+        """
+        if keyword_ids is None:
+            key = literal_column(str(ALL_KEYWORDS_ID)).label("keyword_id")
+        else:
+            key = TweetKeyword.keyword_id.label("keyword_id")
+
+        if hourly:
+            bucket = func.date_trunc(literal_column("'hour'"), Tweet.created_at).label("bucket")
+        else:
+            bucket = null().label("bucket")
+
+        stmt = select(key, bucket, *columns)
+        if keyword_ids is not None:
+            stmt = stmt.join(TweetKeyword, TweetKeyword.tweet_id == Tweet.id)
+            if keyword_ids:
+                stmt = stmt.where(TweetKeyword.keyword_id.in_(keyword_ids))
+
+        return stmt
+
+    async def _aggregate(
+            self,
+            start_time: datetime,
+            end_time: datetime,
+            keyword_ids: Optional[List[int]],
+            hourly: bool
+    ) -> Dict[Tuple[int, Optional[datetime]], Dict[str, Any]]:
+        """
+        محاسبه آمار گزارش از جدول توییت‌ها
+
+        Args:
+            start_time (datetime): ابتدای بازه
+            end_time (datetime): انتهای بازه (باز)
+            keyword_ids (Optional[List[int]]): دامنه کلیدواژه‌ها (مانند _scoped_select)
+            hourly (bool): محاسبه به تفکیک ساعت
+
+        Returns:
+            Dict[Tuple[int, Optional[datetime]], Dict[str, Any]]: آمار به ازای (کلیدواژه، ساعت)
+        """
+        tweet_filter = and_(
+            Tweet.is_analyzed == True,
+            Tweet.created_at >= start_time,
+            Tweet.created_at < end_time
+        )
+        group_by = self._group_by(keyword_ids, hourly)
+        stats: Dict[Tuple[int, Optional[datetime]], Dict[str, Any]] = {}
+
+        # شمارنده‌ها و توزیع احساسات
+        counts_stmt = self._scoped_select(
+            keyword_ids, hourly,
+            func.count(),
+            func.count(Tweet.sentiment_score),
+            func.coalesce(func.sum(Tweet.sentiment_score), 0.0),
+            *[func.count().filter(Tweet.sentiment_label == label) for label in SENTIMENT_LABELS]
+        ).where(tweet_filter).group_by(*group_by)
+
+        # آمار موضوعات
+        topics_stmt = self._scoped_select(
+            keyword_ids, hourly,
+            Topic.name,
+            func.count(TweetTopic.tweet_id),
+            func.coalesce(func.sum(TweetTopic.relevance_score), 0.0)
+        ).join(
+            TweetTopic, TweetTopic.tweet_id == Tweet.id
+        ).join(
+            Topic, Topic.id == TweetTopic.topic_id
+        ).where(tweet_filter).group_by(*group_by, Topic.name)
+
+        # مهم‌ترین توییت‌ها با رتبه‌بندی در هر گروه
+        ranked = self._scoped_select(
+            keyword_ids, hourly,
+            Tweet.id.label("tweet_pk"),
+            func.row_number().over(
+                partition_by=group_by or None,
+                order_by=(Tweet.importance_score.desc().nulls_last(), Tweet.id)
+            ).label("rank")
+        ).where(tweet_filter).subquery()
+        top_stmt = select(ranked.c.keyword_id, ranked.c.bucket, ranked.c.tweet_pk).where(
+            ranked.c.rank <= TOP_TWEETS_PER_HOUR
+        ).order_by(ranked.c.keyword_id, ranked.c.bucket, ranked.c.rank)
+
+        # سه کوئری مستقل به صورت هم‌زمان روی اتصالات جداگانه اجرا می‌شوند
+        count_rows, topic_rows, top_rows = await fetch_concurrently(counts_stmt, topics_stmt, top_stmt)
+
+        for row in count_rows:
+            data = stats.setdefault((row[0], row[1]), _empty_stats())
+            data.update(zip(COUNTER_COLUMNS, (float(value) if i == 2 else int(value) for i, value in enumerate(row[2:]))))
+
+        for key_id, bucket, name, count, relevance_sum in topic_rows:
+            data = stats.setdefault((key_id, bucket), _empty_stats())
+            data["topic_stats"][name] = [int(count), float(relevance_sum)]
+
+        for key_id, bucket, tweet_pk in top_rows:
+            data = stats.setdefault((key_id, bucket), _empty_stats())
+            data["top_tweet_ids"].append(tweet_pk)
+
+        return stats
+
+    async def refresh(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> int:
+        """
+        محاسبه مجدد خلاصه ساعت‌های علامت‌گذاری شده
+
+        ساعت‌های پیوسته با یک کوئری تجمیعی محاسبه می‌شوند. اگر در حین محاسبه ساعتی
+        دوباره علامت‌گذاری شود، dirty_at آن جدیدتر از computed_at می‌ماند و در اجرای
+        بعدی دوباره محاسبه می‌شود.
+
+        Args:
+            start_time (Optional[datetime]): محدود کردن به ساعت‌های پس از این زمان
+            end_time (Optional[datetime]): محدود کردن به ساعت‌های قبل از این زمان
+
+        Returns:
+            int: تعداد ساعت‌های محاسبه شده
+        """
+        refresh_started = datetime.utcnow()
+
+        conditions = [
+            ReportHourStat.keyword_id == ALL_KEYWORDS_ID,
+            ReportHourStat.dirty_at.isnot(None),
+            or_(ReportHourStat.computed_at.is_(None), ReportHourStat.dirty_at > ReportHourStat.computed_at)
+        ]
+        if start_time:
+            conditions.append(ReportHourStat.hour >= start_time)
+        if end_time:
+            conditions.append(ReportHourStat.hour < end_time)
+
+        result = await self.db_session.execute(
+            select(ReportHourStat.hour).where(and_(*conditions)).order_by(ReportHourStat.hour)
+        )
+        hours = [row[0] for row in result.fetchall()]
+        if not hours:
+            return 0
+
+        # تقسیم ساعت‌ها به بازه‌های پیوسته
+        runs = []
+        for hour in hours:
+            if runs and runs[-1][1] == hour:
+                runs[-1][1] = hour + timedelta(hours=1)
+            else:
+                runs.append([hour, hour + timedelta(hours=1)])
+
+        rows = []
+        for run_start, run_end in runs:
+            stats = await self._aggregate(run_start, run_end, None, hourly=True)
+            stats.update(await self._aggregate(run_start, run_end, [], hourly=True))
+
+            # ساعت‌های بدون توییت تحلیل شده هم با صفر ثبت می‌شوند تا محاسبه شده شناخته شوند
+            hour = run_start
+            while hour < run_end:
+                stats.setdefault((ALL_KEYWORDS_ID, hour), _empty_stats())
+                hour += timedelta(hours=1)
+
+            for (keyword_id, hour), data in stats.items():
+                rows.append({"keyword_id": keyword_id, "hour": hour, "computed_at": refresh_started, **data})
+
+        rows.sort(key=lambda row: (row["keyword_id"], row["hour"]))
+        for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            stmt = pg_insert(ReportHourStat).values(rows[i:i + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ReportHourStat.keyword_id, ReportHourStat.hour],
+                set_={
+                    column: getattr(stmt.excluded, column)
+                    for column in (*COUNTER_COLUMNS, "topic_stats", "top_tweet_ids", "computed_at")
+                }
+            )
+            await self.db_session.execute(stmt)
+
+        await self.db_session.commit()
+        logger.info(f"Refreshed report snapshots for {len(hours)} hours ({len(rows)} rows)")
+        return len(hours)
+
+    async def ensure_hours(self, start_hour: datetime, end_hour: datetime) -> int:
+        """
+        اطمینان از به‌روز بودن خلاصه ساعت‌های یک بازه
+
+        ساعت‌هایی که هنوز خلاصه ندارند (داده‌های قبل از فعال شدن خلاصه‌ها)
+        علامت‌گذاری و همراه با ساعت‌های تغییر کرده محاسبه می‌شوند.
+
+        Args:
+            start_hour (datetime): ابتدای اولین ساعت
+            end_hour (datetime): انتهای آخرین ساعت
+
+        Returns:
+            int: تعداد ساعت‌های محاسبه شده
+        """
+        result = await self.db_session.execute(
+            select(ReportHourStat.hour).where(
+                and_(
+                    ReportHourStat.keyword_id == ALL_KEYWORDS_ID,
+                    ReportHourStat.hour >= start_hour,
+                    ReportHourStat.hour < end_hour
+                )
+            )
+        )
+        existing = {row[0] for row in result.fetchall()}
+
+        missing = []
+        hour = start_hour
+        while hour < end_hour:
+            if hour not in existing:
+                missing.append(hour)
+            hour += timedelta(hours=1)
+
+        if missing:
+            await self.mark_dirty(missing)
+
+        return await self.refresh(start_hour, end_hour)
+
+    async def get_report_stats(self, start_time: datetime, end_time: datetime, keyword_id: int) -> Dict[str, Any]:
+        """
+        دریافت آمار گزارش یک بازه از جمع خلاصه‌های ساعتی
+
+        Args:
+            start_time (datetime): ابتدای بازه
+            end_time (datetime): انتهای بازه
+            keyword_id (int): شناسه کلیدواژه (ALL_KEYWORDS_ID برای همه توییت‌ها)
+
+        Returns:
+            Dict[str, Any]: شمارنده‌ها، آمار موضوعات ({نام: [تعداد، مجموع ارتباط]}) و
+            شناسه توییت‌های نامزد برای مهم‌ترین توییت‌ها
+        """
+        total = _empty_stats()
+
+        first_hour = floor_to_hour(start_time)
+        if first_hour < start_time:
+            first_hour += timedelta(hours=1)
+        last_hour = floor_to_hour(end_time)
+
+        # ساعت‌های ناقص ابتدا و انتهای بازه به صورت زنده محاسبه می‌شوند
+        scope = None if keyword_id == ALL_KEYWORDS_ID else [keyword_id]
+        live_ranges = [(start_time, end_time)]
+        snapshots = []
+        if first_hour < last_hour:
+            await self.ensure_hours(first_hour, last_hour)
+            live_ranges = [(start_time, first_hour), (last_hour, end_time)]
+
+            result = await self.db_session.execute(
+                select(ReportHourStat).where(
+                    and_(
+                        ReportHourStat.keyword_id == keyword_id,
+                        ReportHourStat.hour >= first_hour,
+                        ReportHourStat.hour < last_hour
+                    )
+                )
+            )
+            snapshots = result.scalars().all()
+
+        # بازه‌های ناقص مستقل هستند و هم‌زمان محاسبه می‌شوند
+        live_stats = await asyncio.gather(*(
+            self._aggregate(range_start, range_end, scope, hourly=False)
+            for range_start, range_end in live_ranges if range_start < range_end
+        ))
+
+        for snapshot in snapshots:
+            _add_stats(total, {
+                **{column: getattr(snapshot, column) for column in COUNTER_COLUMNS},
+                "topic_stats": snapshot.topic_stats,
+                "top_tweet_ids": snapshot.top_tweet_ids
+            })
+        for stats in live_stats:
+            if (keyword_id, None) in stats:
+                _add_stats(total, stats[(keyword_id, None)])
+
+        return total
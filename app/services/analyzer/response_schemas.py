@@ -0,0 +1,267 @@
+"""
+شِمای خروجی ساختاریافته Claude.
+
+این ماژول مدل‌های Pydantic مربوط به خروجی هر نوع تحلیل را تعریف می‌کند.
+از همین مدل‌ها هم تعریف ابزار (tool) ارسالی به Claude ساخته می‌شود و هم
+اعتبارسنجی پاسخ انجام می‌شود؛ بنابراین شِمای درخواست و پارسر همیشه هماهنگ هستند.
+اعتبارسنج‌های Pydantic یک بار در زمان import کامپایل می‌شوند و نیازی به
+جستجوی رشته‌ای یا regex روی متن پاسخ نیست.
+"""
+
+import json
+import logging
+from typing import Dict, List, Any, Optional, Literal, Type
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+logger = logging.getLogger(__name__)
+
+SentimentLabel = Literal["positive", "negative", "neutral", "mixed"]
+
+
+class _LabelNormalizingModel(BaseModel):
+    """مدل پایه برای یکسان‌سازی برچسب احساسات (مثلاً 'Positive' به 'positive')"""
+
+    @field_validator("sentiment", mode="before", check_fields=False)
+    @classmethod
+    def normalize_label(cls, v: Any) -> Any:
+        """تبدیل برچسب احساسات به حروف کوچک"""
+        if isinstance(v, str):
+            return v.strip().lower()
+        return v
+
+
+class EntitySentiment(_LabelNormalizingModel):
+    """احساسات مرتبط با یک موجودیت"""
+    entity: str
+    sentiment: SentimentLabel
+
+
+class SentimentResult(_LabelNormalizingModel):
+    """خروجی تحلیل احساسات یک متن"""
+    sentiment: SentimentLabel = Field(description="احساس غالب متن")
+    score: float = Field(ge=-1, le=1, description="امتیاز احساسات بین -1 تا 1")
+    confidence: float = Field(ge=0, le=1, description="میزان اطمینان بین 0 تا 1")
+    explanation: str = Field("", description="توضیح مختصر دلیل این احساس")
+    emotions: Optional[List[str]] = Field(None, description="احساسات جزئی (فقط در تحلیل با جزئیات)")
+    intensity: Optional[float] = Field(None, ge=0, le=1, description="شدت احساس (فقط در تحلیل با جزئیات)")
+    entities: Optional[List[EntitySentiment]] = Field(None, description="احساسات موجودیت‌ها (فقط در تحلیل با جزئیات)")
+
+
+class TopicItem(BaseModel):
+    """یک موضوع استخراج شده"""
+    title: str = Field(description="عنوان موضوع")
+    relevance: float = Field(1.0, ge=0, le=1, description="میزان ارتباط بین 0 تا 1")
+    keywords: List[str] = Field(default_factory=list, description="کلیدواژه‌های موضوع")
+
+
+class TopicsResult(BaseModel):
+    """خروجی استخراج موضوعات یک متن"""
+    topics: List[TopicItem] = Field(default_factory=list)
+    main_topic: str = Field(description="موضوع اصلی کلی")
+    keywords: List[str] = Field(default_factory=list)
+
+
+class BatchSentiment(_LabelNormalizingModel):
+    """احساسات یک متن در تحلیل دسته‌ای"""
+    sentiment: SentimentLabel
+    score: float = Field(ge=-1, le=1)
+    confidence: float = Field(ge=0, le=1)
+
+
+class BatchTopics(BaseModel):
+    """موضوعات یک متن در تحلیل دسته‌ای"""
+    main_topic: str
+    keywords: List[str] = Field(default_factory=list)
+
+
+class BatchItem(BaseModel):
+    """نتیجه تحلیل یک متن در دسته"""
+    index: int = Field(ge=0, description="شماره متن در ورودی (همان عدد داخل کروشه)")
+    sentiment: Optional[BatchSentiment] = None
+    topics: Optional[BatchTopics] = None
+
+
+class WaveAnalysisResult(BaseModel):
+    """خروجی تحلیل عمیق یک موج"""
+    main_topic: str = Field(description="موضوع اصلی موج")
+    summary: str = Field(description="خلاصه‌ای از ماهیت موج")
+    is_coordinated: bool = Field(False, description="آیا موج هماهنگ شده است؟")
+    coordination_confidence: float = Field(0.0, ge=0, le=1)
+    importance_score: float = Field(0.0, ge=0, le=10)
+    key_influencers: List[str] = Field(default_factory=list)
+    reactionary: bool = False
+    trigger_event: Optional[str] = Field(None, description="رویداد محرک (اگر وجود دارد)")
+    prediction: str = Field("", description="پیش‌بینی روند آینده")
+    recommendations: List[str] = Field(default_factory=list)
+    sentiment_distribution: Dict[str, float] = Field(default_factory=dict)
+    analysis_confidence: float = Field(0.0, ge=0, le=1)
+
+
+SENTIMENT_TOOL_NAME = "record_sentiment"
+TOPICS_TOOL_NAME = "record_topics"
+BATCH_TOOL_NAME = "record_batch_results"
+WAVE_TOOL_NAME = "record_wave_analysis"
+
+# بخش‌های الزامی هر آیتم در تحلیل دسته‌ای
+BATCH_REQUIRED_FIELDS = {
+    "sentiment": ("sentiment",),
+    "topics": ("topics",),
+    "full": ("sentiment", "topics"),
+}
+
+
+def build_tool(name: str, description: str, model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    ساخت تعریف ابزار Claude از روی یک مدل Pydantic
+
+    Args:
+        name (str): نام ابزار
+        description (str): توضیح ابزار
+        model (Type[BaseModel]): مدل خروجی
+
+    Returns:
+        Dict[str, Any]: تعریف ابزار برای فیلد tools درخواست
+    """
+    return {
+        "name": name,
+        "description": description,
+        "input_schema": model.model_json_schema()
+    }
+
+
+def build_batch_tool(analysis_type: str) -> Dict[str, Any]:
+    """
+    ساخت تعریف ابزار تحلیل دسته‌ای براساس نوع تحلیل
+
+    Args:
+        analysis_type (str): نوع تحلیل ('sentiment', 'topics', 'full')
+
+    Returns:
+        Dict[str, Any]: تعریف ابزار
+    """
+    item_schema = BatchItem.model_json_schema()
+    required = ["index"] + list(BATCH_REQUIRED_FIELDS.get(analysis_type, ("sentiment",)))
+    item_schema["required"] = required
+
+    defs = item_schema.pop("$defs", {})
+    schema = {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "description": "برای هر متن ورودی دقیقاً یک آیتم",
+                "items": item_schema
+            }
+        },
+        "required": ["results"]
+    }
+    if defs:
+        schema["$defs"] = defs
+
+    return {
+        "name": BATCH_TOOL_NAME,
+        "description": "ثبت نتایج تحلیل دسته‌ای متون",
+        "input_schema": schema
+    }
+
+
+SENTIMENT_TOOL = build_tool(SENTIMENT_TOOL_NAME, "ثبت نتیجه تحلیل احساسات متن", SentimentResult)
+TOPICS_TOOL = build_tool(TOPICS_TOOL_NAME, "ثبت موضوعات استخراج شده از متن", TopicsResult)
+WAVE_TOOL = build_tool(WAVE_TOOL_NAME, "ثبت نتیجه تحلیل عمیق موج توییتری", WaveAnalysisResult)
+
+
+def extract_tool_input(content: List[Dict[str, Any]], tool_name: str) -> Optional[Any]:
+    """
+    استخراج ورودی ابزار از بلاک‌های محتوای پاسخ
+
+    اگر مدل به جای فراخوانی ابزار پاسخ متنی داده باشد (مثلاً در حالت Extended Thinking
+    که انتخاب اجباری ابزار ممکن نیست)، اولین شیء JSON متن پارس می‌شود.
+
+    Args:
+        content (List[Dict[str, Any]]): بلاک‌های محتوای پاسخ
+        tool_name (str): نام ابزار مورد انتظار
+
+    Returns:
+        Optional[Any]: ورودی ابزار یا None در صورت عدم وجود
+    """
+    for block in content:
+        if block.get("type") == "tool_use" and block.get("name") == tool_name:
+            return block.get("input")
+
+    text = next((block.get("text") for block in content if block.get("type") == "text"), None)
+    if not text:
+        return None
+
+    start_idx = text.find("{")
+    if start_idx == -1:
+        return None
+    try:
+        payload, _ = json.JSONDecoder().raw_decode(text, start_idx)
+        return payload
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_model(payload: Any, model: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    """
+    اعتبارسنجی خروجی با مدل مربوطه
+
+    Args:
+        payload (Any): داده خام ورودی ابزار
+        model (Type[BaseModel]): مدل خروجی
+
+    Returns:
+        Optional[Dict[str, Any]]: داده اعتبارسنجی شده یا None در صورت نامعتبر بودن
+    """
+    if payload is None:
+        return None
+    try:
+        return model.model_validate(payload).model_dump(exclude_none=True)
+    except ValidationError as e:
+        logger.warning(f"Invalid {model.__name__} payload: {e.error_count()} errors")
+        return None
+
+
+def parse_batch_results(payload: Any, count: int, analysis_type: str) -> List[Dict[str, Any]]:
+    """
+    اعتبارسنجی نتایج دسته‌ای با بازیابی جزئی
+
+    هر آیتم به صورت مستقل اعتبارسنجی می‌شود؛ آیتم‌های معتبر حفظ می‌شوند و برای
+    متونی که نتیجه معتبری ندارند یک آیتم خطا برگردانده می‌شود.
+
+    Args:
+        payload (Any): داده خام ورودی ابزار
+        count (int): تعداد متون ورودی
+        analysis_type (str): نوع تحلیل ('sentiment', 'topics', 'full')
+
+    Returns:
+        List[Dict[str, Any]]: یک آیتم به ازای هر متن، مرتب شده براساس index
+    """
+    raw_items = payload.get("results", []) if isinstance(payload, dict) else payload
+    if not isinstance(raw_items, list):
+        raw_items = []
+
+    required = BATCH_REQUIRED_FIELDS.get(analysis_type, ("sentiment",))
+    valid: Dict[int, Dict[str, Any]] = {}
+
+    for raw in raw_items:
+        try:
+            item = BatchItem.model_validate(raw)
+        except ValidationError:
+            continue
+
+        if item.index >= count or item.index in valid:
+            continue
+        if any(getattr(item, field) is None for field in required):
+            continue
+
+        valid[item.index] = item.model_dump(exclude_none=True)
+
+    if len(valid) < count:
+        logger.warning(f"Recovered {len(valid)}/{count} valid items from batch response")
+
+    return [
+        valid.get(i, {"index": i, "error": "خطا در پردازش پاسخ"})
+        for i in range(count)
+    ]
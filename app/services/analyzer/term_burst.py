@@ -0,0 +1,660 @@
+"""
+تشخیص انفجار هشتگ‌ها و عبارات نوظهور.
+
+تشخیص موج فقط کلیدواژه‌های از پیش تعریف شده را بررسی می‌کند. این ماژول هشتگ‌ها و
+n-gramهای پرتکرار همه توییت‌های پردازش شده را در بازه‌های زمانی ثابت می‌شمارد و
+عباراتی را که تعداد آن‌ها در بازه جاری به طور معناداری از خط پایه بیشتر است به
+عنوان کلیدواژه پیشنهادی (و در صورت تنظیم، هشدار) گزارش می‌کند.
+
+حافظه مستقل از تعداد عبارات متمایز است:
+- Count-Min Sketch برای شمارش تقریبی بازه جاری و خط پایه نمایی بازه‌های قبلی
+- Space-Saving برای نگهداری K عبارت پرتکرار بازه جاری
+"""
+
+import base64
+import hashlib
+import heapq
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.db.models import Alert, Keyword, Tweet
+from app.services.redis_service import RedisService
+from app.services.processor.content_filter import ContentFilter
+from app.core.http_cache import bump_resource_versions, RESOURCE_ALERTS
+from app.services.live_updates import publish_live_event, alert_event, ALERTS_CHANNEL, EMERGING_TERMS_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# کلید وضعیت شمارنده‌ها در Redis
+STATE_KEY = "term_burst_state"
+
+# کلید کش عبارات نوظهور
+EMERGING_TERMS_KEY = "emerging_terms"
+
+# حداکثر تعداد عبارات نوظهور نگهداری شده در کش
+MAX_EMERGING_TERMS = 100
+
+# مدت نگهداری کش عبارات نوظهور (ثانیه)
+EMERGING_TERMS_TTL = 24 * 3600
+
+
+class CountMinSketch:
+    """
+    شمارنده تقریبی Count-Min Sketch
+
+    تخمین هر عبارت حداقل مقدار آن در depth سطر است و هرگز کمتر از مقدار واقعی نیست.
+
+    Attributes:
+        width (int): تعداد ستون‌های هر سطر
+        depth (int): تعداد سطرها (توابع درهم‌سازی)
+        table (np.ndarray): جدول شمارنده‌ها
+    """
+
+    def __init__(self, width: int, depth: int, table: Optional[np.ndarray] = None):
+        """
+        مقداردهی اولیه شمارنده
+
+        Args:
+            width (int): تعداد ستون‌ها
+            depth (int): تعداد سطرها
+            table (np.ndarray, optional): جدول اولیه
+        """
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+
+    def _indexes(self, terms: List[str]) -> np.ndarray:
+        """
+        محاسبه ستون عبارات در هر سطر (درهم‌سازی دوگانه)
+
+        Args:
+            terms (List[str]): عبارات
+
+        Returns:
+            np.ndarray: ستون‌ها با ابعاد (تعداد عبارات، depth)
+        """
+        digests = np.array(
+            [
+                int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+                for term in terms
+            ],
+            dtype=np.uint64
+        ).reshape(-1)
+        h1 = (digests & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        h2 = ((digests >> np.uint64(32)) | np.uint64(1)).astype(np.int64)
+        return (h1[:, None] + self._rows[None, :] * h2[:, None]) % self.width
+
+    def add(self, terms: List[str], counts: List[float]) -> None:
+        """
+        افزودن به شمارش چند عبارت با یک عملیات برداری
+
+        Args:
+            terms (List[str]): عبارات
+            counts (List[float]): مقدار افزایش هر عبارت
+        """
+        if not terms:
+            return
+        indexes = self._indexes(terms)
+        weights = np.repeat(np.asarray(counts, dtype=np.float64)[:, None], self.depth, axis=1)
+        np.add.at(self.table, (np.broadcast_to(self._rows, indexes.shape), indexes), weights)
+
+    def estimate(self, terms: List[str]) -> np.ndarray:
+        """
+        تخمین شمارش چند عبارت
+
+        Args:
+            terms (List[str]): عبارات
+
+        Returns:
+            np.ndarray: تخمین‌ها (حد بالای مقدار واقعی)
+        """
+        if not terms:
+            return np.zeros(0)
+        return self.table[self._rows[None, :], self._indexes(terms)].min(axis=1)
+
+    def to_state(self) -> str:
+        """
+        تبدیل جدول به رشته برای ذخیره در Redis
+
+        Returns:
+            str: جدول به صورت base64
+        """
+        return base64.b64encode(self.table.astype(np.float32).tobytes()).decode("ascii")
+
+    @classmethod
+    def from_state(cls, width: int, depth: int, state: str) -> "CountMinSketch":
+        """
+        بازسازی شمارنده از رشته ذخیره شده
+
+        Args:
+            width (int): تعداد ستون‌ها
+            depth (int): تعداد سطرها
+            state (str): جدول به صورت base64
+
+        Returns:
+            CountMinSketch: شمارنده
+        """
+        table = np.frombuffer(base64.b64decode(state), dtype=np.float32).astype(np.float64)
+        return cls(width, depth, table.reshape(depth, width))
+
+
+class SpaceSaving:
+    """
+    نگهداری K عبارت پرتکرار با الگوریتم Space-Saving
+
+    وقتی ظرفیت پر باشد، عبارت جدید جای کم‌تکرارترین عبارت را می‌گیرد و شمارش آن
+    به عنوان خطای حداکثری عبارت جدید ثبت می‌شود. کم‌تکرارترین عبارت با یک heap
+    با حذف تنبل پیدا می‌شود (شمارش‌ها فقط افزایش می‌یابند).
+
+    Attributes:
+        capacity (int): حداکثر تعداد عبارات
+        counters (Dict[str, List[int]]): شمارش و خطای هر عبارت
+    """
+
+    def __init__(self, capacity: int, counters: Optional[Dict[str, List[int]]] = None):
+        """
+        مقداردهی اولیه
+
+        Args:
+            capacity (int): حداکثر تعداد عبارات
+            counters (Dict[str, List[int]], optional): شمارنده‌های اولیه
+        """
+        self.capacity = capacity
+        self.counters: Dict[str, List[int]] = counters or {}
+        self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        """بازسازی heap از شمارنده‌های فعلی"""
+        self._heap = [(counter[0], term) for term, counter in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    def add(self, term: str, count: int = 1) -> None:
+        """
+        افزودن به شمارش عبارت
+
+        Args:
+            term (str): عبارت
+            count (int): مقدار افزایش
+        """
+        counter = self.counters.get(term)
+        if counter is not None:
+            counter[0] += count
+        elif len(self.counters) < self.capacity:
+            counter = self.counters[term] = [count, 0]
+        else:
+            # ورودی‌های قدیمی heap (شمارش تغییر کرده یا عبارت حذف شده) نادیده گرفته می‌شوند
+            while True:
+                minimum, evicted = heapq.heappop(self._heap)
+                current = self.counters.get(evicted)
+                if current is not None and current[0] == minimum:
+                    break
+            del self.counters[evicted]
+            counter = self.counters[term] = [minimum + count, minimum]
+
+        heapq.heappush(self._heap, (counter[0], term))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def top(self) -> List[Tuple[str, int, int]]:
+        """
+        عبارات به ترتیب شمارش
+
+        Returns:
+            List[Tuple[str, int, int]]: (عبارت، شمارش، خطای حداکثری)
+        """
+        return sorted(
+            ((term, count, error) for term, (count, error) in self.counters.items()),
+            key=lambda item: item[1],
+            reverse=True
+        )
+
+
+class TermBurstDetector:
+    """
+    تشخیص انفجار هشتگ‌ها و n-gramها در بازه‌های زمانی ثابت
+
+    خط پایه هر عبارت میانگین نمایی شمارش آن در بازه‌های قبلی است که در یک
+    Count-Min Sketch جداگانه نگه داشته می‌شود. وضعیت متعلق به یک نمونه پردازشگر
+    است؛ اجرای چند پردازشگر موازی وضعیت یکدیگر را بازنویسی می‌کنند.
+
+    Attributes:
+        db_session (AsyncSession): نشست دیتابیس
+        redis_service (RedisService): سرویس Redis برای ذخیره وضعیت و انتشار عبارات
+        bucket (timedelta): طول بازه
+        width (int): تعداد ستون‌های شمارنده‌ها
+        depth (int): تعداد سطرهای شمارنده‌ها
+        top_k (int): ظرفیت Space-Saving
+        alpha (float): ضریب هموارسازی خط پایه
+        z_threshold (float): آستانه z-score
+        min_count (int): حداقل تعداد توییت تضمین شده در بازه
+        warmup_buckets (int): حداقل تعداد بازه‌های مشاهده شده قبل از اعلام انفجار
+        cooldown (timedelta): حداقل فاصله بین دو اعلام یک عبارت
+        ngram_sizes (List[int]): طول n-gramهای شمرده شده
+        create_alerts (bool): ایجاد هشدار برای عبارات نوظهور
+    """
+
+    def __init__(
+            self,
+            db_session: AsyncSession,
+            redis_service: RedisService,
+            bucket_minutes: int = None,
+            width: int = None,
+            depth: int = None,
+            top_k: int = None,
+            alpha: float = None,
+            z_threshold: float = None,
+            min_count: int = None,
+            warmup_buckets: int = None,
+            cooldown_minutes: int = None,
+            ngram_sizes: Optional[List[int]] = None,
+            create_alerts: bool = None,
+            content_filter: ContentFilter = None
+    ):
+        """
+        مقداردهی اولیه تشخیص انفجار عبارات
+
+        Args:
+            db_session (AsyncSession): نشست دیتابیس
+            redis_service (RedisService): سرویس Redis
+            bucket_minutes (int, optional): طول بازه به دقیقه. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            width (int, optional): تعداد ستون‌های شمارنده. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            depth (int, optional): تعداد سطرهای شمارنده. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            top_k (int, optional): ظرفیت Space-Saving. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            alpha (float, optional): ضریب هموارسازی. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            z_threshold (float, optional): آستانه z-score. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            min_count (int, optional): حداقل تعداد توییت. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            warmup_buckets (int, optional): بازه‌های گرم شدن. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            cooldown_minutes (int, optional): فاصله بین اعلام‌ها به دقیقه. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            ngram_sizes (List[int], optional): طول n-gramها. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            create_alerts (bool, optional): ایجاد هشدار. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            content_filter (ContentFilter, optional): فیلتر محتوا برای پاکسازی متن و کلمات ایست
+        """
+        self.db_session = db_session
+        self.redis_service = redis_service
+        self.bucket = timedelta(minutes=bucket_minutes or settings.TERM_BURST_BUCKET_MINUTES)
+        self.width = width or settings.TERM_BURST_SKETCH_WIDTH
+        self.depth = depth or settings.TERM_BURST_SKETCH_DEPTH
+        self.top_k = top_k or settings.TERM_BURST_TOP_K
+        self.alpha = alpha or settings.TERM_BURST_ALPHA
+        self.z_threshold = z_threshold or settings.TERM_BURST_Z_THRESHOLD
+        self.min_count = min_count or settings.TERM_BURST_MIN_COUNT
+        self.warmup_buckets = warmup_buckets or settings.TERM_BURST_WARMUP_BUCKETS
+        self.cooldown = timedelta(minutes=cooldown_minutes or settings.TERM_BURST_COOLDOWN_MINUTES)
+        self.ngram_sizes = ngram_sizes or [
+            int(value) for value in settings.TERM_BURST_NGRAM_SIZES.split(",") if value.strip()
+        ]
+        self.create_alerts = settings.TERM_BURST_CREATE_ALERTS if create_alerts is None else create_alerts
+        self.content_filter = content_filter or ContentFilter()
+        self._stopwords = set(self.content_filter.stopwords) | set(self.content_filter.persian_stopwords)
+
+        self.bucket_start: Optional[datetime] = None
+        self.current: CountMinSketch = None
+        self.heavy_hitters: SpaceSaving = None
+        self.baseline: CountMinSketch = None
+        self.buckets_seen = 0
+        self.last_burst: Dict[str, datetime] = {}
+        self._reset_state()
+        self._loaded = False
+        logger.info(
+            f"TermBurstDetector initialized (bucket: {self.bucket}, sketch: {self.depth}x{self.width}, "
+            f"top k: {self.top_k})"
+        )
+
+    def _floor_bucket(self, value: datetime) -> datetime:
+        """
+        گرد کردن زمان به ابتدای بازه
+
+        Args:
+            value (datetime): زمان
+
+        Returns:
+            datetime: ابتدای بازه
+        """
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None) - (value.utcoffset() or timedelta(0))
+        bucket_seconds = int(self.bucket.total_seconds())
+        epoch = int((value - datetime(1970, 1, 1)).total_seconds())
+        return datetime(1970, 1, 1) + timedelta(seconds=epoch - epoch % bucket_seconds)
+
+    def extract_terms(self, tweet: Tweet) -> List[Tuple[str, str]]:
+        """
+        استخراج هشتگ‌ها و n-gramهای یک توییت
+
+        هر عبارت در هر توییت حداکثر یک بار شمرده می‌شود تا تکرار در یک توییت
+        (مثلاً اسپم) باعث انفجار نشود.
+
+        Args:
+            tweet (Tweet): توییت پردازش شده
+
+        Returns:
+            List[Tuple[str, str]]: (عبارت، نوع عبارت)
+        """
+        terms: Dict[str, str] = {}
+
+        entities = tweet.entities
+        if isinstance(entities, str):
+            try:
+                entities = json.loads(entities)
+            except ValueError:
+                entities = None
+        if not isinstance(entities, dict):
+            entities = self.content_filter.extract_entities(tweet.content or "")
+
+        for hashtag in entities.get("hashtags") or []:
+            text = hashtag.get("text") if isinstance(hashtag, dict) else hashtag
+            if text:
+                terms[f"#{text.lower()}"] = "hashtag"
+
+        tokens = [
+            token for token in self.content_filter.clean_text(tweet.content or "").split()
+            if len(token) > 2 and token not in self._stopwords and not token.isdigit()
+        ]
+        for size in self.ngram_sizes:
+            for i in range(len(tokens) - size + 1):
+                terms.setdefault(" ".join(tokens[i:i + size]), "ngram")
+
+        return list(terms.items())
+
+    def _roll(self, bucket_start: datetime) -> None:
+        """
+        بستن بازه جاری، افزودن آن به خط پایه و شروع بازه جدید
+
+        Args:
+            bucket_start (datetime): ابتدای بازه جدید
+        """
+        if self.bucket_start is not None:
+            if self.buckets_seen == 0:
+                self.baseline.table = self.current.table.copy()
+            else:
+                self.baseline.table *= (1 - self.alpha)
+                self.baseline.table += self.alpha * self.current.table
+            self.buckets_seen += 1
+
+            # بازه‌های بدون توییت خط پایه را به سمت صفر می‌برند
+            gap = int((bucket_start - self.bucket_start) / self.bucket) - 1
+            if gap > 0:
+                self.baseline.table *= (1 - self.alpha) ** gap
+                self.buckets_seen += gap
+
+        self.bucket_start = bucket_start
+        self.current = CountMinSketch(self.width, self.depth)
+        self.heavy_hitters = SpaceSaving(self.top_k)
+
+        # اعلام‌های قدیمی‌تر از دوره انتظار دیگر لازم نیستند
+        self.last_burst = {
+            term: when for term, when in self.last_burst.items() if bucket_start - when < self.cooldown
+        }
+
+    def observe(self, tweets: Iterable[Tweet]) -> None:
+        """
+        شمارش عبارات توییت‌های پردازش شده
+
+        توییت‌های بازه‌های قدیمی‌تر از بازه جاری نادیده گرفته می‌شوند.
+
+        Args:
+            tweets (Iterable[Tweet]): توییت‌های پردازش شده
+        """
+        dated = sorted(
+            ((self._floor_bucket(tweet.created_at or datetime.utcnow()), tweet) for tweet in tweets),
+            key=lambda item: item[0]
+        )
+        counts: Counter = Counter()
+        for bucket_start, tweet in dated:
+            if self.bucket_start is None or bucket_start > self.bucket_start:
+                self._add_counts(counts)
+                counts = Counter()
+                self._roll(bucket_start)
+            elif bucket_start < self.bucket_start:
+                continue
+
+            counts.update(term for term, _ in self.extract_terms(tweet))
+
+        self._add_counts(counts)
+
+    def _add_counts(self, counts: Counter) -> None:
+        """
+        افزودن شمارش عبارات به بازه جاری
+
+        Args:
+            counts (Counter): تعداد توییت‌های هر عبارت
+        """
+        if not counts:
+            return
+        terms = list(counts)
+        self.current.add(terms, [counts[term] for term in terms])
+        for term in terms:
+            self.heavy_hitters.add(term, counts[term])
+
+    def detect(self) -> List[Dict[str, Any]]:
+        """
+        بررسی عبارات پرتکرار بازه جاری نسبت به خط پایه
+
+        Returns:
+            List[Dict[str, Any]]: عبارات نوظهور به ترتیب z-score
+        """
+        if self.bucket_start is None or self.buckets_seen < self.warmup_buckets:
+            return []
+
+        # حد پایین تضمین شده Space-Saving برای حداقل تعداد استفاده می‌شود
+        candidates = [
+            (term, count) for term, count, error in self.heavy_hitters.top()
+            if count - error >= self.min_count and term not in self.last_burst
+        ]
+        if not candidates:
+            return []
+
+        terms = [term for term, _ in candidates]
+        observed = np.minimum([count for _, count in candidates], self.current.estimate(terms))
+        expected = self.baseline.estimate(terms)
+        z_scores = (observed - expected) / np.sqrt(np.maximum(expected, 1.0))
+
+        bursts = []
+        for term, count, baseline, z_score in zip(terms, observed, expected, z_scores):
+            if z_score < self.z_threshold:
+                continue
+
+            bursts.append({
+                "term": term,
+                "term_type": "hashtag" if term.startswith("#") else "ngram",
+                "bucket_start": self.bucket_start.isoformat(),
+                "bucket_end": (self.bucket_start + self.bucket).isoformat(),
+                "count": int(count),
+                "expected": round(float(baseline), 3),
+                "z_score": round(float(z_score), 3),
+                "importance_score": round(min(10.0, float(z_score)), 3)
+            })
+
+        bursts.sort(key=lambda burst: burst["z_score"], reverse=True)
+        return bursts
+
+    async def load_state(self) -> bool:
+        """
+        بارگذاری وضعیت ذخیره شده از Redis
+
+        Returns:
+            bool: آیا وضعیت معتبری بارگذاری شد
+        """
+        self._loaded = True
+        stored = await self.redis_service.get_cache(STATE_KEY)
+        if not isinstance(stored, dict):
+            return False
+
+        try:
+            if stored.get("shape") != [self.depth, self.width]:
+                logger.warning("Stored term burst state has a different sketch shape, starting fresh")
+                return False
+
+            self.bucket_start = datetime.fromisoformat(stored["bucket_start"])
+            self.buckets_seen = int(stored["buckets_seen"])
+            self.current = CountMinSketch.from_state(self.width, self.depth, stored["current"])
+            self.baseline = CountMinSketch.from_state(self.width, self.depth, stored["baseline"])
+            self.heavy_hitters = SpaceSaving(self.top_k, stored.get("heavy_hitters") or {})
+            self.last_burst = {
+                term: datetime.fromisoformat(when) for term, when in (stored.get("last_burst") or {}).items()
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed term burst state: {e}")
+            self._reset_state()
+            return False
+
+        logger.info(f"Loaded term burst state ({self.buckets_seen} buckets seen)")
+        return True
+
+    def _reset_state(self) -> None:
+        """بازنشانی وضعیت به حالت اولیه"""
+        self.bucket_start = None
+        self.current = CountMinSketch(self.width, self.depth)
+        self.heavy_hitters = SpaceSaving(self.top_k)
+        self.baseline = CountMinSketch(self.width, self.depth)
+        self.buckets_seen = 0
+        self.last_burst = {}
+
+    async def save_state(self) -> bool:
+        """
+        ذخیره وضعیت در Redis
+
+        Returns:
+            bool: نتیجه عملیات
+        """
+        if self.bucket_start is None:
+            return True
+
+        return await self.redis_service.set_cache(STATE_KEY, {
+            "shape": [self.depth, self.width],
+            "bucket_start": self.bucket_start.isoformat(),
+            "buckets_seen": self.buckets_seen,
+            "current": self.current.to_state(),
+            "baseline": self.baseline.to_state(),
+            "heavy_hitters": self.heavy_hitters.counters,
+            "last_burst": {term: when.isoformat() for term, when in self.last_burst.items()}
+        })
+
+    async def _filter_known_keywords(self, bursts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        حذف عباراتی که قبلاً به عنوان کلیدواژه تعریف شده‌اند
+
+        Args:
+            bursts (List[Dict[str, Any]]): عبارات نوظهور
+
+        Returns:
+            List[Dict[str, Any]]: عبارات پیشنهادی جدید
+        """
+        candidates = {burst["term"].lstrip("#") for burst in bursts} | {burst["term"] for burst in bursts}
+        result = await self.db_session.execute(
+            select(func.lower(Keyword.text)).where(func.lower(Keyword.text).in_(candidates))
+        )
+        known = {row[0] for row in result.fetchall()}
+        return [
+            burst for burst in bursts
+            if burst["term"] not in known and burst["term"].lstrip("#") not in known
+        ]
+
+    async def _create_alert(self, burst: Dict[str, Any]) -> Alert:
+        """
+        ایجاد هشدار برای عبارت نوظهور
+
+        Args:
+            burst (Dict[str, Any]): اطلاعات عبارت
+
+        Returns:
+            Alert: هشدار ایجاد شده
+        """
+        importance_score = burst["importance_score"]
+        if importance_score >= 7:
+            severity = "high"
+        elif importance_score >= 4:
+            severity = "medium"
+        else:
+            severity = "low"
+
+        label = "هشتگ" if burst["term_type"] == "hashtag" else "عبارت"
+        alert = Alert(
+            title=f"{label} نوظهور: {burst['term']} ({burst['count']} توییت)",
+            message=(
+                f"{label} «{burst['term']}» در بازه {burst['bucket_start']} تا {burst['bucket_end']} "
+                f"در {burst['count']} توییت دیده شد (انتظار: {burst['expected']:.1f}). "
+                f"این {label} می‌تواند به عنوان کلیدواژه جدید پیگیری شود."
+            ),
+            severity=severity,
+            alert_type="emerging_term",
+            data=burst,
+            is_read=False,
+            created_at=datetime.utcnow()
+        )
+        self.db_session.add(alert)
+        await self.db_session.commit()
+        await bump_resource_versions(RESOURCE_ALERTS)
+        await publish_live_event(ALERTS_CHANNEL, alert_event(alert, "created"))
+        return alert
+
+    async def _store_emerging_terms(self, bursts: List[Dict[str, Any]]) -> None:
+        """
+        افزودن عبارات نوظهور به کش عبارات اخیر
+
+        Args:
+            bursts (List[Dict[str, Any]]): عبارات نوظهور
+        """
+        recent = await self.redis_service.get_cache(EMERGING_TERMS_KEY) or []
+        new_terms = {burst["term"] for burst in bursts}
+        recent = bursts + [item for item in recent if item.get("term") not in new_terms]
+        await self.redis_service.set_cache(
+            EMERGING_TERMS_KEY, recent[:MAX_EMERGING_TERMS], expire=EMERGING_TERMS_TTL
+        )
+
+    async def process_tweets(self, tweets: List[Tweet]) -> List[Dict[str, Any]]:
+        """
+        شمارش عبارات یک دسته توییت پردازش شده و اعلام عبارات نوظهور
+
+        Args:
+            tweets (List[Tweet]): توییت‌های پردازش شده
+
+        Returns:
+            List[Dict[str, Any]]: عبارات نوظهور جدید
+        """
+        if not tweets:
+            return []
+
+        if not self._loaded:
+            await self.load_state()
+
+        self.observe(tweets)
+        bursts = self.detect()
+        for burst in bursts:
+            self.last_burst[burst["term"]] = self.bucket_start
+
+        await self.save_state()
+
+        if not bursts:
+            return []
+
+        bursts = await self._filter_known_keywords(bursts)
+        for burst in bursts:
+            logger.info(
+                f"Emerging {burst['term_type']} '{burst['term']}': {burst['count']} tweets "
+                f"(expected {burst['expected']:.1f}, z={burst['z_score']:.2f})"
+            )
+
+            if self.create_alerts:
+                try:
+                    alert = await self._create_alert(burst)
+                    burst["alert_id"] = alert.id
+                except Exception as e:
+                    logger.error(f"Error creating alert for emerging term: {e}")
+                    await self.db_session.rollback()
+
+            await publish_live_event(EMERGING_TERMS_CHANNEL, burst)
+
+        if bursts:
+            await self._store_emerging_terms(bursts)
+
+        return bursts
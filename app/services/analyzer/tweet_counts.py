@@ -0,0 +1,277 @@
+"""
+شمارش توییت‌ها برای اندپوینت تعداد.
+
+شمارش دقیق (count با فیلترهای جستجو) روی هر بارگذاری صفحه و هر تغییر فیلتر
+اجرا می‌شود. این ماژول به ترتیب از این منابع پاسخ می‌دهد:
+    1. کش کوتاه‌مدت Redis برای ترکیب فیلترهای تکراری
+    2. تخمین آماری PostgreSQL (pg_class.reltuples) برای تعداد کل بدون فیلتر
+    3. سری‌های دقیقه‌ای keyword_minute_stats برای فیلترهای زمان، یک کلیدواژه و احساسات
+    4. شمارش دقیق از جدول توییت‌ها
+منابع 2 و 3 تقریبی هستند (سری‌ها فقط توییت‌های پردازش شده را با دقت دقیقه
+دارند) و فقط وقتی شمارش دقیق درخواست نشده باشد استفاده می‌شوند. هر دو به سری‌ها
+وابسته‌اند (توزیع احساسات تعداد تخمینی هم از سری‌ها خوانده می‌شود)؛ بنابراین فقط
+با TWEET_COUNT_USE_ROLLUPS و پس از بازسازی سری‌ها برای کل تاریخچه فعال هستند.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from sqlalchemy import func, and_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.db.models import Tweet, Keyword, KeywordMinuteStat
+from app.schemas.tweet import TweetFilterParams
+from app.services.analyzer.keyword_series import ALL_KEYWORDS_ID, SENTIMENT_LABELS, floor_to_minute
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# پیشوند کلیدهای کش تعداد توییت‌ها
+CACHE_KEY_PREFIX = "tweet_count:"
+
+# فیلترهایی که در شمارش اثر دارند (صفحه‌بندی و مرتب‌سازی اثری ندارند)
+COUNT_FILTER_FIELDS = ("query", "sentiment", "keywords", "start_date", "end_date", "min_importance")
+
+
+class TweetCountService:
+    """
+    سرویس شمارش توییت‌ها با کش و تخمین
+
+    Attributes:
+        db_session (AsyncSession): نشست دیتابیس
+        redis_service (Optional[RedisService]): سرویس Redis برای کش (None برای غیرفعال)
+        cache_ttl (int): مدت اعتبار کش به ثانیه
+        use_rollups (bool): استفاده از سری‌های دقیقه‌ای برای فیلترهای ساده
+    """
+
+    def __init__(self, db_session: AsyncSession, redis_service: Optional[RedisService] = None):
+        """
+        مقداردهی اولیه سرویس شمارش
+
+        Args:
+            db_session (AsyncSession): نشست دیتابیس
+            redis_service (Optional[RedisService]): سرویس Redis
+        """
+        self.db_session = db_session
+        self.redis_service = redis_service
+        self.cache_ttl = settings.TWEET_COUNT_CACHE_TTL
+        self.use_rollups = settings.TWEET_COUNT_USE_ROLLUPS
+
+    @staticmethod
+    def _filter_values(params: TweetFilterParams) -> Dict[str, Any]:
+        """
+        مقادیر فیلترهای مؤثر در شمارش به شکل قابل مقایسه
+
+        Args:
+            params (TweetFilterParams): پارامترهای فیلتر
+
+        Returns:
+            Dict[str, Any]: فیلترهای مشخص شده
+        """
+        values = {}
+        for field in COUNT_FILTER_FIELDS:
+            value = getattr(params, field)
+            if value is None or value == [] or value == "":
+                continue
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, list):
+                value = sorted(value)
+            values[field] = value
+        return values
+
+    def _cache_key(self, filter_values: Dict[str, Any]) -> str:
+        """
+        کلید کش یک ترکیب فیلتر
+
+        Args:
+            filter_values (Dict[str, Any]): فیلترهای مشخص شده
+
+        Returns:
+            str: کلید کش
+        """
+        payload = json.dumps(filter_values, sort_keys=True, ensure_ascii=False)
+        return CACHE_KEY_PREFIX + hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    async def _get_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        خواندن تعداد از کش (خطای Redis مانع شمارش نمی‌شود)
+
+        Args:
+            key (str): کلید کش
+
+        Returns:
+            Optional[Dict[str, Any]]: تعداد ذخیره شده
+        """
+        if not self.redis_service or self.cache_ttl <= 0:
+            return None
+        try:
+            cached = await self.redis_service.get_cache(key)
+        except Exception as e:
+            logger.warning(f"Tweet count cache unavailable: {e}")
+            return None
+        return cached if isinstance(cached, dict) else None
+
+    async def _set_cached(self, key: str, counts: Dict[str, Any]) -> None:
+        """
+        ذخیره تعداد در کش
+
+        Args:
+            key (str): کلید کش
+            counts (Dict[str, Any]): تعداد محاسبه شده
+        """
+        if not self.redis_service or self.cache_ttl <= 0:
+            return
+        try:
+            await self.redis_service.set_cache(key, counts, expire=self.cache_ttl)
+        except Exception as e:
+            logger.warning(f"Tweet count cache unavailable: {e}")
+
+    @staticmethod
+    def _result(total: int, sentiment_counts: Dict[str, int], exact: bool, source: str) -> Dict[str, Any]:
+        """
+        ساخت پاسخ شمارش
+
+        Args:
+            total (int): تعداد کل
+            sentiment_counts (Dict[str, int]): تعداد هر برچسب احساسات
+            exact (bool): آیا تعداد دقیق است
+            source (str): منبع تعداد (query، rollup یا estimate)
+
+        Returns:
+            Dict[str, Any]: پاسخ شمارش
+        """
+        return {
+            "total": int(total),
+            "sentiment_counts": {label: int(sentiment_counts.get(label) or 0) for label in SENTIMENT_LABELS},
+            "exact": exact,
+            "source": source,
+        }
+
+    async def _count_exact(self, filters: List) -> Dict[str, Any]:
+        """
+        شمارش دقیق از جدول توییت‌ها
+
+        Args:
+            filters (List): شرط‌های فیلتر
+
+        Returns:
+            Dict[str, Any]: پاسخ شمارش
+        """
+        query = select(
+            func.count(),
+            *[func.count().filter(Tweet.sentiment_label == label) for label in SENTIMENT_LABELS]
+        ).select_from(Tweet)
+        if filters:
+            query = query.where(and_(*filters))
+
+        result = await self.db_session.execute(query)
+        counts = result.fetchone()
+        return self._result(counts[0], dict(zip(SENTIMENT_LABELS, counts[1:])), exact=True, source="query")
+
+    async def _sum_rollups(self, filter_values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        جمع سری‌های دقیقه‌ای برای فیلترهای زمان، یک کلیدواژه و احساسات
+
+        Args:
+            filter_values (Dict[str, Any]): فیلترهای مشخص شده
+
+        Returns:
+            Optional[Dict[str, Any]]: پاسخ شمارش یا None اگر فیلترها با سری‌ها قابل پاسخ نباشند
+        """
+        if set(filter_values) - {"sentiment", "keywords", "start_date", "end_date"}:
+            return None
+
+        # توییت‌های مرتبط با چند کلیدواژه را نمی‌توان از جمع سری‌ها بدون تکرار شمرد
+        keywords = filter_values.get("keywords") or []
+        if len(keywords) > 1:
+            return None
+
+        sentiment = filter_values.get("sentiment")
+        if sentiment and sentiment not in SENTIMENT_LABELS:
+            return None
+
+        keyword_id = ALL_KEYWORDS_ID
+        if keywords:
+            result = await self.db_session.execute(select(Keyword.id).where(Keyword.text == keywords[0]))
+            keyword_id = result.scalar_one_or_none()
+            if keyword_id is None:
+                return None
+
+        conditions = [KeywordMinuteStat.keyword_id == keyword_id]
+        if "start_date" in filter_values:
+            conditions.append(KeywordMinuteStat.bucket >= floor_to_minute(datetime.fromisoformat(filter_values["start_date"])))
+        if "end_date" in filter_values:
+            conditions.append(KeywordMinuteStat.bucket <= floor_to_minute(datetime.fromisoformat(filter_values["end_date"])))
+
+        result = await self.db_session.execute(
+            select(
+                func.coalesce(func.sum(KeywordMinuteStat.tweet_count), 0),
+                *[func.coalesce(func.sum(getattr(KeywordMinuteStat, f"{label}_count")), 0) for label in SENTIMENT_LABELS]
+            ).where(and_(*conditions))
+        )
+        row = result.fetchone()
+        sentiment_counts = dict(zip(SENTIMENT_LABELS, row[1:]))
+
+        if sentiment:
+            return self._result(sentiment_counts[sentiment], {sentiment: sentiment_counts[sentiment]}, exact=False, source="rollup")
+        return self._result(row[0], sentiment_counts, exact=False, source="rollup")
+
+    async def _estimate_total(self) -> Optional[int]:
+        """
+        تخمین تعداد کل توییت‌ها از آمار جدول (بدون پیمایش جدول)
+
+        Returns:
+            Optional[int]: تعداد تخمینی یا None اگر جدول هنوز تحلیل (ANALYZE) نشده باشد
+        """
+        result = await self.db_session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": Tweet.__tablename__}
+        )
+        estimate = result.scalar_one_or_none()
+        if estimate is None or estimate < 0:
+            return None
+        return int(estimate)
+
+    async def count(self, params: TweetFilterParams, filters: List, exact: bool = False) -> Dict[str, Any]:
+        """
+        شمارش توییت‌ها
+
+        Args:
+            params (TweetFilterParams): پارامترهای فیلتر
+            filters (List): شرط‌های فیلتر متناظر برای شمارش دقیق
+            exact (bool): الزام به شمارش دقیق از جدول توییت‌ها
+
+        Returns:
+            Dict[str, Any]: تعداد کل، تعداد هر برچسب احساسات، دقیق بودن و منبع تعداد
+        """
+        filter_values = self._filter_values(params)
+        key = self._cache_key(filter_values)
+
+        if not exact:
+            cached = await self._get_cached(key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+            counts = None
+            if self.use_rollups:
+                counts = await self._sum_rollups(filter_values)
+
+            # تعداد کل بدون فیلتر از آمار جدول، توزیع احساسات از سری‌ها
+            if not filter_values and counts is not None:
+                estimate = await self._estimate_total()
+                if estimate is not None:
+                    counts = self._result(estimate, counts["sentiment_counts"], exact=False, source="estimate")
+
+            if counts is not None:
+                await self._set_cached(key, counts)
+                return {**counts, "cached": False}
+
+        counts = await self._count_exact(filters)
+        await self._set_cached(key, counts)
+        return {**counts, "cached": False}
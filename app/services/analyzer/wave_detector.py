@@ -13,13 +13,21 @@ from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy import func, and_, or_, desc, literal_column, values, column, Integer, DateTime
 import asyncio
 
+from app.config import settings
 from app.db.models import Tweet, Alert, User, Keyword, TweetKeyword
+from app.services.analyzer.keyword_series import KeywordSeriesService, floor_to_minute
+from app.services.analyzer.wave_tracker import WaveTracker
+from app.core.http_cache import bump_resource_versions, RESOURCE_ALERTS
+from app.services.live_updates import publish_live_event, alert_event, ALERTS_CHANNEL
 
 logger = logging.getLogger(__name__)
 
+# برچسب‌های احساسات برای شمارش در هر بازه
+SENTIMENT_LABELS = ("positive", "negative", "neutral", "mixed")
+
 
 class WaveDetector:
     """
@@ -34,6 +42,9 @@ class WaveDetector:
         sentiment_threshold (float): آستانه تشخیص موج احساسی
         min_tweets (int): حداقل تعداد توییت برای تشخیص موج
         time_window (int): پنجره زمانی برای تحلیل موج به دقیقه
+        use_keyword_series (bool): خواندن آمار بازه‌ها از سری‌های دقیقه‌ای به جای جدول توییت‌ها
+        keyword_series (KeywordSeriesService): سرویس سری زمانی کلیدواژه‌ها
+        wave_tracker (WaveTracker): ردیاب چرخه عمر موج‌ها
     """
 
     def __init__(
@@ -42,7 +53,8 @@ class WaveDetector:
             volume_threshold: float = 2.0,
             sentiment_threshold: float = 0.3,
             min_tweets: int = 10,
-            time_window: int = 60  # دقیقه
+            time_window: int = 60,  # دقیقه
+            use_keyword_series: Optional[bool] = None
     ):
         """
         مقداردهی اولیه تشخیص موج
@@ -53,175 +65,375 @@ class WaveDetector:
             sentiment_threshold (float): آستانه تشخیص موج احساسی (میزان تغییر)
             min_tweets (int): حداقل تعداد توییت برای تشخیص موج
             time_window (int): پنجره زمانی برای تحلیل موج به دقیقه
+            use_keyword_series (bool, optional): استفاده از سری‌های دقیقه‌ای. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
         """
         self.db_session = db_session
         self.volume_threshold = volume_threshold
         self.sentiment_threshold = sentiment_threshold
         self.min_tweets = min_tweets
         self.time_window = time_window
-        logger.info("WaveDetector initialized")
+        self.use_keyword_series = (
+            settings.WAVE_USE_KEYWORD_SERIES if use_keyword_series is None else use_keyword_series
+        )
+        self.keyword_series = KeywordSeriesService(db_session)
+        self.wave_tracker = WaveTracker(db_session)
+        logger.info(f"WaveDetector initialized (keyword series: {self.use_keyword_series})")
 
-    async def detect_volume_waves(
+    async def _get_keyword_ids(self, keywords: Optional[List[str]]) -> Optional[List[int]]:
+        """
+        دریافت شناسه کلیدواژه‌ها
+
+        Args:
+            keywords (Optional[List[str]]): کلیدواژه‌ها
+
+        Returns:
+            Optional[List[int]]: شناسه‌ها یا None اگر کلیدواژه‌ای مشخص نشده یا یافت نشود
+        """
+        if not keywords:
+            return None
+
+        # دریافت شناسه‌های کلیدواژه‌ها از دیتابیس
+        stmt = select(Keyword.id).where(Keyword.text.in_(keywords))
+        result = await self.db_session.execute(stmt)
+        keyword_ids = [row[0] for row in result.fetchall()]
+
+        return keyword_ids or None
+
+    def _build_keyword_condition(self, keyword_ids: Optional[List[int]]):
+        """
+        ساخت شرط فیلتر توییت‌ها براساس کلیدواژه‌ها
+
+        Args:
+            keyword_ids (Optional[List[int]]): شناسه کلیدواژه‌ها
+
+        Returns:
+            شرط SQLAlchemy یا None
+        """
+        if not keyword_ids:
+            return None
+
+        # ایجاد شرط برای توییت‌هایی که با این کلیدواژه‌ها مرتبط هستند
+        return Tweet.id.in_(
+            select(TweetKeyword.tweet_id).where(TweetKeyword.keyword_id.in_(keyword_ids))
+        )
+
+    async def _get_window_stats(
             self,
-            keywords: Optional[List[str]] = None,
-            hours_back: int = 24
+            keyword_ids: Optional[List[int]],
+            keyword_condition,
+            hours_back: int,
+            window_minutes: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
-        تشخیص موج‌های حجمی
+        دریافت آمار همه بازه‌های زمانی با یک کوئری GROUP BY
+
+        توییت‌ها با date_bin در بازه‌های time_window دقیقه‌ای (با مبدأ زمان شروع)
+        گروه‌بندی می‌شوند و تعداد، میانگین احساسات و تعداد هر برچسب احساس
+        یکجا محاسبه می‌شود. در صورت فعال بودن سری‌های دقیقه‌ای، همین آمار از
+        جدول keyword_minute_stats خوانده می‌شود. بازه‌های بدون توییت در پایتون
+        با صفر پر می‌شوند.
 
         Args:
-            keywords (Optional[List[str]]): کلیدواژه‌ها برای فیلتر کردن
+            keyword_ids (Optional[List[int]]): شناسه کلیدواژه‌ها (یا None)
+            keyword_condition: شرط کلیدواژه‌ها (یا None)
             hours_back (int): تعداد ساعات برای بررسی
+            window_minutes (Optional[int]): طول بازه به دقیقه. اگر مشخص نشود، time_window استفاده می‌شود.
 
         Returns:
-            List[Dict[str, Any]]: لیست موج‌های تشخیص داده شده
+            List[Dict[str, Any]]: آمار هر بازه به ترتیب زمانی
         """
-        logger.info(f"Detecting volume waves for the past {hours_back} hours")
-
         # محاسبه زمان شروع و پایان
         end_time = datetime.utcnow()
-        start_time = end_time - timedelta(hours=hours_back)
+        # هم‌ترازی با دقیقه تا بازه‌ها با سری‌های دقیقه‌ای منطبق باشند
+        start_time = floor_to_minute(end_time - timedelta(hours=hours_back))
+        window = timedelta(minutes=window_minutes or self.time_window)
 
         # تقسیم زمان به بازه‌های time_window دقیقه‌ای
-        time_windows = []
+        windows = []
         window_start = start_time
-
         while window_start < end_time:
-            window_end = window_start + timedelta(minutes=self.time_window)
-            time_windows.append((window_start, min(window_end, end_time)))
+            window_end = window_start + window
+            windows.append({
+                "start_time": window_start,
+                "end_time": min(window_end, end_time),
+                "tweet_count": 0,
+                "scored_count": 0,
+                "avg_sentiment": 0,
+                "sentiment_counts": {label: 0 for label in SENTIMENT_LABELS}
+            })
             window_start = window_end
 
-        # بررسی هر بازه زمانی
-        volume_data = []
-        prev_count = 0
-        keyword_condition = None
-
-        # ایجاد شرط کلیدواژه‌ها
-        if keywords:
-            # دریافت شناسه‌های کلیدواژه‌ها از دیتابیس
-            stmt = select(Keyword.id).where(Keyword.text.in_(keywords))
-            result = await self.db_session.execute(stmt)
-            keyword_ids = [row[0] for row in result.fetchall()]
-
-            if keyword_ids:
-                # ایجاد شرط برای توییت‌هایی که با این کلیدواژه‌ها مرتبط هستند
-                keyword_condition = Tweet.id.in_(
-                    select(TweetKeyword.tweet_id).where(TweetKeyword.keyword_id.in_(keyword_ids))
+        if self.use_keyword_series:
+            rows = await self.keyword_series.get_bucket_rows(keyword_ids, start_time, end_time, window)
+        else:
+            bucket = func.date_bin(window, Tweet.created_at, start_time).label("bucket")
+            # توییت‌های بدون برچسب مانند قبل خنثی در نظر گرفته می‌شوند
+            label_counts = [
+                func.count().filter(
+                    or_(Tweet.sentiment_label == label, Tweet.sentiment_label.is_(None))
+                    if label == "neutral" else Tweet.sentiment_label == label
                 )
+                for label in SENTIMENT_LABELS
+            ]
+
+            conditions = [Tweet.created_at >= start_time, Tweet.created_at < end_time]
+            if keyword_condition is not None:
+                conditions.append(keyword_condition)
 
-        # بررسی هر بازه زمانی
-        for i, (window_start, window_end) in enumerate(time_windows):
-            # شرط زمانی
-            time_condition = and_(
-                Tweet.created_at >= window_start,
-                Tweet.created_at < window_end
+            stmt = select(
+                bucket,
+                func.count(),
+                func.count(Tweet.sentiment_score),
+                func.avg(Tweet.sentiment_score),
+                *label_counts
+            ).where(and_(*conditions)).group_by(
+                # گروه‌بندی با نام ستون خروجی؛ تکرار عبارت با پارامترهای جدید در PostgreSQL یکسان شناخته نمی‌شود
+                literal_column("bucket")
             )
 
-            # ترکیب شرط‌ها
-            if keyword_condition:
-                stmt_condition = and_(time_condition, keyword_condition)
-            else:
-                stmt_condition = time_condition
+            rows = (await self.db_session.execute(stmt)).fetchall()
 
-            # شمارش توییت‌ها در این بازه
-            stmt = select(func.count()).where(stmt_condition)
-            result = await self.db_session.execute(stmt)
-            tweet_count = result.scalar() or 0
+        window_seconds = window.total_seconds()
+        for row in rows:
+            index = int(round((row[0] - start_time).total_seconds() / window_seconds))
+            if not 0 <= index < len(windows):
+                continue
 
-            # محاسبه نرخ تغییر
-            if i > 0 and prev_count > 0:
-                growth_rate = (tweet_count - prev_count) / prev_count if prev_count > 0 else 0
-            else:
-                growth_rate = 0
+            data = windows[index]
+            data["tweet_count"] = int(row[1] or 0)
+            data["scored_count"] = int(row[2] or 0)
+            data["avg_sentiment"] = float(row[3]) if row[3] is not None else 0
+            data["sentiment_counts"] = dict(zip(SENTIMENT_LABELS, (int(count or 0) for count in row[4:])))
 
-            volume_data.append({
-                "start_time": window_start,
-                "end_time": window_end,
-                "tweet_count": tweet_count,
-                "growth_rate": growth_rate
+        return windows
+
+    async def _get_top_tweets(
+            self,
+            windows: List[Dict[str, Any]],
+            keyword_condition,
+            limit: int = 20
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        دریافت مهم‌ترین توییت‌های چند بازه با یک کوئری
+
+        بازه‌ها به صورت جدول VALUES به توییت‌ها متصل شده و توییت‌های هر بازه با
+        row_number رتبه‌بندی می‌شوند؛ فقط ستون‌های مورد نیاز خروجی خوانده می‌شوند.
+
+        Args:
+            windows (List[Dict[str, Any]]): بازه‌ها (با start_time و end_time)
+            keyword_condition: شرط کلیدواژه‌ها (یا None)
+            limit (int): حداکثر تعداد توییت هر بازه
+
+        Returns:
+            List[List[Dict[str, Any]]]: توییت‌های برتر هر بازه به ترتیب ورودی
+        """
+        top_tweets: List[List[Dict[str, Any]]] = [[] for _ in windows]
+        if not windows:
+            return top_tweets
+
+        window_table = values(
+            column("idx", Integer), column("start_time", DateTime), column("end_time", DateTime),
+            name="wave_windows"
+        ).data([(i, data["start_time"], data["end_time"]) for i, data in enumerate(windows)])
+
+        rank = func.row_number().over(
+            partition_by=window_table.c.idx,
+            order_by=(Tweet.importance_score.desc().nulls_last(), Tweet.id)
+        ).label("rank")
+
+        ranked = select(
+            window_table.c.idx,
+            Tweet.id,
+            Tweet.tweet_id,
+            Tweet.content,
+            Tweet.user_id,
+            Tweet.importance_score,
+            Tweet.sentiment_label,
+            rank
+        ).join(
+            window_table,
+            and_(Tweet.created_at >= window_table.c.start_time, Tweet.created_at < window_table.c.end_time)
+        )
+        if keyword_condition is not None:
+            ranked = ranked.where(keyword_condition)
+        ranked = ranked.subquery()
+
+        stmt = select(ranked).where(ranked.c.rank <= limit).order_by(ranked.c.idx, ranked.c.rank)
+        result = await self.db_session.execute(stmt)
+
+        for row in result.mappings():
+            top_tweets[row["idx"]].append({
+                "id": row["id"],
+                "tweet_id": row["tweet_id"],
+                "content": row["content"],
+                "user_id": row["user_id"],
+                "importance_score": row["importance_score"],
+                "sentiment_label": row["sentiment_label"]
             })
 
-            prev_count = tweet_count
+        return top_tweets
+
+    def _build_wave(
+            self,
+            wave_type: str,
+            data: Dict[str, Any],
+            importance_score: float,
+            tweets: List[Dict[str, Any]],
+            keywords: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """
+        ساخت خروجی یک موج از آمار بازه
+
+        Args:
+            wave_type (str): نوع موج (volume, sentiment)
+            data (Dict[str, Any]): آمار بازه
+            importance_score (float): امتیاز اهمیت موج
+            tweets (List[Dict[str, Any]]): مهم‌ترین توییت‌های بازه
+            keywords (Optional[List[str]]): کلیدواژه‌های فیلتر
+
+        Returns:
+            Dict[str, Any]: اطلاعات موج
+        """
+        # محاسبه توزیع احساسات
+        sentiment_counts = data["sentiment_counts"]
+        total_tweets = sum(sentiment_counts.values())
+        sentiment_distribution = {
+            label: count / total_tweets for label, count in sentiment_counts.items() if total_tweets > 0
+        }
+
+        wave = {
+            "type": wave_type,
+            "start_time": data["start_time"].isoformat(),
+            "end_time": data["end_time"].isoformat(),
+            "tweet_count": data["tweet_count"],
+            "avg_sentiment": data["avg_sentiment"],
+            "sentiment_distribution": sentiment_distribution,
+            "importance_score": importance_score,
+            "top_tweets": tweets[:20]  # فقط 20 توییت مهم
+        }
+
+        if wave_type == "volume":
+            wave["growth_rate"] = data["growth_rate"]
+        else:
+            wave["sentiment_shift"] = data["sentiment_shift"]
 
-        # تشخیص موج‌ها
-        waves = []
+        # بررسی کلیدواژه‌های مرتبط
+        if keywords:
+            wave["related_keywords"] = keywords
+
+        return wave
+
+    def _find_volume_candidates(self, windows: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        تشخیص بازه‌های موج حجمی از آمار بازه‌ها
+
+        Args:
+            windows (List[Dict[str, Any]]): آمار بازه‌ها
+
+        Returns:
+            List[Tuple[str, Dict[str, Any], float]]: (نوع موج، آمار بازه، امتیاز اهمیت)
+        """
+        candidates = []
+        prev_count = 0
+
+        for i, window in enumerate(windows):
+            tweet_count = window["tweet_count"]
+
+            # محاسبه نرخ تغییر نسبت به بازه قبلی
+            growth_rate = (tweet_count - prev_count) / prev_count if i > 0 and prev_count > 0 else 0
+            prev_count = tweet_count
 
-        for i, data in enumerate(volume_data):
             # رد کردن بازه‌های با تعداد کم توییت
-            if data["tweet_count"] < self.min_tweets:
+            if tweet_count < self.min_tweets or growth_rate < self.volume_threshold:
                 continue
 
-            # بررسی افزایش ناگهانی نسبت به بازه قبلی
-            if data["growth_rate"] >= self.volume_threshold:
-                # دریافت توییت‌های این بازه
-                time_condition = and_(
-                    Tweet.created_at >= data["start_time"],
-                    Tweet.created_at < data["end_time"]
-                )
+            # محاسبه امتیاز اهمیت موج
+            importance_score = min(10, growth_rate * 2.5 + (tweet_count / 10))
+            candidates.append(("volume", {**window, "growth_rate": growth_rate}, importance_score))
 
-                if keyword_condition:
-                    stmt_condition = and_(time_condition, keyword_condition)
-                else:
-                    stmt_condition = time_condition
+        logger.info(f"Detected {len(candidates)} volume waves")
+        return candidates
 
-                stmt = select(Tweet).where(stmt_condition).order_by(Tweet.importance_score.desc()).limit(100)
-                result = await self.db_session.execute(stmt)
-                tweets = result.scalars().all()
+    def _find_sentiment_candidates(self, windows: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        تشخیص بازه‌های موج احساسی از آمار بازه‌ها
 
-                # محاسبه اطلاعات احساسات
-                sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0, "mixed": 0}
-                total_sentiment = 0
+        Args:
+            windows (List[Dict[str, Any]]): آمار بازه‌ها
 
-                for tweet in tweets:
-                    sentiment_label = tweet.sentiment_label or "neutral"
-                    sentiment_counts[sentiment_label] = sentiment_counts.get(sentiment_label, 0) + 1
+        Returns:
+            List[Tuple[str, Dict[str, Any], float]]: (نوع موج، آمار بازه، امتیاز اهمیت)
+        """
+        candidates = []
+        prev_avg_sentiment = 0
 
-                    # محاسبه میانگین احساسات
-                    if tweet.sentiment_score is not None:
-                        total_sentiment += tweet.sentiment_score
+        for i, window in enumerate(windows):
+            # فقط توییت‌هایی که امتیاز احساسات دارند
+            tweet_count = window["scored_count"]
+            avg_sentiment = window["avg_sentiment"]
 
-                # محاسبه متوسط احساسات
-                avg_sentiment = total_sentiment / len(tweets) if tweets else 0
+            # محاسبه تغییر احساسات
+            sentiment_shift = abs(avg_sentiment - prev_avg_sentiment) if i > 0 else 0
+            prev_avg_sentiment = avg_sentiment
 
-                # محاسبه توزیع احساسات
-                total_tweets = sum(sentiment_counts.values())
-                sentiment_distribution = {
-                    label: count / total_tweets for label, count in sentiment_counts.items() if total_tweets > 0
-                }
+            # رد کردن بازه‌های با تعداد کم توییت
+            if tweet_count < self.min_tweets or sentiment_shift < self.sentiment_threshold:
+                continue
 
-                # محاسبه امتیاز اهمیت موج
-                importance_score = min(10, data["growth_rate"] * 2.5 + (data["tweet_count"] / 10))
+            # محاسبه امتیاز اهمیت موج
+            importance_score = min(10, sentiment_shift * 10 + (tweet_count / 20))
+            data = {**window, "tweet_count": tweet_count, "sentiment_shift": sentiment_shift}
+            candidates.append(("sentiment", data, importance_score))
 
-                wave = {
-                    "type": "volume",
-                    "start_time": data["start_time"].isoformat(),
-                    "end_time": data["end_time"].isoformat(),
-                    "tweet_count": data["tweet_count"],
-                    "growth_rate": data["growth_rate"],
-                    "avg_sentiment": avg_sentiment,
-                    "sentiment_distribution": sentiment_distribution,
-                    "importance_score": importance_score,
-                    "top_tweets": [
-                        {
-                            "id": tweet.id,
-                            "tweet_id": tweet.tweet_id,
-                            "content": tweet.content,
-                            "user_id": tweet.user_id,
-                            "importance_score": tweet.importance_score,
-                            "sentiment_label": tweet.sentiment_label
-                        }
-                        for tweet in tweets[:20]  # فقط 20 توییت مهم
-                    ]
-                }
+        logger.info(f"Detected {len(candidates)} sentiment waves")
+        return candidates
 
-                # بررسی کلیدواژه‌های مرتبط
-                if keywords:
-                    wave["related_keywords"] = keywords
+    async def _build_waves(
+            self,
+            candidates: List[Tuple[str, Dict[str, Any], float]],
+            keyword_condition,
+            keywords: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        ساخت خروجی موج‌ها با توییت‌های برتر همه بازه‌ها در یک کوئری
 
-                waves.append(wave)
+        Args:
+            candidates (List[Tuple[str, Dict[str, Any], float]]): (نوع موج، آمار بازه، امتیاز اهمیت)
+            keyword_condition: شرط کلیدواژه‌ها (یا None)
+            keywords (Optional[List[str]]): کلیدواژه‌های فیلتر
 
-        logger.info(f"Detected {len(waves)} volume waves")
-        return waves
+        Returns:
+            List[Dict[str, Any]]: لیست موج‌ها
+        """
+        top_tweets = await self._get_top_tweets([data for _, data, _ in candidates], keyword_condition)
+
+        return [
+            self._build_wave(wave_type, data, importance_score, tweets, keywords)
+            for (wave_type, data, importance_score), tweets in zip(candidates, top_tweets)
+        ]
+
+    async def detect_volume_waves(
+            self,
+            keywords: Optional[List[str]] = None,
+            hours_back: int = 24
+    ) -> List[Dict[str, Any]]:
+        """
+        تشخیص موج‌های حجمی
+
+        Args:
+            keywords (Optional[List[str]]): کلیدواژه‌ها برای فیلتر کردن
+            hours_back (int): تعداد ساعات برای بررسی
+
+        Returns:
+            List[Dict[str, Any]]: لیست موج‌های تشخیص داده شده
+        """
+        logger.info(f"Detecting volume waves for the past {hours_back} hours")
+
+        keyword_ids = await self._get_keyword_ids(keywords)
+        keyword_condition = self._build_keyword_condition(keyword_ids)
+        windows = await self._get_window_stats(keyword_ids, keyword_condition, hours_back)
+
+        return await self._build_waves(self._find_volume_candidates(windows), keyword_condition, keywords)
 
     async def detect_sentiment_waves(
             self,
@@ -240,185 +452,447 @@ class WaveDetector:
         """
         logger.info(f"Detecting sentiment waves for the past {hours_back} hours")
 
-        # محاسبه زمان شروع و پایان
-        end_time = datetime.utcnow()
-        start_time = end_time - timedelta(hours=hours_back)
+        keyword_ids = await self._get_keyword_ids(keywords)
+        keyword_condition = self._build_keyword_condition(keyword_ids)
+        windows = await self._get_window_stats(keyword_ids, keyword_condition, hours_back)
 
-        # تقسیم زمان به بازه‌های time_window دقیقه‌ای
-        time_windows = []
-        window_start = start_time
+        return await self._build_waves(self._find_sentiment_candidates(windows), keyword_condition, keywords)
 
-        while window_start < end_time:
-            window_end = window_start + timedelta(minutes=self.time_window)
-            time_windows.append((window_start, min(window_end, end_time)))
-            window_start = window_end
+    async def detect_all_waves(
+            self,
+            keywords: Optional[List[str]] = None,
+            hours_back: int = 24
+    ) -> List[Dict[str, Any]]:
+        """
+        تشخیص تمام انواع موج‌ها
 
-        # بررسی هر بازه زمانی
-        sentiment_data = []
-        prev_avg_sentiment = 0
-        keyword_condition = None
+        آمار بازه‌ها یک بار محاسبه شده و برای هر دو نوع موج استفاده می‌شود.
+
+        Args:
+            keywords (Optional[List[str]]): کلیدواژه‌ها برای فیلتر کردن
+            hours_back (int): تعداد ساعات برای بررسی
+
+        Returns:
+            List[Dict[str, Any]]: لیست تمام موج‌های تشخیص داده شده
+        """
+        logger.info(f"Detecting all waves for the past {hours_back} hours")
+
+        keyword_ids = await self._get_keyword_ids(keywords)
+        keyword_condition = self._build_keyword_condition(keyword_ids)
+        windows = await self._get_window_stats(keyword_ids, keyword_condition, hours_back)
+
+        # تشخیص موج‌های حجمی و احساسی و دریافت توییت‌های برتر همه آن‌ها با یک کوئری
+        candidates = self._find_volume_candidates(windows) + self._find_sentiment_candidates(windows)
+        all_waves = await self._build_waves(candidates, keyword_condition, keywords)
+
+        # مرتب‌سازی براساس امتیاز اهمیت
+        all_waves.sort(key=lambda x: x.get("importance_score", 0), reverse=True)
 
-        # ایجاد شرط کلیدواژه‌ها
+        logger.info(f"Detected {len(all_waves)} total waves")
+        return all_waves
+
+    async def _get_keyword_matrix(
+            self,
+            keywords: Optional[List[str]],
+            hours_back: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        دریافت ماتریس بازه زمانی × کلیدواژه با یک کوئری
+
+        Args:
+            keywords (Optional[List[str]]): کلیدواژه‌ها (None برای همه کلیدواژه‌های فعال)
+            hours_back (int): تعداد ساعات برای بررسی
+
+        Returns:
+            Optional[Dict[str, Any]]: متن کلیدواژه‌ها، ابتدای بازه‌ها و ماتریس‌های تعداد،
+            تعداد دارای امتیاز و مجموع امتیاز احساسات (هر کدام به شکل بازه × کلیدواژه)
+        """
+        stmt = select(Keyword.id, Keyword.text)
         if keywords:
-            # دریافت شناسه‌های کلیدواژه‌ها از دیتابیس
-            stmt = select(Keyword.id).where(Keyword.text.in_(keywords))
-            result = await self.db_session.execute(stmt)
-            keyword_ids = [row[0] for row in result.fetchall()]
-
-            if keyword_ids:
-                # ایجاد شرط برای توییت‌هایی که با این کلیدواژه‌ها مرتبط هستند
-                keyword_condition = Tweet.id.in_(
-                    select(TweetKeyword.tweet_id).where(TweetKeyword.keyword_id.in_(keyword_ids))
-                )
+            stmt = stmt.where(Keyword.text.in_(keywords))
+        else:
+            stmt = stmt.where(Keyword.is_active == True)
+        keyword_rows = (await self.db_session.execute(stmt.order_by(Keyword.id))).fetchall()
+        if not keyword_rows:
+            return None
 
-        # بررسی هر بازه زمانی
-        for i, (window_start, window_end) in enumerate(time_windows):
-            # شرط زمانی
-            time_condition = and_(
-                Tweet.created_at >= window_start,
-                Tweet.created_at < window_end,
-                Tweet.sentiment_score.isnot(None)  # فقط توییت‌هایی که امتیاز احساسات دارند
-            )
+        keyword_ids = [row[0] for row in keyword_rows]
+        column_index = {keyword_id: i for i, keyword_id in enumerate(keyword_ids)}
 
-            # ترکیب شرط‌ها
-            if keyword_condition:
-                stmt_condition = and_(time_condition, keyword_condition)
-            else:
-                stmt_condition = time_condition
+        end_time = datetime.utcnow()
+        start_time = floor_to_minute(end_time - timedelta(hours=hours_back))
+        window = timedelta(minutes=self.time_window)
+        window_seconds = window.total_seconds()
+        window_count = int(math.ceil((end_time - start_time).total_seconds() / window_seconds))
 
-            # شمارش توییت‌ها و میانگین احساسات در این بازه
+        if self.use_keyword_series:
+            rows = await self.keyword_series.get_keyword_matrix_rows(keyword_ids, start_time, end_time, window)
+        else:
+            bucket = func.date_bin(window, Tweet.created_at, start_time).label("bucket")
             stmt = select(
+                TweetKeyword.keyword_id,
+                bucket,
                 func.count(),
-                func.avg(Tweet.sentiment_score)
-            ).where(stmt_condition)
+                func.count(Tweet.sentiment_score),
+                func.sum(Tweet.sentiment_score)
+            ).join(
+                TweetKeyword, TweetKeyword.tweet_id == Tweet.id
+            ).where(
+                and_(
+                    Tweet.created_at >= start_time,
+                    Tweet.created_at < end_time,
+                    TweetKeyword.keyword_id.in_(keyword_ids)
+                )
+            ).group_by(TweetKeyword.keyword_id, literal_column("bucket"))
+            rows = (await self.db_session.execute(stmt)).fetchall()
 
-            result = await self.db_session.execute(stmt)
-            row = result.fetchone()
-            tweet_count = row[0] or 0
-            avg_sentiment = row[1] or 0
+        shape = (window_count, len(keyword_ids))
+        counts = np.zeros(shape)
+        scored = np.zeros(shape)
+        sentiment_sums = np.zeros(shape)
 
-            # محاسبه تغییر احساسات
-            sentiment_shift = abs(avg_sentiment - prev_avg_sentiment) if i > 0 else 0
-
-            sentiment_data.append({
-                "start_time": window_start,
-                "end_time": window_end,
-                "tweet_count": tweet_count,
-                "avg_sentiment": avg_sentiment,
-                "sentiment_shift": sentiment_shift
-            })
+        for keyword_id, bucket_start, tweet_count, scored_count, sentiment_sum in rows:
+            row_index = int(round((bucket_start - start_time).total_seconds() / window_seconds))
+            if not 0 <= row_index < window_count or keyword_id not in column_index:
+                continue
+            keyword_column = column_index[keyword_id]
+            counts[row_index, keyword_column] = tweet_count or 0
+            scored[row_index, keyword_column] = scored_count or 0
+            sentiment_sums[row_index, keyword_column] = sentiment_sum or 0
+
+        return {
+            "keywords": [row[1] for row in keyword_rows],
+            "bucket_starts": [start_time + window * i for i in range(window_count)],
+            "end_time": end_time,
+            "counts": counts,
+            "scored": scored,
+            "sentiment_sums": sentiment_sums
+        }
 
-            prev_avg_sentiment = avg_sentiment
+    def _rolling_baseline(self, counts: np.ndarray, baseline_windows: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        محاسبه میانگین و انحراف معیار بازه‌های قبلی برای همه کلیدواژه‌ها
 
-        # تشخیص موج‌ها
-        waves = []
+        برای هر بازه فقط baseline_windows بازه قبل از آن (بدون خود بازه) در نظر گرفته می‌شود.
 
-        for i, data in enumerate(sentiment_data):
-            # رد کردن بازه‌های با تعداد کم توییت
-            if data["tweet_count"] < self.min_tweets:
-                continue
+        Args:
+            counts (np.ndarray): ماتریس تعداد (بازه × کلیدواژه)
+            baseline_windows (int): تعداد بازه‌های خط پایه
 
-            # بررسی تغییر ناگهانی احساسات
-            if data["sentiment_shift"] >= self.sentiment_threshold:
-                # دریافت توییت‌های این بازه
-                time_condition = and_(
-                    Tweet.created_at >= data["start_time"],
-                    Tweet.created_at < data["end_time"]
-                )
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: میانگین و انحراف معیار خط پایه (هم‌شکل counts)
+        """
+        window_count = counts.shape[0]
+        zero_row = np.zeros((1, counts.shape[1]))
+        cumulative = np.vstack([zero_row, np.cumsum(counts, axis=0)])
+        cumulative_squares = np.vstack([zero_row, np.cumsum(counts ** 2, axis=0)])
 
-                if keyword_condition:
-                    stmt_condition = and_(time_condition, keyword_condition)
-                else:
-                    stmt_condition = time_condition
+        ends = np.arange(window_count)
+        starts = np.maximum(ends - baseline_windows, 0)
+        sizes = (ends - starts)[:, None]
 
-                stmt = select(Tweet).where(stmt_condition).order_by(Tweet.importance_score.desc()).limit(100)
-                result = await self.db_session.execute(stmt)
-                tweets = result.scalars().all()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(sizes > 0, (cumulative[ends] - cumulative[starts]) / sizes, 0.0)
+            mean_squares = np.where(sizes > 0, (cumulative_squares[ends] - cumulative_squares[starts]) / sizes, 0.0)
 
-                # محاسبه اطلاعات احساسات
-                sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0, "mixed": 0}
+        std = np.sqrt(np.clip(mean_squares - mean ** 2, 0, None))
+        return mean, std
 
-                for tweet in tweets:
-                    sentiment_label = tweet.sentiment_label or "neutral"
-                    sentiment_counts[sentiment_label] = sentiment_counts.get(sentiment_label, 0) + 1
+    async def scan_keywords(
+            self,
+            keywords: Optional[List[str]] = None,
+            hours_back: int = 24,
+            baseline_windows: int = 6,
+            z_threshold: float = 4.0,
+            max_waves_per_keyword: int = 5
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        تشخیص موج‌ها برای همه کلیدواژه‌ها به صورت برداری
 
-                # محاسبه توزیع احساسات
-                total_tweets = sum(sentiment_counts.values())
-                sentiment_distribution = {
-                    label: count / total_tweets for label, count in sentiment_counts.items() if total_tweets > 0
-                }
+        ماتریس بازه × کلیدواژه با یک کوئری بارگذاری شده و نرخ رشد، z-score نسبت به
+        بازه‌های قبلی و تغییر احساسات برای همه کلیدواژه‌ها با NumPy یکجا محاسبه می‌شود.
+        برای جلوگیری از کوئری به ازای هر موج، توییت‌های برتر در خروجی گنجانده نمی‌شوند.
 
-                # محاسبه امتیاز اهمیت موج
-                importance_score = min(10, data["sentiment_shift"] * 10 + (data["tweet_count"] / 20))
+        Args:
+            keywords (Optional[List[str]]): کلیدواژه‌ها (None برای همه کلیدواژه‌های فعال)
+            hours_back (int): تعداد ساعات برای بررسی
+            baseline_windows (int): تعداد بازه‌های قبلی برای خط پایه z-score
+            z_threshold (float): آستانه z-score برای موج حجمی
+            max_waves_per_keyword (int): حداکثر تعداد موج برای هر کلیدواژه
 
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: موج‌های هر کلیدواژه به ترتیب امتیاز اهمیت
+        """
+        logger.info(f"Scanning keyword waves for the past {hours_back} hours")
+
+        matrix = await self._get_keyword_matrix(keywords, hours_back)
+        if matrix is None:
+            return {}
+
+        counts = matrix["counts"]
+        scored = matrix["scored"]
+
+        # نرخ رشد نسبت به بازه قبلی
+        previous = np.vstack([np.zeros((1, counts.shape[1])), counts[:-1]])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = np.where(previous > 0, (counts - previous) / previous, 0.0)
+            avg_sentiment = np.where(scored > 0, matrix["sentiment_sums"] / scored, 0.0)
+
+        # z-score نسبت به خط پایه؛ کف انحراف معیار از نویز پواسون برای کلیدواژه‌های کم‌حجم جلوگیری می‌کند
+        baseline_mean, baseline_std = self._rolling_baseline(counts, baseline_windows)
+        z_scores = (counts - baseline_mean) / np.maximum(baseline_std, np.sqrt(np.maximum(baseline_mean, 1.0)))
+        # بازه‌های ابتدایی خط پایه کافی ندارند
+        z_scores[:max(2, baseline_windows // 2)] = 0.0
+
+        sentiment_shift = np.abs(np.diff(avg_sentiment, axis=0, prepend=avg_sentiment[:1]))
+
+        volume_mask = (counts >= self.min_tweets) & ((growth >= self.volume_threshold) | (z_scores >= z_threshold))
+        volume_importance = np.minimum(10, np.maximum(growth * 2.5, z_scores) + counts / 10)
+
+        sentiment_mask = (scored >= self.min_tweets) & (sentiment_shift >= self.sentiment_threshold)
+        sentiment_importance = np.minimum(10, sentiment_shift * 10 + scored / 20)
+
+        window = timedelta(minutes=self.time_window)
+        bucket_starts = matrix["bucket_starts"]
+        waves_by_keyword: Dict[str, List[Dict[str, Any]]] = {}
+
+        for wave_type, mask, importance in (
+                ("volume", volume_mask, volume_importance),
+                ("sentiment", sentiment_mask, sentiment_importance)
+        ):
+            for row_index, keyword_column in zip(*np.nonzero(mask)):
+                keyword = matrix["keywords"][keyword_column]
+                start_time = bucket_starts[row_index]
                 wave = {
-                    "type": "sentiment",
-                    "start_time": data["start_time"].isoformat(),
-                    "end_time": data["end_time"].isoformat(),
-                    "tweet_count": data["tweet_count"],
-                    "avg_sentiment": data["avg_sentiment"],
-                    "sentiment_shift": data["sentiment_shift"],
-                    "sentiment_distribution": sentiment_distribution,
-                    "importance_score": importance_score,
-                    "top_tweets": [
-                        {
-                            "id": tweet.id,
-                            "tweet_id": tweet.tweet_id,
-                            "content": tweet.content,
-                            "user_id": tweet.user_id,
-                            "importance_score": tweet.importance_score,
-                            "sentiment_label": tweet.sentiment_label
-                        }
-                        for tweet in tweets[:20]  # فقط 20 توییت مهم
-                    ]
+                    "type": wave_type,
+                    "start_time": start_time.isoformat(),
+                    "end_time": min(start_time + window, matrix["end_time"]).isoformat(),
+                    "tweet_count": int(counts[row_index, keyword_column] if wave_type == "volume" else scored[row_index, keyword_column]),
+                    "avg_sentiment": float(avg_sentiment[row_index, keyword_column]),
+                    "sentiment_distribution": {},
+                    "importance_score": float(importance[row_index, keyword_column]),
+                    "z_score": float(z_scores[row_index, keyword_column]),
+                    "baseline_mean": float(baseline_mean[row_index, keyword_column]),
+                    "related_keywords": [keyword],
+                    "top_tweets": []
                 }
+                if wave_type == "volume":
+                    wave["growth_rate"] = float(growth[row_index, keyword_column])
+                else:
+                    wave["sentiment_shift"] = float(sentiment_shift[row_index, keyword_column])
 
-                # بررسی کلیدواژه‌های مرتبط
-                if keywords:
-                    wave["related_keywords"] = keywords
+                waves_by_keyword.setdefault(keyword, []).append(wave)
 
-                waves.append(wave)
+        for keyword, waves in waves_by_keyword.items():
+            waves.sort(key=lambda x: x["importance_score"], reverse=True)
+            del waves[max_waves_per_keyword:]
 
-        logger.info(f"Detected {len(waves)} sentiment waves")
-        return waves
+        logger.info(
+            f"Scanned {counts.shape[1]} keywords over {counts.shape[0]} windows, "
+            f"{sum(len(waves) for waves in waves_by_keyword.values())} waves found"
+        )
+        return waves_by_keyword
 
-    async def detect_all_waves(
+    def _find_hop_detections(
+            self,
+            series: Dict[str, np.ndarray],
+            resolution_buckets: int,
+            hop_buckets: int
+    ) -> List[Dict[str, Any]]:
+        """
+        تشخیص موج‌ها در پنجره‌های لغزان یک تفکیک‌پذیری
+
+        مجموع هر پنجره با تفاضل مجموع تجمعی بازه‌های پایه محاسبه شده و با پنجره
+        هم‌طول قبلی مقایسه می‌شود. آخرین پنجره همیشه تا انتهای سری ادامه دارد.
+
+        Args:
+            series (Dict[str, np.ndarray]): مجموع‌های تجمعی سری پایه
+            resolution_buckets (int): طول پنجره به تعداد بازه پایه
+            hop_buckets (int): گام حرکت پنجره به تعداد بازه پایه
+
+        Returns:
+            List[Dict[str, Any]]: تشخیص‌ها با بازه اندیس‌ها و امتیاز اهمیت
+        """
+        bucket_count = len(series["counts"]) - 1
+        if bucket_count < 2 * resolution_buckets:
+            return []
+
+        starts = np.arange(resolution_buckets, bucket_count - resolution_buckets + 1, hop_buckets)
+        if starts[-1] != bucket_count - resolution_buckets:
+            starts = np.append(starts, bucket_count - resolution_buckets)
+        ends = starts + resolution_buckets
+        previous_starts = starts - resolution_buckets
+
+        def window_sum(name: str, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+            return series[name][last] - series[name][first]
+
+        counts = window_sum("counts", starts, ends)
+        previous_counts = window_sum("counts", previous_starts, starts)
+        scored = window_sum("scored", starts, ends)
+        previous_scored = window_sum("scored", previous_starts, starts)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = np.where(previous_counts > 0, (counts - previous_counts) / previous_counts, 0.0)
+            avg_sentiment = np.where(scored > 0, window_sum("sentiment_sums", starts, ends) / scored, 0.0)
+            previous_avg = np.where(
+                previous_scored > 0, window_sum("sentiment_sums", previous_starts, starts) / previous_scored, 0.0
+            )
+
+        # تغییر احساسات فقط نسبت به پنجره قبلی دارای امتیاز سنجیده می‌شود
+        sentiment_shift = np.where(previous_scored > 0, np.abs(avg_sentiment - previous_avg), 0.0)
+
+        detections = []
+        volume_mask = (counts >= self.min_tweets) & (growth >= self.volume_threshold)
+        for i in np.nonzero(volume_mask)[0]:
+            detections.append({
+                "type": "volume",
+                "start": int(starts[i]),
+                "end": int(ends[i]),
+                "growth_rate": float(growth[i]),
+                "importance_score": float(min(10, growth[i] * 2.5 + counts[i] / 10))
+            })
+
+        sentiment_mask = (scored >= self.min_tweets) & (sentiment_shift >= self.sentiment_threshold)
+        for i in np.nonzero(sentiment_mask)[0]:
+            detections.append({
+                "type": "sentiment",
+                "start": int(starts[i]),
+                "end": int(ends[i]),
+                "sentiment_shift": float(sentiment_shift[i]),
+                "importance_score": float(min(10, sentiment_shift[i] * 10 + scored[i] / 20))
+            })
+
+        return detections
+
+    def _merge_detections(self, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        ادغام تشخیص‌های هم‌نوع که بازه‌های آن‌ها همپوشانی یا مجاورت دارند
+
+        Args:
+            detections (List[Dict[str, Any]]): تشخیص‌های همه تفکیک‌پذیری‌ها
+
+        Returns:
+            List[Dict[str, Any]]: تشخیص‌های ادغام شده با قوی‌ترین معیار و فهرست تفکیک‌پذیری‌ها
+        """
+        merged = []
+        for detection in sorted(detections, key=lambda x: (x["type"], x["start"], x["end"])):
+            current = merged[-1] if merged else None
+            if current and current["type"] == detection["type"] and detection["start"] <= current["end"]:
+                current["end"] = max(current["end"], detection["end"])
+                current["resolutions"].add(detection["resolution"])
+                if detection["importance_score"] > current["importance_score"]:
+                    resolutions = current["resolutions"]
+                    current.update({k: v for k, v in detection.items() if k not in ("start", "end")})
+                    current["resolutions"] = resolutions
+            else:
+                merged.append({**detection, "resolutions": {detection["resolution"]}})
+        return merged
+
+    async def detect_multi_resolution_waves(
             self,
             keywords: Optional[List[str]] = None,
-            hours_back: int = 24
+            hours_back: int = 24,
+            resolutions: Optional[List[int]] = None,
+            hop_fraction: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
-        تشخیص تمام انواع موج‌ها
+        تشخیص موج‌ها در چند تفکیک‌پذیری زمانی با پنجره‌های لغزان
+
+        آمار یک بار در بازه‌های پایه (بزرگ‌ترین مقسوم‌علیه مشترک تفکیک‌پذیری‌ها و گام‌ها)
+        خوانده می‌شود و پنجره‌های هر تفکیک‌پذیری از مجموع تجمعی آن ساخته می‌شوند؛
+        بنابراین هم جهش‌های چند دقیقه‌ای و هم رشدهای تدریجی چند ساعته تشخیص داده
+        شده و موجی که روی مرز بازه‌ها قرار دارد دو نیم نمی‌شود. تشخیص‌های
+        همپوشان در یک موج ادغام می‌شوند.
 
         Args:
             keywords (Optional[List[str]]): کلیدواژه‌ها برای فیلتر کردن
             hours_back (int): تعداد ساعات برای بررسی
+            resolutions (Optional[List[int]]): طول پنجره‌ها به دقیقه. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            hop_fraction (Optional[int]): گام هر پنجره برابر طول آن تقسیم بر این مقدار است.
+                اگر مشخص نشود، از تنظیمات استفاده می‌شود.
 
         Returns:
-            List[Dict[str, Any]]: لیست تمام موج‌های تشخیص داده شده
+            List[Dict[str, Any]]: موج‌های ادغام شده به ترتیب امتیاز اهمیت
         """
-        # تشخیص موج‌های حجمی و احساسی
-        volume_waves = await self.detect_volume_waves(keywords, hours_back)
-        sentiment_waves = await self.detect_sentiment_waves(keywords, hours_back)
+        resolutions = sorted(set(
+            resolutions or [int(value) for value in settings.WAVE_RESOLUTIONS.split(",") if value.strip()]
+        ))
+        hop_fraction = hop_fraction or settings.WAVE_HOP_FRACTION
+        hops = {resolution: max(1, resolution // hop_fraction) for resolution in resolutions}
+        base_minutes = math.gcd(*resolutions, *hops.values())
+
+        logger.info(
+            f"Detecting multi-resolution waves ({', '.join(map(str, resolutions))} minutes, "
+            f"base {base_minutes}) for the past {hours_back} hours"
+        )
 
-        # ترکیب نتایج
-        all_waves = volume_waves + sentiment_waves
+        keyword_ids = await self._get_keyword_ids(keywords)
+        keyword_condition = self._build_keyword_condition(keyword_ids)
+        windows = await self._get_window_stats(keyword_ids, keyword_condition, hours_back, base_minutes)
+        if not windows:
+            return []
 
-        # مرتب‌سازی براساس امتیاز اهمیت
-        all_waves.sort(key=lambda x: x.get("importance_score", 0), reverse=True)
+        # مجموع‌های تجمعی بازه‌های پایه؛ مجموع هر پنجره با یک تفاضل به دست می‌آید
+        def cumulative(values) -> np.ndarray:
+            return np.concatenate([[0.0], np.cumsum(np.fromiter(values, dtype=float, count=len(windows)))])
 
-        logger.info(f"Detected {len(all_waves)} total waves")
-        return all_waves
+        series = {
+            "counts": cumulative(w["tweet_count"] for w in windows),
+            "scored": cumulative(w["scored_count"] for w in windows),
+            "sentiment_sums": cumulative(w["avg_sentiment"] * w["scored_count"] for w in windows)
+        }
+        label_series = {
+            label: cumulative(w["sentiment_counts"][label] for w in windows) for label in SENTIMENT_LABELS
+        }
 
-    async def create_alert_for_wave(self, wave: Dict[str, Any]) -> Optional[Alert]:
+        detections = []
+        for resolution in resolutions:
+            for detection in self._find_hop_detections(
+                    series, resolution // base_minutes, hops[resolution] // base_minutes
+            ):
+                detection["resolution"] = resolution
+                detections.append(detection)
+
+        merged = self._merge_detections(detections)
+        candidates = []
+        for detection in merged:
+            start, end = detection["start"], detection["end"]
+            tweet_count = int(series["counts"][end] - series["counts"][start])
+            scored_count = int(series["scored"][end] - series["scored"][start])
+            data = {
+                "start_time": windows[start]["start_time"],
+                "end_time": windows[end - 1]["end_time"],
+                "tweet_count": tweet_count if detection["type"] == "volume" else scored_count,
+                "avg_sentiment": (
+                    (series["sentiment_sums"][end] - series["sentiment_sums"][start]) / scored_count
+                    if scored_count else 0
+                ),
+                "sentiment_counts": {
+                    label: int(values[end] - values[start]) for label, values in label_series.items()
+                },
+                "growth_rate": detection.get("growth_rate"),
+                "sentiment_shift": detection.get("sentiment_shift")
+            }
+
+            candidates.append((detection["type"], data, detection["importance_score"]))
+
+        waves = await self._build_waves(candidates, keyword_condition, keywords)
+        for wave, detection in zip(waves, merged):
+            wave["resolutions"] = sorted(detection["resolutions"])
+
+        waves.sort(key=lambda x: x.get("importance_score", 0), reverse=True)
+        logger.info(f"Detected {len(waves)} multi-resolution waves from {len(detections)} window detections")
+        return waves
+
+    def _build_alert_fields(self, wave: Dict[str, Any]) -> Dict[str, Any]:
         """
-        ایجاد هشدار برای موج
+        ساخت فیلدهای هشدار یک موج
 
         Args:
             wave (Dict[str, Any]): اطلاعات موج
 
         Returns:
-            Optional[Alert]: هشدار ایجاد شده
+            Dict[str, Any]: عنوان، متن، شدت، نوع، توییت مرتبط و داده‌های هشدار
         """
         # تعیین نوع و شدت هشدار
         wave_type = wave.get("type", "unknown")
@@ -496,29 +970,113 @@ class WaveDetector:
             "sentiment_distribution": wave.get("sentiment_distribution", {})
         }
 
+        return {
+            "title": title,
+            "message": message,
+            "severity": severity,
+            "alert_type": alert_type,
+            "related_tweet_id": related_tweet_id,
+            "data": data
+        }
+
+    async def create_alert_for_wave(self, wave: Dict[str, Any]) -> Optional[Alert]:
+        """
+        ایجاد هشدار برای موج
+
+        Args:
+            wave (Dict[str, Any]): اطلاعات موج
+
+        Returns:
+            Optional[Alert]: هشدار ایجاد شده
+        """
+        fields = self._build_alert_fields(wave)
+
         # ایجاد هشدار
-        alert = Alert(
-            title=title,
-            message=message,
-            severity=severity,
-            alert_type=alert_type,
-            related_tweet_id=related_tweet_id,
-            data=data,
-            is_read=False,
-            created_at=datetime.utcnow()
-        )
+        alert = Alert(**fields, is_read=False, created_at=datetime.utcnow())
 
         self.db_session.add(alert)
         await self.db_session.commit()
+        await bump_resource_versions(RESOURCE_ALERTS)
+        await publish_live_event(ALERTS_CHANNEL, alert_event(alert, "created", wave.get("related_keywords")))
 
-        logger.info(f"Created alert for {wave_type} wave: {title}")
+        logger.info(f"Created alert for {wave.get('type', 'unknown')} wave: {alert.title}")
         return alert
 
+    async def track_wave_alert(self, wave: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        ثبت موج در چرخه عمر و ایجاد یا به‌روزرسانی درجای هشدار آن
+
+        برای موج جدید هشدار ساخته می‌شود. تشخیص‌های بعدی همان موج فقط در صورت
+        تغییر وضعیت یا رشد اساسی، هشدار موجود را به‌روز می‌کنند.
+
+        Args:
+            wave (Dict[str, Any]): اطلاعات موج
+
+        Returns:
+            Optional[Dict[str, Any]]: خلاصه هشدار ایجاد یا به‌روز شده، یا None اگر تغییری لازم نبود
+        """
+        wave_row, created, changed = await self.wave_tracker.track(wave)
+        if not changed:
+            await self.db_session.commit()
+            return None
+
+        fields = self._build_alert_fields(wave)
+        fields["data"].update({
+            "wave_id": wave_row.id,
+            "wave_status": wave_row.status,
+            "peak_tweet_count": wave_row.peak_tweet_count,
+            "detection_count": wave_row.detection_count
+        })
+
+        alert = None
+        if not created and wave_row.alert_id:
+            alert = await self.db_session.get(Alert, wave_row.alert_id)
+
+        if alert is None:
+            alert = Alert(**fields, is_read=False, created_at=datetime.utcnow())
+            self.db_session.add(alert)
+            await self.db_session.flush()
+            wave_row.alert_id = alert.id
+            action = "created"
+        else:
+            # تحلیل عمیق ذخیره شده حفظ می‌شود؛ هشدار فقط با رشد اساسی دوباره خوانده نشده می‌شود
+            if "wave_analysis" in (alert.data or {}):
+                fields["data"]["wave_analysis"] = alert.data["wave_analysis"]
+            grew = self.wave_tracker.is_material_growth(wave_row)
+            for key, value in fields.items():
+                setattr(alert, key, value)
+            if grew:
+                alert.is_read = False
+            action = "updated"
+
+        wave_row.alerted_tweet_count = wave_row.peak_tweet_count
+        await self.db_session.commit()
+        await bump_resource_versions(RESOURCE_ALERTS)
+        await publish_live_event(ALERTS_CHANNEL, {
+            **alert_event(alert, action, wave.get("related_keywords")),
+            "wave_id": wave_row.id,
+            "wave_status": wave_row.status
+        })
+
+        logger.info(f"Alert {alert.id} {action} for wave {wave_row.id} ({wave_row.status})")
+        return {
+            "id": alert.id,
+            "title": alert.title,
+            "severity": alert.severity,
+            "alert_type": alert.alert_type,
+            "created_at": alert.created_at.isoformat(),
+            "wave_id": wave_row.id,
+            "wave_status": wave_row.status,
+            "action": action
+        }
+
     async def run_detection_and_create_alerts(
             self,
             keywords: Optional[List[str]] = None,
             hours_back: int = 6,
-            min_importance: float = 3.0
+            min_importance: float = 3.0,
+            per_keyword: bool = False,
+            multi_resolution: Optional[bool] = None
     ) -> List[Dict[str, Any]]:
         """
         اجرای تشخیص و ایجاد هشدار برای موج‌های مهم
@@ -527,28 +1085,35 @@ class WaveDetector:
             keywords (Optional[List[str]]): کلیدواژه‌ها برای فیلتر کردن
             hours_back (int): تعداد ساعات برای بررسی
             min_importance (float): حداقل امتیاز اهمیت برای ایجاد هشدار
+            per_keyword (bool): تشخیص جداگانه برای هر کلیدواژه با پویش برداری
+            multi_resolution (Optional[bool]): تشخیص در چند تفکیک‌پذیری زمانی. اگر مشخص نشود،
+                از تنظیمات استفاده می‌شود.
 
         Returns:
-            List[Dict[str, Any]]: لیست هشدارهای ایجاد شده
+            List[Dict[str, Any]]: لیست هشدارهای ایجاد یا به‌روز شده
         """
         # تشخیص تمام موج‌ها
-        all_waves = await self.detect_all_waves(keywords, hours_back)
+        if per_keyword:
+            waves_by_keyword = await self.scan_keywords(keywords, hours_back)
+            all_waves = [wave for waves in waves_by_keyword.values() for wave in waves]
+            all_waves.sort(key=lambda x: x.get("importance_score", 0), reverse=True)
+        elif settings.WAVE_ALERT_MULTI_RESOLUTION if multi_resolution is None else multi_resolution:
+            all_waves = await self.detect_multi_resolution_waves(keywords, hours_back)
+        else:
+            all_waves = await self.detect_all_waves(keywords, hours_back)
 
-        # ایجاد هشدار برای موج‌های مهم
+        # ایجاد یا به‌روزرسانی هشدار برای موج‌های مهم
         alerts = []
 
         for wave in all_waves:
             # بررسی امتیاز اهمیت
             if wave.get("importance_score", 0) >= min_importance:
-                alert = await self.create_alert_for_wave(wave)
+                alert = await self.track_wave_alert(wave)
                 if alert:
-                    alerts.append({
-                        "id": alert.id,
-                        "title": alert.title,
-                        "severity": alert.severity,
-                        "alert_type": alert.alert_type,
-                        "created_at": alert.created_at.isoformat()
-                    })
-
-        logger.info(f"Created {len(alerts)} alerts from {len(all_waves)} detected waves")
+                    alerts.append(alert)
+
+        await self.wave_tracker.close_stale_waves()
+        await self.db_session.commit()
+
+        logger.info(f"Created or updated {len(alerts)} alerts from {len(all_waves)} detected waves")
         return alerts
\ No newline at end of file
@@ -0,0 +1,320 @@
+"""
+ردیابی چرخه عمر موج‌ها.
+
+هر اجرای تشخیص موج، بازه‌های زمانی گذشته را دوباره بررسی می‌کند و همان رویداد
+را بارها تشخیص می‌دهد. این ماژول تشخیص‌ها را به یک موج پایدار (جدول waves)
+نگاشت می‌کند، وضعیت آن را (open، growing، peaked، closed) به‌روز می‌کند و
+مشخص می‌کند چه زمانی تغییر موج برای به‌روزرسانی هشدار یا تحلیل مجدد کافی است.
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+from sqlalchemy import and_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.db.models import Wave
+from app.services.analyzer.keyword_series import floor_to_minute
+
+logger = logging.getLogger(__name__)
+
+WAVE_STATUSES = ("open", "growing", "peaked", "closed")
+
+# کاهش تعداد توییت نسبت به اوج که موج را در وضعیت peaked قرار می‌دهد
+PEAK_DROP_RATIO = 0.8
+
+# حداکثر طول کلید کلیدواژه‌ها (طول ستون waves.keyword_key)
+KEYWORD_KEY_MAX_LENGTH = 255
+
+
+def _parse_time(value: Any) -> datetime:
+    """
+    تبدیل زمان موج به datetime بدون منطقه زمانی
+
+    Args:
+        value (Any): رشته ISO یا datetime
+
+    Returns:
+        datetime: زمان به وقت UTC
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class WaveTracker:
+    """
+    ردیابی موج‌های پایدار
+
+    Attributes:
+        db_session (AsyncSession): نشست دیتابیس
+        merge_gap (timedelta): حداکثر فاصله تشخیص جدید از موج باز برای ادغام
+        close_after (timedelta): مدت بدون تشخیص که پس از آن موج بسته می‌شود
+        change_ratio (float): نسبت رشد اوج که تغییر اساسی شمرده می‌شود
+    """
+
+    def __init__(
+            self,
+            db_session: AsyncSession,
+            merge_gap_minutes: int = None,
+            close_after_minutes: int = None,
+            change_ratio: float = None
+    ):
+        """
+        مقداردهی اولیه ردیاب موج
+
+        Args:
+            db_session (AsyncSession): نشست دیتابیس
+            merge_gap_minutes (int, optional): فاصله ادغام به دقیقه. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            close_after_minutes (int, optional): مدت بسته شدن به دقیقه. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+            change_ratio (float, optional): نسبت تغییر اساسی. اگر مشخص نشود، از تنظیمات استفاده می‌شود.
+        """
+        self.db_session = db_session
+        self.merge_gap = timedelta(minutes=merge_gap_minutes or settings.WAVE_MERGE_GAP_MINUTES)
+        self.close_after = timedelta(minutes=close_after_minutes or settings.WAVE_CLOSE_AFTER_MINUTES)
+        self.change_ratio = change_ratio or settings.WAVE_CHANGE_RATIO
+
+    @staticmethod
+    def keyword_key(keywords: Optional[List[str]]) -> str:
+        """
+        ساخت کلید کلیدواژه‌های موج
+
+        فهرست‌های بلند (مثلاً کلیدواژه‌های ارسالی کاربر) به ابتدای فهرست و درهم‌ساز
+        SHA-1 کل فهرست کوتاه می‌شوند تا کلید در ستون جا شود و یکتا بماند.
+
+        Args:
+            keywords (Optional[List[str]]): کلیدواژه‌های مرتبط
+
+        Returns:
+            str: کلیدواژه‌های مرتب شده و جدا شده با کاما (* برای همه توییت‌ها)
+        """
+        if not keywords:
+            return "*"
+
+        key = ",".join(sorted(set(keywords)))
+        if len(key) <= KEYWORD_KEY_MAX_LENGTH:
+            return key
+
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"{key[:KEYWORD_KEY_MAX_LENGTH - len(digest) - 1]}#{digest}"
+
+    def _is_material(self, current: Optional[int], reference: Optional[int]) -> bool:
+        """
+        بررسی رشد اساسی تعداد توییت‌ها نسبت به مقدار مرجع
+
+        Args:
+            current (Optional[int]): تعداد فعلی
+            reference (Optional[int]): تعداد مرجع (None یعنی هنوز ثبت نشده)
+
+        Returns:
+            bool: True اگر رشد اساسی باشد
+        """
+        if reference is None:
+            return True
+        return (current or 0) >= reference * (1 + self.change_ratio)
+
+    async def _find_wave(
+            self,
+            wave_type: str,
+            keyword_key: str,
+            start_time: datetime,
+            end_time: datetime
+    ) -> Optional[Wave]:
+        """
+        یافتن موج همپوشان با یک تشخیص (شامل موج‌های بسته شده)
+
+        Args:
+            wave_type (str): نوع موج
+            keyword_key (str): کلید کلیدواژه‌ها
+            start_time (datetime): شروع تشخیص
+            end_time (datetime): پایان تشخیص
+
+        Returns:
+            Optional[Wave]: موج یا None
+        """
+        stmt = select(Wave).where(
+            and_(
+                Wave.keyword_key == keyword_key,
+                Wave.wave_type == wave_type,
+                Wave.start_time <= end_time + self.merge_gap,
+                Wave.end_time >= start_time - self.merge_gap
+            )
+        ).order_by(Wave.end_time.desc()).limit(1)
+
+        result = await self.db_session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def _insert_wave(self, values: Dict[str, Any]) -> Optional[Wave]:
+        """
+        درج موج جدید (بدون خطا در صورت وجود موجی با همان شناسه یکتا)
+
+        تشخیص آنلاین و اجرای دوره‌ای ممکن است هم‌زمان یک موج را ثبت کنند؛ در این
+        حالت درج دوم نادیده گرفته می‌شود.
+
+        Args:
+            values (Dict[str, Any]): مقادیر ستون‌های موج
+
+        Returns:
+            Optional[Wave]: موج درج شده یا None اگر شناسه یکتا از قبل وجود داشته باشد
+        """
+        stmt = pg_insert(Wave).values(**values).on_conflict_do_nothing(
+            index_elements=[Wave.identity_key]
+        ).returning(Wave)
+        result = await self.db_session.scalars(stmt)
+        return result.first()
+
+    async def _get_by_identity(self, identity_key: str) -> Optional[Wave]:
+        """
+        دریافت موج با شناسه یکتا
+
+        Args:
+            identity_key (str): شناسه یکتای موج
+
+        Returns:
+            Optional[Wave]: موج یا None
+        """
+        result = await self.db_session.execute(select(Wave).where(Wave.identity_key == identity_key))
+        return result.scalar_one_or_none()
+
+    async def track(self, wave: Dict[str, Any]) -> Tuple[Wave, bool, bool]:
+        """
+        ثبت یک تشخیص و به‌روزرسانی چرخه عمر موج
+
+        Args:
+            wave (Dict[str, Any]): اطلاعات موج تشخیص داده شده
+
+        Returns:
+            Tuple[Wave, bool, bool]: (موج، آیا موج جدید است، آیا هشدار باید به‌روز شود)
+        """
+        wave_type = wave.get("type", "unknown")
+        keyword_key = self.keyword_key(wave.get("related_keywords"))
+        start_time = _parse_time(wave["start_time"])
+        end_time = _parse_time(wave["end_time"])
+        tweet_count = int(wave.get("tweet_count") or 0)
+        importance_score = float(wave.get("importance_score") or 0)
+        now = datetime.utcnow()
+
+        row = await self._find_wave(wave_type, keyword_key, start_time, end_time)
+
+        if row is None:
+            identity_key = f"{wave_type}:{keyword_key}:{floor_to_minute(start_time).isoformat()}"
+            row = await self._insert_wave({
+                "identity_key": identity_key,
+                "wave_type": wave_type,
+                "keyword_key": keyword_key,
+                "status": "open",
+                "start_time": start_time,
+                "end_time": end_time,
+                "tweet_count": tweet_count,
+                "peak_tweet_count": tweet_count,
+                "importance_score": importance_score,
+                "peak_importance": importance_score,
+                "detection_count": 1,
+                "last_seen_at": now
+            })
+            if row is not None:
+                logger.info(f"Opened wave {row.id} ({wave_type}, {keyword_key})")
+                return row, True, True
+
+            # فرآیند دیگری همین موج را هم‌زمان ثبت کرده است؛ تشخیص با آن ادغام می‌شود
+            row = await self._get_by_identity(identity_key)
+
+        # تشخیص دوباره بازه‌های قدیمی یک موج بسته شده آن را باز نمی‌کند
+        if row.status == "closed" and end_time <= row.end_time:
+            return row, False, False
+
+        previous_status = row.status
+        row.closed_at = None
+
+        # فقط تشخیص‌های جدیدتر یا همان بازه وضعیت فعلی موج را تعیین می‌کنند
+        if end_time >= row.end_time:
+            if tweet_count > (row.tweet_count or 0):
+                row.status = "growing"
+            elif previous_status == "closed":
+                # تشخیص بعد از پایان موج بسته شده یعنی موج دوباره فعال است
+                row.status = "open"
+            elif tweet_count < (row.peak_tweet_count or 0) * PEAK_DROP_RATIO:
+                row.status = "peaked"
+            row.tweet_count = tweet_count
+            row.importance_score = importance_score
+
+        row.start_time = min(row.start_time, start_time)
+        row.end_time = max(row.end_time, end_time)
+        row.peak_tweet_count = max(row.peak_tweet_count or 0, tweet_count)
+        row.peak_importance = max(row.peak_importance or 0, importance_score)
+        row.detection_count = (row.detection_count or 0) + 1
+        row.last_seen_at = now
+
+        changed = row.status != previous_status or self.is_material_growth(row)
+        return row, False, changed
+
+    def is_material_growth(self, wave: Wave) -> bool:
+        """
+        بررسی رشد اساسی موج پس از آخرین به‌روزرسانی هشدار
+
+        Args:
+            wave (Wave): موج
+
+        Returns:
+            bool: True اگر اوج موج به طور اساسی رشد کرده باشد
+        """
+        return self._is_material(wave.peak_tweet_count, wave.alerted_tweet_count)
+
+    def needs_analysis(self, wave: Wave) -> bool:
+        """
+        بررسی نیاز موج به تحلیل عمیق مجدد
+
+        Args:
+            wave (Wave): موج
+
+        Returns:
+            bool: True اگر موج تحلیل نشده یا پس از آخرین تحلیل به طور اساسی رشد کرده باشد
+        """
+        return self._is_material(wave.peak_tweet_count, wave.analyzed_tweet_count)
+
+    def mark_analyzed(self, wave: Wave) -> None:
+        """
+        ثبت انجام تحلیل عمیق برای موج
+
+        Args:
+            wave (Wave): موج
+        """
+        wave.analyzed_tweet_count = wave.peak_tweet_count
+        wave.analyzed_at = datetime.utcnow()
+
+    async def get_by_alert(self, alert_id: int) -> Optional[Wave]:
+        """
+        دریافت موج مرتبط با یک هشدار
+
+        Args:
+            alert_id (int): شناسه هشدار
+
+        Returns:
+            Optional[Wave]: موج یا None
+        """
+        result = await self.db_session.execute(select(Wave).where(Wave.alert_id == alert_id))
+        return result.scalars().first()
+
+    async def close_stale_waves(self) -> int:
+        """
+        بستن موج‌هایی که مدتی تشخیص داده نشده‌اند
+
+        Returns:
+            int: تعداد موج‌های بسته شده
+        """
+        now = datetime.utcnow()
+        stmt = update(Wave).where(
+            and_(Wave.status != "closed", Wave.last_seen_at < now - self.close_after)
+        ).values(status="closed", closed_at=now)
+
+        result = await self.db_session.execute(stmt)
+        if result.rowcount:
+            logger.info(f"Closed {result.rowcount} stale waves")
+        return result.rowcount or 0
@@ -0,0 +1,322 @@
+"""
+ارسال زنده رویدادها به کلاینت‌ها.
+
+جمع‌آوری‌کننده، پردازشگر و تشخیص‌دهنده‌های موج هر رویداد را یک بار در کانال‌های
+Redis منتشر می‌کنند. هر فرآیند API فقط یک اشتراک Redis برای همه کانال‌ها دارد و
+رویدادها را در صف محدود هر کلاینت متصل قرار می‌دهد؛ بنابراین به جای پرس‌وجوی
+دوره‌ای هر کلاینت از دیتابیس، برای هر رویداد فقط یک انتشار انجام می‌شود.
+
+اگر کلاینتی کندتر از نرخ رویدادها بخواند، قدیمی‌ترین رویدادهای صف آن دور ریخته
+و تعدادشان به کلاینت اعلام می‌شود تا وضعیت را از REST دوباره بخواند؛ کلاینت کند
+هیچ‌گاه انتشار یا کلاینت‌های دیگر را معطل نمی‌کند.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.db.models import Alert
+from app.services.redis_service import RedisService, get_redis_service
+
+logger = logging.getLogger(__name__)
+
+# کانال‌های رویدادهای زنده
+ALERTS_CHANNEL = "alerts"
+TWEETS_CHANNEL = "tweets"
+WAVE_CHANNEL = "waves"
+EMERGING_TERMS_CHANNEL = "emerging_terms"
+LIVE_CHANNELS = (ALERTS_CHANNEL, TWEETS_CHANNEL, WAVE_CHANNEL, EMERGING_TERMS_CHANNEL)
+
+# حداکثر تعداد شناسه توییت در هر رویداد توییت
+MAX_EVENT_TWEET_IDS = 100
+
+# فاصله تلاش دوباره برای اشتراک Redis پس از قطع اتصال (ثانیه)
+RESUBSCRIBE_DELAY = 5
+
+
+async def publish_live_event(channel: str, event: Dict[str, Any]) -> None:
+    """
+    انتشار یک رویداد زنده
+
+    خطای Redis فقط لاگ می‌شود تا مسیر نوشتن متوقف نشود.
+
+    Args:
+        channel (str): نام کانال
+        event (Dict[str, Any]): رویداد (مقادیر زمانی به رشته تبدیل می‌شوند)
+    """
+    try:
+        await get_redis_service().publish(channel, json.dumps(event, ensure_ascii=False, default=str))
+    except Exception as e:
+        logger.warning(f"Could not publish live event to {channel}: {e}")
+
+
+def alert_event(alert: Alert, action: str, keywords: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    ساخت رویداد زنده یک هشدار
+
+    Args:
+        alert (Alert): هشدار ذخیره شده
+        action (str): نوع تغییر (created یا updated)
+        keywords (Optional[List[str]]): کلیدواژه‌های مرتبط برای فیلتر کلاینت‌ها
+
+    Returns:
+        Dict[str, Any]: رویداد هشدار
+    """
+    return {
+        "id": alert.id,
+        "title": alert.title,
+        "severity": alert.severity,
+        "alert_type": alert.alert_type,
+        "created_at": alert.created_at,
+        "action": action,
+        "keywords": keywords or [],
+    }
+
+
+def tweets_event(stage: str, tweet_ids: List[int], keywords: Iterable[str], **extra: Any) -> Dict[str, Any]:
+    """
+    ساخت رویداد خلاصه یک دسته توییت
+
+    Args:
+        stage (str): مرحله (collected یا processed)
+        tweet_ids (List[int]): شناسه توییت‌های دسته
+        keywords (Iterable[str]): کلیدواژه‌های توییت‌های دسته
+        **extra: داده‌های اضافی رویداد
+
+    Returns:
+        Dict[str, Any]: رویداد توییت‌ها
+    """
+    return {
+        "stage": stage,
+        "count": len(tweet_ids),
+        "tweet_ids": tweet_ids[:MAX_EVENT_TWEET_IDS],
+        "keywords": sorted(set(keywords)),
+        **extra,
+    }
+
+
+class LiveSubscriber:
+    """
+    یک کلاینت متصل به جریان رویدادهای زنده
+
+    Attributes:
+        channels (Set[str]): کانال‌های درخواستی
+        keywords (Set[str]): کلیدواژه‌های مورد نظر (خالی برای همه)
+        severities (Set[str]): شدت‌های هشدار مورد نظر (خالی برای همه)
+        alert_types (Set[str]): نوع‌های هشدار مورد نظر (خالی برای همه)
+        queue (asyncio.Queue): صف محدود رویدادهای در انتظار ارسال
+        dropped (int): تعداد رویدادهای دور ریخته شده از آخرین اعلام
+    """
+
+    def __init__(
+            self,
+            channels: Iterable[str],
+            keywords: Iterable[str] = (),
+            severities: Iterable[str] = (),
+            alert_types: Iterable[str] = (),
+            queue_size: Optional[int] = None
+    ):
+        """
+        مقداردهی اولیه کلاینت
+
+        Args:
+            channels (Iterable[str]): کانال‌های درخواستی
+            keywords (Iterable[str]): کلیدواژه‌های مورد نظر
+            severities (Iterable[str]): شدت‌های هشدار مورد نظر
+            alert_types (Iterable[str]): نوع‌های هشدار مورد نظر
+            queue_size (Optional[int]): ظرفیت صف (پیش‌فرض از تنظیمات)
+        """
+        self.channels = set(channels)
+        self.keywords = set(keywords)
+        self.severities = set(severities)
+        self.alert_types = set(alert_types)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or settings.LIVE_CLIENT_QUEUE_SIZE)
+        self.dropped = 0
+
+    def matches(self, channel: str, event: Dict[str, Any]) -> bool:
+        """
+        بررسی تطابق رویداد با فیلترهای کلاینت
+
+        فیلتر کلیدواژه فقط روی رویدادهایی اعمال می‌شود که کلیدواژه دارند.
+
+        Args:
+            channel (str): کانال رویداد
+            event (Dict[str, Any]): رویداد
+
+        Returns:
+            bool: آیا رویداد باید ارسال شود
+        """
+        if channel not in self.channels:
+            return False
+
+        if channel == ALERTS_CHANNEL:
+            if self.severities and event.get("severity") not in self.severities:
+                return False
+            if self.alert_types and event.get("alert_type") not in self.alert_types:
+                return False
+
+        if self.keywords:
+            event_keywords = event.get("keywords") or event.get("related_keywords")
+            if event_keywords and self.keywords.isdisjoint(event_keywords):
+                return False
+
+        return True
+
+    def offer(self, channel: str, event: Dict[str, Any]) -> None:
+        """
+        قرار دادن رویداد در صف کلاینت (در صورت پر بودن، قدیمی‌ترین رویداد حذف می‌شود)
+
+        Args:
+            channel (str): کانال رویداد
+            event (Dict[str, Any]): رویداد
+        """
+        if not self.matches(channel, event):
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait((channel, event))
+
+    async def next_event(self, timeout: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        انتظار برای رویداد بعدی
+
+        Args:
+            timeout (float): حداکثر زمان انتظار (ثانیه)
+
+        Returns:
+            Optional[Tuple[str, Dict[str, Any]]]: (کانال، رویداد) یا None در صورت اتمام زمان
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def take_dropped(self) -> int:
+        """
+        دریافت و صفر کردن تعداد رویدادهای دور ریخته شده
+
+        Returns:
+            int: تعداد رویدادهای دور ریخته شده
+        """
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class LiveUpdateHub:
+    """
+    توزیع رویدادهای Redis بین کلاینت‌های متصل این فرآیند
+
+    اشتراک Redis با اتصال اولین کلاینت باز و با قطع آخرین کلاینت بسته می‌شود.
+
+    Attributes:
+        redis_service (RedisService): سرویس Redis
+        channels (Tuple[str, ...]): کانال‌های مشترک شده
+        subscribers (Set[LiveSubscriber]): کلاینت‌های متصل
+    """
+
+    def __init__(self, redis_service: Optional[RedisService] = None, channels: Tuple[str, ...] = LIVE_CHANNELS):
+        """
+        مقداردهی اولیه توزیع‌کننده
+
+        Args:
+            redis_service (Optional[RedisService]): سرویس Redis (پیش‌فرض سرویس مشترک)
+            channels (Tuple[str, ...]): کانال‌ها
+        """
+        self.redis_service = redis_service or get_redis_service()
+        self.channels = channels
+        self.subscribers: Set[LiveSubscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, subscriber: LiveSubscriber) -> None:
+        """
+        افزودن کلاینت و شروع اشتراک Redis در صورت نیاز
+
+        Args:
+            subscriber (LiveSubscriber): کلاینت
+        """
+        self.subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        logger.info(f"Live client connected ({len(self.subscribers)} connected)")
+
+    def unregister(self, subscriber: LiveSubscriber) -> None:
+        """
+        حذف کلاینت و بستن اشتراک Redis پس از قطع آخرین کلاینت
+
+        Args:
+            subscriber (LiveSubscriber): کلاینت
+        """
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+        logger.info(f"Live client disconnected ({len(self.subscribers)} connected)")
+
+    async def stop(self) -> None:
+        """توقف اشتراک Redis هنگام خاموش شدن برنامه"""
+        self.subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def dispatch(self, channel: str, data: str) -> None:
+        """
+        ارسال یک پیام Redis به صف کلاینت‌ها
+
+        Args:
+            channel (str): کانال پیام
+            data (str): متن پیام
+        """
+        try:
+            event = json.loads(data)
+        except (TypeError, json.JSONDecodeError):
+            event = {"message": data}
+        if not isinstance(event, dict):
+            event = {"message": event}
+
+        for subscriber in list(self.subscribers):
+            subscriber.offer(channel, event)
+
+    async def _listen(self) -> None:
+        """دریافت پیام‌های Redis و توزیع آن‌ها (با اتصال دوباره پس از خطا)"""
+        while True:
+            pubsub = None
+            try:
+                pubsub = await self.redis_service.subscribe(*self.channels)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Live update subscription failed: {e}")
+                await asyncio.sleep(RESUBSCRIBE_DELAY)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+
+_live_update_hub: Optional[LiveUpdateHub] = None
+
+
+def get_live_update_hub() -> LiveUpdateHub:
+    """
+    دریافت توزیع‌کننده رویدادهای زنده این فرآیند
+
+    Returns:
+        LiveUpdateHub: توزیع‌کننده مشترک
+    """
+    global _live_update_hub
+    if _live_update_hub is None:
+        _live_update_hub = LiveUpdateHub()
+    return _live_update_hub
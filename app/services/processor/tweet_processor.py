@@ -19,6 +19,12 @@ from app.db.models import Tweet, User, Keyword, TweetKeyword
 from app.services.redis_service import RedisService
 # اصلاح مسیر واردسازی ContentFilter
 from app.services.processor.content_filter import ContentFilter
+from app.services.analyzer.keyword_series import KeywordSeriesService
+from app.services.analyzer.online_detector import OnlineWaveDetector
+from app.services.analyzer.term_burst import TermBurstDetector
+from app.config import settings
+from app.core.http_cache import bump_resource_versions, RESOURCE_TWEETS
+from app.services.live_updates import publish_live_event, tweets_event, TWEETS_CHANNEL
 
 logger = logging.getLogger(__name__)
 
@@ -34,13 +40,18 @@ class TweetProcessor:
         db_session (AsyncSession): نشست دیتابیس
         redis_service (RedisService): سرویس Redis برای مدیریت صف‌ها
         content_filter (ContentFilter): فیلتر محتوا برای تشخیص اسپم و محتوای نامرتبط
+        keyword_series (KeywordSeriesService): سری زمانی دقیقه‌ای کلیدواژه‌ها
+        online_detector (Optional[OnlineWaveDetector]): تشخیص آنلاین موج
+        term_burst_detector (Optional[TermBurstDetector]): تشخیص هشتگ‌ها و عبارات نوظهور
     """
 
     def __init__(
             self,
             db_session: AsyncSession,
             redis_service: RedisService,
-            content_filter: ContentFilter = None
+            content_filter: ContentFilter = None,
+            online_detector: OnlineWaveDetector = None,
+            term_burst_detector: TermBurstDetector = None
     ):
         """
         مقداردهی اولیه سرویس پردازش توییت
@@ -49,10 +60,19 @@ class TweetProcessor:
             db_session (AsyncSession): نشست دیتابیس
             redis_service (RedisService): سرویس Redis
             content_filter (ContentFilter, optional): فیلتر محتوا. اگر None باشد، یک نمونه جدید ایجاد می‌شود.
+            online_detector (OnlineWaveDetector, optional): تشخیص آنلاین موج. اگر None باشد و در تنظیمات فعال باشد، یک نمونه جدید ایجاد می‌شود.
+            term_burst_detector (TermBurstDetector, optional): تشخیص عبارات نوظهور. اگر None باشد و در تنظیمات فعال باشد، یک نمونه جدید ایجاد می‌شود.
         """
         self.db_session = db_session
         self.redis_service = redis_service
         self.content_filter = content_filter or ContentFilter()
+        self.keyword_series = KeywordSeriesService(db_session)
+        self.online_detector = online_detector
+        if self.online_detector is None and settings.ONLINE_WAVE_ENABLED:
+            self.online_detector = OnlineWaveDetector(db_session, redis_service)
+        self.term_burst_detector = term_burst_detector
+        if self.term_burst_detector is None and settings.TERM_BURST_ENABLED:
+            self.term_burst_detector = TermBurstDetector(db_session, redis_service, content_filter=self.content_filter)
         logger.info("TweetProcessor initialized")
 
     async def process_tweets(self, tweet_ids: List[int]) -> Tuple[List[Tweet], List[Tweet]]:
@@ -174,7 +194,41 @@ class TweetProcessor:
 
         # ذخیره تغییرات در دیتابیس
         if processed_tweets or filtered_tweets:
+            # به‌روزرسانی سری‌های دقیقه‌ای در همان تراکنش
+            minute_counts = {}
+            if processed_tweets:
+                minute_counts = await self.keyword_series.record_tweets(processed_tweets)
+
             await self.db_session.commit()
+            await bump_resource_versions(RESOURCE_TWEETS)
+
+            if processed_tweets:
+                # کلیدواژه‌های دسته از کلید سری‌های دقیقه‌ای (شناسه کلیدواژه، دقیقه) به دست می‌آیند
+                keyword_by_id = {keyword.id: keyword.text for keyword in keywords}
+                sentiment_counts = {}
+                for tweet in processed_tweets:
+                    sentiment_counts[tweet.sentiment_label] = sentiment_counts.get(tweet.sentiment_label, 0) + 1
+                await publish_live_event(TWEETS_CHANNEL, tweets_event(
+                    "processed",
+                    [tweet.id for tweet in processed_tweets],
+                    {keyword_by_id[keyword_id] for keyword_id, _ in minute_counts if keyword_id in keyword_by_id},
+                    filtered=len(filtered_tweets),
+                    sentiment_counts=sentiment_counts
+                ))
+
+            # تشخیص آنلاین موج بلافاصله پس از ثبت توییت‌ها
+            if self.online_detector and minute_counts:
+                try:
+                    await self.online_detector.process_counts(minute_counts)
+                except Exception as e:
+                    logger.error(f"Error in online wave detection: {e}")
+
+            # شمارش هشتگ‌ها و عبارات برای تشخیص موضوعات نوظهور
+            if self.term_burst_detector and processed_tweets:
+                try:
+                    await self.term_burst_detector.process_tweets(processed_tweets)
+                except Exception as e:
+                    logger.error(f"Error in emerging term detection: {e}")
 
             # افزودن توییت‌های پردازش شده به صف تحلیل
             if processed_tweets:
@@ -15,6 +15,22 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 
 
+# افزایش اعشاری با حداقل مقدار: ARGV[1] مقدار افزایش، ARGV[2] حداقل (خالی برای بدون حداقل)، ARGV[3] انقضا
+INCREMENT_FLOAT_SCRIPT = """
+if ARGV[2] ~= '' then
+    local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+    if current < tonumber(ARGV[2]) then
+        redis.call('SET', KEYS[1], ARGV[2])
+    end
+end
+local value = redis.call('INCRBYFLOAT', KEYS[1], ARGV[1])
+if tonumber(ARGV[3]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return value
+"""
+
+
 class RedisService:
     """
     سرویس عملیات Redis
@@ -139,6 +155,153 @@ class RedisService:
             logger.error(f"Error deleting cache for key {key}: {e}")
             return False
 
+    async def increment_float(
+            self,
+            key: str,
+            amount: float,
+            expire: int = None,
+            floor: float = None
+    ) -> Optional[float]:
+        """
+        افزایش اتمیک یک مقدار اعشاری (INCRBYFLOAT)
+
+        اگر floor مشخص باشد، مقدار فعلی (یا کلید ناموجود) پیش از افزایش حداقل برابر
+        floor می‌شود. بررسی و افزایش در یک اسکریپت Lua اتمیک انجام می‌شوند؛ بنابراین
+        کلیدی که حذف یا منقضی شده از صفر شروع نمی‌شود.
+
+        Args:
+            key (str): کلید
+            amount (float): مقدار افزایش
+            expire (int, optional): زمان انقضا به ثانیه
+            floor (float, optional): حداقل مقدار کلید پیش از افزایش
+
+        Returns:
+            Optional[float]: مقدار جدید یا None در صورت خطا
+        """
+        client = await self._get_client()
+        try:
+            result = await client.eval(
+                INCREMENT_FLOAT_SCRIPT, 1, key,
+                repr(float(amount)),
+                repr(float(floor)) if floor is not None else "",
+                int(expire or 0)
+            )
+            return float(result)
+        except Exception as e:
+            logger.error(f"Error incrementing key {key}: {e}")
+            return None
+
+    async def set_if_not_exists(self, key: str, value: Any, expire: int = None) -> bool:
+        """
+        ذخیره مقدار فقط در صورت عدم وجود کلید (SET NX)
+
+        Args:
+            key (str): کلید
+            value (Any): مقدار
+            expire (int, optional): زمان انقضا به ثانیه
+
+        Returns:
+            bool: True اگر مقدار ذخیره شد
+        """
+        client = await self._get_client()
+        try:
+            return bool(await client.set(key, value, ex=expire, nx=True))
+        except Exception as e:
+            logger.error(f"Error setting key {key} with NX: {e}")
+            return False
+
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        """
+        دریافت چند کلید با یک درخواست (MGET)
+
+        Args:
+            keys (List[str]): لیست کلیدها
+
+        Returns:
+            List[Optional[str]]: مقادیر به ترتیب کلیدها (None برای کلیدهای ناموجود یا در صورت خطا)
+        """
+        client = await self._get_client()
+        try:
+            return await client.mget(keys)
+        except Exception as e:
+            logger.error(f"Error getting keys {keys}: {e}")
+            return [None] * len(keys)
+
+    async def set_many(self, mapping: Dict[str, Any]) -> bool:
+        """
+        ذخیره چند کلید با یک درخواست (MSET)
+
+        Args:
+            mapping (Dict[str, Any]): کلیدها و مقادیر (مقادیر غیررشته‌ای به JSON تبدیل می‌شوند)
+
+        Returns:
+            bool: نتیجه عملیات
+        """
+        if not mapping:
+            return True
+
+        client = await self._get_client()
+        try:
+            await client.mset({
+                key: json.dumps(value) if not isinstance(value, str) else value
+                for key, value in mapping.items()
+            })
+            return True
+        except Exception as e:
+            logger.error(f"Error setting keys {list(mapping)}: {e}")
+            return False
+
+    async def set_hash_fields(self, key: str, mapping: Dict[str, Any]) -> bool:
+        """
+        ذخیره چند فیلد در یک hash با یک درخواست
+
+        Args:
+            key (str): کلید hash
+            mapping (Dict[str, Any]): فیلدها و مقادیر (مقادیر غیررشته‌ای به JSON تبدیل می‌شوند)
+
+        Returns:
+            bool: نتیجه عملیات
+        """
+        if not mapping:
+            return True
+
+        client = await self._get_client()
+        try:
+            serialized = {
+                field: json.dumps(value) if not isinstance(value, str) else value
+                for field, value in mapping.items()
+            }
+            await client.hset(key, mapping=serialized)
+            return True
+        except Exception as e:
+            logger.error(f"Error setting hash fields for key {key}: {e}")
+            return False
+
+    async def get_hash(self, key: str) -> Dict[str, Any]:
+        """
+        دریافت همه فیلدهای یک hash
+
+        Args:
+            key (str): کلید hash
+
+        Returns:
+            Dict[str, Any]: فیلدها و مقادیر (مقادیر JSON تبدیل می‌شوند)
+        """
+        client = await self._get_client()
+        try:
+            values = await client.hgetall(key)
+        except Exception as e:
+            logger.error(f"Error getting hash {key}: {e}")
+            return {}
+
+        result = {}
+        for field, value in values.items():
+            try:
+                result[field] = json.loads(value)
+            except json.JSONDecodeError:
+                result[field] = value
+        return result
+
     async def add_to_queue(self, queue_name: str, item: Union[str, Dict, List]) -> bool:
         """
         افزودن آیتم به صف
@@ -236,12 +399,12 @@ class RedisService:
             logger.error(f"Error publishing to channel {channel}: {e}")
             return 0
 
-    async def subscribe(self, channel: str) -> redis.client.PubSub:
+    async def subscribe(self, *channels: str) -> redis.client.PubSub:
         """
-        مشترک شدن در یک کانال
+        مشترک شدن در یک یا چند کانال روی یک اتصال
 
         Args:
-            channel (str): نام کانال
+            *channels (str): نام کانال‌ها
 
         Returns:
             redis.client.PubSub: آبجکت PubSub
@@ -249,9 +412,28 @@ class RedisService:
         client = await self._get_client()
         try:
             pubsub = client.pubsub()
-            await pubsub.subscribe(channel)
-            logger.debug(f"Subscribed to channel: {channel}")
+            await pubsub.subscribe(*channels)
+            logger.debug(f"Subscribed to channels: {', '.join(channels)}")
             return pubsub
         except Exception as e:
-            logger.error(f"Error subscribing to channel {channel}: {e}")
+            logger.error(f"Error subscribing to channels {channels}: {e}")
             raise
+
+
+_redis_service: Optional[RedisService] = None
+
+
+def get_redis_service() -> RedisService:
+    """
+    دریافت سرویس Redis مشترک این فرآیند
+
+    اندپوینت‌های API از یک اتصال مشترک استفاده می‌کنند تا برای هر درخواست
+    اتصال جدیدی ساخته نشود.
+
+    Returns:
+        RedisService: سرویس Redis
+    """
+    global _redis_service
+    if _redis_service is None:
+        _redis_service = RedisService()
+    return _redis_service
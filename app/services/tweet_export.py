@@ -0,0 +1,239 @@
+"""
+خروجی گرفتن از توییت‌ها.
+
+ردیف‌ها با cursor سمت سرور (stream با yield_per) دسته به دسته خوانده و بلافاصله
+به صورت NDJSON، CSV یا Parquet نوشته می‌شوند؛ بنابراین حافظه مصرفی به اندازه یک
+دسته است و به تعداد کل ردیف‌ها وابسته نیست. در Parquet هر دسته یک row group است.
+"""
+
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from sqlalchemy import Boolean, DateTime, Float, Integer
+from sqlalchemy.sql import Select
+
+from app.db.session import get_session
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # خروجی Parquet اختیاری است
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# نوع محتوای هر قالب خروجی
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# تعداد پیش‌فرض ردیف‌های هر دسته (و هر row group در Parquet)
+DEFAULT_BATCH_SIZE = 5000
+
+
+def parquet_available() -> bool:
+    """
+    بررسی در دسترس بودن خروجی Parquet
+
+    Returns:
+        bool: آیا pyarrow نصب است
+    """
+    return pq is not None
+
+
+class _ChunkSink(io.RawIOBase):
+    """مقصد نوشتن Parquet که بایت‌های نوشته شده را برای ارسال تدریجی نگه می‌دارد"""
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """
+        برداشتن بایت‌های نوشته شده از آخرین فراخوانی
+
+        Returns:
+            bytes: بایت‌های جدید
+        """
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class TweetExporter:
+    """
+    نوشتن نتایج یک کوئری به صورت جریان بایت
+
+    Attributes:
+        statement (Select): کوئری با ستون‌های نام‌گذاری شده
+        record_builder (Callable): تبدیل ردیف به رکورد JSON برای خروجی NDJSON
+        batch_size (int): تعداد ردیف‌های هر دسته
+    """
+
+    def __init__(
+            self,
+            statement: Select,
+            record_builder: Callable[[Any], Dict[str, Any]],
+            batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        """
+        مقداردهی اولیه خروجی
+
+        Args:
+            statement (Select): کوئری
+            record_builder (Callable): تبدیل ردیف به رکورد JSON
+            batch_size (int): تعداد ردیف‌های هر دسته
+        """
+        self.statement = statement
+        self.record_builder = record_builder
+        self.batch_size = batch_size
+        self.columns = [column.key for column in statement.selected_columns]
+
+    async def _batches(self) -> AsyncIterator[List[Any]]:
+        """
+        خواندن ردیف‌ها دسته به دسته با cursor سمت سرور
+
+        نشست جداگانه‌ای باز می‌شود چون نشست وابستگی درخواست پیش از ارسال پاسخ
+        جریانی بسته می‌شود.
+
+        Yields:
+            List[Any]: ردیف‌های یک دسته
+        """
+        async with get_session() as session:
+            result = await session.stream(
+                self.statement.execution_options(yield_per=self.batch_size)
+            )
+            exported = 0
+            async for partition in result.partitions():
+                exported += len(partition)
+                yield partition
+            logger.info(f"Exported {exported} rows")
+
+    def _flat_values(self, row) -> List[Any]:
+        """
+        مقادیر ساده یک ردیف برای خروجی‌های جدولی (ساختارها به JSON تبدیل می‌شوند)
+
+        Args:
+            row: ردیف کوئری
+
+        Returns:
+            List[Any]: مقادیر به ترتیب ستون‌ها
+        """
+        values = []
+        for value in row:
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False)
+            values.append(value)
+        return values
+
+    async def write_ndjson(self) -> AsyncIterator[bytes]:
+        """
+        خروجی NDJSON (یک شیء JSON در هر خط)
+
+        Yields:
+            bytes: خطوط هر دسته
+        """
+        async for batch in self._batches():
+            yield "".join(
+                json.dumps(self.record_builder(row), ensure_ascii=False) + "\n" for row in batch
+            ).encode("utf-8")
+
+    async def write_csv(self) -> AsyncIterator[bytes]:
+        """
+        خروجی CSV با سطر عنوان
+
+        Yields:
+            bytes: سطرهای هر دسته
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        # BOM برای نمایش درست متن فارسی در Excel
+        writer.writerow(self.columns)
+        yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+        async for batch in self._batches():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in batch:
+                writer.writerow([
+                    value.isoformat() if isinstance(value, datetime) else value
+                    for value in self._flat_values(row)
+                ])
+            yield buffer.getvalue().encode("utf-8")
+
+    def _parquet_schema(self):
+        """
+        ساخت شمای Parquet از نوع ستون‌های کوئری
+
+        Returns:
+            pyarrow.Schema: شمای خروجی
+        """
+        fields = []
+        for column in self.statement.selected_columns:
+            column_type = column.type
+            if isinstance(column_type, Boolean):
+                arrow_type = pa.bool_()
+            elif isinstance(column_type, Integer):
+                arrow_type = pa.int64()
+            elif isinstance(column_type, Float):
+                arrow_type = pa.float64()
+            elif isinstance(column_type, DateTime):
+                arrow_type = pa.timestamp("us")
+            else:
+                arrow_type = pa.string()
+            fields.append(pa.field(column.key, arrow_type))
+        return pa.schema(fields)
+
+    async def write_parquet(self) -> AsyncIterator[bytes]:
+        """
+        خروجی Parquet (هر دسته یک row group)
+
+        Yields:
+            bytes: بایت‌های هر row group
+        """
+        schema = self._parquet_schema()
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        try:
+            async for batch in self._batches():
+                columns = list(zip(*(self._flat_values(row) for row in batch)))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema
+                ))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    def stream(self, export_format: str) -> AsyncIterator[bytes]:
+        """
+        جریان خروجی در قالب مشخص شده
+
+        Args:
+            export_format (str): قالب خروجی (ndjson، csv یا parquet)
+
+        Returns:
+            AsyncIterator[bytes]: جریان بایت‌ها
+        """
+        return getattr(self, f"write_{export_format}")()
@@ -19,6 +19,8 @@ from app.services.twitter.client import TwitterAPIClient
 from app.services.twitter.models import Tweet as TweetModel, TwitterUser
 from app.db.models import Tweet, User, Keyword, TweetKeyword
 from app.services.redis_service import RedisService
+from app.core.http_cache import bump_resource_versions, RESOURCE_TWEETS, RESOURCE_KEYWORDS
+from app.services.live_updates import publish_live_event, tweets_event, TWEETS_CHANNEL
 
 logger = logging.getLogger(__name__)
 
@@ -348,6 +350,7 @@ class TweetCollector:
 
         # ذخیره تغییرات
         await self.db_session.commit()
+        await bump_resource_versions(RESOURCE_TWEETS, RESOURCE_KEYWORDS)
 
         logger.info(f"Saved {len(new_tweet_ids)} new tweets to database")
 
@@ -356,6 +359,9 @@ class TweetCollector:
             await self.redis_service.add_to_processing_queue(new_tweet_ids)
             logger.info(f"Added {len(new_tweet_ids)} tweets to processing queue")
 
+            # یک رویداد زنده برای کل دسته
+            await publish_live_event(TWEETS_CHANNEL, tweets_event("collected", new_tweet_ids, keywords))
+
     async def _collect_user_profiles(self, user_ids: List[str], batch_size: int = 100) -> None:
         """
         جمع‌آوری پروفایل کاربران به صورت دسته‌ای
@@ -493,6 +499,7 @@ class TweetCollector:
             existing.priority = priority
             existing.description = description
             await self.db_session.commit()
+            await bump_resource_versions(RESOURCE_KEYWORDS)
             logger.info(f"Updated existing keyword: {text}")
             return existing
 
@@ -506,6 +513,7 @@ class TweetCollector:
 
         self.db_session.add(keyword)
         await self.db_session.commit()
+        await bump_resource_versions(RESOURCE_KEYWORDS)
 
         logger.info(f"Added new keyword: {text}")
         return keyword
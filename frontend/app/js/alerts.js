@@ -463,6 +463,34 @@ function updateLatestAlerts(alerts) {
     }
 }
 
+// اتصال به جریان رویدادهای زنده هشدارها (به جای بارگذاری دوره‌ای)
+let liveAlertsSource = null;
+
+function setupLiveAlerts() {
+    if (liveAlertsSource || typeof EventSource === 'undefined') return;
+    
+    liveAlertsSource = new EventSource('/api/v1/live/stream?channels=alerts');
+    
+    const refreshFromServer = () => {
+        loadLatestAlerts();
+        
+        // بروزرسانی لیست هشدارها اگر صفحه هشدارها باز است
+        const alertsList = document.getElementById('alertsList');
+        if (alertsList && alertsList.offsetParent !== null) {
+            loadAlerts();
+        }
+    };
+    
+    liveAlertsSource.addEventListener('alerts', refreshFromServer);
+    
+    // عقب ماندن از جریان رویدادها: خواندن دوباره وضعیت از API
+    liveAlertsSource.addEventListener('lagged', refreshFromServer);
+    
+    liveAlertsSource.onerror = () => {
+        console.warn('Live alerts connection lost, reconnecting...');
+    };
+}
+
 // تنظیم گوش‌دهنده‌های رویداد
 function setupAlertsListeners() {
     // فرم فیلتر هشدارها
@@ -489,6 +517,9 @@ function setupAlertsListeners() {
             showPage('alerts');
         });
     }
+    
+    // دریافت زنده هشدارهای جدید
+    setupLiveAlerts();
 }
 
 // صادرات توابع و متغیرهای مورد نیاز
@@ -496,5 +527,6 @@ window.loadAlerts = loadAlerts;
 window.markAlertAsRead = markAlertAsRead;
 window.showAlertDetails = showAlertDetails;
 window.loadLatestAlerts = loadLatestAlerts;
+window.setupLiveAlerts = setupLiveAlerts;
 window.updateLatestAlerts = updateLatestAlerts;
 window.setupAlertsListeners = setupAlertsListeners;
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+اسکریپت ساخت شاخص‌های جداول موجود.
+
+create_all فقط جداول جدید را همراه با شاخص‌هایشان می‌سازد. شاخص‌هایی که بعداً به
+مدل‌ها اضافه شده‌اند (مانند شاخص جستجوی متن توییت‌ها) با این اسکریپت ساخته می‌شوند.
+هر شاخص با CREATE INDEX CONCURRENTLY و خارج از تراکنش ساخته می‌شود تا نوشتن در
+جدول در طول ساخت متوقف نشود؛ شاخص‌های موجود با IF NOT EXISTS رد می‌شوند.
+
+ساخت CONCURRENTLY ناموفق یک شاخص نامعتبر باقی می‌گذارد که IF NOT EXISTS آن را
+موجود فرض می‌کند؛ این شاخص‌ها پیش از ساخت حذف و دوباره ساخته می‌شوند.
+
+در نصب‌های موجود این اسکریپت پس از به‌روزرسانی یک بار (و پس از افزودن هر شاخص
+جدید به مدل‌ها) اجرا شود.
+
+استفاده:
+    python scripts/create_indexes.py
+"""
+
+import asyncio
+import logging
+import sys
+import os
+
+# افزودن مسیر پروژه به PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from app.db.models import Base
+from app.db.session import engine, create_tables, close_db_engine
+
+# تنظیم لاگر
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("create_indexes")
+
+# شاخص‌های نامعتبر باقی مانده از ساخت CONCURRENTLY ناموفق
+INVALID_INDEXES_QUERY = text("""
+    SELECT index_class.relname
+    FROM pg_index
+    JOIN pg_class AS index_class ON index_class.oid = pg_index.indexrelid
+    WHERE NOT pg_index.indisvalid AND index_class.relname = ANY(:names)
+""")
+
+
+async def main():
+    """تابع اصلی"""
+    try:
+        await create_tables()
+
+        indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+
+        # CONCURRENTLY داخل بلوک تراکنش مجاز نیست
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            preparer = conn.dialect.identifier_preparer
+
+            result = await conn.execute(INVALID_INDEXES_QUERY, {"names": [index.name for index in indexes]})
+            for (name,) in result.fetchall():
+                logger.warning(f"Dropping invalid index {name}")
+                await conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {preparer.quote(name)}")
+
+            for index in indexes:
+                index.dialect_options["postgresql"]["concurrently"] = True
+                logger.info(f"Creating index {index.name} on {index.table.name}")
+                await conn.execute(CreateIndex(index, if_not_exists=True))
+
+        logger.info(f"Indexes verified ({len(indexes)} indexes)")
+    except Exception as e:
+        logger.error(f"Error creating indexes: {e}", exc_info=True)
+    finally:
+        await close_db_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""
+اسکریپت بازسازی سری‌های دقیقه‌ای کلیدواژه‌ها.
+
+این اسکریپت جدول keyword_minute_stats را برای بازه مشخص از روی توییت‌های
+پردازش شده دوباره می‌سازد (برای داده‌های قبل از فعال شدن سری‌ها یا اصلاح انحراف).
+
+در نصب‌های موجود این جدول خالی شروع می‌شود؛ پیش از فعال کردن WAVE_USE_KEYWORD_SERIES
+این اسکریپت باید حداقل برای بازه تشخیص موج اجرا شود و پیش از فعال کردن
+TWEET_COUNT_USE_ROLLUPS برای کل تاریخچه توییت‌ها.
+
+استفاده:
+    python scripts/rebuild_keyword_series.py [hours_back]
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+import sys
+import os
+
+# افزودن مسیر پروژه به PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import get_session, create_tables, close_db_engine
+from app.services.analyzer.keyword_series import KeywordSeriesService
+
+# تنظیم لاگر
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("rebuild_keyword_series")
+
+
+async def main(hours_back: int):
+    """تابع اصلی"""
+    try:
+        await create_tables()
+
+        end_time = datetime.utcnow() + timedelta(minutes=1)
+        start_time = end_time - timedelta(hours=hours_back)
+
+        async with get_session() as session:
+            rows = await KeywordSeriesService(session).rebuild(start_time, end_time)
+
+        logger.info(f"Keyword series rebuilt for the past {hours_back} hours ({rows} rows)")
+    except Exception as e:
+        logger.error(f"Error rebuilding keyword series: {e}", exc_info=True)
+    finally:
+        await close_db_engine()
+
+
+if __name__ == "__main__":
+    hours = int(sys.argv[1]) if len(sys.argv) > 1 else 24 * 7
+    asyncio.run(main(hours))
@@ -21,6 +21,7 @@ from app.services.processor.content_filter import ContentFilter
 from app.services.processor.tweet_processor import TweetProcessor
 from app.services.analyzer.claude_client import ClaudeClient
 from app.services.analyzer.cost_manager import CostManager
+from app.services.analyzer.budget_ledger import get_budget_ledger
 from app.services.analyzer.wave_detector import WaveDetector
 from app.services.analyzer.analyzer import TweetAnalyzer
 
@@ -245,6 +246,9 @@ async def main():
         logger.error(f"Unhandled error in main: {e}", exc_info=True)
     finally:
         logger.info("Rasad System shutdown")
+        # توقف درج دوره‌ای و درج ردیف‌های استفاده API باقی مانده
+        await get_budget_ledger().stop()
+
         # بستن صریح اتصالات دیتابیس
         await close_db_engine()
 
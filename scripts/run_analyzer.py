@@ -16,6 +16,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.db.session import get_db, close_db_engine
 from app.services.analyzer.claude_client import ClaudeClient
 from app.services.analyzer.cost_manager import CostManager
+from app.services.analyzer.budget_ledger import get_budget_ledger
 from app.services.analyzer.wave_detector import WaveDetector
 from app.services.analyzer.analyzer import TweetAnalyzer
 
@@ -141,6 +142,9 @@ async def main():
     except Exception as e:
         logger.error(f"Unhandled error in main: {e}", exc_info=True)
     finally:
+        # توقف درج دوره‌ای و درج ردیف‌های استفاده API باقی مانده
+        await get_budget_ledger().stop()
+
         # بستن صریح اتصالات دیتابیس
         await close_db_engine()
 
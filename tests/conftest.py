@@ -0,0 +1,56 @@
+"""
+تنظیمات مشترک تست‌ها.
+
+مسیر پروژه به PYTHONPATH اضافه می‌شود تا تست‌ها مانند اسکریپت‌ها بسته app را
+بدون نصب وارد کنند.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeRedisService:
+    """سرویس Redis ساختگی در حافظه برای نسخه منابع درخواست‌های شرطی"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get_many(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def set_many(self, mapping):
+        self.values.update({key: str(value) for key, value in mapping.items()})
+        return True
+
+    async def set_if_not_exists(self, key, value, expire=None):
+        return self.values.setdefault(key, str(value)) == str(value)
+
+    async def get_cache(self, key):
+        return self.values.get(key)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """جایگزینی سرویس Redis درخواست‌های شرطی با نمونه ساختگی"""
+    redis_service = FakeRedisService()
+    monkeypatch.setattr("app.core.http_cache.get_redis_service", lambda: redis_service)
+    return redis_service
+
+
+@pytest.fixture
+def make_detector(request):
+    """
+    ساخت تشخیص‌دهنده ماژول تست بدون دیتابیس و Redis
+
+    کلاس از DETECTOR_CLASS و تنظیمات پیش‌فرض از DETECTOR_OPTIONS ماژول تست خوانده
+    می‌شوند؛ آرگومان‌های factory تنظیمات پیش‌فرض را بازنویسی می‌کنند.
+    """
+    def factory(**options):
+        module = request.module
+        return module.DETECTOR_CLASS(None, None, **{**module.DETECTOR_OPTIONS, **options})
+
+    return factory
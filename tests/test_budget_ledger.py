@@ -0,0 +1,108 @@
+"""
+تست‌های درج ردیف‌های دفتر بودجه.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.services.analyzer import budget_ledger
+from app.services.analyzer.budget_ledger import BudgetLedger
+
+
+class FakeLedgerRedis:
+    """سرویس Redis ساختگی برای مجموع‌های دفتر"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def increment_float(self, key, amount, expire=None, floor=None):
+        self.values[key] = max(self.values.get(key, 0.0), floor or 0.0) + amount
+        return self.values[key]
+
+    async def get_many(self, keys):
+        return [self.values.get(key) for key in keys]
+
+
+class FakeDatabase:
+    """دیتابیس ساختگی که ردیف‌های درج شده را نگه می‌دارد یا خطا می‌دهد"""
+
+    def __init__(self):
+        self.rows = []
+        self.available = True
+
+    @asynccontextmanager
+    async def session(self):
+        yield self
+
+    async def execute(self, statement, rows):
+        if not self.available:
+            raise ConnectionError("database is down")
+        self.rows.extend(rows)
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+
+    async def bump_resource_versions(*resources):
+        pass
+
+    monkeypatch.setattr(budget_ledger, "get_session", database.session)
+    monkeypatch.setattr(budget_ledger, "bump_resource_versions", bump_resource_versions)
+    return database
+
+
+def make_ledger(**kwargs):
+    ledger = BudgetLedger(FakeLedgerRedis(), **kwargs)
+    ledger._seeded_day = ledger.day
+    return ledger
+
+
+def test_pending_rows_are_flushed_without_new_records(database):
+    async def scenario():
+        ledger = make_ledger(flush_size=100, flush_interval=0.05)
+        await ledger.record("claude", 0.5, {"api_type": "claude", "cost": 0.5})
+        assert database.rows == []
+
+        await asyncio.sleep(0.2)
+        flushed = list(database.rows)
+        await ledger.stop()
+        return flushed, ledger
+
+    flushed, ledger = asyncio.run(scenario())
+
+    assert flushed == [{"api_type": "claude", "cost": 0.5}]
+    assert ledger.pending == []
+    assert ledger._flush_task is None
+
+
+def test_stop_flushes_remaining_rows(database):
+    async def scenario():
+        ledger = make_ledger(flush_size=100, flush_interval=60)
+        await ledger.record("twitter", 0.1, {"api_type": "twitter", "cost": 0.1})
+        await ledger.stop()
+
+    asyncio.run(scenario())
+
+    assert database.rows == [{"api_type": "twitter", "cost": 0.1}]
+
+
+def test_failed_flush_keeps_at_most_max_pending_rows(database):
+    database.available = False
+
+    async def scenario():
+        ledger = make_ledger(flush_size=2, flush_interval=60, max_pending=3)
+        for index in range(5):
+            await ledger.record("claude", 0.1, {"index": index})
+        await ledger.stop()
+        return ledger
+
+    ledger = asyncio.run(scenario())
+
+    assert [row["index"] for row in ledger.pending] == [2, 3, 4]
+    assert database.rows == []
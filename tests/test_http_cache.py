@@ -0,0 +1,105 @@
+"""
+تست‌های درخواست‌های شرطی HTTP (ETag).
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.tweets import router as tweets_router
+from app.core.http_cache import bump_resource_versions, RESOURCE_KEYWORDS
+from app.core.responses import FastJSONResponse
+from app.core.security import get_current_user
+from app.db.models import Keyword
+from app.db.session import get_db
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """نشست دیتابیس ساختگی که تعداد کوئری‌ها را می‌شمارد"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return FakeResult(self.rows)
+
+
+@pytest.fixture
+def session():
+    return FakeSession([
+        Keyword(id=1, text="تهران", is_active=True, priority=2, description=None, created_at=datetime(2024, 1, 1))
+    ])
+
+
+@pytest.fixture
+def client(fake_redis, session):
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(tweets_router)
+
+    async def override_db():
+        yield session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: None
+    return TestClient(app)
+
+
+def test_keywords_response_has_cache_validators(client):
+    response = client.get("/tweets/keywords")
+
+    assert response.status_code == 200
+    assert response.json()[0]["text"] == "تهران"
+    assert response.headers["ETag"].startswith('W/"')
+    assert "Last-Modified" not in response.headers
+    assert response.headers["Cache-Control"].startswith("private")
+
+
+def test_matching_etag_returns_not_modified_without_query(client, session):
+    etag = client.get("/tweets/keywords").headers["ETag"]
+
+    response = client.get("/tweets/keywords", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert session.queries == 1
+
+
+def test_other_query_string_has_other_etag(client):
+    etag = client.get("/tweets/keywords").headers["ETag"]
+
+    response = client.get("/tweets/keywords?active_only=true", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_write_changes_etag(client):
+    etag = client.get("/tweets/keywords").headers["ETag"]
+    asyncio.run(bump_resource_versions(RESOURCE_KEYWORDS))
+
+    response = client.get("/tweets/keywords", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_if_modified_since_alone_is_not_used(client):
+    response = client.get("/tweets/keywords", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+
+    assert response.status_code == 200
@@ -0,0 +1,125 @@
+"""
+تست‌های تشخیص آنلاین موج (OnlineWaveDetector.observe).
+"""
+
+from datetime import datetime, timedelta
+
+from app.services.analyzer.online_detector import OnlineWaveDetector, MAX_GAP_MINUTES
+
+START = datetime(2024, 1, 1, 12, 0)
+
+DETECTOR_CLASS = OnlineWaveDetector
+DETECTOR_OPTIONS = dict(alpha=0.5, z_threshold=3.0, min_tweets=10, warmup_minutes=3, cooldown_minutes=30)
+
+
+def minute(offset):
+    return START + timedelta(minutes=offset)
+
+
+def warm_up(detector, counts, keyword_id=1):
+    for offset, count in enumerate(counts):
+        assert detector.observe(keyword_id, minute(offset), count) is None
+    return detector.states[keyword_id]
+
+
+def test_first_closed_minute_seeds_baseline(make_detector):
+    detector = make_detector()
+    detector.observe(1, minute(0), 4)
+    detector.observe(1, minute(1), 6)
+
+    state = detector.states[1]
+    assert state["seen"] == 1
+    assert state["mean"] == 4.0
+    assert state["var"] == 0.0
+    assert state["count"] == 6
+
+
+def test_baseline_is_exponentially_weighted(make_detector):
+    detector = make_detector()
+    state = warm_up(detector, [4, 8, 0])
+
+    # میانگین: 4 → 6؛ واریانس: 0.5 × (0 + 4 × 2)
+    assert state["mean"] == 6.0
+    assert state["var"] == 4.0
+    assert state["seen"] == 2
+
+
+def test_empty_minutes_decay_baseline(make_detector):
+    detector = make_detector()
+    detector.observe(1, minute(0), 8)
+
+    detector.observe(1, minute(3), 1)
+
+    state = detector.states[1]
+    assert state["seen"] == 3
+    assert state["mean"] == 2.0
+    assert state["bucket"] == minute(3)
+
+
+def test_long_gap_is_capped(make_detector):
+    detector = make_detector()
+    detector.observe(1, minute(0), 8)
+
+    detector.observe(1, minute(10 * MAX_GAP_MINUTES), 1)
+
+    assert detector.states[1]["seen"] == MAX_GAP_MINUTES + 1
+
+
+def test_spike_after_warmup_is_reported_once_per_cooldown(make_detector):
+    detector = make_detector()
+    warm_up(detector, [2, 2, 2, 2])
+
+    wave = detector.observe(1, minute(4), 30)
+
+    assert wave is not None
+    assert wave["keyword_id"] == 1
+    assert wave["tweet_count"] == 30
+    assert wave["start_time"] == minute(4).isoformat()
+    assert wave["end_time"] == minute(5).isoformat()
+    assert wave["z_score"] >= 3.0
+    assert wave["importance_score"] == 10.0
+
+    assert detector.observe(1, minute(5), 60) is None
+    assert detector.observe(1, minute(40), 300) is not None
+
+
+def test_spike_during_warmup_is_ignored(make_detector):
+    detector = make_detector()
+    warm_up(detector, [2, 2])
+
+    assert detector.observe(1, minute(2), 50) is None
+
+
+def test_small_counts_are_ignored_below_min_tweets(make_detector):
+    detector = make_detector()
+    warm_up(detector, [0, 0, 0, 0])
+
+    assert detector.observe(1, minute(4), 9) is None
+
+
+def test_late_counts_of_closed_minutes_are_ignored(make_detector):
+    detector = make_detector()
+    warm_up(detector, [2, 2, 2, 2])
+    before = dict(detector.states[1])
+
+    assert detector.observe(1, minute(1), 500) is None
+    assert detector.states[1] == before
+
+
+def test_count_accumulates_within_open_minute(make_detector):
+    detector = make_detector()
+    warm_up(detector, [2, 2, 2, 2])
+
+    assert detector.observe(1, minute(4), 6) is None
+    wave = detector.observe(1, minute(4), 20)
+
+    assert wave is not None
+    assert wave["tweet_count"] == 26
+
+
+def test_keywords_have_independent_state(make_detector):
+    detector = make_detector()
+    warm_up(detector, [2, 2, 2, 2], keyword_id=1)
+
+    assert detector.observe(2, minute(4), 30) is None
+    assert detector.observe(1, minute(4), 30) is not None
@@ -0,0 +1,72 @@
+"""
+تست‌های صفحه‌بندی با نشانگر.
+"""
+
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy.dialects import postgresql
+
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER, after_cursor, decode_cursor, encode_cursor, set_next_cursor
+)
+from app.db.models import Tweet
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("importance", 7.5, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "importance") == (7.5, 42)
+
+
+def test_datetime_cursor_round_trip():
+    created_at = datetime(2024, 1, 1, 12, 30, 15, 250)
+    cursor = encode_cursor("date", created_at, 9)
+
+    assert decode_cursor(cursor, "date", is_datetime=True) == (created_at, 9)
+
+
+def test_cursor_of_other_sort_is_rejected():
+    cursor = encode_cursor("date", datetime(2024, 1, 1), 9)
+
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "importance")
+    assert error.value.status_code == 400
+
+
+def _raw_cursor(payload):
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+@pytest.mark.parametrize("cursor, sort_by, is_datetime", [
+    ("not a cursor", "date", True),
+    ("!!!", "date", True),
+    ("نشانگر", "date", True),
+    (_raw_cursor(b"[1, 2]"), "importance", False),
+    (_raw_cursor(b"5"), "importance", False),
+    (_raw_cursor(b'["date", "yesterday", 1]'), "date", True),
+    (_raw_cursor(b'["importance", 1.0, "abc"]'), "importance", False),
+])
+def test_malformed_cursor_is_rejected(cursor, sort_by, is_datetime):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, sort_by, is_datetime=is_datetime)
+    assert error.value.status_code == 400
+
+
+def test_after_cursor_compares_rows():
+    condition = after_cursor(Tweet.created_at, Tweet.id, datetime(2024, 1, 1), 9)
+    sql = str(condition.compile(dialect=postgresql.dialect()))
+
+    assert sql == "(tweets.created_at, tweets.id) < (%(param_1)s, %(param_2)s)"
+
+
+def test_next_cursor_header_only_when_more_pages():
+    response = Response()
+    set_next_cursor(response, None)
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    set_next_cursor(response, "abc")
+    assert response.headers[NEXT_CURSOR_HEADER] == "abc"
@@ -0,0 +1,35 @@
+"""
+تست‌های جستجوی متن کامل.
+"""
+
+import html
+
+import pytest
+from sqlalchemy import create_engine, literal, select
+from sqlalchemy.dialects import postgresql
+
+from app.db.models import Tweet
+from app.db.search import escape_html, search_headline, search_query
+
+
+@pytest.mark.parametrize("text", [
+    '<script>alert("x")</script>',
+    "<img src=x onerror='alert(1)'>",
+    "AT&T &amp; &lt;b&gt;",
+    "متن فارسی بدون نویسه ویژه",
+])
+def test_escape_html_matches_python(text):
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        escaped = conn.execute(select(escape_html(literal(text)))).scalar()
+
+    assert escaped == html.escape(text)
+
+
+def test_headline_escapes_content_before_highlighting():
+    sql = str(search_headline(Tweet.content, search_query("تهران")).compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("ts_headline('simple'::regconfig, replace(replace(replace(replace(replace(translate(")
+    assert "'&amp;'" in sql and "'&lt;'" in sql and "'&#x27;'" in sql
+    assert "StartSel=<b>, StopSel=</b>" in sql
+
@@ -0,0 +1,140 @@
+"""
+تست‌های ساختارهای شمارش تشخیص انفجار عبارات.
+"""
+
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.services.analyzer.term_burst import CountMinSketch, SpaceSaving, TermBurstDetector
+
+START = datetime(2024, 1, 1, 12, 0)
+
+DETECTOR_CLASS = TermBurstDetector
+DETECTOR_OPTIONS = dict(bucket_minutes=15, width=256, depth=4, top_k=10, alpha=0.5, warmup_buckets=1)
+
+
+def test_space_saving_keeps_capacity_and_evicts_minimum():
+    counter = SpaceSaving(3)
+    for term, count in (("a", 5), ("b", 3), ("c", 1)):
+        counter.add(term, count)
+
+    counter.add("d", 2)
+
+    assert len(counter.counters) == 3
+    assert "c" not in counter.counters
+    # عبارت جدید شمارش کمینه حذف شده را به عنوان خطا به ارث می‌برد
+    assert counter.counters["d"] == [3, 1]
+    assert [term for term, _, _ in counter.top()] == ["a", "b", "d"]
+
+
+def test_space_saving_error_bounds_true_count():
+    rng = random.Random(7)
+    terms = [f"t{rng.randint(0, 40) if rng.random() < 0.6 else rng.randint(0, 3)}" for _ in range(2000)]
+    counter = SpaceSaving(10)
+    for term in terms:
+        counter.add(term)
+
+    truth = Counter(terms)
+    for term, count, error in counter.top():
+        assert count - error <= truth[term] <= count
+
+    # عبارات پرتکرار واقعی (بیشتر از N/K) همیشه حفظ می‌شوند
+    for term, count in truth.items():
+        if count > len(terms) / 10:
+            assert term in counter.counters
+
+
+def test_space_saving_survives_stale_heap_entries():
+    counter = SpaceSaving(2)
+    counter.add("a", 1)
+    counter.add("b", 1)
+    for _ in range(20):
+        counter.add("a")
+
+    counter.add("c", 1)
+
+    assert set(counter.counters) == {"a", "c"}
+    assert counter.counters["a"] == [21, 0]
+    assert counter.counters["c"] == [2, 1]
+
+
+def test_count_min_sketch_never_underestimates():
+    sketch = CountMinSketch(width=16, depth=3)
+    truth = {f"term{i}": i + 1 for i in range(100)}
+    sketch.add(list(truth), list(truth.values()))
+
+    estimates = sketch.estimate(list(truth))
+
+    assert np.all(estimates >= np.array(list(truth.values())))
+
+
+def test_count_min_sketch_is_exact_without_collisions():
+    sketch = CountMinSketch(width=4096, depth=4)
+    sketch.add(["#tehran", "hello world"], [3, 2])
+    sketch.add(["#tehran"], [1])
+
+    assert sketch.estimate(["#tehran", "hello world", "missing"]).tolist() == [4.0, 2.0, 0.0]
+    assert sketch.estimate([]).shape == (0,)
+
+
+def test_count_min_sketch_state_round_trip():
+    sketch = CountMinSketch(width=64, depth=3)
+    sketch.add(["a", "b", "c"], [1.25, 7, 0.5])
+
+    restored = CountMinSketch.from_state(64, 3, sketch.to_state())
+
+    assert restored.table.shape == (3, 64)
+    assert np.array_equal(restored.table, sketch.table.astype(np.float32).astype(np.float64))
+    assert restored.estimate(["a", "b", "c"]).tolist() == sketch.estimate(["a", "b", "c"]).tolist()
+
+
+def test_roll_seeds_baseline_from_first_bucket(make_detector):
+    detector = make_detector()
+    detector._roll(START)
+    detector._add_counts(Counter({"#x": 8}))
+
+    detector._roll(START + timedelta(minutes=15))
+
+    assert detector.buckets_seen == 1
+    assert detector.baseline.estimate(["#x"])[0] == 8.0
+    assert detector.current.estimate(["#x"])[0] == 0.0
+    assert detector.heavy_hitters.counters == {}
+
+
+def test_roll_smooths_consecutive_buckets(make_detector):
+    detector = make_detector()
+    detector._roll(START)
+    detector._add_counts(Counter({"#x": 8}))
+    detector._roll(START + timedelta(minutes=15))
+    detector._add_counts(Counter({"#x": 4}))
+
+    detector._roll(START + timedelta(minutes=30))
+
+    assert detector.buckets_seen == 2
+    assert detector.baseline.estimate(["#x"])[0] == 6.0
+
+
+def test_roll_decays_baseline_over_empty_buckets(make_detector):
+    detector = make_detector()
+    detector._roll(START)
+    detector._add_counts(Counter({"#x": 8}))
+
+    # دو بازه خالی بین بازه اول و بازه جدید
+    detector._roll(START + timedelta(minutes=45))
+
+    assert detector.buckets_seen == 3
+    assert detector.baseline.estimate(["#x"])[0] == 8.0 * 0.5 ** 2
+    assert detector.bucket_start == START + timedelta(minutes=45)
+
+
+def test_roll_drops_expired_cooldowns(make_detector):
+    detector = make_detector(cooldown_minutes=30)
+    detector._roll(START)
+    detector.last_burst = {"#old": START - timedelta(minutes=30), "#recent": START}
+
+    detector._roll(START + timedelta(minutes=15))
+
+    assert set(detector.last_burst) == {"#recent"}
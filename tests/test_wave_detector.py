@@ -0,0 +1,51 @@
+"""
+تست‌های انتخاب روش تشخیص در مسیر دوره‌ای هشدار موج.
+"""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.analyzer.wave_detector import WaveDetector
+
+
+class FakeSession:
+    async def commit(self):
+        pass
+
+
+def make_alerting_detector(calls):
+    detector = WaveDetector(FakeSession())
+
+    async def detect(name, importance):
+        calls.append(name)
+        return [{"type": "volume", "importance_score": importance, "name": name}]
+
+    async def track_wave_alert(wave):
+        return {"name": wave["name"]}
+
+    async def close_stale_waves():
+        return 0
+
+    detector.detect_multi_resolution_waves = lambda *args: detect("multi_resolution", 5.0)
+    detector.detect_all_waves = lambda *args: detect("fixed_window", 5.0)
+    detector.track_wave_alert = track_wave_alert
+    detector.wave_tracker.close_stale_waves = close_stale_waves
+    return detector
+
+
+@pytest.mark.parametrize("setting, argument, expected", [
+    (True, None, "multi_resolution"),
+    (False, None, "fixed_window"),
+    (False, True, "multi_resolution"),
+    (True, False, "fixed_window"),
+])
+def test_scheduled_alerts_use_configured_detection(monkeypatch, setting, argument, expected):
+    monkeypatch.setattr(settings, "WAVE_ALERT_MULTI_RESOLUTION", setting)
+    calls = []
+
+    alerts = asyncio.run(make_alerting_detector(calls).run_detection_and_create_alerts(multi_resolution=argument))
+
+    assert calls == [expected]
+    assert alerts == [{"name": expected}]
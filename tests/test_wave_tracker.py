@@ -0,0 +1,176 @@
+"""
+تست‌های چرخه عمر موج (WaveTracker.track).
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from app.db.models import Wave
+from app.services.analyzer.wave_tracker import WaveTracker, KEYWORD_KEY_MAX_LENGTH
+
+START = datetime(2024, 1, 1, 12, 0)
+
+
+def make_tracker(existing=None, concurrent=None):
+    """
+    ساخت ردیاب با دیتابیس ساختگی
+
+    Args:
+        existing: موج یافته شده برای تشخیص
+        concurrent: موجی که فرآیند دیگری هم‌زمان با همان شناسه یکتا درج کرده است
+    """
+    tracker = WaveTracker(None, merge_gap_minutes=60, close_after_minutes=180, change_ratio=0.5)
+    tracker.inserted = []
+
+    async def find_wave(*args):
+        return existing
+
+    async def insert_wave(values):
+        if concurrent is not None:
+            return None
+        row = Wave(id=len(tracker.inserted) + 1, **values)
+        tracker.inserted.append(row)
+        return row
+
+    async def get_by_identity(identity_key):
+        assert identity_key == concurrent.identity_key
+        return concurrent
+
+    tracker._find_wave = find_wave
+    tracker._insert_wave = insert_wave
+    tracker._get_by_identity = get_by_identity
+    return tracker
+
+
+def make_wave(status="open", tweet_count=100, end_minutes=15, alerted_tweet_count=100):
+    return Wave(
+        id=1,
+        identity_key="volume:*:2024-01-01T12:00:00",
+        wave_type="volume",
+        keyword_key="*",
+        status=status,
+        start_time=START,
+        end_time=START + timedelta(minutes=end_minutes),
+        tweet_count=tweet_count,
+        peak_tweet_count=tweet_count,
+        importance_score=5.0,
+        peak_importance=5.0,
+        detection_count=1,
+        alerted_tweet_count=alerted_tweet_count,
+        closed_at=START + timedelta(hours=3) if status == "closed" else None
+    )
+
+
+def detection(start_minutes=0, end_minutes=15, tweet_count=100):
+    return {
+        "type": "volume",
+        "related_keywords": [],
+        "start_time": (START + timedelta(minutes=start_minutes)).isoformat(),
+        "end_time": (START + timedelta(minutes=end_minutes)).isoformat(),
+        "tweet_count": tweet_count,
+        "importance_score": 5.0
+    }
+
+
+def track(tracker, wave):
+    return asyncio.run(tracker.track(wave))
+
+
+def test_new_detection_opens_wave():
+    row, created, changed = track(make_tracker(), detection())
+
+    assert created and changed
+    assert row.status == "open"
+    assert row.keyword_key == "*"
+    assert row.peak_tweet_count == 100
+
+
+def test_same_window_without_growth_is_unchanged():
+    row, created, changed = track(make_tracker(make_wave()), detection())
+
+    assert not created and not changed
+    assert row.detection_count == 2
+
+
+def test_later_window_with_more_tweets_is_growing():
+    row, _, changed = track(make_tracker(make_wave()), detection(15, 30, tweet_count=120))
+
+    assert changed
+    assert row.status == "growing"
+    assert row.end_time == START + timedelta(minutes=30)
+
+
+def test_drop_below_peak_ratio_is_peaked():
+    row, _, changed = track(make_tracker(make_wave()), detection(15, 30, tweet_count=70))
+
+    assert changed
+    assert row.status == "peaked"
+    assert row.peak_tweet_count == 100
+
+
+def test_material_growth_updates_alert():
+    wave = make_wave(alerted_tweet_count=60)
+    row, _, changed = track(make_tracker(wave), detection(0, 15, tweet_count=100))
+
+    assert changed
+    assert row.status == "open"
+
+
+def test_old_window_of_closed_wave_is_ignored():
+    wave = make_wave(status="closed")
+    row, _, changed = track(make_tracker(wave), detection(0, 15, tweet_count=500))
+
+    assert not changed
+    assert row.status == "closed"
+    assert row.closed_at is not None
+    assert row.tweet_count == 100
+
+
+def test_later_detection_reopens_closed_wave():
+    wave = make_wave(status="closed")
+    row, _, changed = track(make_tracker(wave), detection(15, 30, tweet_count=90))
+
+    assert changed
+    assert row.status == "open"
+    assert row.closed_at is None
+    assert row.end_time == START + timedelta(minutes=30)
+
+    # تشخیص دوباره همان بازه پس از باز شدن موج نادیده گرفته نمی‌شود
+    row, _, _ = track(make_tracker(row), detection(15, 30, tweet_count=95))
+    assert row.status == "growing"
+    assert row.tweet_count == 95
+
+
+def test_later_detection_with_more_tweets_reopens_closed_wave_as_growing():
+    wave = make_wave(status="closed")
+    row, _, changed = track(make_tracker(wave), detection(15, 30, tweet_count=150))
+
+    assert changed
+    assert row.status == "growing"
+
+
+def test_concurrent_insert_is_merged_into_existing_wave():
+    wave = make_wave(tweet_count=80)
+    tracker = make_tracker(concurrent=wave)
+
+    row, created, changed = track(tracker, detection(0, 15, tweet_count=100))
+
+    assert row is wave and not created and changed
+    assert row.status == "growing"
+    assert row.detection_count == 2
+    assert tracker.inserted == []
+
+
+def test_short_keyword_key_is_readable():
+    assert WaveTracker.keyword_key(["b", "a", "b"]) == "a,b"
+    assert WaveTracker.keyword_key([]) == "*"
+
+
+def test_long_keyword_key_is_bounded_and_unique():
+    keywords = [f"کلیدواژه شماره {i}" for i in range(100)]
+
+    key = WaveTracker.keyword_key(keywords)
+
+    assert len(key) == KEYWORD_KEY_MAX_LENGTH
+    assert key == WaveTracker.keyword_key(list(reversed(keywords)))
+    assert key != WaveTracker.keyword_key(keywords[:-1])